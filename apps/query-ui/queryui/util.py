@@ -1,7 +1,6 @@
 import base64
 import json
 import os
-import pickle
 from typing import Any, Dict, List, Set, Tuple
 
 import boto3
@@ -11,6 +10,7 @@ import streamlit as st
 
 from sycamore.docset import DocSet
 from sycamore.data import MetadataDocument
+from sycamore.data.serialization import loads
 from sycamore.query.client import SycamoreQueryClient
 from sycamore.query.logical_plan import LogicalPlan
 from sycamore.query.planner import PlannerExample
@@ -177,7 +177,8 @@ class QueryNodeTrace:
         """Read the given trace file."""
         with open(f, "rb") as file:
             try:
-                doc = pickle.load(file)
+                # Trace files are serialized documents, which keep large binaries out of band.
+                doc = loads(file.read())
             except EOFError:
                 return None
 
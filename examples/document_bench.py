@@ -0,0 +1,64 @@
+# Micro-benchmark for the in-memory cost of Documents and Elements: memory per element and the
+# time to build documents, rebuild them from their data (as explode and most transforms do),
+# round-trip them through serialize/deserialize, and load their elements after deserializing.
+# Run it like this:
+#
+# poetry run python examples/document_bench.py [num_docs] [elements_per_doc]
+
+import sys
+import time
+import tracemalloc
+
+from sycamore.data import Document, Element
+
+
+def make_data(num_docs: int, elements_per_doc: int) -> list[dict]:
+    return [
+        {
+            "doc_id": f"doc-{d}",
+            "type": "pdf",
+            "properties": {"path": f"/tmp/doc-{d}.pdf"},
+            "elements": [
+                {
+                    "type": "Text",
+                    "text_representation": f"element {e} of document {d}",
+                    "bbox": (0.1, 0.2, 0.3, 0.4),
+                    "properties": {"page_number": e // 10 + 1},
+                }
+                for e in range(elements_per_doc)
+            ],
+        }
+        for d in range(num_docs)
+    ]
+
+
+def timed(label: str, f, count: int):
+    start = time.perf_counter()
+    result = f()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed:8.3f}s {1e6 * elapsed / count:8.2f}us/element")
+    return result
+
+
+def main(num_docs: int, elements_per_doc: int) -> None:
+    count = num_docs * elements_per_doc
+    data = make_data(num_docs, elements_per_doc)
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    elements = [Element(e) for d in data for e in d["elements"]]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"{'element memory':<28} {(after - before) / len(elements):8.1f} bytes/element")
+    del elements
+
+    docs = timed("construct", lambda: [Document(d) for d in data], count)
+    timed("rebuild from data", lambda: [Document(d.data) for d in docs], count)
+    raw = timed("serialize", lambda: [d.serialize() for d in docs], count)
+    copies = timed("deserialize", lambda: [Document.deserialize(r) for r in raw], count)
+    timed("reserialize untouched", lambda: [d.serialize() for d in copies], count)
+    timed("load elements", lambda: [d.elements for d in copies], count)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000, int(sys.argv[2]) if len(sys.argv) > 2 else 100)
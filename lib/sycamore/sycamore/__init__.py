@@ -5,8 +5,10 @@ from sycamore.materialize_config import MaterializeSourceMode
 
 EXEC_RAY = ExecMode.RAY
 EXEC_LOCAL = ExecMode.LOCAL
+EXEC_LOCAL_PARALLEL = ExecMode.LOCAL_PARALLEL
 MATERIALIZE_RECOMPUTE = MaterializeSourceMode.RECOMPUTE
 MATERIALIZE_USE_STORED = MaterializeSourceMode.USE_STORED
+MATERIALIZE_INCREMENTAL = MaterializeSourceMode.INCREMENTAL
 
 __all__ = [
     "DocSet",
@@ -0,0 +1,124 @@
+"""
+Command line tools for sycamore.
+
+    sycamore cache stats [DIR ...]
+    sycamore cache prune DIR [--size-limit 10G] [--older-than 30d [--namespace llm]]
+    sycamore cache prune DIR --namespace llm --all
+
+Without a DIR, stats reports on the caches that sycamore keeps under ~/.sycamore. Directories that
+are not caches are refused rather than turned into empty caches.
+"""
+
+import argparse
+from pathlib import Path
+import re
+import sys
+from typing import Optional
+
+from diskcache.core import DBNAME
+
+from sycamore.utils.cache import DiskCache
+
+DEFAULT_CACHE_DIRS = [Path.home() / ".sycamore/PDFMinerCache", Path.home() / ".sycamore/OcrCache"]
+
+_SIZE_UNITS = {"": 1, "K": 2**10, "M": 2**20, "G": 2**30, "T": 2**40}
+_DURATION_UNITS = {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_size(value: str) -> int:
+    """Parses sizes like 500M or 10G into bytes."""
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)\s*([KMGT]?)i?B?", value.strip(), re.IGNORECASE)
+    if match is None:
+        raise argparse.ArgumentTypeError(f"Invalid size {value}")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2).upper()])
+
+
+def parse_age(value: str) -> float:
+    """Parses ages like 3600, 12h or 30d into seconds."""
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)\s*([smhd]?)", value.strip())
+    if match is None:
+        raise argparse.ArgumentTypeError(f"Invalid age {value}")
+    return float(match.group(1)) * _DURATION_UNITS[match.group(2)]
+
+
+def _format_size(size: float) -> str:
+    for unit in ["B", "KiB", "MiB", "GiB"]:
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TiB"
+
+
+def _is_cache(path: Path) -> bool:
+    return (path / DBNAME).is_file()
+
+
+def cache_stats(dirs: list[str]) -> None:
+    paths = [Path(d) for d in dirs] if dirs else DEFAULT_CACHE_DIRS
+    for path in paths:
+        if not _is_cache(path):
+            if dirs:
+                print(f"{path}: not a cache", file=sys.stderr)
+            continue
+        cache = DiskCache(str(path))
+        print(f"{path}: {_format_size(cache.volume())} on disk")
+        for namespace, (count, size) in sorted(cache.namespace_stats().items(), key=lambda x: str(x[0])):
+            print(f"  {namespace or '(none)':<12} {count:>10} entries {_format_size(size):>12}")
+
+
+def cache_prune(
+    path: str,
+    size_limit: Optional[int],
+    namespace: Optional[str],
+    older_than: Optional[float],
+    remove_all: bool = False,
+) -> None:
+    if not _is_cache(Path(path)):
+        raise SystemExit(f"{path}: not a cache")
+    cache = DiskCache(path)
+    before = cache.volume()
+    removed = cache.clear_namespace(namespace) if remove_all else 0
+    removed += cache.prune(
+        size_limit_bytes=size_limit, namespace=None if remove_all else namespace, older_than_seconds=older_than
+    )
+    print(f"{path}: removed {removed} entries, {_format_size(before)} -> {_format_size(cache.volume())}")
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="sycamore", description="Sycamore command line tools.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    cache_parser = commands.add_parser("cache", help="Inspect and prune local caches.")
+    cache_commands = cache_parser.add_subparsers(dest="cache_command", required=True)
+
+    stats_parser = cache_commands.add_parser("stats", help="Show the size of caches by namespace.")
+    stats_parser.add_argument("dirs", nargs="*", help="Cache directories. Defaults to the caches in ~/.sycamore.")
+
+    prune_parser = cache_commands.add_parser("prune", help="Remove expired and unwanted cache entries.")
+    prune_parser.add_argument("dir", help="Cache directory.")
+    prune_parser.add_argument(
+        "--size-limit", type=parse_size, help="Evict entries until the cache is under this size, e.g. 10G."
+    )
+    prune_parser.add_argument("--older-than", type=parse_age, help="Remove entries older than this, e.g. 30d.")
+    prune_parser.add_argument(
+        "--namespace",
+        help="Only remove the entries of this namespace, e.g. llm or layout, that --older-than or --all select."
+        " --size-limit still evicts entries of any namespace.",
+    )
+    prune_parser.add_argument("--all", action="store_true", help="Remove every entry of --namespace.")
+
+    args = parser.parse_args(argv)
+    if args.cache_command == "stats":
+        cache_stats(args.dirs)
+        return
+    if args.all and args.namespace is None:
+        prune_parser.error("--all requires --namespace")
+    if args.namespace is not None and args.older_than is None and not args.all:
+        prune_parser.error("--namespace requires --older-than or --all")
+    if args.all and args.older_than is not None:
+        prune_parser.error("--all removes every entry of the namespace; drop --older-than")
+    cache_prune(args.dir, args.size_limit, args.namespace, args.older_than, remove_all=args.all)
+
+
+if __name__ == "__main__":
+    main()
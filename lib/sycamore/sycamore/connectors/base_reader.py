@@ -1,10 +1,13 @@
-from dataclasses import dataclass
-from typing import TYPE_CHECKING
+import copy
+import hashlib
+import pickle
+from dataclasses import dataclass, fields
+from typing import Iterator, Optional, TYPE_CHECKING
 
 from abc import ABC, abstractmethod
 
 from sycamore.data.document import Document
-from sycamore.plan_nodes import Scan
+from sycamore.plan_nodes import Node, Scan
 from sycamore.utils.time_trace import TimeTrace
 
 if TYPE_CHECKING:
@@ -56,6 +59,17 @@ class BaseDBReader(Scan):
         self._client_params = client_params
         self._query_params = query_params
 
+    def pushdown_limit(self, limit: int) -> Optional[Node]:
+        # Readers whose QueryParams have a limit field ask the database for at most that many records.
+        if not any(f.name == "limit" for f in fields(self._query_params)):
+            return None
+        current = getattr(self._query_params, "limit")
+        reader = copy.copy(self)
+        # Deep copy because clients may update the query params while reading.
+        reader._query_params = copy.deepcopy(self._query_params)
+        setattr(reader._query_params, "limit", limit if current is None else min(limit, current))
+        return reader
+
     def read_docs(self) -> list[Document]:
         client = self.Client.from_client_params(self._client_params)
 
@@ -65,6 +79,16 @@ class BaseDBReader(Scan):
         docs = records.to_docs(query_params=self._query_params)
         return docs
 
+    def content_fingerprint(self) -> str:
+        """Returns a hash of the records that the reader returns. The contents of the database can change
+        without any change to the query, so DocSet.cache(fingerprint_reads=True) adds this to the plan
+        fingerprint. Each call queries the database."""
+        h = hashlib.sha256()
+        for doc in self.read_docs():
+            # lineage_id is assigned afresh on every read.
+            h.update(pickle.dumps({k: v for k, v in doc.data.items() if k != "lineage_id"}))
+        return h.hexdigest()
+
     def execute(self, **kwargs) -> "Dataset":
         from sycamore.utils.ray_utils import check_serializable
 
@@ -74,8 +98,9 @@ class BaseDBReader(Scan):
         with TimeTrace("Reader"):
             return from_items(items=[{"doc": doc.serialize()} for doc in self.read_docs()])
 
-    def local_source(self) -> list[Document]:
-        return self.read_docs()
+    def local_source(self) -> Iterator[Document]:
+        # Defer querying the database until the documents are consumed.
+        yield from self.read_docs()
 
     def format(self):
         return "reader"
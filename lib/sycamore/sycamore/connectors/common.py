@@ -30,7 +30,7 @@ def generate_random_string(length=8):
 
 
 def filter_doc(obj, include):
-    return {k: v for k, v in obj.__dict__.items() if k in include}
+    return {k: v for k, v in getattr(obj, "__dict__", {}).items() if k in include}
 
 
 def check_dictionary_compatibility(dict1: dict[Any, Any], dict2: dict[Any, Any], ignore: list[str] = []):
@@ -22,6 +22,7 @@ class DuckDBReaderQueryParams(BaseDBReader.QueryParams):
     table_name: str
     query: Optional[str]
     create_hnsw_table: Optional[str]
+    limit: Optional[int] = None
 
 
 class DuckDBReaderClient(BaseDBReader.Client):
@@ -44,10 +45,12 @@ class DuckDBReaderClient(BaseDBReader.Client):
         if query_params.create_hnsw_table:
             self._client.execute(query_params.create_hnsw_table)
         if query_params.query:
-            results = DuckDBReaderQueryResponse(self._client.execute(query_params.query))
+            query = query_params.query
         else:
-            results = DuckDBReaderQueryResponse(self._client.execute(f"SELECT * from {query_params.table_name}"))
-        return results
+            query = f"SELECT * from {query_params.table_name}"
+        if query_params.limit is not None:
+            query = f"SELECT * FROM ({query.strip().rstrip(';')}) LIMIT {query_params.limit}"
+        return DuckDBReaderQueryResponse(self._client.execute(query))
 
     def check_target_presence(self, query_params: BaseDBReader.QueryParams):
         assert isinstance(query_params, DuckDBReaderQueryParams)
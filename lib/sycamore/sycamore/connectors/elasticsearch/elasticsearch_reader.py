@@ -3,7 +3,7 @@ from sycamore.connectors.base_reader import BaseDBReader
 from sycamore.utils.import_utils import requires_modules
 from dataclasses import dataclass, field
 import typing
-from typing import Dict
+from typing import Dict, Optional
 
 if typing.TYPE_CHECKING:
     from elasticsearch import Elasticsearch
@@ -21,6 +21,7 @@ class ElasticsearchReaderQueryParams(BaseDBReader.QueryParams):
     query: Dict = field(default_factory=lambda: {"match_all": {}})
     keep_alive: str = "1m"
     kwargs: Dict = field(default_factory=lambda: {})
+    limit: Optional[int] = None
 
 
 class ElasticsearchReaderClient(BaseDBReader.Client):
@@ -52,18 +53,25 @@ class ElasticsearchReaderClient(BaseDBReader.Client):
             ]
         pit = self._client.open_point_in_time(index=query_params.index_name, keep_alive=query_params.keep_alive)["id"]
         pit_dict = {"id": pit, "keep_alive": query_params.keep_alive}
+        kwargs = query_params.kwargs
+        limit = query_params.limit
+        if limit is not None:
+            # Copied so the page size does not leak into other readers sharing these kwargs.
+            kwargs = {**kwargs, "size": min(kwargs.get("size", limit), limit)}
         overall_list = []
-        return_object = self._client.search(pit=pit_dict, query=query_params.query, **query_params.kwargs)
+        return_object = self._client.search(pit=pit_dict, query=query_params.query, **kwargs)
         results_list = list(return_object["hits"]["hits"])
         overall_list.extend(results_list)
-        while results_list:
-            query_params.kwargs["search_after"] = results_list[-1]["sort"]
+        while results_list and (limit is None or len(overall_list) < limit):
+            kwargs["search_after"] = results_list[-1]["sort"]
             pit = return_object["pit_id"]
             pit_dict["id"] = pit
-            return_object = self._client.search(pit=pit_dict, query=query_params.query, **query_params.kwargs)
+            return_object = self._client.search(pit=pit_dict, query=query_params.query, **kwargs)
             results_list = list(return_object["hits"]["hits"])
             overall_list.extend(results_list)
         self._client.close_point_in_time(id=pit)
+        if limit is not None:
+            overall_list = overall_list[:limit]
         return ElasticsearchReaderQueryResponse(overall_list)
 
     def check_target_presence(self, query_params: BaseDBReader.QueryParams):
@@ -1,14 +1,16 @@
+import copy
 import json
 from abc import ABC, abstractmethod
 import boto3
 import mimetypes
-from typing import Any, Optional, Union, Tuple, Callable, TYPE_CHECKING
+from typing import Any, Iterator, Optional, Union, Tuple, Callable, TYPE_CHECKING
 import uuid
 import logging
 
-from pyarrow.fs import FileSystem, FileSelector
+from pyarrow.fs import FileInfo, FileSystem, FileSelector
 from sycamore.data import Document
-from sycamore.plan_nodes import Scan
+from sycamore.data.blob_store import BlobStore
+from sycamore.plan_nodes import Node, Scan
 from sycamore.utils.time_trace import timetrace
 
 if TYPE_CHECKING:
@@ -84,6 +86,25 @@ class FileScan(Scan):
         self._filesystem = filesystem
         self.parallelism = parallelism
 
+    def fingerprint_state(self) -> dict[str, Any]:
+        from pyarrow.fs import FileSelector, FileType
+        from sycamore.utils.pyarrow import cross_check_infer_fs
+
+        state = super().fingerprint_state()
+        # The filesystem is inferred lazily from the paths; the files and their mtimes identify the input.
+        state.pop("_filesystem", None)
+        files: list[tuple[str, int, int]] = []
+        for orig_path in [self._paths] if isinstance(self._paths, str) else self._paths:
+            (filesystem, path) = cross_check_infer_fs(self._filesystem, orig_path)
+            info = filesystem.get_file_info(path)
+            if info.type == FileType.Directory:
+                infos = filesystem.get_file_info(FileSelector(path, recursive=True))
+            else:
+                infos = [info]
+            files.extend((i.path, i.size, i.mtime_ns) for i in infos if i.type == FileType.File)
+        state["files"] = sorted(files)
+        return state
+
     def _is_s3_scheme(self) -> bool:
         if isinstance(self._paths, str):
             return self._paths.startswith("s3:")
@@ -102,6 +123,9 @@ class BinaryScan(FileScan):
     Note: if you specify filter_paths_by_extension = False, you need to make sure
     all the files that are scanned can be processed by the pipeline. Many pipelines
     include file-type specific steps.
+
+    If a blob_store is given, the bytes of each file are put in it and the documents
+    carry a reference to them, which is fetched when binary_representation is read.
     """
 
     def __init__(
@@ -113,6 +137,7 @@ class BinaryScan(FileScan):
         filesystem: Optional[FileSystem] = None,
         metadata_provider: Optional[FileMetadataProvider] = None,
         filter_paths_by_extension: bool = True,
+        blob_store: Optional[Union[str, BlobStore]] = None,
         **resource_args,
     ):
         super().__init__(paths, parallelism=parallelism, filesystem=filesystem, **resource_args)
@@ -120,6 +145,14 @@ class BinaryScan(FileScan):
         self._binary_format = binary_format
         self._metadata_provider = metadata_provider
         self._filter_paths_by_extension = filter_paths_by_extension
+        self._blob_store = BlobStore(blob_store) if isinstance(blob_store, str) else blob_store
+        self._limit: Optional[int] = None
+
+    def pushdown_limit(self, limit: int) -> Optional[Node]:
+        # Each file becomes exactly one document, so only the first limit files need to be read.
+        scan = copy.copy(self)
+        scan._limit = limit if self._limit is None else min(limit, self._limit)
+        return scan
 
     @timetrace("readBinary")
     def _to_document(self, dict: dict[str, Any]) -> dict[str, bytes]:
@@ -127,7 +160,7 @@ class BinaryScan(FileScan):
 
         document.doc_id = str(uuid.uuid1())
         document.type = self._binary_format
-        document.binary_representation = dict["bytes"]
+        self._set_binary(document, dict["bytes"])
 
         if self._is_s3_scheme():
             dict["path"] = "s3://" + dict["path"]
@@ -139,6 +172,12 @@ class BinaryScan(FileScan):
 
         return {"doc": document.serialize()}
 
+    def _set_binary(self, document: Document, data: bytes) -> None:
+        if self._blob_store is None:
+            document.binary_representation = data
+        else:
+            document.data["binary_representation"] = self._blob_store.put(data)
+
     def _file_mime_type(self):
         # binary_format is an extension, make it into a filename.
         (ftype, encoding) = mimetypes.guess_type("foo." + self._binary_format)
@@ -153,8 +192,17 @@ class BinaryScan(FileScan):
 
         from ray.data import read_binary_files
 
+        paths = self._paths
+        if self._limit is not None:
+            # Lists the files on the driver so that only the first limit files are read.
+            paths = [info.path for _, info in self._file_infos()]
+            if len(paths) == 0:
+                from ray.data import from_items
+
+                return from_items([])
+
         files = read_binary_files(
-            self._paths,
+            paths,
             include_paths=True,
             filesystem=self._filesystem,
             override_num_blocks=self.parallelism if self.parallelism is not None else -1,
@@ -164,27 +212,15 @@ class BinaryScan(FileScan):
 
         return files.map(self._to_document, **self.resource_args)
 
-    def local_source(self, **kwargs) -> list[Document]:
-        if isinstance(self._paths, str):
-            paths = [self._paths]
-        else:
-            paths = self._paths
-
-        documents = []
-
-        def process_file(info):
-            if not info.is_file:
-                return
-            if self._filter_paths_by_extension and not info.path.endswith(self.format()):
-                return
-
-            with self._filesystem.open_input_file(info.path) as file:
+    def local_source(self, **kwargs) -> Iterator[Document]:
+        def process_file(filesystem: FileSystem, info: FileInfo) -> Document:
+            with filesystem.open_input_file(info.path) as file:
                 binary_data = file.read()
 
             document = Document()
             document.doc_id = str(uuid.uuid1())
             document.type = self._binary_format
-            document.binary_representation = binary_data
+            self._set_binary(document, binary_data)
             document.properties["path"] = info.path
             if "filetype" not in document.properties and self._binary_format is not None:
                 document.properties["filetype"] = self._file_mime_type()
@@ -193,22 +229,42 @@ class BinaryScan(FileScan):
             if self._metadata_provider:
                 document.properties.update(self._metadata_provider.get_metadata(info.path))
 
-            documents.append(document)
+            return document
 
-        for orig_path in paths:
-            from sycamore.utils.pyarrow import cross_check_infer_fs
+        # Files are read one at a time as the documents are consumed so that callers like take()
+        # only read as many files as they need.
+        for filesystem, info in self._file_infos():
+            yield process_file(filesystem, info)
+
+    def _file_infos(self) -> Iterator[tuple[FileSystem, FileInfo]]:
+        """Lists the files to read and the filesystem for each, stopping after the limit if there is one."""
+        from sycamore.utils.pyarrow import cross_check_infer_fs
+
+        if isinstance(self._paths, str):
+            paths = [self._paths]
+        else:
+            paths = self._paths
 
+        count = 0
+        for orig_path in paths:
             (filesystem, path) = cross_check_infer_fs(self._filesystem, orig_path)
             if self._filesystem is None:
                 self._filesystem = filesystem
 
             path_info = filesystem.get_file_info(path)
             if path_info.is_file:
-                process_file(path_info)
+                infos = [path_info]
             else:
-                for info in filesystem.get_file_info(FileSelector(path, recursive=True)):
-                    process_file(info)
-        return documents
+                infos = filesystem.get_file_info(FileSelector(path, recursive=True))
+            for info in infos:
+                if not info.is_file:
+                    continue
+                if self._filter_paths_by_extension and not info.path.endswith(self.format()):
+                    continue
+                if self._limit is not None and count >= self._limit:
+                    return
+                count += 1
+                yield filesystem, info
 
     def format(self):
         return self._binary_format
@@ -232,6 +288,15 @@ class JsonScan(FileScan):
         self._metadata_provider = metadata_provider
         self._document_body_field = document_body_field
         self._doc_extractor = doc_extractor
+        self._limit: Optional[int] = None
+
+    def pushdown_limit(self, limit: int) -> Optional[Node]:
+        # A custom doc_extractor can turn one record into any number of documents.
+        if self._doc_extractor is not None:
+            return None
+        scan = copy.copy(self)
+        scan._limit = limit if self._limit is None else min(limit, self._limit)
+        return scan
 
     def _to_document(self, json_dict: dict[str, Any]) -> list[dict[str, Any]]:
         document = Document()
@@ -285,6 +350,10 @@ class JsonScan(FileScan):
             ray_remote_args=self.resource_args,
         )
 
+        if self._limit is not None:
+            # Each record becomes one document, so ray can stop reading once it has limit records.
+            json_dataset = json_dataset.limit(self._limit)
+
         doc_extractor = self._doc_extractor if self._doc_extractor else self._to_document
         return json_dataset.flat_map(doc_extractor, **self.resource_args)
 
@@ -10,9 +10,10 @@ import logging
 from pathlib import Path
 import posixpath
 import uuid
-from typing import Callable, Optional, TYPE_CHECKING
+from typing import Callable, Iterable, Iterator, Optional, TYPE_CHECKING
 
 if TYPE_CHECKING:
+    import pyarrow as pa
     from ray.data import Dataset
 
 
@@ -22,9 +23,18 @@ logger = logging.getLogger(__name__)
 class JSONEncodeWithUserDict(json.JSONEncoder):
     def default(self, obj):
         from sycamore.data.bbox import BoundingBox
+        from sycamore.data.blob_store import BlobRef
 
-        if isinstance(obj, UserDict):
+        from sycamore.data.mapping import DataMapping
+        from sycamore.data.serialization import LazyElements
+
+        if isinstance(obj, (UserDict, DataMapping)):
             return obj.data
+        elif isinstance(obj, LazyElements):
+            return obj.load()
+        elif isinstance(obj, BlobRef):
+            # The bytes stay in the blob store; JSON output refers to them.
+            return {"blob": obj.key, "size": obj.size}
         elif isinstance(obj, BoundingBox):
             return {"x1": obj.x1, "y1": obj.y1, "x2": obj.x2, "y2": obj.y2}
         elif isinstance(obj, bytes):
@@ -174,20 +184,21 @@ class FileWriter(Write):
         return dataset
 
     def local_execute(self, all_docs: list[Document]) -> list[Document]:
+        return list(self.local_execute_iter(all_docs))
+
+    def local_execute_iter(self, all_docs: Iterable[Document]) -> Iterator[Document]:
         from sycamore.utils.pyarrow import cross_check_infer_fs
         from sycamore.data import MetadataDocument
 
         (filesystem, path) = cross_check_infer_fs(self.filesystem, self.path)
 
         for d in all_docs:
-            if isinstance(d, MetadataDocument):
-                continue
-            bytes = self.doc_to_bytes_fn(d)
-            file_path = posixpath.join(path, self.filename_fn(d))
-            with filesystem.open_output_stream(str(file_path)) as file:
-                file.write(bytes)
-
-        return all_docs
+            if not isinstance(d, MetadataDocument):
+                bytes = self.doc_to_bytes_fn(d)
+                file_path = posixpath.join(path, self.filename_fn(d))
+                with filesystem.open_output_stream(str(file_path)) as file:
+                    file.write(bytes)
+            yield d
 
 
 class JsonWriter(FileWriter):
@@ -229,3 +240,137 @@ class JsonWriter(FileWriter):
         sink = _JsonBlockDataSink(self.path, filesystem=self.filesystem)
         ds.write_datasink(sink, ray_remote_args=self.ray_remote_args)
         return ds
+
+
+def parquet_schemas(
+    docs: Iterable[Document], elements: bool = False, include_binary: bool = False
+) -> tuple["pa.Schema", Optional["pa.Schema"]]:
+    """Returns the schemas inferred for the document and, if elements is set, the element tables of docs."""
+    from sycamore.data.arrow_export import docs_to_arrow, elements_to_arrow
+
+    docs = list(docs)
+    elements_schema = elements_to_arrow(docs, include_binary).schema if elements else None
+    return (docs_to_arrow(docs, include_binary).schema, elements_schema)
+
+
+def write_parquet_block(
+    docs: Iterable[Document],
+    filesystem: FileSystem,
+    path: str,
+    filename: str,
+    elements_path: Optional[str] = None,
+    include_binary: bool = False,
+    schema: Optional["pa.Schema"] = None,
+    elements_schema: Optional["pa.Schema"] = None,
+) -> None:
+    """Writes docs to path/filename and, if elements_path is set, their elements to elements_path/filename.
+    The tables are converted to schema and elements_schema if they are set; see arrow_export.unify_schemas."""
+    import pyarrow.parquet as pq
+
+    from sycamore.data.arrow_export import conform_table, docs_to_arrow, elements_to_arrow
+
+    docs = list(docs)
+    table = docs_to_arrow(docs, include_binary)
+    if schema is not None:
+        table = conform_table(table, schema)
+    pq.write_table(table, posixpath.join(path, filename), filesystem=filesystem)
+    if elements_path is not None:
+        table = elements_to_arrow(docs, include_binary)
+        if elements_schema is not None:
+            table = conform_table(table, elements_schema)
+        pq.write_table(table, posixpath.join(elements_path, filename), filesystem=filesystem)
+
+
+class ParquetWriter(Write):
+    """
+    Sycamore Write implementation that writes Documents to Parquet files, one
+    file per block, with a column for each document property. Elements can
+    be written as a separate table keyed by doc_id. See
+    sycamore.data.arrow_export for the layout.
+
+    The column types are inferred from all of the documents, so that the
+    files can be read together. Columns whose values have no common type
+    across blocks are written as JSON text. In ray mode this materializes
+    the DocSet and converts each block twice, once to infer its schema.
+    """
+
+    def __init__(
+        self,
+        plan: Node,
+        path: str,
+        filesystem: Optional[FileSystem] = None,
+        elements_path: Optional[str] = None,
+        include_binary: bool = False,
+        **ray_remote_args,
+    ) -> None:
+        """
+        Construct a ParquetWriter instance.
+
+        Args:
+            plan: A Sycamore plan representing the DocSet to write out.
+            path: The path prefix to write documents to. Should include the scheme.
+            filesystem: The pyarrow.fs FileSystem to use.
+            elements_path: The path prefix to write elements to. Elements are not written if unset.
+            include_binary: Whether to write binary_representation columns.
+            ray_remote_args: Arguments to pass to the underlying execution environment.
+        """
+        super().__init__(plan, **ray_remote_args)
+        self.path = path
+        self.filesystem = filesystem
+        self.elements_path = elements_path
+        self.include_binary = include_binary
+        self.ray_remote_args = ray_remote_args
+
+    def execute(self, **kwargs) -> "Dataset":
+        ds = self.child().execute().materialize()
+        from sycamore.connectors.file.file_writer_ray import _ParquetBlockDataSink
+
+        (schema, elements_schema) = self._unified_schemas(ds)
+        sink = _ParquetBlockDataSink(
+            self.path,
+            self.filesystem,
+            elements_path=self.elements_path,
+            include_binary=self.include_binary,
+            schema=schema,
+            elements_schema=elements_schema,
+        )
+        ds.write_datasink(sink, ray_remote_args=self.ray_remote_args)
+        return ds
+
+    def _unified_schemas(self, ds: "Dataset") -> tuple["pa.Schema", Optional["pa.Schema"]]:
+        # Each block infers its own column types, which can differ between blocks, so the schemas of
+        # all of the blocks are combined before any file is written.
+        import numpy
+        import pyarrow as pa
+
+        from sycamore.data.arrow_export import unify_schemas
+
+        elements = self.elements_path is not None
+        include_binary = self.include_binary
+
+        def block_schemas(batch: dict[str, numpy.ndarray]) -> dict[str, list]:
+            docs = [Document.deserialize(s) for s in batch["doc"]]
+            (schema, elements_schema) = parquet_schemas(docs, elements, include_binary)
+            return {
+                "schema": [schema.serialize().to_pybytes()],
+                "elements_schema": [b"" if elements_schema is None else elements_schema.serialize().to_pybytes()],
+            }
+
+        rows = ds.map_batches(block_schemas).take_all()
+        schema = unify_schemas(pa.ipc.read_schema(pa.py_buffer(r["schema"])) for r in rows)
+        if not elements:
+            return (schema, None)
+        return (schema, unify_schemas(pa.ipc.read_schema(pa.py_buffer(r["elements_schema"])) for r in rows))
+
+    def local_execute(self, all_docs: list[Document]) -> list[Document]:
+        from sycamore.utils.pyarrow import cross_check_infer_fs
+
+        (filesystem, path) = cross_check_infer_fs(self.filesystem, self.path)
+        elements_path = None
+        if self.elements_path is not None:
+            (_, elements_path) = cross_check_infer_fs(filesystem, self.elements_path)
+        for p in [path] if elements_path is None else [path, elements_path]:
+            filesystem.create_dir(p)
+        filename = f"block_{uuid.uuid4().hex}_0_0.parquet"
+        write_parquet_block(all_docs, filesystem, path, filename, elements_path, self.include_binary)
+        return all_docs
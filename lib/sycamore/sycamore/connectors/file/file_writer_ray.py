@@ -1,6 +1,8 @@
 from typing import Any, Callable, Iterable, Optional
 
 import posixpath
+import uuid
+import pyarrow as pa
 from pyarrow.fs import FileSystem, FileType
 from pyarrow import NativeFile
 from ray.data.block import Block, BlockAccessor
@@ -9,7 +11,12 @@ from ray.data.datasource.path_util import _resolve_paths_and_filesystem
 from ray.data._internal.execution.interfaces import TaskContext
 from urllib.parse import urlparse
 
-from sycamore.connectors.file.file_writer import default_filename, default_doc_to_bytes, document_to_json_bytes
+from sycamore.connectors.file.file_writer import (
+    default_filename,
+    default_doc_to_bytes,
+    document_to_json_bytes,
+    write_parquet_block,
+)
 from sycamore.data import Document, MetadataDocument
 from sycamore.utils.time_trace import TimeTrace
 
@@ -77,3 +84,46 @@ class _JsonBlockDataSink(BlockBasedFileDatasink):
                 del doc.binary_representation  # Doesn't make sense in JSON
                 binary = document_to_json_bytes(doc)
                 file.write(binary)
+
+
+class _ParquetBlockDataSink(_FileDataSink):
+    def __init__(
+        self,
+        path: str,
+        filesystem: Optional[FileSystem] = None,
+        elements_path: Optional[str] = None,
+        include_binary: bool = False,
+        schema: Optional[pa.Schema] = None,
+        elements_schema: Optional[pa.Schema] = None,
+    ) -> None:
+        super().__init__(path, filesystem=filesystem)
+        self._elements_root: Optional[str] = None
+        if elements_path is not None:
+            (paths, _) = _resolve_paths_and_filesystem(elements_path, self._filesystem)
+            self._elements_root = paths[0]
+        self._include_binary = include_binary
+        self._schema = schema
+        self._elements_schema = elements_schema
+        # Identifies the files of this write, so that writing to the same path again does not replace
+        # some of the files of an earlier write and leave the rest.
+        self._write_uuid = uuid.uuid4().hex
+
+    def on_write_start(self) -> None:
+        super().on_write_start()
+        if self._elements_root is not None and urlparse(self._elements_root).scheme != "s3":
+            self._filesystem.create_dir(self._elements_root, recursive=True)
+
+    def write(self, blocks: Iterable[Block], ctx: TaskContext) -> Any:
+        for block_index, block in enumerate(blocks):
+            with TimeTrace("parquetSink"):
+                rows = BlockAccessor.for_block(block).to_arrow().to_pylist()
+                write_parquet_block(
+                    (Document.from_row(row) for row in rows),
+                    self._filesystem,
+                    self._root,
+                    f"block_{self._write_uuid}_{block_index}_{ctx.task_idx}.parquet",
+                    self._elements_root,
+                    self._include_binary,
+                    self._schema,
+                    self._elements_schema,
+                )
@@ -2,11 +2,12 @@ import logging
 
 from sycamore.data import Document, Element
 from sycamore.connectors.base_reader import BaseDBReader
+from sycamore.plan_nodes import Node
 from sycamore.data.document import DocumentPropertyTypes, DocumentSource
 from sycamore.utils.import_utils import requires_modules
 from dataclasses import dataclass, field
 import typing
-from typing import Dict
+from typing import Dict, Optional
 
 if typing.TYPE_CHECKING:
     from opensearchpy import OpenSearch
@@ -23,6 +24,7 @@ class OpenSearchReaderQueryParams(BaseDBReader.QueryParams):
     query: Dict = field(default_factory=lambda: {"query": {"match_all": {}}})
     kwargs: Dict = field(default_factory=lambda: {})
     reconstruct_document: bool = False
+    limit: Optional[int] = None
 
 
 class OpenSearchReaderClient(BaseDBReader.Client):
@@ -46,7 +48,7 @@ class OpenSearchReaderClient(BaseDBReader.Client):
         if "scroll" not in query_params.kwargs:
             query_params.kwargs["scroll"] = "1m"
         if "size" not in query_params.query and "size" not in query_params.kwargs:
-            query_params.kwargs["size"] = 200
+            query_params.kwargs["size"] = 200 if query_params.limit is None else min(200, query_params.limit)
         logging.debug(f"OpenSearch query on {query_params.index_name}: {query_params.query}")
         response = self._client.search(index=query_params.index_name, body=query_params.query, **query_params.kwargs)
         scroll_id = response["_scroll_id"]
@@ -59,6 +61,9 @@ class OpenSearchReaderClient(BaseDBReader.Client):
 
                 if not hits:
                     break
+                if query_params.limit is not None and len(result) >= query_params.limit:
+                    result = result[: query_params.limit]
+                    break
                 response = self._client.scroll(scroll_id=scroll_id, scroll=query_params.kwargs["scroll"])
         finally:
             self._client.clear_scroll(scroll_id=scroll_id)
@@ -194,3 +199,10 @@ class OpenSearchReader(BaseDBReader):
     Record = OpenSearchReaderQueryResponse
     ClientParams = OpenSearchReaderClientParams
     QueryParams = OpenSearchReaderQueryParams
+
+    def pushdown_limit(self, limit: int) -> Optional[Node]:
+        assert isinstance(self._query_params, OpenSearchReaderQueryParams)
+        # Reconstructed documents are assembled from many records, so a record limit is not a document limit.
+        if self._query_params.reconstruct_document:
+            return None
+        return super().pushdown_limit(limit)
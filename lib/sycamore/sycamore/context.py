@@ -11,6 +11,7 @@ class ExecMode(Enum):
     UNKNOWN = 0
     RAY = 1
     LOCAL = 2
+    LOCAL_PARALLEL = 3
 
 
 class OperationTypes(Enum):
@@ -22,8 +23,10 @@ class OperationTypes(Enum):
 
 def _default_rewrite_rules():
     import sycamore.rules.optimize_resource_args as o
+    from sycamore.rules.fuse_map_transforms import FuseMapTransforms
+    from sycamore.rules.limit_pushdown import PushDownLimit
 
-    return [o.EnforceResourceUsage(), o.OptimizeResourceArgs()]
+    return [PushDownLimit(), o.EnforceResourceUsage(), o.OptimizeResourceArgs(), FuseMapTransforms()]
 
 
 @dataclass
@@ -47,6 +50,11 @@ class Context:
     """
     params: dict[str, Any] = field(default_factory=dict)
 
+    """
+    Maximum number of workers used by each node in ExecMode.LOCAL_PARALLEL. Defaults to the number of CPUs.
+    """
+    local_max_workers: Optional[int] = None
+
     @property
     def read(self):
         from sycamore.reader import DocSetReader
@@ -140,6 +148,14 @@ def context_params(*names):
             else:
                 return func(*args, **kwargs)
 
+        if inspect.iscoroutinefunction(func):
+            # Keep coroutine functions recognizable as such, e.g. by Map.
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                return await wrapper(*args, **kwargs)
+
+            return async_wrapper
+
         return wrapper
 
     """
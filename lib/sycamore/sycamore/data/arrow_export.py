@@ -0,0 +1,171 @@
+"""
+Flat Arrow tables of Documents for export, e.g. to Parquet or to DataFrames.
+
+These tables are meant to be read by other tools rather than converted back into Documents. Each
+document property becomes a column of its own named in dotted notation, e.g. properties.entity.state,
+with its type inferred from the values.
+Properties whose values do not have a common Arrow type are stored as JSON text. Embeddings and
+bounding boxes become fixed size lists of doubles when every row has one of the same length.
+
+Elements can be exported as a child table with one row per element, keyed by the doc_id of the
+document they belong to.
+
+Tables converted separately, e.g. one per block of a Parquet write, can have different column types. To
+write them as one dataset, unify_schemas combines their schemas, using JSON text for columns without a
+common type, and conform_table converts each table to the combined schema.
+"""
+
+import json
+from typing import Any, Iterable, Optional
+
+import pyarrow as pa
+
+from sycamore.connectors.common import flatten_data
+from sycamore.data.document import Document, MetadataDocument
+
+# Lists of these types are kept as lists rather than flattened into a column per index.
+_LIST_TYPES: list[type] = [str, int, float, bool]
+
+_DOCUMENT_FIELDS = {
+    "doc_id": pa.string(),
+    "lineage_id": pa.string(),
+    "parent_id": pa.string(),
+    "type": pa.string(),
+    "text_representation": pa.large_string(),
+}
+
+_ELEMENT_FIELDS = {"type": pa.string(), "text_representation": pa.large_string()}
+
+
+def docs_to_arrow(docs: Iterable[Document], include_binary: bool = False) -> pa.Table:
+    """Returns a table with one row per document, skipping MetadataDocuments. Elements are left out; see
+    elements_to_arrow.
+
+    Args:
+        docs: The documents to convert.
+        include_binary: Whether to include a binary_representation column.
+    """
+    rows = [d for d in docs if not isinstance(d, MetadataDocument)]
+    columns: dict[str, pa.Array] = {f: _column([d.data.get(f) for d in rows], t) for f, t in _DOCUMENT_FIELDS.items()}
+    if include_binary:
+        columns["binary_representation"] = pa.array([d.binary_representation for d in rows], pa.large_binary())
+    columns["embedding"] = _float_list_column([d.data.get("embedding") for d in rows])
+    columns["bbox"] = _float_list_column([d.data.get("bbox") for d in rows])
+    columns.update(_property_columns([d.properties for d in rows]))
+    return _table(columns, len(rows))
+
+
+def elements_to_arrow(docs: Iterable[Document], include_binary: bool = False) -> pa.Table:
+    """Returns a table with one row per element of the documents, skipping MetadataDocuments. The doc_id
+    column holds the doc_id of the document each element belongs to, and element_index its position
+    within that document.
+
+    Args:
+        docs: The documents whose elements to convert.
+        include_binary: Whether to include a binary_representation column.
+    """
+    doc_ids: list[Any] = []
+    indexes: list[int] = []
+    elements = []
+    for d in docs:
+        if isinstance(d, MetadataDocument):
+            continue
+        for i, e in enumerate(d.elements):
+            doc_ids.append(d.doc_id)
+            indexes.append(i)
+            elements.append(e)
+
+    columns: dict[str, pa.Array] = {
+        "doc_id": pa.array(doc_ids, pa.string()),
+        "element_index": pa.array(indexes, pa.int64()),
+    }
+    columns.update({f: _column([e.data.get(f) for e in elements], t) for f, t in _ELEMENT_FIELDS.items()})
+    if include_binary:
+        columns["binary_representation"] = pa.array([e.binary_representation for e in elements], pa.large_binary())
+    columns["embedding"] = _float_list_column([e.data.get("embedding") for e in elements])
+    columns["bbox"] = _float_list_column([e.data.get("bbox") for e in elements])
+    columns.update(_property_columns([e.properties for e in elements]))
+    return _table(columns, len(elements))
+
+
+def unify_schemas(schemas: Iterable[pa.Schema]) -> pa.Schema:
+    """Returns a schema that tables with any of the schemas can be converted to with conform_table.
+    Columns are ordered by where they were first seen, and columns whose types can not be promoted to a
+    common type, e.g. a property that is an int in one table and a string in another, become JSON text."""
+    types: dict[str, list[pa.DataType]] = {}
+    for schema in schemas:
+        for field in schema:
+            types.setdefault(field.name, []).append(field.type)
+    return pa.schema([pa.field(name, _common_type(ts)) for name, ts in types.items()])
+
+
+def conform_table(table: pa.Table, schema: pa.Schema) -> pa.Table:
+    """Returns the table with the columns of schema, as returned by unify_schemas for a set of schemas
+    that includes the table's. Missing columns are null."""
+    columns = []
+    for field in schema:
+        if field.name not in table.column_names:
+            columns.append(pa.nulls(table.num_rows, field.type))
+            continue
+        column = table.column(field.name)
+        if column.type == field.type:
+            columns.append(column)
+        elif field.type == pa.large_string():
+            columns.append(_json_column(column.to_pylist()))
+        else:
+            columns.append(column.cast(field.type))
+    return pa.table(columns, schema=schema)
+
+
+def _common_type(types: list[pa.DataType]) -> pa.DataType:
+    distinct = list(dict.fromkeys(types))
+    if len(distinct) == 1:
+        return distinct[0]
+    if pa.large_string() in distinct:
+        # Columns are only large strings if they hold text or JSON, which the other types are converted to.
+        return pa.large_string()
+    try:
+        schemas = [pa.schema([("c", t)]) for t in distinct]
+        return pa.unify_schemas(schemas, promote_options="permissive").field("c").type
+    except (pa.ArrowTypeError, pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        return pa.large_string()
+
+
+def _json_column(values: list[Any]) -> pa.Array:
+    return pa.array([None if v is None else json.dumps(v, default=str) for v in values], pa.large_string())
+
+
+def _table(columns: dict[str, pa.Array], num_rows: int) -> pa.Table:
+    if num_rows == 0:
+        # Nothing to infer property types from; keep the fixed columns only.
+        columns = {k: v for k, v in columns.items() if not k.startswith("properties.")}
+    return pa.table(columns)
+
+
+def _column(values: list[Any], type: Optional[pa.DataType] = None) -> pa.Array:
+    """Returns the values as an array of the given type or, if they do not fit it, of their common type,
+    or as JSON text if they do not have one."""
+    try:
+        return pa.array(values, type)
+    except (pa.ArrowException, TypeError, ValueError):
+        if type is not None:
+            return _column(values)
+        return _json_column(values)
+
+
+def _float_list_column(values: list[Any]) -> pa.Array:
+    """Returns lists of floats, e.g. embeddings or bounding boxes, as fixed size lists of doubles if all of
+    them are present and have the same length. Readers of older Parquet versions can not read fixed size
+    lists with nulls, so the others are variable size lists."""
+    values = [None if v is None or len(v) == 0 else list(v) for v in values]
+    lengths = {None if v is None else len(v) for v in values}
+    if len(lengths) == 1 and None not in lengths:
+        return pa.array(values, pa.list_(pa.float64(), lengths.pop()))
+    return pa.array(values, pa.list_(pa.float64()))
+
+
+def _property_columns(properties: list[dict[str, Any]]) -> dict[str, pa.Array]:
+    rows = [dict(flatten_data(p, prefix="properties", allowed_list_types=_LIST_TYPES)) for p in properties]
+    # Columns are ordered by where they were first seen.
+    names = list(dict.fromkeys(k for r in rows for k in r))
+    return {n: _column([r.get(n) for r in rows]) for n in names}
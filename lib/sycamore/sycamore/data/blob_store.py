@@ -0,0 +1,112 @@
+from hashlib import sha256
+from typing import Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pyarrow.fs import FileSystem
+
+
+class BlobStore:
+    """
+    A content addressed store for the binary contents of documents, on local disk or any pyarrow
+    filesystem.
+
+    Documents whose binary_representation is put in a store carry a small BlobRef instead of the
+    bytes, so the bytes are not copied through every serialization between stages. Reading
+    Document.binary_representation fetches them from the store. Blobs are named by the sha256 of their
+    contents, so storing the same file twice stores it once, and a store can be shared by any number
+    of pipelines. Nothing is ever removed from the store; delete the directory when it is no longer
+    needed.
+
+    Args:
+        root: The directory of the store, e.g. /tmp/blobs or s3://bucket/blobs
+        filesystem: The filesystem of root. By default it is inferred from root.
+
+    Example:
+         .. code-block:: python
+
+            blobs = BlobStore("s3://bucket/blobs")
+            docset = context.read.binary(paths, binary_format="pdf", blob_store=blobs)
+    """
+
+    def __init__(self, root: str, filesystem: Optional["FileSystem"] = None):
+        self.root = root
+        self._filesystem = filesystem
+        self._path: Optional[str] = None
+
+    def __getstate__(self):
+        # The filesystem is inferred again where the store is used.
+        return {"root": self.root, "_filesystem": self._filesystem, "_path": None}
+
+    def _fs(self) -> tuple["FileSystem", str]:
+        from sycamore.utils.pyarrow import cross_check_infer_fs
+
+        if self._path is None or self._filesystem is None:
+            (self._filesystem, self._path) = cross_check_infer_fs(self._filesystem, self.root)
+        return (self._filesystem, self._path)
+
+    def _blob_path(self, key: str) -> str:
+        (_, root) = self._fs()
+        return f"{root.rstrip('/')}/{key[:2]}/{key}"
+
+    def put(self, data: bytes) -> "BlobRef":
+        """Stores data unless the store already has it, returning a reference to it."""
+        key = sha256(data).hexdigest()
+        (fs, _) = self._fs()
+        path = self._blob_path(key)
+        from pyarrow.fs import FileType
+
+        if fs.get_file_info(path).type == FileType.NotFound:
+            fs.create_dir(path.rsplit("/", 1)[0])
+            with fs.open_output_stream(path) as out:
+                out.write(data)
+        return BlobRef(self, key, len(data))
+
+    def get(self, key: str) -> bytes:
+        """Returns the blob with the given key."""
+        (fs, _) = self._fs()
+        with fs.open_input_file(self._blob_path(key)) as f:
+            data = f.read()
+        if sha256(data).hexdigest() != key:
+            raise ValueError(f"Blob {key} in {self.root} is corrupt")
+        return data
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, BlobStore) and other.root == self.root
+
+    def __hash__(self) -> int:
+        return hash(self.root)
+
+    def __repr__(self) -> str:
+        return f"BlobStore({self.root!r})"
+
+
+class BlobRef:
+    """
+    A reference to bytes in a BlobStore, standing in for a binary_representation. The bytes are fetched
+    the first time they are read and kept until the reference is serialized, which drops them.
+    """
+
+    __slots__ = ("store", "key", "size", "_data")
+
+    def __init__(self, store: BlobStore, key: str, size: int):
+        self.store = store
+        self.key = key
+        self.size = size
+        self._data: Optional[bytes] = None
+
+    def read(self) -> bytes:
+        if self._data is None:
+            self._data = self.store.get(self.key)
+        return self._data
+
+    def __reduce__(self):
+        return (BlobRef, (self.store, self.key, self.size))
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, BlobRef) and other.key == self.key and other.store == self.store
+
+    def __hash__(self) -> int:
+        return hash(self.key)
+
+    def __repr__(self) -> str:
+        return f"BlobRef({self.store.root!r}, {self.key!r}, {self.size})"
@@ -0,0 +1,60 @@
+"""
+Column-wise access to the fields of Documents.
+
+Sort, GroupByCount and other transforms that only need a few fields read them for a whole batch of
+documents at once, with each field in dotted notation split into its keys once. In ray mode a block holds
+one pickled Document per row (see Document.to_row), so reading a field unpickles the documents of the
+block, but the rows are not serialized again.
+"""
+
+from typing import Any, Iterable, Iterator, Optional, Union
+
+import pyarrow as pa
+
+from sycamore.data.document import Document
+from sycamore.utils.nested import FieldPath
+
+
+def table_to_docs(table: pa.Table) -> list[Document]:
+    """Converts a block of pickled documents into Documents."""
+    return [Document.deserialize(raw) for raw in _binary_values(table.column("doc"))]
+
+
+def _binary_values(column: pa.ChunkedArray) -> Iterator[Any]:
+    """Yields the values of a binary column as views of the Arrow buffers rather than copying each into a
+    bytes object as to_pylist does."""
+    for chunk in column.chunks:
+        if chunk.null_count > 0 or not (pa.types.is_binary(chunk.type) or pa.types.is_large_binary(chunk.type)):
+            yield from chunk.to_pylist()
+            continue
+        (_, offsets, data) = chunk.buffers()
+        if data is None:
+            yield from (b"" for _ in range(len(chunk)))
+            continue
+        bounds = memoryview(offsets).cast("q" if pa.types.is_large_binary(chunk.type) else "i")
+        bounds = bounds[chunk.offset : chunk.offset + len(chunk) + 1]
+        values = memoryview(data)
+        for i in range(len(chunk)):
+            yield values[bounds[i] : bounds[i + 1]]
+
+
+def extract_column(docs: Iterable[Document], field: Union[str, FieldPath]) -> list[Any]:
+    """Returns the value of a field in dotted notation, e.g. properties.entity.state, for each document,
+    with None where it is missing. The field is split into its keys once rather than for every document
+    as Document.field_to_value does."""
+    lookup = (FieldPath.of(field) if isinstance(field, str) else field).lookup
+    return [lookup(d) for d in docs]
+
+
+def extract_arrow_column(
+    docs: Iterable[Document], field: Union[str, FieldPath], type: Optional[pa.DataType] = None
+) -> pa.Array:
+    """Returns the values of extract_column as an Arrow array of the given type, or of a type inferred
+    from the values."""
+    return pa.array(extract_column(docs, field), type=type)
+
+
+def field_values(table: pa.Table, field: str) -> list[Any]:
+    """Returns the value of a field in dotted notation for each document in a block of pickled documents,
+    with None where it is missing."""
+    return extract_column(table_to_docs(table), field)
@@ -1,11 +1,16 @@
-from collections import UserDict
+import copy
 import json
 from enum import Enum
+from collections.abc import Mapping
 from typing import Any, Optional
 import uuid
 
 from sycamore.data import BoundingBox, Element
-from sycamore.data.element import create_element
+from sycamore.data.blob_store import BlobRef
+from sycamore.data.element import create_element, element_class
+from sycamore.data.mapping import DataMapping
+from sycamore.utils.nested import FieldPath
+from sycamore.data.serialization import Buffer, LazyElements, dumps, loads
 
 
 class DocumentSource(Enum):
@@ -20,16 +25,16 @@ class DocumentPropertyTypes:
     PAGE_NUMBER: str = "page_number"
 
 
-class Document(UserDict):
+class Document(DataMapping):
     """
     A Document is a generic representation of an unstructured document in a format like PDF, HTML. Though different
     types of document may have different properties, they all contain the following common fields in Sycamore:
     """
 
+    __slots__ = ()
+
     def __init__(self, document=None, /, **kwargs):
         if isinstance(document, bytes):
-            from pickle import loads
-
             document = loads(document)
             if "metadata" in document:
                 raise ValueError("metadata must be deserialized with Document.deserialize not Document.__init__")
@@ -38,16 +43,16 @@ class Document(UserDict):
         if "properties" not in self.data:
             self.data["properties"] = {}
 
-        if "elements" not in self.data or self.data["elements"] is None:
+        elements = self.data.get("elements")
+        if elements is None:
             self.data["elements"] = []
-        elif not isinstance(self.data["elements"], list):
+        elif isinstance(elements, LazyElements) and not elements.loaded:
+            # Leave deserialized elements pickled until they are used.
+            self.data["elements"] = elements.bind(self.data)
+        elif not isinstance(elements, (list, LazyElements)):
             raise ValueError("elements property should be a list")
         else:
-            elements = self.data["elements"]
-            for e in elements:
-                if not (isinstance(e, dict) or isinstance(e, UserDict)):
-                    raise ValueError(f"entries in elements property list must be dictionaries, not {type(e)}")
-            self.data["elements"] = [create_element(**element) for element in self.data["elements"]]
+            self.data["elements"] = [_copy_element(e) for e in elements]
 
         if "lineage_id" not in self.data:
             self.update_lineage_id()
@@ -94,8 +99,12 @@ class Document(UserDict):
     @property
     def binary_representation(self) -> Optional[bytes]:
         """The raw content of the document stored in the appropriate format. For example, the
-        content of a PDF document will be stored as the binary_representation."""
-        return self.data.get("binary_representation")
+        content of a PDF document will be stored as the binary_representation. If the content was put in a
+        BlobStore, it is fetched from there."""
+        binary = self.data.get("binary_representation")
+        if isinstance(binary, BlobRef):
+            return binary.read()
+        return binary
 
     @binary_representation.setter
     def binary_representation(self, value: bytes) -> None:
@@ -111,7 +120,10 @@ class Document(UserDict):
     def elements(self) -> list[Element]:
         """A list of elements belonging to this document. A document does not necessarily always have
         elements, for instance, before a document is chunked."""
-        return self.data["elements"]
+        elements = self.data["elements"]
+        if isinstance(elements, LazyElements):
+            return elements.load()
+        return elements
 
     @elements.setter
     def elements(self, elements: list[Element]):
@@ -180,18 +192,30 @@ class Document(UserDict):
         """Delete all the properties of this document."""
         self.data["properties"] = {}
 
+    def _binary_size(self) -> int:
+        binary = self.data.get("binary_representation")
+        if isinstance(binary, BlobRef):
+            return binary.size
+        return 0 if binary is None else len(binary)
+
     def serialize(self) -> bytes:
         """Serialize this document to bytes."""
-        from pickle import dumps
+        return b"".join(self.serialize_buffers())
 
+    def serialize_buffers(self) -> list[Buffer]:
+        """Serialize this document into pieces that concatenate to the output of serialize. Large binary
+        values are returned as their own pieces without being copied, so writers that do not need a single
+        bytes object should prefer this."""
         return dumps(self.data)
 
     @staticmethod
-    def deserialize(raw: bytes) -> "Document":
+    def deserialize(raw: Buffer) -> "Document":
         """Unserialize from bytes to a Document."""
-        from pickle import loads
+        return Document.from_data(loads(raw))
 
-        data = loads(raw)
+    @staticmethod
+    def from_data(data: dict[str, Any]) -> "Document":
+        """Build the appropriate kind of Document from its underlying data dict."""
         if "metadata" in data:
             return MetadataDocument(data)
         elif "children" in data:
@@ -216,9 +240,7 @@ class Document(UserDict):
             "lineage_id": self.lineage_id,
             "type": self.type,
             "text_representation": self.text_representation[0:40] + "..." if self.text_representation else None,
-            "binary_representation": (
-                f"<{len(self.binary_representation)} bytes>" if self.binary_representation else None
-            ),
+            "binary_representation": (f"<{self._binary_size()} bytes>" if self._binary_size() else None),
             "elements": [str(e) for e in self.elements],
             "embedding": (str(self.embedding[0:4]) + f"... <{len(self.embedding)} total>") if self.embedding else None,
             "shingles": (str(self.shingles[0:4]) + f"... <{len(self.shingles)} total>") if self.shingles else None,
@@ -239,12 +261,24 @@ class Document(UserDict):
             The value associated with the document field.
             Returns None if field does not exist in document.
         """
-        from sycamore.utils.nested import dotted_lookup
+        return FieldPath.of(field).lookup(self)
+
 
-        return dotted_lookup(self, field)
+def _copy_element(e: Any) -> Element:
+    if isinstance(e, dict):
+        return create_element(**e)
+    if isinstance(e, Element):
+        # Elements that already have the right class only need a shallow copy, not a rebuild.
+        if type(e) is element_class(e.data.get("type")) and "element_index" not in e.data:
+            return copy.copy(e)
+    elif not isinstance(e, Mapping):
+        raise ValueError(f"entries in elements property list must be dictionaries, not {type(e)}")
+    return create_element(**e)
 
 
 class MetadataDocument(Document):
+    __slots__ = ()
+
     def __init__(self, document=None, **kwargs):
         # Do not pass kwargs to parent; metadata docs take everything into data["metadata"]
         # so we do not want them in the generic userdict.
@@ -331,6 +365,8 @@ def split_data_metadata(all: list[Document]) -> tuple[list[Document], list[Metad
 
 ############### EXPERIMENTAL
 class HierarchicalDocument(Document):
+    __slots__ = ()
+
     def __init__(self, document=None, **kwargs):
         super().__init__(document)
 
@@ -375,9 +411,7 @@ class HierarchicalDocument(Document):
             "lineage_id": self.lineage_id,
             "type": self.type,
             "text_representation": self.text_representation[0:40] + "..." if self.text_representation else None,
-            "binary_representation": (
-                f"<{len(self.binary_representation)} bytes>" if self.binary_representation else None
-            ),
+            "binary_representation": (f"<{self._binary_size()} bytes>" if self._binary_size() else None),
             "children": [str(c) for c in self.children],
             "embedding": (str(self.embedding[0:4]) + f"... <{len(self.embedding)} total>") if self.embedding else None,
             "shingles": (str(self.shingles[0:4]) + f"... <{len(self.shingles)} total>") if self.shingles else None,
@@ -392,6 +426,8 @@ class HierarchicalDocument(Document):
 
 
 class OpenSearchQuery(Document):
+    __slots__ = ()
+
     def __init__(
         self,
         document=None,
@@ -441,14 +477,14 @@ class OpenSearchQuery(Document):
         self.data["headers"] = value
 
     @staticmethod
-    def deserialize(raw: bytes) -> "OpenSearchQuery":
+    def deserialize(raw: Buffer) -> "OpenSearchQuery":
         """Deserialize from bytes to a OpenSearchQuery."""
-        from pickle import loads
-
         return OpenSearchQuery(loads(raw))
 
 
 class OpenSearchQueryResult(Document):
+    __slots__ = ()
+
     def __init__(
         self,
         document=None,
@@ -498,8 +534,6 @@ class OpenSearchQueryResult(Document):
         self.data["result"] = value
 
     @staticmethod
-    def deserialize(raw: bytes) -> "OpenSearchQueryResult":
+    def deserialize(raw: Buffer) -> "OpenSearchQueryResult":
         """Deserialize from bytes to a OpenSearchQueryResult."""
-        from pickle import loads
-
         return OpenSearchQueryResult(loads(raw))
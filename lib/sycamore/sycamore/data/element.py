@@ -1,4 +1,3 @@
-from collections import UserDict
 from io import BytesIO
 import json
 from typing import Any, Optional
@@ -6,10 +5,12 @@ from typing import Any, Optional
 from PIL import Image
 
 from sycamore.data.bbox import BoundingBox
+from sycamore.data.mapping import DataMapping
+from sycamore.utils.nested import FieldPath
 from sycamore.data.table import Table
 
 
-class Element(UserDict):
+class Element(DataMapping):
     """
     It is often useful to process different parts of a document separately. For example, you might want to process
     tables differently than text paragraphs, and typically small chunks of text are embedded separately for vector
@@ -17,6 +18,8 @@ class Element(UserDict):
     representations and collection of properties that can be set by the user or by built-in transforms.
     """
 
+    __slots__ = ()
+
     def __init__(self, element=None, /, **kwargs):
         super().__init__(element, **kwargs)
         if "properties" not in self.data:
@@ -100,12 +103,12 @@ class Element(UserDict):
             The value associated with the document field.
             Returns None if field does not exist in document.
         """
-        from sycamore.utils.nested import dotted_lookup
-
-        return dotted_lookup(self, field)
+        return FieldPath.of(field).lookup(self)
 
 
 class ImageElement(Element):
+    __slots__ = ()
+
     def __init__(
         self,
         element=None,
@@ -167,6 +170,8 @@ class ImageElement(Element):
 
 
 class TableElement(Element):
+    __slots__ = ()
+
     def __init__(
         self,
         element=None,
@@ -237,6 +242,18 @@ class TableElement(Element):
         self.data["text_representation"] = text_representation
 
 
+def element_class(element_type: Optional[str]) -> type[Element]:
+    """Returns the class create_element uses for elements of the given type."""
+    if element_type is None:
+        return Element
+    kind = element_type.lower()
+    if kind == "table":
+        return TableElement
+    if kind in {"picture", "image", "figure"}:
+        return ImageElement
+    return Element
+
+
 def create_element(element_index: Optional[int] = None, **kwargs) -> Element:
     element: Element
     if "type" in kwargs and kwargs["type"].lower() == "table":
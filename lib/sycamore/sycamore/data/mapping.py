@@ -0,0 +1,99 @@
+from collections.abc import MutableMapping
+import copy
+from typing import Any, Iterator
+
+
+class DataMapping(MutableMapping):
+    """
+    The dict-like base of Document and Element.
+
+    The fields of a document or element live in a plain dict, self.data, which is what gets pickled and
+    what transforms read and write directly. This class exposes that dict through the mapping API the
+    way collections.UserDict does, but declares __slots__ so instances carry no per-instance __dict__,
+    and delegates the common operations straight to the dict rather than going through the generic
+    MutableMapping implementations. Subclasses that add no attributes of their own should declare
+    __slots__ = () to keep that saving.
+    """
+
+    __slots__ = ("data",)
+
+    data: dict[str, Any]
+
+    def __init__(self, data=None, /, **kwargs):
+        if data is None:
+            self.data = {}
+        elif isinstance(data, DataMapping):
+            self.data = data.data.copy()
+        else:
+            self.data = dict(data)
+        if kwargs:
+            self.data.update(kwargs)
+
+    def __getitem__(self, key: str) -> Any:
+        return self.data[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.data[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        del self.data[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.data)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.data
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, DataMapping):
+            return self.data == other.data
+        if isinstance(other, dict):
+            return self.data == other
+        return super().__eq__(other)
+
+    def __repr__(self) -> str:
+        return repr(self.data)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.data.get(key, default)
+
+    def keys(self):
+        return self.data.keys()
+
+    def items(self):
+        return self.data.items()
+
+    def values(self):
+        return self.data.values()
+
+    def pop(self, key: str, *default: Any) -> Any:
+        return self.data.pop(key, *default)
+
+    def setdefault(self, key: str, default: Any = None) -> Any:
+        return self.data.setdefault(key, default)
+
+    def update(self, other=(), /, **kwargs) -> None:
+        self.data.update(other.data if isinstance(other, DataMapping) else other, **kwargs)
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Same shape as the state of the UserDict these classes used to derive from, so pickles written
+        # before and after the switch load either way.
+        state = {"data": self.data}
+        if hasattr(self, "__dict__"):
+            state.update(self.__dict__)
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        for k, v in state.items():
+            object.__setattr__(self, k, v)
+
+    def __copy__(self):
+        result = object.__new__(type(self))
+        result.__setstate__({**self.__getstate__(), "data": self.data.copy()})
+        return result
+
+    def copy(self):
+        return copy.copy(self)
@@ -0,0 +1,241 @@
+"""
+Pickling of document data with large values kept out of band.
+
+A plain pickle copies every bytes value into the pickle stream, so serializing a document with a
+large binary_representation, e.g. the PDF it was read from, copies it. dumps instead pickles with
+protocol 5 and hands large bytes values over as out-of-band buffers, so a writer that can take the
+pieces separately, like Materialize.save, never copies them. Embeddings that are lists of floats are
+stored as contiguous arrays of doubles rather than one pickled float at a time.
+
+The elements of a document are pickled separately and nested in the document's pickle, so loads
+can leave them in their pickled form as a LazyElements until they are used, and dumps can write an
+untouched LazyElements back out without ever decoding it.
+
+Data without large values serializes to an ordinary pickle. Otherwise the buffers follow the pickle
+after a short header:
+
+    MAGIC, number of buffers n, length of the pickle, length of each of the n buffers
+
+with all numbers as little endian unsigned 64 bit integers. loads reads both forms, and since values
+are decoded back into bytes and lists, documents look the same however they were stored.
+"""
+
+from array import array
+from collections.abc import MutableSequence
+import pickle
+import struct
+import sys
+from typing import Any, Iterator, Optional, Union
+
+from sycamore.data.element import Element, create_element
+from sycamore.data.mapping import DataMapping
+
+# Buffers at least this large are stored out of band.
+OUT_OF_BAND_THRESHOLD = 64 * 1024
+
+MAGIC = b"\xffSYCAMORE-OOB\x00"
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+
+def dumps(data: dict[str, Any]) -> list[Buffer]:
+    """Pickles document data, returning the pieces of the serialized form in order."""
+    buffers: list[pickle.PickleBuffer] = []
+
+    def out_of_band(buffer: pickle.PickleBuffer) -> bool:
+        # Returning True keeps the buffer in the pickle.
+        if buffer.raw().nbytes < OUT_OF_BAND_THRESHOLD:
+            return True
+        buffers.append(buffer)
+        return False
+
+    body = pickle.dumps(_encode(data), protocol=5, buffer_callback=out_of_band)
+    if not buffers:
+        return [body]
+    views = [b.raw() for b in buffers]
+    header = MAGIC + struct.pack(f"<{len(views) + 2}Q", len(views), len(body), *(v.nbytes for v in views))
+    return [header, body, *views]
+
+
+def loads(raw: Buffer) -> Any:
+    """Unpickles data written by dumps or by a plain pickle.dumps."""
+    view = memoryview(raw)
+    if view[: len(MAGIC)] != MAGIC:
+        return pickle.loads(raw)
+
+    offset = len(MAGIC)
+    (count,) = struct.unpack_from("<Q", view, offset)
+    sizes = struct.unpack_from(f"<{count + 1}Q", view, offset + 8)
+    offset += 8 * (count + 2)
+    pieces = []
+    for size in sizes:
+        pieces.append(view[offset : offset + size])
+        offset += size
+    return pickle.loads(pieces[0], buffers=pieces[1:])
+
+
+def float_list(buffer: Buffer) -> list[float]:
+    """Rebuilds an embedding from the array of doubles it was stored as."""
+    values = array("d")
+    values.frombytes(buffer)
+    return values.tolist()
+
+
+def lazy_elements(count: int, body: Buffer, *buffers: Buffer) -> "LazyElements":
+    """Rebuilds the elements of a document in their pickled form."""
+    # Copy out of the serialized document so that the elements do not keep all of it alive.
+    return LazyElements(count, bytes(body), [b if isinstance(b, (bytes, bytearray)) else bytes(b) for b in buffers])
+
+
+class LazyElements(MutableSequence):
+    """
+    The elements of a deserialized document, kept pickled until they are first used.
+
+    Document.elements loads them and puts the list of elements in place of this object in the
+    document's data, so code that goes through Document.elements only ever sees a list. Code that
+    reads data["elements"] directly gets this object, which loads the elements on first use and
+    then forwards everything to the loaded list.
+    """
+
+    __slots__ = ("_count", "_body", "_buffers", "_elements", "_owner")
+
+    def __init__(self, count: int, body: Buffer, buffers: list[Buffer], owner: Optional[dict[str, Any]] = None):
+        self._count = count
+        self._body: Optional[Buffer] = body
+        self._buffers = buffers
+        self._elements: Optional[list[Element]] = None
+        self._owner = owner
+
+    @property
+    def loaded(self) -> bool:
+        return self._elements is not None
+
+    def bind(self, owner: dict[str, Any]) -> "LazyElements":
+        """Returns an unloaded LazyElements that puts the loaded elements into owner["elements"]."""
+        assert self._body is not None, "loaded elements can not be bound"
+        if self._owner is None:
+            self._owner = owner
+            return self
+        return LazyElements(self._count, self._body, self._buffers, owner)
+
+    def load(self) -> list[Element]:
+        if self._elements is None:
+            assert self._body is not None
+            elements = pickle.loads(self._body, buffers=self._buffers)
+            self._elements = [e if isinstance(e, Element) else create_element(**e) for e in elements]
+            (self._body, self._buffers) = (None, [])
+            if self._owner is not None and self._owner.get("elements") is self:
+                self._owner["elements"] = self._elements
+            self._owner = None
+        return self._elements
+
+    def __len__(self) -> int:
+        return self._count if self._elements is None else len(self._elements)
+
+    def __getitem__(self, index):
+        return self.load()[index]
+
+    def __setitem__(self, index, value) -> None:
+        self.load()[index] = value
+
+    def __delitem__(self, index) -> None:
+        del self.load()[index]
+
+    def insert(self, index: int, value: Element) -> None:
+        self.load().insert(index, value)
+
+    def __iter__(self) -> Iterator[Element]:
+        return iter(self.load())
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, LazyElements):
+            other = other.load()
+        return self.load() == other
+
+    def __repr__(self) -> str:
+        return repr(self._elements) if self._elements is not None else f"<{self._count} pickled elements>"
+
+    def sort(self, *args, **kwargs) -> None:
+        self.load().sort(*args, **kwargs)
+
+    def copy(self) -> list[Element]:
+        return self.load().copy()
+
+    def clear(self) -> None:
+        self.load().clear()
+
+    def __reduce__(self):
+        if self._elements is not None:
+            return (list, (self._elements,))
+        return (lazy_elements, (self._count, self._body, *self._buffers))
+
+
+class _PickledElements:
+    __slots__ = ("count", "body", "buffers")
+
+    def __init__(self, count: int, body: Buffer, buffers: list[Buffer]):
+        self.count = count
+        self.body = body
+        self.buffers = buffers
+
+    def __reduce__(self):
+        return (lazy_elements, (self.count, *map(pickle.PickleBuffer, [self.body, *self.buffers])))
+
+
+class _OutOfBandBytes:
+    __slots__ = ("value",)
+
+    def __init__(self, value: bytes):
+        self.value = value
+
+    def __reduce__(self):
+        return (bytes, (pickle.PickleBuffer(self.value),))
+
+
+class _FloatArray:
+    __slots__ = ("value",)
+
+    def __init__(self, value: list[float]):
+        self.value = value
+
+    def __reduce__(self):
+        return (float_list, (pickle.PickleBuffer(array("d", self.value)),))
+
+
+def _is_float_list(v: Any) -> bool:
+    # Arrays are written in native byte order, which is only portable on little endian machines.
+    return isinstance(v, list) and len(v) > 0 and sys.byteorder == "little" and all(isinstance(x, float) for x in v)
+
+
+def _encode(data: dict[str, Any]) -> dict[str, Any]:
+    """Returns data with the values that should be stored differently wrapped; data itself is not changed."""
+    updates: dict[str, Any] = {}
+    binary = data.get("binary_representation")
+    if isinstance(binary, bytes) and len(binary) >= OUT_OF_BAND_THRESHOLD:
+        updates["binary_representation"] = _OutOfBandBytes(binary)
+    embedding: Any = data.get("embedding")
+    if _is_float_list(embedding):
+        updates["embedding"] = _FloatArray(embedding)
+    elements = data.get("elements")
+    if isinstance(elements, LazyElements) and not elements.loaded:
+        # Never used since it was loaded, so the pickled form is still current.
+        assert elements._body is not None
+        updates["elements"] = _PickledElements(elements._count, elements._body, elements._buffers)
+    elif isinstance(elements, (list, LazyElements)) and len(elements) > 0:
+        buffers: list[pickle.PickleBuffer] = []
+        body = pickle.dumps([_encode_element(e) for e in elements], protocol=5, buffer_callback=buffers.append)
+        updates["elements"] = _PickledElements(len(elements), body, [b.raw() for b in buffers])
+    return {**data, **updates} if updates else data
+
+
+def _encode_element(element: Any) -> Any:
+    if isinstance(element, DataMapping):
+        data = _encode(element.data)
+        if data is element.data:
+            return element
+        copy = object.__new__(type(element))
+        copy.__setstate__({**element.__getstate__(), "data": data})
+        return copy
+    if isinstance(element, dict):
+        return _encode(element)
+    return element
@@ -30,11 +30,14 @@ from sycamore.transforms.llm_query import LLMTextQueryAgent
 from sycamore.transforms.extract_table import TableExtractor
 from sycamore.transforms.merge_elements import ElementMerger
 from sycamore.utils.extract_json import extract_json
+from sycamore.utils.nested import FieldPath
 from sycamore.transforms.query import QueryExecutor, Query
 from sycamore.materialize_config import MaterializeSourceMode
 
 if TYPE_CHECKING:
+    from pyarrow import Table
     from sycamore.writer import DocSetWriter
+    from sycamore.utils.profiler import PlanProfile
 
 logger = logging.getLogger(__name__)
 
@@ -52,9 +55,45 @@ class DocSet:
     def lineage(self) -> Node:
         return self.plan
 
-    def explain(self) -> None:
-        # TODO, print out nice format DAG
-        pass
+    def explain(self, stream=sys.stdout, analyze: bool = False) -> Optional["PlanProfile"]:
+        """
+        Prints the plan for this DocSet, one node per line, indented by depth.
+
+        Rewrite rules that only restructure the plan (such as FuseMapTransforms and PushDownLimit) are
+        applied first, so the output shows the plan that will actually run. Other rules are not applied
+        since they may have side effects such as cleaning materialize directories.
+
+        Args:
+            stream: Where to print the plan.
+            analyze: If True, execute the plan, discarding the output, and print for each node the
+                number of documents and serialized bytes in and out, the wall and cpu time spent in the
+                node, the peak rss, and the number of LLM calls, LLM cache hit rate and embedding calls.
+                The statistics are also returned. In ray mode each node is materialized before the
+                next one runs, so the execution is slower than usual.
+
+        Example:
+            .. code-block:: python
+
+               context.read.binary(paths, binary_format="pdf").partition(...).embed(...).explain(analyze=True)
+        """
+        if analyze:
+            from sycamore.executor import Execution
+
+            profile = Execution(self.context).profile(self.plan)
+            profile.print(stream=stream)
+            return profile
+
+        from sycamore.plan_nodes import print_plan
+        from sycamore.rules.fuse_map_transforms import FuseMapTransforms
+        from sycamore.rules.limit_pushdown import PushDownLimit
+
+        plan = self.plan
+        for r in self.context.rewrite_rules:
+            if isinstance(r, (FuseMapTransforms, PushDownLimit)):
+                plan = r.once(self.context, plan)
+
+        print_plan(plan, stream=stream)
+        return None
 
     def show(
         self,
@@ -105,8 +144,9 @@ class DocSet:
                 if document.elements is not None and 0 <= num_elements < len(document.elements):
                     document.elements = document.elements[:num_elements]
 
-            if not show_binary and document.binary_representation is not None:
-                binary_length = len(document.binary_representation)
+            if not show_binary and document.data.get("binary_representation") is not None:
+                # _binary_size does not fetch binaries kept in a BlobStore.
+                binary_length = document._binary_size()
                 document.binary_representation = f"<{binary_length} bytes>".encode("utf-8")
 
             if truncate_content and document.text_representation is not None:
@@ -181,11 +221,12 @@ class DocSet:
         """
         from sycamore import Execution
 
+        path = FieldPath(field)
         unique_docs = set()
         for doc in Execution(self.context).execute_iter(self.plan, **kwargs):
             if isinstance(doc, MetadataDocument):
                 continue
-            value = doc.field_to_value(field)
+            value = path.lookup(doc)
             if value is not None and value != "None":
                 unique_docs.add(value)
         return len(unique_docs)
@@ -243,6 +284,33 @@ class DocSet:
 
         return docs
 
+    def to_arrow(self, elements: bool = False, include_binary: bool = False, **kwargs) -> "Table":
+        """
+        Returns the documents in this DocSet as an Arrow table, with a column for each document property
+        in dotted notation, e.g. properties.entity.state, and types inferred from the values. See
+        sycamore.data.arrow_export for the layout.
+
+        Args:
+            elements: If True, returns the elements of the documents instead, one row per element with
+                the doc_id of its document.
+            include_binary: Whether to include binary_representation columns.
+
+        Example:
+             .. code-block:: python
+
+                table = context.read.binary(paths, binary_format="pdf")
+                    .partition(partitioner=ArynPartitioner())
+                    .to_arrow()
+                df = table.to_pandas()
+        """
+        from sycamore import Execution
+        from sycamore.data.arrow_export import docs_to_arrow, elements_to_arrow
+
+        docs = Execution(self.context).execute_iter(self.plan, **kwargs)
+        if elements:
+            return elements_to_arrow(docs, include_binary)
+        return docs_to_arrow(docs, include_binary)
+
     def limit(self, limit: int = 20, **kwargs) -> "DocSet":
         """
         Applies the Limit transforms on the Docset.
@@ -407,7 +475,9 @@ class DocSet:
 
         Args:
             embedder: An instance of an Embedder class that defines the embedding method to be applied.
-
+            adaptive_batching: Optionally True or a :class:`~sycamore.utils.adaptive_batch.AdaptiveBatchSize`
+                to choose the number of documents embedded at a time from the observed latency and
+                document sizes instead of using a fixed batch_size.
 
         Example:
             .. code-block:: python
@@ -455,6 +525,8 @@ class DocSet:
         Args:
             entity_extractor: An instance of an EntityExtractor class that defines the entity extraction method to be
                 applied.
+            max_concurrency: If set, documents are processed with extract_entity_async, with up to this many
+                LLM calls in flight at a time in each worker.
 
         Example:
              .. code-block:: python
@@ -502,6 +574,8 @@ class DocSet:
 
         Args:
             schema_extractor: A `SchemaExtractor` instance to extract the schema for each document.
+            max_concurrency: If set, documents are processed with extract_schema_async, with up to this many
+                LLM calls in flight at a time in each worker.
 
         Example:
             .. code-block:: python
@@ -517,7 +591,7 @@ class DocSet:
 
         from sycamore.transforms import ExtractSchema
 
-        schema = ExtractSchema(self.plan, schema_extractor=schema_extractor)
+        schema = ExtractSchema(self.plan, schema_extractor=schema_extractor, **kwargs)
         return DocSet(self.context, schema)
 
     def extract_batch_schema(self, schema_extractor: SchemaExtractor, **kwargs) -> "DocSet":
@@ -681,6 +755,8 @@ class DocSet:
         The schema can be computed using `extract_schema` or `extract_batch_schema` or can be
         provided manually in JSON-schema format in the `_schema` field under `Document.properties`.
 
+        Pass max_concurrency to extract the properties of up to that many documents at a time in each worker,
+        using extract_properties_async.
 
         Example:
             .. code-block:: python
@@ -696,13 +772,15 @@ class DocSet:
         """
         from sycamore.transforms import ExtractProperties
 
-        schema = ExtractProperties(self.plan, property_extractor=property_extractor)
+        schema = ExtractProperties(self.plan, property_extractor=property_extractor, **kwargs)
         return DocSet(self.context, schema)
 
     def summarize(self, summarizer: Summarizer, **kwargs) -> "DocSet":
         """
         Applies the Summarize transform on the Docset.
 
+        Pass max_concurrency to summarize up to that many documents at a time in each worker; see Summarize.
+
         Example:
             .. code-block:: python
 
@@ -921,7 +999,7 @@ class DocSet:
 
         Args:
             f: A callable function that takes a Document object and returns a boolean indicating whether the document
-                should be included in the filtered Docset.
+                should be included in the filtered Docset. It can be a coroutine function; see Filter.
 
         Example:
              .. code-block:: python
@@ -969,6 +1047,7 @@ class DocSet:
         use_elements: bool = False,
         similarity_query: Optional[str] = None,
         similarity_scorer: Optional[SimilarityScorer] = None,
+        max_concurrency: Optional[int] = None,
         **resource_args,
     ) -> "DocSet":
         """
@@ -988,6 +1067,8 @@ class DocSet:
             similarity_query: query string to compute similarity against. Also requires a 'similarity_scorer'.
             similarity_scorer: scorer used to generate similarity scores used in element sorting.
                         Also requires a 'similarity_query'.
+            max_concurrency: If set, documents are scored with LLM.generate_async, with up to this many
+                        documents in flight at a time in each worker.
             **resource_args
 
         Returns:
@@ -997,14 +1078,13 @@ class DocSet:
             entity_name=new_field, llm=llm, use_elements=False, prompt=prompt, field=field
         )
 
-        def threshold_filter(doc: Document, threshold) -> bool:
-            if not use_elements:
-                if doc.field_to_value(field) is None:
-                    return keep_none
-                doc = entity_extractor.extract_entity(doc)
-                # todo: move data extraction and validation to entity extractor
-                return int(re.findall(r"\d+", doc.properties[new_field])[0]) >= threshold
+        path = FieldPath(field)
+
+        def passes(value: str, threshold) -> bool:
+            # todo: move data extraction and validation to entity extractor
+            return int(re.findall(r"\d+", value)[0]) >= threshold
 
+        def sort_by_similarity(doc: Document) -> Document:
             if similarity_query or similarity_scorer:
                 assert similarity_scorer is not None, "Similarity sorting requires a scorer"
                 assert similarity_query is not None, "Similarity sorting requires a string query"
@@ -1013,22 +1093,41 @@ class DocSet:
                     doc_batch=[doc], query=similarity_query, score_property_name=score_property_name
                 )[0]
                 doc.elements.sort(key=lambda e: e.properties.get(score_property_name, float("-inf")), reverse=True)
-            evaluated_elements = 0
-            for element in doc.elements:
-                e_doc = Document(element.data)
-                if e_doc.field_to_value(field) is None:
-                    continue
-                e_doc = entity_extractor.extract_entity(e_doc)
+            return doc
+
+        def candidates(doc: Document) -> list[tuple[Document, Optional[Element]]]:
+            # The documents to score, in order, with the element each one was made from when using elements.
+            if not use_elements:
+                return [] if path.lookup(doc) is None else [(doc, None)]
+            doc = sort_by_similarity(doc)
+            e_docs = [(Document(element.data), element) for element in doc.elements]
+            return [(e_doc, element) for e_doc, element in e_docs if path.lookup(e_doc) is not None]
+
+        def scored(e_doc: Document, element: Optional[Element], threshold) -> bool:
+            if element is not None:
                 element.properties[new_field] = e_doc.properties[new_field]
-                # todo: move data extraction and validation to entity extractor
-                if int(re.findall(r"\d+", element.properties[new_field])[0]) >= threshold:
+            return passes(e_doc.properties[new_field], threshold)
+
+        def threshold_filter(doc: Document, threshold) -> bool:
+            to_score = candidates(doc)
+            for e_doc, element in to_score:
+                if scored(entity_extractor.extract_entity(e_doc), element, threshold):
+                    return True
+            # keep_none applies when there is nothing to score.
+            return keep_none and len(to_score) == 0
+
+        async def threshold_filter_async(doc: Document) -> bool:
+            # The elements of a document are still scored one at a time, stopping at the first that passes.
+            to_score = candidates(doc)
+            for e_doc, element in to_score:
+                if scored(await entity_extractor.extract_entity_async(e_doc), element, threshold):
                     return True
-                evaluated_elements += 1
-            if evaluated_elements == 0:  # no elements found for property
-                return keep_none
-            return False
+            return keep_none and len(to_score) == 0
 
-        docset = self.filter(lambda doc: threshold_filter(doc, threshold), **resource_args)
+        if max_concurrency is None:
+            docset = self.filter(lambda doc: threshold_filter(doc, threshold), **resource_args)
+        else:
+            docset = self.filter(threshold_filter_async, max_concurrency=max_concurrency, **resource_args)
 
         return docset
 
@@ -1045,7 +1144,9 @@ class DocSet:
         The map_batch transform is similar to map, except that it processes a list of documents and returns a list of
         documents. map_batch is ideal for transformations that get performance benefits from batching.
 
-        See the :class:`~sycamore.transforms.map.MapBatch` documentation for advanced features.
+        See the :class:`~sycamore.transforms.map.MapBatch` documentation for advanced features. Pass
+        adaptive_batching=True or an :class:`~sycamore.utils.adaptive_batch.AdaptiveBatchSize` to size
+        batches from the observed latency and document sizes rather than a fixed batch_size.
 
         Example:
              .. code-block:: python
@@ -1219,6 +1320,7 @@ class DocSet:
                 engine.
             element_type: (Optional) Parameter to only execute the LLM query on a particular element type. If not
                 specified, the query will be executed on all elements.
+            max_concurrency: (Optional) If set, up to this many documents are queried at a time in each worker.
         """
         from sycamore.transforms import LLMQuery
 
@@ -1288,9 +1390,11 @@ class DocSet:
             values like 'fruit', 'dairy', and 'dessert'.
         """
 
+        from sycamore.data.columnar import extract_column
+
         docset = self
         # Not all documents will have a value for the given field, so we filter those out.
-        field_values = [doc.field_to_value(field) for doc in docset.take_all()]
+        field_values = extract_column(docset.take_all(), field)
         text = ", ".join([str(v) for v in field_values if v is not None])
 
         # sets message
@@ -1342,18 +1446,21 @@ class DocSet:
         from sycamore import Execution
 
         def make_filter_fn_join(field: str, join_set: set) -> Callable[[Document], bool]:
+            path = FieldPath(field)
+
             def filter_fn_join(doc: Document) -> bool:
-                value = doc.field_to_value(field)
+                value = path.lookup(doc)
                 return value in join_set
 
             return filter_fn_join
 
         # identifies unique values of field1 in docset (self)
+        path2 = FieldPath(field2)
         unique_vals = set()
         for doc in Execution(docset2.context).execute_iter(docset2.plan, **kwargs):
             if isinstance(doc, MetadataDocument):
                 continue
-            value = doc.field_to_value(field2)
+            value = path2.lookup(doc)
             unique_vals.add(value)
 
         # filters docset2 based on matches of field2 with unique values
@@ -1436,6 +1543,15 @@ class DocSet:
              WARNING: If you change the input files or any of the steps before the
              materialize step, you need to use clear_materialize() or change the source_mode
              to force re-execution.
+           INCREMENTAL: Only compute the documents whose inputs changed. Each input document is
+             keyed by a hash of its content and of the transforms between the source and the
+             materialize step; inputs whose key has stored outputs skip those transforms and the
+             stored outputs are returned instead. The outputs of inputs that were deleted or changed
+             are removed once an execution reads all of the input, and their doc_ids are recorded
+             in tombstone-<key>.json files; executions that stop early, e.g. take() or limit(),
+             remove nothing. The directory is never cleaned. Requires that only map
+             style transforms (map, map_batch, partition, explode, embed, ...) are between the
+             source and the materialize step, and the default serialization and naming.
 
            Note: you can write the source mode as MaterializeSourceMode.SOMETHING after importing
            MaterializeSourceMode, or as sycamore.MATERIALIZE_SOMETHING after importing sycamore.
@@ -1446,6 +1562,45 @@ class DocSet:
 
         return DocSet(self.context, Materialize(self.plan, self.context, path=path, source_mode=source_mode))
 
+    def cache(
+        self, storage: str = "memory", max_bytes: Optional[int] = None, fingerprint_reads: bool = False
+    ) -> "DocSet":
+        """
+        Caches the documents up to this point so that running several actions on the DocSet, e.g.
+        count() followed by take_all(), only computes them once.
+
+        Results are keyed by a fingerprint of the plan: the type and arguments of every transform and
+        the paths and modification times of the files being read. Database readers are fingerprinted
+        by their client and query parameters, so changes to the records they return are not noticed
+        unless fingerprint_reads is set. Changing any of them computes the results again. Plans over a
+        lazy Ray dataset can not be fingerprinted and are not cached. Cached results are only stored
+        once they have been read to the end.
+
+        storage: "memory" keeps the results in memory (the ray object store in ray mode);
+            "disk" spills them to a local temporary directory that is removed when the process exits.
+        max_bytes: limit on the total size of cached results for the storage. The least recently
+            used results are evicted first. The limit is shared by all DocSets using the same storage.
+        fingerprint_reads: also fingerprint database readers by the records they return, so that
+            changes to the database compute the results again. This queries the database every time
+            the plan is fingerprinted, i.e. once more per execution.
+        """
+
+        from sycamore.result_cache import ResultCache
+
+        return DocSet(
+            self.context,
+            ResultCache(self.plan, storage=storage, max_bytes=max_bytes, fingerprint_reads=fingerprint_reads),
+        )
+
+    def persist(
+        self, storage: str = "memory", max_bytes: Optional[int] = None, fingerprint_reads: bool = False
+    ) -> "DocSet":
+        """
+        Alias for cache().
+        """
+
+        return self.cache(storage=storage, max_bytes=max_bytes, fingerprint_reads=fingerprint_reads)
+
     def clear_materialize(self, path: Optional[Union[Path, str]] = None, *, clear_non_local=False) -> None:
         """
         Deletes all of the materialized files referenced by the docset.
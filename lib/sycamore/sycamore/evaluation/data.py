@@ -3,6 +3,7 @@ from typing import Optional, Any
 
 from sycamore.data import Element
 from sycamore.data import Document
+from sycamore.data.serialization import Buffer
 
 
 class EvaluationDataPoint(Document):
@@ -105,9 +106,9 @@ class EvaluationDataPoint(Document):
         self.data["raw"] = value
 
     @staticmethod
-    def deserialize(raw: bytes) -> "EvaluationDataPoint":
+    def deserialize(raw: Buffer) -> "EvaluationDataPoint":
         """Deserialize from bytes to a EvaluationDataPoint."""
-        from pickle import loads
+        from sycamore.data.serialization import loads
 
         return EvaluationDataPoint(loads(raw))
 
@@ -131,9 +132,9 @@ class EvaluationSummary(Document):
         self.data["metrics"] = value
 
     @staticmethod
-    def deserialize(raw: bytes) -> "EvaluationSummary":
+    def deserialize(raw: Buffer) -> "EvaluationSummary":
         """Deserialize from bytes to a EvaluationSummary."""
-        from pickle import loads
+        from sycamore.data.serialization import loads
 
         return EvaluationSummary(loads(raw))
 
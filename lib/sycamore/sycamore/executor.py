@@ -1,8 +1,9 @@
 import logging
-from typing import Callable, Iterable, TYPE_CHECKING
+from typing import Any, Callable, Iterable, Optional, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from ray.data import Dataset
+    from sycamore.utils.profiler import PlanProfile
 
 from sycamore.context import Context, ExecMode
 from sycamore.data import Document
@@ -75,6 +76,7 @@ class Execution:
     def __init__(self, context: Context):
         self._context = context
         self._exec_mode = context.exec_mode
+        self._profile: Optional["PlanProfile"] = None
 
     def _execute_ray(self, plan: Node, **kwargs) -> "Dataset":
         import ray
@@ -102,10 +104,13 @@ class Execution:
         plan = self._apply_rules(plan)
         self._prepare(plan)
         if self._exec_mode == ExecMode.RAY:
+            from sycamore.materialize import mark_read_to_end
+
             ds = self._execute_ray(plan, **kwargs)
             for row in ds.iter_rows():
                 yield Document.from_row(row)
-        elif self._exec_mode == ExecMode.LOCAL:
+            mark_read_to_end(plan)
+        elif self._exec_mode in (ExecMode.LOCAL, ExecMode.LOCAL_PARALLEL):
             for d in self.recursive_execute(plan):
                 yield d
         else:
@@ -113,6 +118,76 @@ class Execution:
 
         plan.traverse(visit=lambda n: n.finalize())
 
+    def profile(self, plan: Node) -> "PlanProfile":
+        """Executes the plan, discarding the output, and returns statistics for each node.
+
+        In local modes the plan runs as usual with every node wrapped to measure it. In ray mode
+        each node is executed and materialized in turn, so that the time spent in every node can be
+        measured separately; this is slower than a normal execution."""
+        from sycamore.utils.profiler import PlanProfile
+        from sycamore.utils.time_trace import InMemoryTimeTrace
+
+        plan = self._apply_rules(plan)
+        self._prepare(plan)
+        profile = PlanProfile(plan)
+        imtt = InMemoryTimeTrace()
+        if self._exec_mode == ExecMode.RAY:
+            self._profile_ray(plan, profile)
+        elif self._exec_mode in (ExecMode.LOCAL, ExecMode.LOCAL_PARALLEL):
+            self._profile = profile
+            try:
+                for _ in self.recursive_execute(plan):
+                    pass
+            finally:
+                self._profile = None
+        else:
+            assert False
+        data = imtt.measure()
+        profile.wall_ns = data.t1 - data.t0
+
+        plan.traverse(visit=lambda n: n.finalize())
+        return profile
+
+    def _profile_ray(self, plan: Node, profile: "PlanProfile") -> None:
+        import copy
+        import pickle
+
+        import ray
+
+        from sycamore.transforms.dataset_scan import DatasetScan
+        from sycamore.utils.profiler import PROFILE_METADATA_KEY
+        from sycamore.utils.time_trace import InMemoryTimeTrace
+
+        if not ray.is_initialized():
+            ray_args = self._context.ray_args or {}
+            sycamore_ray_init(**ray_args)
+
+        plan = plan.traverse(visit=visit_parallelism)
+
+        def run(n: Node) -> "Dataset":
+            inputs = [run(c) for c in n.children if c is not None]
+            node = copy.copy(n)
+            node.children = [DatasetScan(ds) for ds in inputs]
+            node.properties = n.properties | {PROFILE_METADATA_KEY: True}
+
+            imtt = InMemoryTimeTrace()
+            ds = node.execute().materialize()
+            data = imtt.measure()
+
+            p = profile.get(n)
+            p.wall_ns += data.t1 - data.t0
+            stats = [pickle.loads(r["stats"]) for r in ds.map_batches(_stage_stats, batch_format="pyarrow").take_all()]
+            for rows, nbytes, batches in stats:
+                p.rows_out += rows
+                p.bytes_out += nbytes
+                for b in batches:
+                    p.merge_dict(b)
+            if any(len(batches) > 0 for _, _, batches in stats):
+                ds = ds.map_batches(_strip_profile_metadata, batch_format="pyarrow").materialize()
+            return ds
+
+        run(plan)
+
     def _prepare(self, plan: Node):
         # Some prepare operations need to execute in phases, running a complete phase over the tree
         # and then running another phase. We use a queue to generate those semantics. For example,
@@ -136,8 +211,21 @@ class Execution:
             if g is not None:
                 pending.put(g)
 
-    def recursive_execute(self, n: Node) -> list[Document]:
+    def recursive_execute(self, n: Node) -> Iterable[Document]:
+        """Lazily execute the plan rooted at n in local mode.
+
+        Sources and streaming transforms (those with a local_execute_iter method) pass documents
+        through as generators so that consumers like take() can stop early. Nodes that only provide
+        local_execute are blocking and receive the fully materialized output of their child. In
+        LOCAL_PARALLEL mode, nodes with a local_parallel_execute_iter method run on a worker pool.
+        """
+        if self._profile is not None:
+            return self._profile.stream(n, lambda: self._execute_node(n))
+        return self._execute_node(n)
+
+    def _execute_node(self, n: Node) -> Iterable[Document]:
         from sycamore.materialize import Materialize
+        from sycamore.result_cache import ResultCache
 
         def get_name(f):
             if hasattr(f, "_name"):
@@ -155,12 +243,52 @@ class Execution:
         if isinstance(n, Materialize) and n._will_be_source():
             logger.info(f"Reading from materialized source {get_name(n)}")
             return n.local_source()
+        if isinstance(n, ResultCache) and n.local_cached():
+            logger.info(f"Reading from cached results {get_name(n)}")
+            return n.local_source()
         if len(n.children) == 1:
-            assert hasattr(n, "local_execute"), f"Transform {n.__class__.__name__} needs a local_execute method"
             assert n.children[0] is not None
             d = self.recursive_execute(n.children[0])
+            if self._exec_mode == ExecMode.LOCAL_PARALLEL and hasattr(n, "local_parallel_execute_iter"):
+                logger.info(f"Streaming node {get_name(n)} in parallel")
+                return n.local_parallel_execute_iter(d, self._context.local_max_workers)
+            if hasattr(n, "local_execute_iter"):
+                logger.info(f"Streaming node {get_name(n)}")
+                return n.local_execute_iter(d)
+            assert hasattr(n, "local_execute"), f"Transform {n.__class__.__name__} needs a local_execute method"
             logger.info(f"Executing node {get_name(n)}")
-            return n.local_execute(d)
+            return n.local_execute(list(d))
 
         assert f"Unable to handle node {n} with multiple children"
         return []
+
+
+def _stage_stats(batch: Any) -> dict[str, list]:
+    import pickle
+
+    from sycamore.data.columnar import table_to_docs
+    from sycamore.data import MetadataDocument
+    from sycamore.utils.profiler import PROFILE_METADATA_KEY, is_profile_metadata
+
+    rows = 0
+    nbytes = 0
+    batches = []
+    for d in table_to_docs(batch) if batch.num_rows > 0 else []:
+        if isinstance(d, MetadataDocument):
+            if is_profile_metadata(d):
+                batches.append(d.metadata[PROFILE_METADATA_KEY])
+        else:
+            rows += 1
+            nbytes += len(d.serialize())
+    return {"stats": [pickle.dumps((rows, nbytes, batches))]}
+
+
+def _strip_profile_metadata(batch: Any) -> Any:
+    import pyarrow as pa
+
+    from sycamore.data.columnar import table_to_docs
+    from sycamore.utils.profiler import is_profile_metadata
+
+    if batch.num_rows == 0:
+        return batch
+    return pa.table({"doc": [d.serialize() for d in table_to_docs(batch) if not is_profile_metadata(d)]})
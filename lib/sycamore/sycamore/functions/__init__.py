@@ -2,6 +2,7 @@ from sycamore.functions.elements import reorder_elements, filter_elements
 from sycamore.functions.chunker import Chunker, TextOverlapChunker
 from sycamore.functions.document import split_and_convert_to_image, DrawBoxes
 from sycamore.functions.tokenizer import Tokenizer, CharacterTokenizer, HuggingFaceTokenizer, OpenAITokenizer
+from sycamore.functions.element_packer import ElementPacker
 
 __all__ = [
     "reorder_elements",
@@ -14,4 +15,5 @@ __all__ = [
     "CharacterTokenizer",
     "HuggingFaceTokenizer",
     "OpenAITokenizer",
+    "ElementPacker",
 ]
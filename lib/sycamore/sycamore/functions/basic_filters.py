@@ -1,12 +1,14 @@
 from typing import Any, Optional
 from abc import ABC, abstractmethod
 from sycamore.data.document import Document
+from sycamore.utils.nested import FieldPath
 from dateutil import parser
 
 
 class BasicFilter(ABC):
     def __init__(self, field: str):
         self._field = field
+        self._path = FieldPath(field)
 
     @abstractmethod
     def __call__(self, document: Document) -> bool:
@@ -30,7 +32,7 @@ class MatchFilter(BasicFilter):
         self._ignore_case = ignore_case
 
     def __call__(self, doc: Document) -> bool:
-        value = doc.field_to_value(self._field)
+        value = self._path.lookup(doc)
 
         # substring matching
         if isinstance(self._query, str) or isinstance(value, str):
@@ -71,7 +73,7 @@ class RangeFilter(BasicFilter):
         self._date = date
 
     def __call__(self, doc: Document) -> bool:
-        value = doc.field_to_value(self._field)
+        value = self._path.lookup(doc)
         # Skip missing values.
         if not value:
             return False
@@ -0,0 +1,99 @@
+from typing import Optional, TYPE_CHECKING
+
+from sycamore.data import Document, Element
+from sycamore.functions.tokenizer import Tokenizer
+from sycamore.utils.nested import FieldPath
+from sycamore.utils.profiler import count_event
+
+if TYPE_CHECKING:
+    from sycamore.transforms.similarity import SimilarityScorer
+
+# The document property the extractors record the packed elements' token count in.
+PROMPT_TOKENS_PROPERTY = "_prompt_element_tokens"
+
+
+class ElementPacker:
+    """
+    The ``ElementPacker`` chooses the elements of a document to put in a prompt, filling a token budget instead of
+    taking a fixed number of elements. Elements are taken in order of their value, either their position in the
+    document or a similarity score, and any element that no longer fits is skipped in favor of smaller ones. The
+    chosen elements are returned in document order.
+
+    Args:
+        tokenizer: The tokenizer of the model the prompt is for.
+        max_tokens: The number of tokens the elements may use.
+        score_property: If set, elements are ranked by this element property, highest first, instead of by
+            position. Elements without it, or where it is None, come last.
+        scorer: If set, the elements are ranked by their score against query with this scorer instead. The
+            scores are not stored on the elements.
+        query: The query to score elements against.
+        element_overhead_tokens: The tokens each element costs in addition to its text, for the
+            "ELEMENT n: " prefix that the prompt formatters add.
+
+    Example:
+        .. code-block:: python
+
+            packer = ElementPacker(OpenAITokenizer("gpt-4o"), max_tokens=4000)
+            entity_extractor = OpenAIEntityExtractor("title", llm=openai_llm, element_packer=packer)
+    """
+
+    def __init__(
+        self,
+        tokenizer: Tokenizer,
+        max_tokens: int,
+        score_property: Optional[str] = None,
+        scorer: Optional["SimilarityScorer"] = None,
+        query: Optional[str] = None,
+        element_overhead_tokens: int = 5,
+    ):
+        if scorer is not None:
+            assert query is not None, "scoring elements requires a query"
+        self.tokenizer = tokenizer
+        self.max_tokens = max_tokens
+        self.score_property = score_property
+        self.scorer = scorer
+        self.query = query
+        self.element_overhead_tokens = element_overhead_tokens
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.tokenizer.tokenize(text, as_ints=True))
+
+    def pack(self, document: Document, field: str = "text_representation") -> tuple[list[Element], int]:
+        """Returns the elements to prompt with and the number of tokens they use. Elements without the field
+        cost no tokens. The tokens and the elements left out are counted as prompt_element_tokens and
+        prompt_elements_skipped when profiling."""
+        path = FieldPath.of(field)
+        ranked = list(enumerate(document.elements))
+        scores = self._scores(document)
+        if scores is not None:
+            ranked.sort(key=lambda e: -scores.get(e[0], float("-inf")))
+
+        chosen = []
+        used = 0
+        for position, element in ranked:
+            value = path.lookup(element)
+            cost = self.element_overhead_tokens + (self.count_tokens(str(value)) if value is not None else 0)
+            if used + cost > self.max_tokens:
+                continue
+            chosen.append(position)
+            used += cost
+        count_event("prompt_element_tokens", used)
+        count_event("prompt_elements_skipped", len(ranked) - len(chosen))
+        return [document.elements[i] for i in sorted(chosen)], used
+
+    def _scores(self, document: Document) -> Optional[dict[int, float]]:
+        """Returns the score of each element by position, leaving out elements without one."""
+        if self.scorer is not None:
+            assert self.query is not None
+            positions = [i for i, e in enumerate(document.elements) if e.text_representation]
+            if not positions:
+                return {}
+            pairs = [(self.query, document.elements[i].text_representation or "") for i in positions]
+            return dict(zip(positions, self.scorer.score(pairs)))
+        if self.score_property is not None:
+            return {
+                i: score
+                for i, e in enumerate(document.elements)
+                if (score := e.properties.get(self.score_property)) is not None
+            }
+        return None
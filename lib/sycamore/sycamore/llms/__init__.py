@@ -1,4 +1,22 @@
 from sycamore.llms.llms import LLM
-from sycamore.llms.openai import OpenAI, OpenAIClientType, OpenAIModels, OpenAIClientParameters, OpenAIClientWrapper
+from sycamore.llms.batch import BatchJobClient, LocalBatchJobClient
+from sycamore.llms.openai import (
+    OpenAI,
+    OpenAIBatchJobClient,
+    OpenAIClientType,
+    OpenAIModels,
+    OpenAIClientParameters,
+    OpenAIClientWrapper,
+)
 
-__all__ = ["LLM", "OpenAI", "OpenAIClientType", "OpenAIModels", "OpenAIClientParameters", "OpenAIClientWrapper"]
+__all__ = [
+    "LLM",
+    "BatchJobClient",
+    "LocalBatchJobClient",
+    "OpenAI",
+    "OpenAIBatchJobClient",
+    "OpenAIClientType",
+    "OpenAIModels",
+    "OpenAIClientParameters",
+    "OpenAIClientWrapper",
+]
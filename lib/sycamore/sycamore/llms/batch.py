@@ -0,0 +1,254 @@
+"""
+Offline batch jobs for LLM calls.
+
+Providers like OpenAI accept a file of requests as a batch job that completes within hours at a fraction of the
+price of interactive calls. An LLM in batch mode (see LLM.use_batch_jobs) does not send the requests made with
+generate_async right away. It collects the ones made while the transform processes a batch of documents, writes
+them to a JSONL file, submits the file through a BatchJobClient, polls until the job is done and hands each
+response back to the call that asked for it, matched by custom_id.
+
+Batch mode is driven by the concurrent execution mode of the LLM transforms, so a transform must be run with
+max_concurrency set. max_concurrency does not limit the size of jobs: a document waiting for a job gives up its
+place, so the requests for all the documents of a batch go into one job, up to max_batch_size requests. Since
+the transform waits for the job before moving on to its next batch, the batch_size of the transform sets the
+size of the jobs, and the default of a hundred documents makes for many small jobs run one after another.
+Offline runs should use a batch_size in the thousands, e.g.
+
+.. code-block:: python
+
+    docset.extract_entity(extractor, max_concurrency=8, batch_size=50_000)
+
+Jobs for different batches run at the same time when the batches do, on different ray workers or with
+local parallelism.
+
+The request and result files have the format of the OpenAI batch API:
+
+.. code-block:: python
+
+    {"custom_id": "request-0", "method": "POST", "url": "/v1/chat/completions", "body": {...}}
+    {"custom_id": "request-0", "response": {"status_code": 200, "body": {...}}, "error": None}
+"""
+
+from abc import ABC, abstractmethod
+import asyncio
+import json
+import logging
+import os
+from pathlib import Path
+import tempfile
+import time
+from typing import Any, Optional, TYPE_CHECKING
+import uuid
+import weakref
+
+from sycamore.utils.async_utils import release_concurrency_slot
+
+if TYPE_CHECKING:
+    from sycamore.llms.llms import LLM
+
+logger = logging.getLogger(__name__)
+
+IN_PROGRESS = "in_progress"
+COMPLETED = "completed"
+FAILED = "failed"
+
+CHAT_COMPLETIONS_URL = "/v1/chat/completions"
+
+# The event loop only keeps weak references to tasks.
+_submit_tasks: set[asyncio.Task] = set()
+
+
+class BatchJobClient(ABC):
+    """Submits files of requests as batch jobs and retrieves their results."""
+
+    @abstractmethod
+    def submit(self, path: str) -> str:
+        """Submits the JSONL file of requests at path and returns the id of the job."""
+        pass
+
+    @abstractmethod
+    def status(self, job_id: str) -> str:
+        """Returns IN_PROGRESS, COMPLETED or FAILED."""
+        pass
+
+    @abstractmethod
+    def results(self, job_id: str) -> list[dict[str, Any]]:
+        """Returns the result lines of a completed job. A job may leave out requests it could not run."""
+        pass
+
+
+class LocalBatchJobClient(BatchJobClient):
+    """
+    A stand-in for a batch job service that keeps its jobs in a local directory, for testing and for running
+    batch mode pipelines without a provider. The requests are answered by llm, called synchronously, when the
+    job completes.
+
+    Args:
+        root: The directory to keep jobs in. Each job is a directory holding its input.jsonl and output.jsonl.
+        llm: The LLM that answers the requests, e.g. a FakeLLM.
+        polls_until_done: How many calls to status report a job as in progress before it completes.
+
+    Example:
+         .. code-block:: python
+
+            llm = OpenAI(OpenAIModels.GPT_4O_MINI).use_batch_jobs(LocalBatchJobClient("/tmp/jobs", FakeLLM()))
+    """
+
+    def __init__(self, root: str, llm: "LLM", polls_until_done: int = 0):
+        self._root = Path(root)
+        self._llm = llm
+        self._polls_until_done = polls_until_done
+        self._polls: dict[str, int] = {}
+
+    def submit(self, path: str) -> str:
+        job_id = f"batch_{uuid.uuid4().hex}"
+        job_dir = self._root / job_id
+        job_dir.mkdir(parents=True)
+        (job_dir / "input.jsonl").write_bytes(Path(path).read_bytes())
+        return job_id
+
+    def status(self, job_id: str) -> str:
+        job_dir = self._root / job_id
+        if not (job_dir / "input.jsonl").exists():
+            return FAILED
+        polls = self._polls.get(job_id, 0)
+        self._polls[job_id] = polls + 1
+        if polls < self._polls_until_done:
+            return IN_PROGRESS
+        if not (job_dir / "output.jsonl").exists():
+            self._run(job_dir)
+        return COMPLETED
+
+    def results(self, job_id: str) -> list[dict[str, Any]]:
+        with open(self._root / job_id / "output.jsonl") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def _run(self, job_dir: Path) -> None:
+        with open(job_dir / "input.jsonl") as f:
+            requests = [json.loads(line) for line in f if line.strip()]
+        lines = []
+        for request in requests:
+            body = dict(request["body"])
+            body.pop("model", None)
+            messages = body.pop("messages")
+            try:
+                content = self._llm.generate(prompt_kwargs={"messages": messages}, llm_kwargs=body)
+                response = {"status_code": 200, "body": {"choices": [{"message": {"content": content}}]}}
+                lines.append({"custom_id": request["custom_id"], "response": response, "error": None})
+            except Exception as e:
+                error = {"code": type(e).__name__, "message": str(e)}
+                lines.append({"custom_id": request["custom_id"], "response": None, "error": error})
+        tmp = job_dir / "output.jsonl.tmp"
+        tmp.write_text("".join(json.dumps(line) + "\n" for line in lines))
+        os.replace(tmp, job_dir / "output.jsonl")
+
+
+class BatchJobError(Exception):
+    """Raised by LLM.generate_async in batch mode when the job or the request failed."""
+
+
+class BatchMode:
+    """
+    How an LLM in batch mode submits its requests. Created by LLM.use_batch_jobs; see there for the arguments.
+    """
+
+    def __init__(
+        self,
+        client: BatchJobClient,
+        work_dir: Optional[str] = None,
+        poll_interval_seconds: float = 60.0,
+        max_batch_size: int = 50_000,
+        timeout_seconds: Optional[float] = None,
+    ):
+        assert max_batch_size > 0, "max_batch_size must be positive"
+        self.client = client
+        self.work_dir = work_dir
+        self.poll_interval_seconds = poll_interval_seconds
+        self.max_batch_size = max_batch_size
+        self.timeout_seconds = timeout_seconds
+        # Requests that have not been submitted yet, per event loop since each thread runs its own.
+        self._pending: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, list] = weakref.WeakKeyDictionary()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_pending"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._pending = weakref.WeakKeyDictionary()
+
+    async def generate(self, llm: "LLM", prompt_kwargs: dict, llm_kwargs: Optional[dict]) -> str:
+        """Adds the request to the next job and returns its response once the job is done."""
+        body = llm.batch_request(prompt_kwargs, llm_kwargs)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending.get(loop)
+        if pending is None:
+            pending = []
+            self._pending[loop] = pending
+            task = loop.create_task(self._submit_when_idle(loop, pending))
+            _submit_tasks.add(task)
+            task.add_done_callback(_submit_tasks.discard)
+        pending.append((llm, body, future))
+        if len(pending) >= self.max_batch_size:
+            del self._pending[loop]
+        # Let more documents of the batch reach their LLM calls while this one waits for the job.
+        release_concurrency_slot()
+        return await future
+
+    async def _submit_when_idle(self, loop: asyncio.AbstractEventLoop, pending: list) -> None:
+        # Let the other documents of the batch reach their LLM calls; once a pass over the ready tasks adds no
+        # more requests, everything that can run before the responses arrive is waiting for them.
+        count = -1
+        while count != len(pending) and self._pending.get(loop) is pending:
+            count = len(pending)
+            await asyncio.sleep(0)
+        if self._pending.get(loop) is pending:
+            del self._pending[loop]
+        try:
+            await self._run(pending)
+        except BaseException as e:
+            for _, _, future in pending:
+                if not future.done():
+                    future.set_exception(e if isinstance(e, Exception) else BatchJobError(repr(e)))
+            if not isinstance(e, Exception):
+                raise
+
+    async def _run(self, pending: list) -> None:
+        lines = [
+            {"custom_id": f"request-{i}", "method": "POST", "url": CHAT_COMPLETIONS_URL, "body": body}
+            for i, (_, body, _) in enumerate(pending)
+        ]
+        fd, path = tempfile.mkstemp(prefix="sycamore-batch-", suffix=".jsonl", dir=self.work_dir)
+        try:
+            with os.fdopen(fd, "w") as f:
+                for line in lines:
+                    f.write(json.dumps(line) + "\n")
+            job_id = await asyncio.to_thread(self.client.submit, path)
+        finally:
+            os.unlink(path)
+        logger.info(f"Submitted batch job {job_id} with {len(lines)} requests")
+
+        start = time.monotonic()
+        while (status := await asyncio.to_thread(self.client.status, job_id)) == IN_PROGRESS:
+            if self.timeout_seconds is not None and time.monotonic() - start > self.timeout_seconds:
+                raise BatchJobError(f"Batch job {job_id} did not finish within {self.timeout_seconds}s")
+            await asyncio.sleep(self.poll_interval_seconds)
+        if status != COMPLETED:
+            raise BatchJobError(f"Batch job {job_id} {status}")
+
+        results = {r["custom_id"]: r for r in await asyncio.to_thread(self.client.results, job_id)}
+        for line, (llm, _, future) in zip(lines, pending):
+            result = results.get(line["custom_id"])
+            if future.done():  # The caller was cancelled.
+                continue
+            elif result is None:
+                future.set_exception(BatchJobError(f"Batch job {job_id} returned no result for a request"))
+            elif result.get("error") or (result.get("response") or {}).get("status_code") != 200:
+                future.set_exception(BatchJobError(f"Batch job {job_id} request failed: {result}"))
+            else:
+                try:
+                    future.set_result(llm.batch_response(result["response"]["body"]))
+                except Exception as e:
+                    future.set_exception(e)
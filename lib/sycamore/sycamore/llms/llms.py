@@ -1,6 +1,8 @@
 from abc import ABC, abstractmethod
-from typing import Optional
+import asyncio
+from typing import Any, Optional
 
+from sycamore.llms.batch import BatchJobClient, BatchMode
 from sycamore.utils.cache import Cache
 
 
@@ -9,6 +11,9 @@ class LLM(ABC):
     Initializes a new LLM instance. This class is abstract and should be subclassed to implement specific LLM providers.
     """
 
+    # Set by use_batch_jobs.
+    _batch_mode: Optional[BatchMode] = None
+
     def __init__(self, model_name, cache: Optional[Cache] = None):
         self._model_name = model_name
         self._cache = cache
@@ -29,8 +34,68 @@ class LLM(ABC):
     def is_chat_mode(self) -> bool:
         pass
 
+    """
+    Generates a response from the LLM without blocking the event loop. Subclasses with an asynchronous client
+    should override this; by default, generate is run in a separate thread.
+    """
+
     async def generate_async(self, *, prompt_kwargs: dict, llm_kwargs: Optional[dict] = None) -> str:
-        raise ValueError("No implementation for llm futures exists")
+        if self._batch_mode is not None:
+            return await self._batch_mode.generate(self, prompt_kwargs, llm_kwargs)
+        return await asyncio.to_thread(self.generate, prompt_kwargs=prompt_kwargs, llm_kwargs=llm_kwargs)
+
+    def use_batch_jobs(
+        self,
+        client: BatchJobClient,
+        *,
+        work_dir: Optional[str] = None,
+        poll_interval_seconds: float = 60.0,
+        max_batch_size: int = 50_000,
+        timeout_seconds: Optional[float] = None,
+    ) -> "LLM":
+        """
+        Switches this LLM to batch mode and returns it. In batch mode, the calls to generate_async made while a
+        transform processes a batch of documents are submitted together as an offline batch job through client,
+        and each call returns once the job is done. generate is not affected. The size of the jobs is set by
+        the batch_size of the transform, which should be large; see sycamore.llms.batch.
+
+        Only LLMs for which supports_batch_jobs is True can be switched to batch mode.
+
+        Args:
+            client: The batch job service to submit to, e.g. OpenAIBatchJobClient or LocalBatchJobClient.
+            work_dir: Where to write request files before they are submitted. Defaults to the temp directory.
+            poll_interval_seconds: How long to wait between checks of the status of a job.
+            max_batch_size: The most requests to put in one job.
+            timeout_seconds: How long to wait for a job before failing its requests. Defaults to no limit.
+
+        Example:
+             .. code-block:: python
+
+                llm = OpenAI(OpenAIModels.GPT_4O_MINI).use_batch_jobs(OpenAIBatchJobClient())
+                docset.extract_entity(OpenAIEntityExtractor("title", llm=llm), max_concurrency=8, batch_size=50_000)
+        """
+        if not self.supports_batch_jobs():
+            raise ValueError(f"{self.__class__.__name__} does not support batch jobs")
+        self._batch_mode = BatchMode(
+            client,
+            work_dir=work_dir,
+            poll_interval_seconds=poll_interval_seconds,
+            max_batch_size=max_batch_size,
+            timeout_seconds=timeout_seconds,
+        )
+        return self
+
+    def supports_batch_jobs(self) -> bool:
+        """Returns True if this LLM implements batch_request and batch_response."""
+        return False
+
+    def batch_request(self, prompt_kwargs: dict, llm_kwargs: Optional[dict] = None) -> dict[str, Any]:
+        """Returns the body of the batch job request that corresponds to a call to generate."""
+        raise NotImplementedError(f"{self.__class__.__name__} does not support batch jobs")
+
+    def batch_response(self, body: dict[str, Any]) -> str:
+        """Returns the text that generate would have returned for the body of a batch job response."""
+        raise NotImplementedError(f"{self.__class__.__name__} does not support batch jobs")
 
 
 class FakeLLM(LLM):
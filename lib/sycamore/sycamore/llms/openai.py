@@ -1,27 +1,34 @@
+import asyncio
 import functools
 import inspect
+import json
 import logging
 import os
 import pickle
 from dataclasses import dataclass
 from enum import Enum
-from typing import Any, Optional, TypedDict, Union, cast, TYPE_CHECKING
+import hashlib
+from typing import Any, Mapping, Optional, TypedDict, Union, cast, TYPE_CHECKING
 
 from openai import AzureOpenAI as AzureOpenAIClient
 from openai import AsyncAzureOpenAI as AsyncAzureOpenAIClient
 from openai import OpenAI as OpenAIClient
 from openai import AsyncOpenAI as AsyncOpenAIClient
 from openai import max_retries as DEFAULT_MAX_RETRIES
+from openai import APIConnectionError, InternalServerError, RateLimitError
 from openai.lib.azure import AzureADTokenProvider
 from openai.lib._parsing import type_to_response_format_param
 
 
 import pydantic
 
+from sycamore.llms.batch import BatchJobClient, BatchMode, COMPLETED, FAILED, IN_PROGRESS
 from sycamore.llms.guidance import execute_with_guidance
 from sycamore.llms.llms import LLM
 from sycamore.llms.prompts import SimplePrompt
-from sycamore.utils.cache import Cache
+from sycamore.utils.cache import LLM_NAMESPACE, Cache, get_async
+from sycamore.utils.profiler import count_event
+from sycamore.utils.rate_limit import RateLimiter, estimate_tokens
 
 if TYPE_CHECKING:
     from guidance.models import Model
@@ -294,8 +301,111 @@ class OpenAIClientWrapper:
 OpenAIClientParameters = OpenAIClientWrapper
 
 
-def openai_deserializer(kwargs):
-    return OpenAI(**kwargs)
+class OpenAIBatchJobClient(BatchJobClient):
+    """
+    Submits batch jobs to the OpenAI batch API, which runs them within 24 hours at a discount.
+
+    Args:
+        client_wrapper: The OpenAIClientWrapper to use. Defaults to one created from the environment.
+    """
+
+    def __init__(self, client_wrapper: Optional[OpenAIClientWrapper] = None):
+        self._client_wrapper = client_wrapper or OpenAIClientWrapper()
+
+    def submit(self, path: str) -> str:
+        client = self._client_wrapper.get_client()
+        with open(path, "rb") as f:
+            input_file = client.files.create(file=f, purpose="batch")
+        batch = client.batches.create(
+            input_file_id=input_file.id, endpoint="/v1/chat/completions", completion_window="24h"
+        )
+        return batch.id
+
+    def status(self, job_id: str) -> str:
+        status = self._client_wrapper.get_client().batches.retrieve(job_id).status
+        if status == "completed":
+            return COMPLETED
+        if status in ("failed", "expired", "cancelled", "cancelling"):
+            return FAILED
+        return IN_PROGRESS
+
+    def results(self, job_id: str) -> list[dict[str, Any]]:
+        client = self._client_wrapper.get_client()
+        batch = client.batches.retrieve(job_id)
+        lines: list[dict[str, Any]] = []
+        # Requests that failed are in the error file, the others in the output file.
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id is not None:
+                text = client.files.content(file_id).text
+                lines.extend(json.loads(line) for line in text.splitlines() if line.strip())
+        return lines
+
+
+def openai_throttle_headers(e: Exception) -> Optional[Mapping[str, str]]:
+    """Returns the headers of an OpenAI error that a RateLimiter should retry after pausing, or None."""
+    if isinstance(e, RateLimitError):
+        # Running out of quota does not get better by waiting.
+        return None if e.code == "insufficient_quota" else e.response.headers
+    if isinstance(e, InternalServerError):
+        return e.response.headers
+    if isinstance(e, APIConnectionError):
+        return {}
+    return None
+
+
+def _estimate_request_tokens(kwargs: dict) -> int:
+    # OpenAI counts the text of the messages and the maximum number of completion tokens against the limit.
+    text = []
+    for message in kwargs.get("messages", []):
+        content = message.get("content")
+        if isinstance(content, str):
+            text.append(content)
+        elif isinstance(content, list):
+            text.extend(part.get("text", "") for part in content if isinstance(part, dict))
+    return estimate_tokens("".join(text)) + (kwargs.get("max_completion_tokens") or kwargs.get("max_tokens") or 0)
+
+
+# Bumped whenever the canonical form of a cached request changes.
+CACHE_KEY_VERSION = 2
+
+
+def _canonical(obj: Any) -> Any:
+    """Returns obj as plain JSON data that is the same for equal requests, whatever the worker or release."""
+    if obj is None or isinstance(obj, (str, bool, int, float)):
+        return obj
+    if isinstance(obj, Enum):
+        return _canonical(obj.value)
+    if isinstance(obj, dict):
+        return {str(k): _canonical(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_canonical(v) for v in obj]
+    if inspect.isclass(obj) and issubclass(obj, pydantic.BaseModel):
+        # Identified by the schema OpenAI gets, not by the identity of the class.
+        return _canonical(type_to_response_format_param(obj))
+    if isinstance(obj, pydantic.BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, bytes):
+        return {"__bytes__": hashlib.sha256(obj).hexdigest()}
+    # Other objects, e.g. guidance prompts, are identified like pickle does: by their class and their state.
+    cls = type(obj)
+    return {"__class__": f"{cls.__module__}.{cls.__qualname__}", "state": _canonical(getattr(obj, "__dict__", {}))}
+
+
+def canonical_request(model_name: str, prompt_kwargs: dict, llm_kwargs: Optional[dict]) -> str:
+    """Returns the normalized JSON of a request that its cache key is the hash of."""
+    combined = {
+        "version": CACHE_KEY_VERSION,
+        "model_name": model_name,
+        "prompt_kwargs": _canonical(prompt_kwargs),
+        "llm_kwargs": _canonical(llm_kwargs),
+    }
+    return json.dumps(combined, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def openai_deserializer(kwargs, batch_mode: Optional[BatchMode] = None):
+    llm = OpenAI(**kwargs)
+    llm._batch_mode = batch_mode
+    return llm
 
 
 class OpenAI(LLM):
@@ -306,6 +416,8 @@ class OpenAI(LLM):
         client_wrapper: Optional[OpenAIClientWrapper] = None,
         params: Optional[OpenAIClientParameters] = None,
         cache: Optional[Cache] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        legacy_cache_keys: bool = True,
         **kwargs,
     ):
         if isinstance(model_name, OpenAIModels):
@@ -337,54 +449,100 @@ class OpenAI(LLM):
                 client_wrapper.api_key = api_key
 
         self.client_wrapper = client_wrapper
+        self._rate_limiter = rate_limiter
+        # Whether a cache miss also looks for the entry under the pickle based key of older releases.
+        self._legacy_cache_keys = legacy_cache_keys
 
     # The actual openai client is not pickleable, This just says to pickle the wrapper, which can be used to
     # recreate the client on the other end.
     def __reduce__(self):
 
-        kwargs = {"client_wrapper": self.client_wrapper, "model_name": self._model_name, "cache": self._cache}
+        kwargs = {
+            "client_wrapper": self.client_wrapper,
+            "model_name": self._model_name,
+            "cache": self._cache,
+            "rate_limiter": self._rate_limiter,
+            "legacy_cache_keys": self._legacy_cache_keys,
+        }
 
-        return openai_deserializer, (kwargs,)
+        return openai_deserializer, (kwargs, self._batch_mode)
 
     def is_chat_mode(self):
         return self.model.is_chat
 
     def _get_cache_key(self, prompt_kwargs: dict, llm_kwargs: Optional[dict] = None) -> str:
+        assert self._cache
+        data = canonical_request(self.model.name, prompt_kwargs, llm_kwargs).encode("utf-8")
+        return self._cache.get_hash_context(data).hexdigest()
+
+    def _get_legacy_cache_key(self, prompt_kwargs: dict, llm_kwargs: Optional[dict] = None) -> str:
+        # Depends on dict order, the python version and pickle details, so equal requests can get different keys.
         assert self._cache
         combined = {"prompt_kwargs": prompt_kwargs, "llm_kwargs": llm_kwargs, "model_name": self.model.name}
         data = pickle.dumps(combined)
         return self._cache.get_hash_context(data).hexdigest()
 
-    def _cache_get(self, prompt_kwargs: dict, llm_kwargs: Optional[dict] = None):
+    def _cache_key(self, prompt_kwargs: dict, llm_kwargs: Optional[dict] = None) -> Optional[str]:
         if (llm_kwargs or {}).get("temperature", 0) != 0 or not self._cache:
             # Never cache when temperature setting is nonzero.
-            return (None, None)
+            return None
 
         response_format = (llm_kwargs or {}).get("response_format")
         if inspect.isclass(response_format) and issubclass(response_format, pydantic.BaseModel):
             assert llm_kwargs
             llm_kwargs["response_format"] = type_to_response_format_param(response_format)
 
-        key = self._get_cache_key(prompt_kwargs, llm_kwargs)
+        return self._get_cache_key(prompt_kwargs, llm_kwargs)
+
+    def _cache_get(self, prompt_kwargs: dict, llm_kwargs: Optional[dict] = None):
+        key = self._cache_key(prompt_kwargs, llm_kwargs)
+        if key is None:
+            return (None, None)
+        assert self._cache
         hit = self._cache.get(key)
+        if not hit and self._legacy_cache_keys:
+            hit = self._migrate_legacy_hit(key, self._cache.get(self._get_legacy_cache_key(prompt_kwargs, llm_kwargs)))
+        return (key, self._cache_result(key, hit, prompt_kwargs, llm_kwargs))
+
+    async def _cache_get_async(self, prompt_kwargs: dict, llm_kwargs: Optional[dict] = None):
+        # Concurrent lookups are combined into one get_many call.
+        key = self._cache_key(prompt_kwargs, llm_kwargs)
+        if key is None:
+            return (None, None)
+        assert self._cache
+        hit = await get_async(self._cache, key)
+        if not hit and self._legacy_cache_keys:
+            legacy_hit = await get_async(self._cache, self._get_legacy_cache_key(prompt_kwargs, llm_kwargs))
+            hit = self._migrate_legacy_hit(key, legacy_hit)
+        return (key, self._cache_result(key, hit, prompt_kwargs, llm_kwargs))
+
+    def _migrate_legacy_hit(self, key: str, hit: Any) -> Any:
         if hit:
-            assert (
-                hit.get("prompt_kwargs") == prompt_kwargs
-                and hit.get("llm_kwargs") == llm_kwargs
-                and hit.get("model_name") == self.model.name
-            ), f"""
-            Found cache content mismatch:
-            key={key}
-            prompt_kwargs={prompt_kwargs}, cached={hit.get("prompt_kwargs")}
-            llm_kwargs={llm_kwargs}, cached={hit.get("llm_kwargs")}
-            model_name={self.model.name}, cached={hit.get("model_name")}"""
-            return (key, hit.get("result"))
-        return (key, None)
+            assert self._cache
+            count_event("llm_cache_legacy_hits")
+            # Migrate the entry, so that the next lookup finds it under the canonical key.
+            self._cache.set(key, hit, namespace=LLM_NAMESPACE)
+        return hit
+
+    def _cache_result(self, key: str, hit: Any, prompt_kwargs: dict, llm_kwargs: Optional[dict]) -> Optional[str]:
+        if not hit:
+            return None
+        assert canonical_request(
+            hit.get("model_name"), hit.get("prompt_kwargs"), hit.get("llm_kwargs")
+        ) == canonical_request(
+            self.model.name, prompt_kwargs, llm_kwargs
+        ), f"""
+        Found cache content mismatch:
+        key={key}
+        prompt_kwargs={prompt_kwargs}, cached={hit.get("prompt_kwargs")}
+        llm_kwargs={llm_kwargs}, cached={hit.get("llm_kwargs")}
+        model_name={self.model.name}, cached={hit.get("model_name")}"""
+        return hit.get("result")
 
     def _cache_set(self, key, result):
         if key is None or not self._cache:
             return
-        self._cache.set(key, result)
+        self._cache.set(key, result, namespace=LLM_NAMESPACE)
 
     def _get_generate_kwargs(self, prompt_kwargs: dict, llm_kwargs: Optional[dict] = None) -> dict:
         kwargs = {
@@ -412,8 +570,10 @@ class OpenAI(LLM):
             return False
 
     def generate(self, *, prompt_kwargs: dict, llm_kwargs: Optional[dict] = None) -> str:
+        count_event("llm_calls")
         key, ret = self._cache_get(prompt_kwargs, llm_kwargs)
         if ret is not None:
+            count_event("llm_cache_hits")
             return ret
 
         if llm_kwargs is not None:
@@ -437,14 +597,14 @@ class OpenAI(LLM):
     def _generate_using_openai(self, prompt_kwargs, llm_kwargs) -> str:
         kwargs = self._get_generate_kwargs(prompt_kwargs, llm_kwargs)
         logging.debug("OpenAI prompt: %s", kwargs)
-        completion = self.client_wrapper.get_client().chat.completions.create(model=self._model_name, **kwargs)
+        completion = self._create_completion(False, kwargs)
         logging.debug("OpenAI completion: %s", completion)
         return completion.choices[0].message.content
 
     def _generate_using_openai_structured(self, prompt_kwargs, llm_kwargs) -> str:
         try:
             kwargs = self._get_generate_kwargs(prompt_kwargs, llm_kwargs)
-            completion = self.client_wrapper.get_client().beta.chat.completions.parse(model=self._model_name, **kwargs)
+            completion = self._create_completion(True, kwargs)
             assert completion.choices[0].message.content is not None, "OpenAI refused to respond to the query"
             return completion.choices[0].message.content
         except Exception as e:
@@ -454,13 +614,19 @@ class OpenAI(LLM):
             raise e
 
     async def generate_async(self, *, prompt_kwargs: dict, llm_kwargs: Optional[dict] = None) -> str:
-        key, ret = self._cache_get(prompt_kwargs, llm_kwargs)
+        if llm_kwargs is None:
+            # Guidance prompts have no asynchronous or batch implementation.
+            return await asyncio.to_thread(self.generate, prompt_kwargs=prompt_kwargs, llm_kwargs=llm_kwargs)
+
+        count_event("llm_calls")
+        key, ret = await self._cache_get_async(prompt_kwargs, llm_kwargs)
         if ret is not None:
+            count_event("llm_cache_hits")
             return ret
 
-        if llm_kwargs is None:
-            raise ValueError("Must include llm_kwargs to generate future call")
-        if self._determine_using_beta(llm_kwargs.get("response_format", None)):
+        if self._batch_mode is not None:
+            ret = await self._batch_mode.generate(self, prompt_kwargs, llm_kwargs)
+        elif self._determine_using_beta(llm_kwargs.get("response_format", None)):
             ret = await self._generate_awaitable_using_openai_structured(prompt_kwargs, llm_kwargs)
         else:
             ret = await self._generate_awaitable_using_openai(prompt_kwargs, llm_kwargs)
@@ -474,19 +640,31 @@ class OpenAI(LLM):
         self._cache_set(key, value)
         return ret
 
+    def supports_batch_jobs(self) -> bool:
+        return True
+
+    def batch_request(self, prompt_kwargs: dict, llm_kwargs: Optional[dict] = None) -> dict[str, Any]:
+        if llm_kwargs is None:
+            raise ValueError("Guidance prompts can not be sent as batch jobs")
+        response_format = llm_kwargs.get("response_format")
+        if inspect.isclass(response_format) and issubclass(response_format, pydantic.BaseModel):
+            llm_kwargs = {**llm_kwargs, "response_format": type_to_response_format_param(response_format)}
+        return {"model": self._model_name, **self._get_generate_kwargs(prompt_kwargs, llm_kwargs)}
+
+    def batch_response(self, body: dict[str, Any]) -> str:
+        content = body["choices"][0]["message"]["content"]
+        assert content is not None, "OpenAI refused to respond to the query"
+        return content
+
     async def _generate_awaitable_using_openai(self, prompt_kwargs, llm_kwargs) -> str:
         kwargs = self._get_generate_kwargs(prompt_kwargs, llm_kwargs)
-        completion = await self.client_wrapper.get_async_client().chat.completions.create(
-            model=self._model_name, **kwargs
-        )
+        completion = await self._create_completion_async(False, kwargs)
         return completion.choices[0].message.content
 
     async def _generate_awaitable_using_openai_structured(self, prompt_kwargs, llm_kwargs) -> str:
         try:
             kwargs = self._get_generate_kwargs(prompt_kwargs, llm_kwargs)
-            completion = await self.client_wrapper.get_async_client().beta.chat.completions.parse(
-                model=self._model_name, **kwargs
-            )
+            completion = await self._create_completion_async(True, kwargs)
             assert completion.choices[0].message.content is not None, "OpenAI refused to respond to the query"
             return completion.choices[0].message.content
         except Exception as e:
@@ -495,6 +673,51 @@ class OpenAI(LLM):
             # 2.) The LLM refused to respond to the request because it did not meet guidelines
             raise e
 
+    def _create_completion(self, structured: bool, kwargs: dict) -> Any:
+        client = self.client_wrapper.get_client()
+        if self._rate_limiter is None:
+            if structured:
+                return client.beta.chat.completions.parse(model=self._model_name, **kwargs)
+            return client.chat.completions.create(model=self._model_name, **kwargs)
+
+        # The limiter does the retrying, so that every worker waits for as long as the service asks.
+        client = client.with_options(max_retries=0)
+        create: Any = (
+            client.beta.chat.completions.with_raw_response.parse
+            if structured
+            else client.chat.completions.with_raw_response.create
+        )
+        tokens = _estimate_request_tokens(kwargs)
+        raw = self._rate_limiter.call(lambda: create(model=self._model_name, **kwargs), tokens, openai_throttle_headers)
+        return self._parse_raw_response(raw, tokens)
+
+    async def _create_completion_async(self, structured: bool, kwargs: dict) -> Any:
+        client = self.client_wrapper.get_async_client()
+        if self._rate_limiter is None:
+            if structured:
+                return await client.beta.chat.completions.parse(model=self._model_name, **kwargs)
+            return await client.chat.completions.create(model=self._model_name, **kwargs)
+
+        client = client.with_options(max_retries=0)
+        create: Any = (
+            client.beta.chat.completions.with_raw_response.parse
+            if structured
+            else client.chat.completions.with_raw_response.create
+        )
+        tokens = _estimate_request_tokens(kwargs)
+        raw = await self._rate_limiter.call_async(
+            lambda: create(model=self._model_name, **kwargs), tokens, openai_throttle_headers
+        )
+        return await asyncio.to_thread(self._parse_raw_response, raw, tokens)
+
+    def _parse_raw_response(self, raw: Any, tokens: int) -> Any:
+        assert self._rate_limiter is not None
+        self._rate_limiter.observe(raw.headers)
+        completion = raw.parse()
+        if completion.usage is not None:
+            self._rate_limiter.add_tokens(tokens - completion.usage.total_tokens)
+        return completion
+
     def _generate_using_guidance(self, prompt_kwargs) -> str:
         guidance_model = self.client_wrapper.get_guidance_model(self.model)
         prompt: SimplePrompt = prompt_kwargs.pop("prompt")
@@ -1,9 +1,16 @@
+import copy
+from hashlib import sha256
+import json
 import logging
 from pathlib import Path
-from typing import Any, Optional, Tuple, Union, TYPE_CHECKING
+import pickle
+import re
+from typing import Any, Iterable, Iterator, Optional, Tuple, Union, TYPE_CHECKING
+import uuid
 
 from sycamore.context import Context
 from sycamore.data import Document, MetadataDocument
+from sycamore.data.serialization import LazyElements
 from sycamore.materialize_config import MaterializeSourceMode
 from sycamore.plan_nodes import Node, UnaryNode, NodeTraverse
 from sycamore.transforms.base import rename
@@ -47,6 +54,171 @@ def _success_path(base_path: Path) -> Path:
     return base_path / "materialize.success"
 
 
+# Property holding the incremental keys of a document, by the root of the materialize that will save it.
+# It starts with "_" so that explode copies it to the element documents.
+_KEYS_PROPERTY = "_materialize_keys"
+# Key of the MetadataDocument that asks an incremental materialize to load its stored outputs for an input.
+_LOAD_METADATA_KEY = "materialize_load"
+_KEYED_NAME = re.compile(r"^doc-([0-9a-f]{64})-(.*):[0-9a-f]{64}\.pickle$")
+
+
+def _stored_outputs(fshelper: _PyArrowFsHelper, root: Path) -> dict[str, list[str]]:
+    """Returns the paths of the outputs saved by an incremental materialize, by input key."""
+    stored: dict[str, list[str]] = {}
+    for fi in fshelper.list_files(root):
+        m = _KEYED_NAME.match(fi.base_name)
+        if m is not None:
+            stored.setdefault(m.group(1), []).append(fi.path)
+    return stored
+
+
+def _content_hash(doc: Document) -> str:
+    # ids are generated on every read, e.g. by BinaryScan, so they do not identify the content.
+    data = {k: v for k, v in doc.data.items() if k not in ("doc_id", "lineage_id")}
+    if isinstance(data.get("elements"), LazyElements):
+        data["elements"] = doc.elements
+    return sha256(pickle.dumps(data)).hexdigest()
+
+
+def _filter_incremental(
+    docs: list[Document], targets: list[tuple[str, Any, str, dict[str, list[str]]]]
+) -> list[Document]:
+    """Replaces the input documents whose outputs are already stored by an incremental materialize with
+    requests to load the stored outputs and stamps the remaining documents with their keys.
+
+    targets are (root, fs, fingerprint, stored outputs) for each incremental materialize above the
+    source, outermost first. The keys of every input are recorded in each root so that the
+    materialize can tombstone the outputs of inputs that no longer exist."""
+    out: list[Document] = []
+    seen: list[list[str]] = [[] for _ in targets]
+    for d in docs:
+        if isinstance(d, MetadataDocument):
+            out.append(d)
+            continue
+        content = _content_hash(d)
+        keys = [sha256((fingerprint + content).encode()).hexdigest() for (_, _, fingerprint, _) in targets]
+        for s, k in zip(seen, keys):
+            s.append(k)
+        for i, ((root, _, _, stored), key) in enumerate(zip(targets, keys)):
+            if key in stored:
+                # The outermost stored outputs skip the most work; the materializes above it still need
+                # the keys for the outputs that they compute from the loaded documents.
+                outer = {t[0]: k for t, k in zip(targets[:i], keys[:i])}
+                out.append(
+                    MetadataDocument(**{_LOAD_METADATA_KEY: {"root": root, "paths": stored[key], "keys": outer}})
+                )
+                break
+        else:
+            # The source may hand out documents that it keeps, e.g. DocScan, so they are not modified.
+            d = copy.copy(d)
+            d.data = {
+                **d.data,
+                "properties": {**d.properties, _KEYS_PROPERTY: {t[0]: k for t, k in zip(targets, keys)}},
+            }
+            out.append(d)
+
+    for (root, fs, _, _), keys in zip(targets, seen):
+        if len(keys) > 0:
+            with fs.open_output_stream(str(Path(root) / f"seen-{uuid.uuid4().hex}.keys")) as f:
+                f.write("\n".join(keys).encode())
+    return out
+
+
+class _IncrementalInput(UnaryNode):
+    """Inserted above the source of the plan of one or more incremental materializes, see
+    MaterializeSourceMode.INCREMENTAL.
+
+    The key of an input document is a hash of its content and of the fingerprint of the plan between
+    the source and the materialize. Inputs whose key has stored outputs do not flow through the plan;
+    the materialize loads their outputs instead."""
+
+    def __init__(self, child: Node, targets: list[tuple[Path, Any, Node]], **kwargs):
+        # targets are (root, fs, top of the plan below the materialize), outermost first.
+        self._targets = targets
+        self._prepared: list[tuple[str, Any, str, dict[str, list[str]]]] = []
+        super().__init__(child, **kwargs)
+
+    def fingerprint_state(self) -> dict[str, Any]:
+        return {"roots": [str(root) for (root, _, _) in self._targets]}
+
+    def prepare(self):
+        from sycamore.result_cache import plan_fingerprint
+
+        def stop(n: Node) -> bool:
+            # Changes to the source data are covered by the content hash of each document.
+            return isinstance(n, _IncrementalInput) or len(n.children) == 0
+
+        self._prepared = []
+        for root, fs, plan in self._targets:
+            fingerprint = plan_fingerprint(plan, stop=stop)
+            if fingerprint is None:
+                raise ValueError(f"Unable to fingerprint the plan for incremental materialize {root}")
+            stored = _stored_outputs(_PyArrowFsHelper(fs), root)
+            logger.info(f"Incremental materialize {root} has stored outputs for {len(stored)} inputs")
+            self._prepared.append((str(root), fs, fingerprint, stored))
+
+    def execute(self, **kwargs) -> "Dataset":
+        import numpy
+
+        targets = self._prepared
+
+        @rename("incremental_input")
+        def ray_callable(ray_input: dict[str, numpy.ndarray]) -> dict[str, list]:
+            docs = [Document.deserialize(s) for s in ray_input.get("doc", [])]
+            return {"doc": [d.serialize() for d in _filter_incremental(docs, targets)]}
+
+        return self.child().execute(**kwargs).map_batches(ray_callable)
+
+    def local_execute(self, docs: list[Document]) -> list[Document]:
+        return list(self.local_execute_iter(docs))
+
+    def local_execute_iter(self, docs: Iterable[Document]) -> Iterator[Document]:
+        from sycamore.transforms.base import DEFAULT_LOCAL_BATCH_SIZE
+
+        batch: list[Document] = []
+        for d in docs:
+            batch.append(d)
+            if len(batch) >= DEFAULT_LOCAL_BATCH_SIZE:
+                yield from _filter_incremental(batch, self._prepared)
+                batch = []
+        yield from _filter_incremental(batch, self._prepared)
+
+
+def _add_incremental_input(materialize: "Materialize", child: Node) -> Node:
+    """Returns a copy of child with an _IncrementalInput for materialize above its source. The plan
+    between the materialize and the source must be made of map style transforms so that the stored
+    outputs of a document only depend on that document."""
+    from sycamore.transforms.base import BaseMapTransform, CompositeTransform, FusedMapTransform
+
+    assert materialize._root is not None
+    target = (materialize._root, materialize._fs, child)
+    below: set[str] = set()
+
+    def insert(node: Node) -> Node:
+        if isinstance(node, _IncrementalInput) and len(node.child().children) == 0:
+            extended = copy.copy(node)
+            above = [t for t in node._targets if str(t[0]) not in below]
+            extended._targets = above + [target] + [t for t in node._targets if str(t[0]) in below]
+            return extended
+        if len(node.children) == 0:
+            return _IncrementalInput(node, [target])
+        if not isinstance(
+            node, (BaseMapTransform, CompositeTransform, FusedMapTransform, Materialize, _IncrementalInput)
+        ):
+            raise ValueError(
+                f"Incremental materialize requires map style transforms between it and the source, found {node}"
+            )
+        if isinstance(node, Materialize) and node._source_mode == MaterializeSourceMode.INCREMENTAL:
+            below.add(str(node._root))
+        (source,) = node.children
+        assert source is not None
+        n = copy.copy(node)
+        n.children = [insert(source)]
+        return n
+
+    return insert(child)
+
+
 class Materialize(UnaryNode):
     def __init__(
         self,
@@ -83,7 +255,14 @@ class Materialize(UnaryNode):
         else:
             assert False, f"unsupported type ({type(path)}) for path argument, expected str, Path, or dict"
 
-        if source_mode != MaterializeSourceMode.RECOMPUTE:
+        if source_mode == MaterializeSourceMode.INCREMENTAL:
+            assert path is not None and child is not None
+            assert (
+                self._doc_to_binary == Document.serialize and self._doc_to_name == self.doc_to_name
+            ), "Using materialize in incremental mode requires default serialization and naming"
+            # The stored outputs are reused, so the root is never cleaned.
+            self._clean_root = False
+        elif source_mode != MaterializeSourceMode.RECOMPUTE:
             assert path is not None
             assert (
                 self._doc_to_binary == Document.serialize
@@ -92,9 +271,15 @@ class Materialize(UnaryNode):
 
         self._source_mode = source_mode
         self._executed_child = False
+        # Whether every document of the child was read. Only then is the output complete, so that it can
+        # be marked as successful and the outputs of unseen inputs can be tombstoned.
+        self._read_child_to_end = False
 
         super().__init__(child, **kwargs)
 
+        if source_mode == MaterializeSourceMode.INCREMENTAL:
+            self.children = [_add_incremental_input(self, self.child())]
+
         self._maybe_anonymous()
 
     def _maybe_anonymous(self):
@@ -123,6 +308,9 @@ class Materialize(UnaryNode):
             )
             return
 
+    def fingerprint_state(self) -> dict[str, Any]:
+        return {"path": self._orig_path, "source_mode": self._source_mode}
+
     def prepare(self):
         """
         Clean up the materialize location if necessary.
@@ -133,6 +321,14 @@ class Materialize(UnaryNode):
         if self._root is None:
             return
 
+        if self._source_mode == MaterializeSourceMode.INCREMENTAL:
+            self._fs.create_dir(str(self._root))
+            # Keys recorded by an earlier execution that did not finish.
+            for fi in self._fshelper.list_files(self._root):
+                if fi.base_name.startswith("seen-"):
+                    self._fs.delete_file(fi.path)
+            return
+
         if self._will_be_source():
             return
 
@@ -174,11 +370,23 @@ class Materialize(UnaryNode):
                 return files.map(self._ray_to_document)
 
         self._executed_child = True
+        # Set by mark_read_to_end once the execution has consumed the whole dataset.
+        self._read_child_to_end = False
         # right now, no validation happens, so save data in parallel. Once we support validation
         # to support retries we won't be able to run the validation in parallel.  non-shared
         # filesystems will also eventually be a problem but we can put it off for now.
 
         input_dataset = self.child().execute(**kwargs)
+        if self._source_mode == MaterializeSourceMode.INCREMENTAL:
+            import numpy
+
+            @rename("materialize")
+            def incremental_callable(ray_input: dict[str, numpy.ndarray]) -> dict[str, list]:
+                docs = [Document.deserialize(s) for s in ray_input.get("doc", [])]
+                return {"doc": [o.serialize() for d in docs for o in self._incremental_outputs(d)]}
+
+            return input_dataset.map_batches(incremental_callable)
+
         if self._root is not None:
             import numpy
 
@@ -215,21 +423,38 @@ class Materialize(UnaryNode):
         )
 
     def local_execute(self, docs: list[Document]) -> list[Document]:
+        return list(self.local_execute_iter(docs))
+
+    def local_execute_iter(self, docs: Iterable[Document]) -> Iterator[Document]:
         if self._source_mode == MaterializeSourceMode.USE_STORED:
             if self._fshelper.file_exists(self._success_path()):
                 self._executed_child = False
                 logger.info(f"Using {self._orig_path} as cached source of data")
 
-                return self.local_source()
+                yield from self.local_source()
+                return
+
+        if self._root is None:
+            yield from docs
+            return
 
-        if self._root is not None:
+        if self._source_mode == MaterializeSourceMode.INCREMENTAL:
             for d in docs:
-                self.save(d)
+                yield from self._incremental_outputs(d)
             self._executed_child = True
+            self._read_child_to_end = True
+            return
+
+        for d in docs:
+            self.save(d)
+            yield d
 
-        return docs
+        # Only mark the child as executed once every document has been saved; a consumer that stops
+        # early (e.g. take()) must not cause a partial materialization to be treated as complete.
+        self._executed_child = True
+        self._read_child_to_end = True
 
-    def local_source(self) -> list[Document]:
+    def local_source(self) -> Iterator[Document]:
         assert self._root is not None
         self._verify_has_files()
         logger.info(f"Using {self._orig_path} as cached source of data")
@@ -239,7 +464,6 @@ class Materialize(UnaryNode):
 
         limited_logger = logging.getLogger(__name__ + ".limited_local_source")
         limited_logger.addFilter(LoggerFilter())
-        ret = []
         count = 0
         for fi in self._fshelper.list_files(self._root):
             n = Path(fi.path)
@@ -247,22 +471,89 @@ class Materialize(UnaryNode):
                 limited_logger.info(f"  reading file {count} from {str(n)}")
                 count = count + 1
                 f = self._fs.open_input_stream(str(n))
-                ret.append(Document.deserialize(f.read()))
+                doc = Document.deserialize(f.read())
                 f.close()
+                yield doc
         logger.info(f"  read {count} total files")
 
-        return ret
-
     def _success_path(self):
         return _success_path(self._root)
 
     def finalize(self):
-        if not self._executed_child:
+        if not self._executed_child or not self._read_child_to_end:
             return
+        if self._source_mode == MaterializeSourceMode.INCREMENTAL:
+            self._tombstone_unseen()
         if self._root is not None:
             self._fs.open_output_stream(str(self._success_path())).close()
             assert self._fshelper.file_exists(self._success_path())
 
+    def _incremental_outputs(self, doc: Document) -> Iterator[Document]:
+        assert self._root is not None
+        root = str(self._root)
+        if isinstance(doc, MetadataDocument):
+            load = doc.metadata.get(_LOAD_METADATA_KEY)
+            if load is None or load["root"] != root:
+                yield doc
+                return
+            for path in load["paths"]:
+                with self._fs.open_input_stream(path) as f:
+                    stored = Document.deserialize(f.read())
+                if len(load["keys"]) > 0:
+                    stored.properties[_KEYS_PROPERTY] = dict(load["keys"])
+                yield stored
+            return
+
+        keys = doc.properties.pop(_KEYS_PROPERTY, {})
+        if root not in keys:
+            logger.warning(f"Document {doc.doc_id} reached incremental materialize {root} without a key; not saved")
+            yield doc
+            return
+
+        # Keys of other materializes are only valid for this execution, so they are not stored.
+        self.save(doc, key=keys[root])
+        remaining = {r: k for r, k in keys.items() if r != root}
+        if len(remaining) > 0:
+            doc.properties[_KEYS_PROPERTY] = remaining
+        yield doc
+
+    def _tombstone_unseen(self) -> None:
+        """Removes the outputs of inputs that were not part of this execution, i.e. inputs that were
+        deleted or changed, and records the removed documents in tombstone-<key>.json files."""
+        assert self._root is not None
+        seen: set[str] = set()
+        seen_files = []
+        tombstones = {}
+        for fi in self._fshelper.list_files(self._root):
+            if fi.base_name.startswith("seen-"):
+                with self._fs.open_input_stream(fi.path) as f:
+                    seen.update(f.read().decode().split())
+                seen_files.append(fi.path)
+            elif fi.base_name.startswith("tombstone-"):
+                tombstones[fi.base_name[len("tombstone-") : -len(".json")]] = fi.path
+
+        stored = _stored_outputs(self._fshelper, self._root)
+        removed = 0
+        for key, paths in stored.items():
+            if key in seen:
+                continue
+            doc_ids = []
+            for path in paths:
+                m = _KEYED_NAME.match(Path(path).name)
+                assert m is not None
+                doc_ids.append(m.group(2))
+                self._fs.delete_file(path)
+            with self._fs.open_output_stream(str(self._root / f"tombstone-{key}.json")) as out:
+                out.write(json.dumps({"key": key, "doc_ids": doc_ids}).encode())
+            removed += 1
+
+        for key, path in tombstones.items():
+            if key in seen:
+                self._fs.delete_file(path)
+        for path in seen_files:
+            self._fs.delete_file(path)
+        logger.info(f"Incremental materialize {self._orig_path} tombstoned the outputs of {removed} inputs")
+
     @staticmethod
     def infer_fs(path: str) -> Tuple["pyarrow.FileSystem", Path]:
         from sycamore.utils.pyarrow import infer_fs as util_infer_fs
@@ -270,13 +561,21 @@ class Materialize(UnaryNode):
         (fs, path) = util_infer_fs(path)
         return (fs, Path(path))
 
-    def save(self, doc: Document) -> None:
-        bin = self._doc_to_binary(doc)
-        if bin is None:
-            return
-        assert isinstance(bin, bytes), f"tobin function returned {type(bin)} not bytes"
+    def save(self, doc: Document, key: Optional[str] = None) -> None:
+        bin: Union[bytes, list]
+        if self._doc_to_binary == Document.serialize and self._doc_to_name == self.doc_to_name:
+            # Write the pieces separately so that large binary values are never copied.
+            bin = doc.serialize_buffers()
+        else:
+            bin = self._doc_to_binary(doc)
+            if bin is None:
+                return
+            assert isinstance(bin, bytes), f"tobin function returned {type(bin)} not bytes"
         assert self._root is not None
         name = self._doc_to_name(doc, bin)
+        if key is not None:
+            # incremental mode; the name starts with the key of the input that the document came from.
+            name = f"doc-{key}-{name[len('doc-'):]}"
         path = self._root / name
 
         if self._clean_root and self._fshelper.file_exists(path):
@@ -291,13 +590,19 @@ class Materialize(UnaryNode):
 
             return
         with self._fs.open_output_stream(str(path)) as out:
-            out.write(bin)
+            for piece in [bin] if isinstance(bin, bytes) else bin:
+                out.write(piece)
 
     @staticmethod
-    def doc_to_name(doc: Document, bin: bytes) -> str:
+    def doc_to_name(doc: Document, bin: Union[bytes, list]) -> str:
+        """Names a document by its id and a hash of its serialized form, given either as bytes or as the
+        pieces returned by Document.serialize_buffers."""
         from hashlib import sha256
 
-        hash_id = sha256(bin).hexdigest()
+        hasher = sha256()
+        for piece in [bin] if isinstance(bin, bytes) else bin:
+            hasher.update(piece)
+        hash_id = hasher.hexdigest()
         doc_id = doc.doc_id or doc.data.get("lineage_id", None)
         if doc_id is None:
             logger.warn(f"found document with no doc_id or lineage_id, assigned content based id {hash_id}")
@@ -310,6 +615,23 @@ class Materialize(UnaryNode):
         return f"doc-{doc_id}:{hash_id}.pickle"
 
 
+def mark_read_to_end(plan: Node) -> None:
+    """Records that a ray execution of plan was consumed to the end.
+
+    A materialize cannot observe the end of its input in ray mode, and a Limit above it stops reading
+    its input early. So the input of a materialize was read to the end if no Limit is above it."""
+    from sycamore.transforms.basics import Limit
+
+    def visit(node: Node, limited: bool) -> None:
+        if isinstance(node, Materialize) and node._executed_child and not limited:
+            node._read_child_to_end = True
+        for c in node.children:
+            if c is not None:
+                visit(c, limited or isinstance(node, Limit))
+
+    visit(plan, False)
+
+
 class AutoMaterialize(NodeTraverse):
     """Automatically add materialize nodes after every node in an execution.
 
@@ -330,6 +652,9 @@ class AutoMaterialize(NodeTraverse):
        # created materialize nodes. To use each materialized node as a source:
        ctx.rewrite_rules.append(AutoMaterialize(source_mode=sycamore.MATERIALIZED_USE_STORED)
 
+       # To only recompute the documents whose inputs changed, see MaterializeSourceMode.INCREMENTAL:
+       ctx.rewrite_rules.append(AutoMaterialize("/home/example/subdir", source_mode=sycamore.MATERIALIZE_INCREMENTAL)
+
     Nodes in the plan will automatically be named. You can specify a name by defining it for the node:
        ctx = sycamore.init()
        ds = ctx.read.document(docs, materialize={"name": "reader"}).map(noop_fn, materialize={"name": "noop"})
@@ -360,7 +685,7 @@ class AutoMaterialize(NodeTraverse):
 
     def _naming_pass(self):
         def after(node):
-            if isinstance(node, Materialize):
+            if isinstance(node, (Materialize, _IncrementalInput)):
                 return node
 
             if "materialize" not in node.properties:
@@ -384,7 +709,7 @@ class AutoMaterialize(NodeTraverse):
 
     def _cleanup_pass(self):
         def visit(node):
-            if isinstance(node, Materialize):
+            if isinstance(node, (Materialize, _IncrementalInput)):
                 return
 
             materialize = node.properties["materialize"]
@@ -392,7 +717,7 @@ class AutoMaterialize(NodeTraverse):
 
             path = self._directory / materialize["name"]
 
-            if not self._path["clean"]:
+            if not self._path["clean"] or self._source_mode == MaterializeSourceMode.INCREMENTAL:
                 return
 
             if self._source_mode == MaterializeSourceMode.USE_STORED and self._fshelper.file_exists(
@@ -415,6 +740,9 @@ class AutoMaterialize(NodeTraverse):
                 child.properties["materialize"]["mark"] = True
                 return node
 
+            if isinstance(node, _IncrementalInput):
+                return node
+
             materialize = node.properties["materialize"]
             if materialize.get("mark", False):
                 return node
@@ -8,6 +8,7 @@ class MaterializeSourceMode(Enum):
 
     RECOMPUTE = 0
     USE_STORED = 1
+    INCREMENTAL = 2
 
     # Deprecated constants
     OFF = 0
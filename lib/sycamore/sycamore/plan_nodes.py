@@ -1,6 +1,6 @@
 import sys
 from abc import ABC, abstractmethod
-from typing import Callable, Optional, TYPE_CHECKING
+from typing import Any, Callable, Optional, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from ray import Dataset
@@ -70,7 +70,7 @@ class Node(ABC):
         assert parallelism is None or parallelism > 0
         self.parallelism = parallelism
         self.resource_args = resource_args
-        self.properties = {}
+        self.properties: dict[str, Any] = {}
         # copy because of https://stackoverflow.com/questions/1132941/least-astonishment-and-the-mutable-default-argument
         self.properties["materialize"] = materialize.copy()
 
@@ -94,6 +94,19 @@ class Node(ABC):
         been returned."""
         pass
 
+    def fingerprint_state(self) -> dict[str, Any]:
+        """Returns the state that determines this node's output, used by DocSet.cache() to fingerprint
+        plans. Defaults to the node's attributes other than its children and execution settings.
+        Override this method if the node holds state that changes while executing or reads external data."""
+        skip = {"children", "parallelism", "resource_args", "properties"}
+        return {k: v for k, v in vars(self).items() if k not in skip}
+
+    def pushdown_limit(self, limit: int) -> Optional["Node"]:
+        """Returns a copy of this node that produces at most limit documents by doing less work, e.g. a
+        scan that reads fewer files, or None if the node can not apply a limit itself. Used by the
+        PushDownLimit rewrite rule; the node must not be modified."""
+        return None
+
     def traverse_down(self, f: Callable[["Node"], "Node"]) -> "Node":
         """
         Allows a function to be applied to a node first and then all of its children
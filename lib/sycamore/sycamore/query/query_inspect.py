@@ -1,5 +1,6 @@
 import os
-import pickle
+
+from sycamore.data import Document
 
 
 class QueryDataInspector:
@@ -20,9 +21,13 @@ class QueryDataInspector:
         files = os.listdir(path)
         documents = []
         for file in files:
+            # Skip the marker files materialize writes next to the documents.
+            if not file.endswith(".pickle"):
+                continue
             file_path = os.path.join(path, file)
             with open(file_path, "rb") as f:
-                document = pickle.load(f)
+                # Materialized documents may keep large binaries out of band, so they are not plain pickles.
+                document = Document.deserialize(f.read())
                 documents.append(document)
         return documents
 
@@ -37,6 +42,7 @@ class QueryDataInspector:
         return result
 
 
-## Sample usage
-inspector = QueryDataInspector("/Users/vinayakthapliyal/tmp/intermediate/342762a8-84aa-4d44-afb2-44ebd445c209/")
-print(inspector.get_counts())
+if __name__ == "__main__":
+    ## Sample usage
+    inspector = QueryDataInspector("/Users/vinayakthapliyal/tmp/intermediate/342762a8-84aa-4d44-afb2-44ebd445c209/")
+    print(inspector.get_counts())
@@ -9,6 +9,7 @@ from sycamore.context import context_params
 from sycamore.plan_nodes import Node
 from sycamore import Context, DocSet
 from sycamore.data import Document
+from sycamore.data.blob_store import BlobStore
 from sycamore.connectors.file import ArrowScan, BinaryScan, DocScan, PandasScan, JsonScan, JsonDocumentScan
 from sycamore.connectors.file.file_scan import FileMetadataProvider
 from sycamore.utils.import_utils import requires_modules
@@ -45,6 +46,7 @@ class DocSetReader:
         parallelism: Optional[int] = None,
         filesystem: Optional[FileSystem] = None,
         metadata_provider: Optional[FileMetadataProvider] = None,
+        blob_store: Optional[Union[str, BlobStore]] = None,
         **kwargs,
     ) -> DocSet:
         """
@@ -57,6 +59,9 @@ class DocSetReader:
                 -1 if not specified
             filesystem: (Optional) The PyArrow filesystem to read from. By default is selected based on the
                 scheme of the paths passed in
+            blob_store: (Optional) A BlobStore, or the root of one, to keep the file contents in. Documents
+                then carry a reference to their contents instead of the bytes, which are fetched only when
+                binary_representation is read.
             kwargs: (Optional) Arguments to passed into the underlying execution engine
 
         Example:
@@ -76,6 +81,7 @@ class DocSetReader:
             parallelism=parallelism,
             filesystem=filesystem,
             metadata_provider=metadata_provider,
+            blob_store=blob_store,
             **kwargs,
         )
         return DocSet(self._context, scan)
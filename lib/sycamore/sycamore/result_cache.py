@@ -0,0 +1,272 @@
+import atexit
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, Iterator, Optional, TYPE_CHECKING
+
+from sycamore.data import Document
+from sycamore.plan_nodes import Node, UnaryNode
+
+if TYPE_CHECKING:
+    from ray.data import Dataset
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = {"memory": 1 << 30, "disk": 10 << 30}
+
+
+def plan_fingerprint(
+    node: Node, stop: Optional[Callable[[Node], bool]] = None, read_content: bool = False
+) -> Optional[str]:
+    """Returns a hash of the plan rooted at node, or None if some part of the plan can not be fingerprinted.
+
+    The hash covers the type and Node.fingerprint_state() of every node, which includes the functions
+    and arguments of transforms and the paths and modification times of files read by scans. Nodes for
+    which stop returns True are left out of the hash along with their children. If read_content is
+    True, database readers are also fingerprinted by the records they return, which queries them.
+    """
+    from ray import cloudpickle
+
+    from sycamore.connectors.base_reader import BaseDBReader
+
+    h = hashlib.sha256()
+
+    def update(n: Node) -> None:
+        if stop is not None and stop(n):
+            return
+        h.update(f"{type(n).__module__}.{type(n).__qualname__}".encode())
+        h.update(cloudpickle.dumps(n.fingerprint_state()))
+        if read_content and isinstance(n, BaseDBReader):
+            h.update(n.content_fingerprint().encode())
+        for c in n.children:
+            if c is not None:
+                update(c)
+
+    try:
+        update(node)
+    except Exception as e:
+        logger.warning(f"Unable to fingerprint plan, results will not be cached: {e}")
+        return None
+
+    return h.hexdigest()
+
+
+class ResultStore:
+    """A size bounded LRU map from plan fingerprints to cached results.
+
+    Each entry records its size in bytes and an optional function that releases it (e.g. deletes
+    spilled files) when the entry is evicted."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[tuple[str, str], tuple[Any, int, Optional[Callable[[], None]]]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple[str, str]) -> Optional[Any]:
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key][0]
+
+    def put(self, key: tuple[str, str], value: Any, size: int, release: Optional[Callable[[], None]] = None) -> bool:
+        """Adds an entry, evicting the least recently used entries to make room. Returns False without
+        storing the value if it is larger than max_bytes on its own."""
+        if size > self.max_bytes:
+            logger.info(f"Result of {size} bytes is larger than the cache limit of {self.max_bytes} bytes")
+            return False
+
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (value, size, release)
+            self._bytes += size
+            self._evict()
+        return True
+
+    def set_max_bytes(self, max_bytes: int) -> None:
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def clear(self) -> None:
+        with self._lock:
+            while len(self._entries) > 0:
+                self._remove(next(iter(self._entries)))
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _evict(self) -> None:
+        while self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: tuple[str, str]) -> None:
+        if key not in self._entries:
+            return
+        (_, size, release) = self._entries.pop(key)
+        self._bytes -= size
+        if release is not None:
+            release()
+
+
+_stores: dict[str, ResultStore] = {}
+_stores_lock = threading.Lock()
+_disk_root: Optional[str] = None
+
+
+def get_result_store(storage: str, max_bytes: Optional[int] = None) -> ResultStore:
+    """Returns the process wide store for the storage kind, updating its size limit if max_bytes is given."""
+    assert storage in DEFAULT_MAX_BYTES, f"storage must be one of {list(DEFAULT_MAX_BYTES)}, not {storage}"
+    with _stores_lock:
+        if storage not in _stores:
+            _stores[storage] = ResultStore(DEFAULT_MAX_BYTES[storage] if max_bytes is None else max_bytes)
+            return _stores[storage]
+    if max_bytes is not None:
+        _stores[storage].set_max_bytes(max_bytes)
+    return _stores[storage]
+
+
+def clear_result_caches() -> None:
+    """Drops all cached results."""
+    with _stores_lock:
+        stores = list(_stores.values())
+    for s in stores:
+        s.clear()
+
+
+def _spill_dir(name: str) -> str:
+    global _disk_root
+    with _stores_lock:
+        if _disk_root is None:
+            _disk_root = tempfile.mkdtemp(prefix="sycamore-cache-")
+            atexit.register(shutil.rmtree, _disk_root, True)
+    return os.path.join(_disk_root, name)
+
+
+def _remove_path(path: str) -> Callable[[], None]:
+    def release() -> None:
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        elif os.path.exists(path):
+            os.remove(path)
+
+    return release
+
+
+class ResultCache(UnaryNode):
+    """Caches the output of its child, keyed by a fingerprint of the child's plan.
+
+    Repeated executions of the same plan, e.g. calling count() and then take_all() on a DocSet,
+    reuse the cached output instead of recomputing it. Results are kept in memory or spilled to a
+    local temporary directory, in an LRU store bounded by max_bytes that is shared by every
+    ResultCache with the same storage. Results are only cached once the child has been read to the
+    end, so take(n) does not populate the cache. If fingerprint_reads is True, the records returned
+    by database readers are part of the fingerprint."""
+
+    def __init__(
+        self,
+        child: Node,
+        storage: str = "memory",
+        max_bytes: Optional[int] = None,
+        fingerprint_reads: bool = False,
+        **kwargs,
+    ):
+        self._storage = storage
+        self._fingerprint_reads = fingerprint_reads
+        self._store = get_result_store(storage, max_bytes)
+        self._fingerprint: Optional[str] = None
+        super().__init__(child, **kwargs)
+
+    def fingerprint_state(self) -> dict[str, Any]:
+        # Caching does not change the output.
+        return {}
+
+    def prepare(self) -> None:
+        # Rewrite rules have already been applied, so this fingerprints the plan that will run.
+        self._fingerprint = plan_fingerprint(self.child(), read_content=self._fingerprint_reads)
+
+    def _key(self, mode: str) -> Optional[tuple[str, str]]:
+        if self._fingerprint is None:
+            return None
+        return (mode, self._fingerprint)
+
+    def execute(self, **kwargs) -> "Dataset":
+        from ray.data import read_parquet
+
+        key = self._key("ray")
+        cached = None if key is None else self._store.get(key)
+        if cached is not None:
+            logger.info(f"Using cached results for plan {self._fingerprint}")
+            return read_parquet(cached) if self._storage == "disk" else cached
+
+        dataset = self.child().execute(**kwargs)
+        if key is None:
+            return dataset
+
+        if self._storage == "memory":
+            dataset = dataset.materialize()
+            self._store.put(key, dataset, dataset.size_bytes())
+            return dataset
+
+        path = _spill_dir(f"ray-{self._fingerprint}")
+        _remove_path(path)()
+        dataset.write_parquet(path)
+        size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+        # If the result is too large to keep, the files are still needed to return it and are removed at exit.
+        self._store.put(key, path, size, _remove_path(path))
+        return read_parquet(path)
+
+    def local_cached(self) -> bool:
+        key = self._key("local")
+        return key is not None and self._store.get(key) is not None
+
+    def local_source(self) -> Iterator[Document]:
+        key = self._key("local")
+        assert key is not None
+        cached = self._store.get(key)
+        assert cached is not None, "cached results were evicted"
+        if self._storage == "disk":
+            import pickle
+
+            with open(cached, "rb") as f:
+                cached = pickle.load(f)
+
+        logger.info(f"Using cached results for plan {self._fingerprint}")
+        for raw in cached:
+            yield Document.deserialize(raw)
+
+    def local_execute(self, all_docs: list[Document]) -> list[Document]:
+        return list(self.local_execute_iter(all_docs))
+
+    def local_execute_iter(self, all_docs: Iterable[Document]) -> Iterator[Document]:
+        key = self._key("local")
+        # Documents are stored serialized so that changes made by the consumer do not leak into the cache.
+        results: list[bytes] = []
+        for d in all_docs:
+            if key is not None:
+                results.append(d.serialize())
+            yield d
+
+        if key is None:
+            return
+
+        if self._storage == "memory":
+            self._store.put(key, results, sum(len(r) for r in results))
+            return
+
+        import pickle
+
+        path = _spill_dir(f"local-{self._fingerprint}.pickle")
+        with open(path, "wb") as f:
+            pickle.dump(results, f)
+        if not self._store.put(key, path, os.path.getsize(path), _remove_path(path)):
+            _remove_path(path)()
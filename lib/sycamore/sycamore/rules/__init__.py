@@ -1,3 +1,5 @@
 from sycamore.rules.optimize_resource_args import Rule, EnforceResourceUsage, OptimizeResourceArgs
+from sycamore.rules.fuse_map_transforms import FuseMapTransforms
+from sycamore.rules.limit_pushdown import PushDownLimit
 
-__all__ = ["Rule", "EnforceResourceUsage", "OptimizeResourceArgs"]
+__all__ = ["Rule", "EnforceResourceUsage", "OptimizeResourceArgs", "FuseMapTransforms", "PushDownLimit"]
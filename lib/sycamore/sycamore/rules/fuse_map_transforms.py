@@ -0,0 +1,75 @@
+import copy
+from typing import Any, TYPE_CHECKING
+
+from sycamore.plan_nodes import Node, NodeTraverse, NonCPUUser
+from sycamore.transforms.base import BaseMapTransform, FusedMapTransform
+
+if TYPE_CHECKING:
+    from sycamore.context import Context
+
+
+class FuseMapTransforms(NodeTraverse):
+    """Fuses chains of adjacent stateless map transforms into a single ray stage.
+
+    Every BaseMapTransform becomes its own ray map_batches call, which deserializes and serializes
+    every document. Consecutive transforms that run plain functions (not classes, so no actor
+    state), have no explicit parallelism and request the same resources are replaced with a
+    FusedMapTransform that applies all of them to each batch. Transforms with adaptive batching are
+    not fused since they choose their own batches.
+
+    The rewrite only applies in ray mode. It is skipped when AutoMaterialize is in use so that each
+    transform is still materialized separately. The original plan is not modified.
+    """
+
+    def once(self, context: "Context", node: Node) -> Node:
+        from sycamore.context import ExecMode
+        from sycamore.materialize import AutoMaterialize
+
+        if context.exec_mode != ExecMode.RAY:
+            return node
+        if any(isinstance(r, AutoMaterialize) for r in context.rewrite_rules):
+            return node
+
+        return self._fuse(node)
+
+    def _fuse(self, node: Node) -> Node:
+        children = [self._fuse(c) for c in node.children if c is not None]
+        if any(a is not b for a, b in zip(children, node.children)):
+            node = copy.copy(node)
+            node.children = list(children)
+
+        if len(children) != 1 or not self.fusable(node):
+            return node
+        assert isinstance(node, BaseMapTransform)
+
+        child = children[0]
+        if isinstance(child, FusedMapTransform) and self.compatible(child.nodes[-1], node):
+            return FusedMapTransform([*child.nodes, node], **child.resource_args)
+        if self.fusable(child):
+            assert isinstance(child, BaseMapTransform)
+            if self.compatible(child, node):
+                return FusedMapTransform([child, node], **self._resources(node))
+
+        return node
+
+    @staticmethod
+    def fusable(node: Node) -> bool:
+        return (
+            isinstance(node, BaseMapTransform)
+            # Subclasses that change how they run in ray cannot be fused.
+            and type(node).execute is BaseMapTransform.execute
+            and not isinstance(node._f, type)
+            and node._adaptive_batching is None
+            and node.parallelism is None
+            and "compute" not in node.resource_args
+        )
+
+    @staticmethod
+    def compatible(a: BaseMapTransform, b: BaseMapTransform) -> bool:
+        return FuseMapTransforms._resources(a) == FuseMapTransforms._resources(b)
+
+    @staticmethod
+    def _resources(node: Node) -> dict[str, Any]:
+        # ray runs map_batches tasks with one cpu unless told otherwise; EnforceResourceUsage sets 0 for
+        # NonCPUUsers, but may not have run yet, e.g. in explain().
+        return {"num_cpus": 0 if isinstance(node, NonCPUUser) else 1, **node.resource_args}
@@ -0,0 +1,78 @@
+import copy
+from typing import TYPE_CHECKING
+
+from sycamore.plan_nodes import Node, NodeTraverse
+
+if TYPE_CHECKING:
+    from sycamore.context import Context
+
+
+class PushDownLimit(NodeTraverse):
+    """Moves limits closer to the source so that upstream nodes process fewer documents.
+
+    A Limit is pushed through nodes that turn each document into exactly one document (Map and its
+    subclasses, Embed and Partition). When it reaches a node that can apply the limit itself (see
+    Node.pushdown_limit), e.g. a BinaryScan that reads fewer files or a reader that adds a size or
+    LIMIT to its query, that node is replaced with a limited copy; otherwise a Limit is inserted
+    above it. The original Limit is kept. The original plan is not modified.
+    """
+
+    def once(self, context: "Context", node: Node) -> Node:
+        return self._rewrite(node)
+
+    def _rewrite(self, node: Node) -> Node:
+        from sycamore.transforms.basics import Limit
+
+        children = [self._rewrite(c) for c in node.children if c is not None]
+        if any(a is not b for a, b in zip(children, node.children)):
+            node = _with_child(node, children)
+
+        if isinstance(node, Limit):
+            child = self._push(node.child(), node._limit, top=True)
+            if child is not node.child():
+                node = _with_child(node, [child])
+
+        return node
+
+    def _push(self, node: Node, limit: int, top: bool = False) -> Node:
+        from sycamore.transforms.basics import Limit
+
+        if self.row_preserving(node):
+            (source,) = node.children
+            assert source is not None
+            child = self._push(source, limit)
+            if child is source:
+                return node
+            return _with_child(node, [child])
+
+        if isinstance(node, Limit):
+            # Both limits apply, so the tighter one can be pushed further down.
+            tighter = min(limit, node._limit)
+            child = self._push(node.child(), tighter)
+            if child is node.child() and tighter == node._limit:
+                return node
+            node = copy.copy(node)
+            node.children = [child]
+            node._limit = tighter
+            return node
+
+        pushed = node.pushdown_limit(limit)
+        if pushed is not None:
+            return pushed
+        if top:
+            return node
+        return Limit(node, limit)
+
+    @staticmethod
+    def row_preserving(node: Node) -> bool:
+        from sycamore.transforms.embed import Embed
+        from sycamore.transforms.map import Map
+        from sycamore.transforms.partition import Partition
+
+        return isinstance(node, (Map, Embed, Partition)) and len(node.children) == 1 and node.children[0] is not None
+
+
+def _with_child(node: Node, children: list[Node]) -> Node:
+    node = copy.copy(node)
+    node.children = list(children)
+    return node
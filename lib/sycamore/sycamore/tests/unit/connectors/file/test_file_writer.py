@@ -41,3 +41,59 @@ def impl_test_json_bytes_with_bbox_image(exec_mode):
 
 def test_json_bytes_with_bbox_image():
     impl_test_json_bytes_with_bbox_image(sycamore.EXEC_LOCAL)
+
+
+def impl_test_parquet(exec_mode):
+    import pyarrow.parquet as pq
+
+    from sycamore.data import Document
+
+    docs = [
+        Document(
+            doc_id=f"doc-{i}",
+            text_representation=f"text {i}",
+            embedding=[0.1 * i, 0.2],
+            properties={"entity": {"state": "WA", "count": i}},
+            elements=[{"type": "Text", "text_representation": "hello", "properties": {"page_number": 1}}],
+        )
+        for i in range(3)
+    ]
+    with tempfile.TemporaryDirectory() as tempdir:
+        (
+            sycamore.init(exec_mode=exec_mode)
+            .read.document(docs)
+            .write.parquet(f"{tempdir}/docs", elements_path=f"{tempdir}/elements")
+        )
+        table = pq.read_table(f"{tempdir}/docs").sort_by("doc_id")
+        assert table.column("doc_id").to_pylist() == ["doc-0", "doc-1", "doc-2"]
+        assert table.column("properties.entity.count").to_pylist() == [0, 1, 2]
+        assert table.schema.field("embedding").type.list_size == 2
+        elements = pq.read_table(f"{tempdir}/elements")
+        assert sorted(elements.column("doc_id").to_pylist()) == ["doc-0", "doc-1", "doc-2"]
+        assert elements.column("properties.page_number").to_pylist() == [1, 1, 1]
+
+        # Writing again adds files rather than replacing some of the earlier ones.
+        sycamore.init(exec_mode=exec_mode).read.document(docs).write.parquet(f"{tempdir}/docs")
+        assert pq.read_table(f"{tempdir}/docs").num_rows == 6
+
+
+def test_parquet():
+    impl_test_parquet(sycamore.EXEC_LOCAL)
+
+
+def test_parquet_ray():
+    impl_test_parquet(sycamore.EXEC_RAY)
+
+
+def test_parquet_ray_schema_per_block():
+    import pyarrow.parquet as pq
+
+    from sycamore.data import Document
+
+    docs = [Document(doc_id="a", properties={"value": 1}), Document(doc_id="b", properties={"value": "s"})]
+    with tempfile.TemporaryDirectory() as tempdir:
+        sycamore.init(exec_mode=sycamore.EXEC_RAY).read.document(docs).write.parquet(tempdir)
+        # Each document is a block of its own, which on its own infers a different type.
+        assert len(glob.glob(f"{tempdir}/*.parquet")) == 2
+        table = pq.read_table(tempdir).sort_by("doc_id")
+        assert table.column("properties.value").to_pylist() == ["1", '"s"']
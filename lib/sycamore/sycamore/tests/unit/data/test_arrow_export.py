@@ -0,0 +1,59 @@
+import pyarrow as pa
+
+from sycamore.data import Document, MetadataDocument
+from sycamore.data.arrow_export import conform_table, docs_to_arrow, elements_to_arrow, unify_schemas
+
+
+def test_docs_to_arrow():
+    docs = [
+        Document(doc_id="a", properties={"score": 1, "tags": ["x", "y"], "mixed": 1, "entity": {"state": "WA"}}),
+        Document(doc_id="b", embedding=[1.0, 2.0], bbox=(0.0, 0.0, 1.0, 1.0), properties={"mixed": "one"}),
+        MetadataDocument(metadata={"ignored": True}),
+    ]
+    table = docs_to_arrow(docs)
+    assert table.num_rows == 2
+    assert table.column("doc_id").to_pylist() == ["a", "b"]
+    assert table.column("properties.score").to_pylist() == [1, None]
+    assert table.column("properties.tags").to_pylist() == [["x", "y"], None]
+    assert table.column("properties.entity.state").to_pylist() == ["WA", None]
+    assert table.column("properties.mixed").to_pylist() == ["1", '"one"']
+    assert table.schema.field("embedding").type == pa.list_(pa.float64())
+    assert docs_to_arrow(docs[1:]).schema.field("embedding").type == pa.list_(pa.float64(), 2)
+    assert table.column("bbox").to_pylist() == [None, [0.0, 0.0, 1.0, 1.0]]
+    assert "binary_representation" not in table.column_names
+    assert docs_to_arrow([]).num_rows == 0
+
+
+def test_elements_to_arrow():
+    docs = [
+        Document(
+            doc_id="a",
+            binary_representation=b"pdf",
+            elements=[
+                {"type": "Text", "text_representation": "one", "properties": {"page_number": 1}},
+                {"type": "Table", "binary_representation": b"img", "properties": {"page_number": 2}},
+            ],
+        ),
+        Document(doc_id="b"),
+    ]
+    table = elements_to_arrow(docs, include_binary=True)
+    assert table.column("doc_id").to_pylist() == ["a", "a"]
+    assert table.column("element_index").to_pylist() == [0, 1]
+    assert table.column("properties.page_number").to_pylist() == [1, 2]
+    assert table.column("binary_representation").to_pylist() == [None, b"img"]
+    assert docs_to_arrow(docs, include_binary=True).column("binary_representation").to_pylist() == [b"pdf", None]
+
+
+def test_unify_schemas():
+    first = docs_to_arrow([Document(doc_id="a", embedding=[1.0, 2.0], properties={"value": 1, "score": 1})])
+    second = docs_to_arrow([Document(doc_id="b", properties={"value": "s", "score": 0.5, "extra": True})])
+    schema = unify_schemas([first.schema, second.schema])
+    assert schema.field("properties.value").type == pa.large_string()
+    assert schema.field("properties.score").type == pa.float64()
+    assert schema.field("embedding").type == pa.list_(pa.float64())
+
+    table = pa.concat_tables([conform_table(first, schema), conform_table(second, schema)])
+    assert table.column("properties.value").to_pylist() == ["1", '"s"']
+    assert table.column("properties.score").to_pylist() == [1.0, 0.5]
+    assert table.column("properties.extra").to_pylist() == [None, True]
+    assert table.column("embedding").to_pylist() == [[1.0, 2.0], None]
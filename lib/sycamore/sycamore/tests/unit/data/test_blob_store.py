@@ -0,0 +1,65 @@
+import io
+import json
+
+import pytest
+
+import sycamore
+
+from sycamore.connectors.file import BinaryScan
+from sycamore.connectors.file.file_writer import document_to_json_bytes
+from sycamore.data import Document
+from sycamore.data.blob_store import BlobRef, BlobStore
+
+
+def test_put_get(tmp_path):
+    store = BlobStore(str(tmp_path / "blobs"))
+    data = b"x" * 100_000
+    ref = store.put(data)
+    assert ref.size == len(data) and store.get(ref.key) == data
+    assert store.put(data) == ref
+    assert len(list((tmp_path / "blobs").rglob("*.*"))) == 0 and len(list((tmp_path / "blobs").rglob(ref.key))) == 1
+
+    (tmp_path / "blobs" / ref.key[:2] / ref.key).write_bytes(b"y")
+    with pytest.raises(ValueError):
+        store.get(ref.key)
+
+
+def test_document_blob_ref(tmp_path):
+    store = BlobStore(str(tmp_path))
+    data = b"%PDF" * 100_000
+    doc = Document(doc_id="d")
+    doc.data["binary_representation"] = store.put(data)
+
+    raw = doc.serialize()
+    assert len(raw) < 1000
+    copy = Document.deserialize(raw)
+    assert isinstance(copy.data["binary_representation"], BlobRef)
+    assert copy.binary_representation == data
+    assert "400000 bytes" in str(copy)
+
+
+def test_binary_scan_blob_store(tmp_path):
+    (tmp_path / "in").mkdir()
+    (tmp_path / "in" / "a.txt").write_bytes(b"hello")
+    scan = BinaryScan(str(tmp_path / "in"), binary_format="txt", blob_store=str(tmp_path / "blobs"))
+    [doc] = list(scan.local_source())
+    assert isinstance(doc.data["binary_representation"], BlobRef)
+    assert doc.binary_representation == b"hello"
+
+
+def test_blob_ref_output(tmp_path):
+    store = BlobStore(str(tmp_path / "blobs"))
+    doc = Document(doc_id="d")
+    doc.data["binary_representation"] = store.put(b"%PDF" * 100)
+    ref = {"blob": doc.data["binary_representation"].key, "size": 400}
+
+    assert json.loads(document_to_json_bytes(doc))["binary_representation"] == ref
+    context = sycamore.init(exec_mode=sycamore.EXEC_LOCAL)
+    (tmp_path / "out").mkdir()
+    context.read.document([doc]).write.json(str(tmp_path / "out"))
+    [out] = list((tmp_path / "out").iterdir())
+    assert json.loads(out.read_text())["binary_representation"] == ref
+
+    shown = io.StringIO()
+    context.read.document([doc]).show(stream=shown)
+    assert "<400 bytes>" in shown.getvalue()
@@ -0,0 +1,70 @@
+import pyarrow as pa
+
+from sycamore.data import BoundingBox, Document, Element, HierarchicalDocument, MetadataDocument, TableElement
+from sycamore.data.columnar import extract_arrow_column, extract_column, field_values, table_to_docs
+from sycamore.data.table import Table, TableCell
+
+
+def make_docs() -> list[Document]:
+    table = Table([TableCell(content="a", rows=[0], cols=[0])])
+    doc = Document(
+        doc_id="d1",
+        type="pdf",
+        text_representation="hello",
+        binary_representation=b"\x00\x01",
+        embedding=[0.5, 1.5],
+        shingles=[1, 2, 3],
+        parent_id="p1",
+        properties={"n": 1, "nested": {"a": [1, 2]}, "path": "s3://x", "bytes": b"raw", "tuple": (1, 2), 3: "x"},
+        elements=[
+            Element(type="Text", text_representation="t", properties={"page_number": 1}),
+            TableElement(table=table, title="tbl"),
+        ],
+    )
+    doc.bbox = BoundingBox(0.0, 0.0, 1.0, 1.0)
+    doc.elements[0].bbox = BoundingBox(1, 2, 3, 4)
+    other = Document(text_representation=None, properties={})
+    other.data["custom"] = {"any": object.__name__}
+    return [doc, other, MetadataDocument(nobodies="home")]
+
+
+class TestColumnar:
+    def test_table_to_docs(self):
+        docs = make_docs()
+        out = table_to_docs(pa.table({"doc": [d.serialize() for d in docs]}))
+        assert out[:2] == docs[:2]
+        assert isinstance(out[0].elements[1], TableElement)
+        assert isinstance(out[2], MetadataDocument)
+
+        doc = HierarchicalDocument(Document(text_representation="root"))
+        doc.children = [HierarchicalDocument(Document(text_representation="child"))]
+        (out,) = table_to_docs(pa.table({"doc": [doc.serialize()]}))
+        assert isinstance(out, HierarchicalDocument)
+        assert out.children[0].text_representation == "child"
+
+    def test_field_values(self):
+        docs = make_docs()
+        rows = pa.table({"doc": [d.serialize() for d in docs]})
+
+        for field in [
+            "doc_id",
+            "text_representation",
+            "bbox",
+            "properties.n",
+            "properties.nested.a",
+            "properties.bytes",
+            "properties.tuple",
+            "properties.missing",
+            "custom.any",
+            "elements",
+        ]:
+            expected = [d.field_to_value(field) for d in docs[:2]]
+            assert extract_column(docs[:2], field) == expected, field
+            assert field_values(rows, field)[:2] == expected, field
+
+        assert field_values(rows, "properties.n")[2] is None
+
+    def test_extract_arrow_column(self):
+        docs = [Document(properties={"entity": {"state": s}}) for s in ["WA", None, "OR"]]
+        assert extract_arrow_column(docs, "properties.entity.state").to_pylist() == ["WA", None, "OR"]
+        assert extract_arrow_column(docs, "properties.missing", type=pa.int64()).type == pa.int64()
@@ -143,6 +143,30 @@ class TestDocument:
         assert d.elements[0]["type"] == "a"
         assert d.elements[1]["type"] == "b"
 
+    def test_compact(self):
+        d = Document({"doc_id": "d", "elements": [{"type": "table"}, {"type": "Image"}, {"type": "Text"}]})
+        for obj in [d, *d.elements]:
+            assert not hasattr(obj, "__dict__")
+        assert isinstance(d.elements[0], TableElement)
+
+        with pytest.raises(AttributeError):
+            d.not_a_field = 1  # type: ignore[attr-defined]
+
+        assert d == d.data and dict(d) == d.data
+        assert d.get("doc_id") == "d" and d.pop("doc_id") == "d" and "doc_id" not in d
+
+    def test_copy_elements(self):
+        d = Document({"elements": [{"type": "table", "properties": {"title": "t"}}, {"type": "Text"}]})
+        copy = Document(d.data)
+        for orig, new in zip(d.elements, copy.elements):
+            assert new == orig and new is not orig and type(new) is type(orig)
+        copy.elements[1].type = "Title"
+        assert d.elements[1].type == "Text"
+
+        # An element whose class does not match its type is rebuilt as the right class.
+        d = Document({"elements": [Element({"type": "table"})]})
+        assert isinstance(d.elements[0], TableElement)
+
 
 class TestMetadataDocument:
     def test_fail_constructor(self):
@@ -0,0 +1,75 @@
+import pickle
+
+from sycamore.data import Document, Element, TableElement
+from sycamore.data.serialization import MAGIC, OUT_OF_BAND_THRESHOLD, LazyElements, dumps, loads
+
+
+def make_doc() -> Document:
+    return Document(
+        {
+            "doc_id": "doc",
+            "binary_representation": b"x" * OUT_OF_BAND_THRESHOLD,
+            "embedding": [0.1, 0.2, 0.3],
+            "elements": [
+                {"type": "Text", "text_representation": "small", "binary_representation": b"y"},
+                {"type": "Image", "binary_representation": b"z" * (2 * OUT_OF_BAND_THRESHOLD), "embedding": [1.5]},
+                {"type": "table", "properties": {"title": "t"}},
+            ],
+        }
+    )
+
+
+class TestSerialization:
+    def test_out_of_band(self):
+        doc = make_doc()
+        before = pickle.dumps(doc.data)
+        buffers = doc.serialize_buffers()
+
+        assert len(buffers) == 4 and bytes(buffers[0]).startswith(MAGIC)
+        # The large values are handed over as they are, not copied.
+        assert buffers[2].obj is doc.binary_representation
+        assert buffers[3].obj.obj is doc.elements[1].binary_representation
+        assert pickle.dumps(doc.data) == before
+
+        copy = Document.deserialize(b"".join(buffers))
+        assert copy == doc and copy.serialize() == doc.serialize()
+        assert isinstance(copy.binary_representation, bytes)
+        assert isinstance(copy.embedding, list) and copy.embedding == [0.1, 0.2, 0.3]
+        assert isinstance(copy.elements[0], Element) and isinstance(copy.elements[2], TableElement)
+        assert copy.elements[1].data["embedding"] == [1.5]
+
+    def test_in_band(self):
+        doc = Document({"doc_id": "small", "binary_representation": b"abc", "embedding": [1.0, 2]})
+        (raw,) = dumps(doc.data)
+        assert raw == doc.serialize() and not raw.startswith(MAGIC)
+        assert Document.deserialize(raw) == doc
+
+        # Data pickled before out of band buffers were used still loads.
+        old = make_doc()
+        assert loads(pickle.dumps(old.data)) == old.data
+        assert Document.deserialize(pickle.dumps(old.data)) == old
+
+    def test_lazy_elements(self):
+        doc = make_doc()
+        raw = doc.serialize()
+
+        copy = Document.deserialize(raw)
+        lazy = copy.data["elements"]
+        assert isinstance(lazy, LazyElements) and not lazy.loaded and len(lazy) == 3
+        # Untouched elements are written back out as they were read.
+        copy.properties["touched"] = True
+        again = Document.deserialize(copy.serialize())
+        assert not lazy.loaded and again.properties["touched"]
+
+        elements = copy.elements
+        assert lazy.loaded and copy.data["elements"] is elements and isinstance(elements, list)
+        assert elements == doc.elements and isinstance(elements[2], TableElement)
+        elements[0].text_representation = "changed"
+        assert Document.deserialize(copy.serialize()).elements[0].text_representation == "changed"
+
+        # Access through the data dict loads too, and documents built from the data get their own elements.
+        child = Document(again.data)
+        assert again.data["elements"][0].text_representation == "small"
+        child.elements[0].text_representation = "child"
+        assert again.elements[0].text_representation == "small"
+        assert pickle.loads(pickle.dumps(Document.deserialize(raw))) == doc
@@ -0,0 +1,57 @@
+from sycamore.data import Document, Element
+from sycamore.functions import CharacterTokenizer, ElementPacker
+from sycamore.transforms.similarity import SimilarityScorer
+
+
+def make_document(texts, scores=None):
+    elements = []
+    for i, text in enumerate(texts):
+        element = Element(text_representation=text, element_index=i)
+        if scores is not None:
+            element.properties["score"] = scores[i]
+        elements.append(element)
+    return Document(elements=elements)
+
+
+class LengthScorer(SimilarityScorer):
+    def score(self, inputs):
+        return [len(text) for _, text in inputs]
+
+
+def test_pack_by_position():
+    doc = make_document(["aaaa", "bbbbbbbbbb", "cc", "dddd"])
+    packer = ElementPacker(CharacterTokenizer(), max_tokens=10, element_overhead_tokens=1)
+
+    elements, tokens = packer.pack(doc)
+    # The second element does not fit, so the smaller ones after it are used instead.
+    assert [e.text_representation for e in elements] == ["aaaa", "cc"]
+    assert tokens == 8
+
+
+def test_pack_by_score_keeps_document_order():
+    doc = make_document(["aaaa", "bbbb", "cccc", "dddd"], scores=[0.1, 0.9, 0.2, 0.5])
+    packer = ElementPacker(CharacterTokenizer(), max_tokens=10, score_property="score", element_overhead_tokens=1)
+
+    elements, tokens = packer.pack(doc)
+    assert [e.text_representation for e in elements] == ["bbbb", "dddd"]
+    assert tokens == 10
+
+
+def test_pack_with_scorer():
+    doc = make_document(["a", "bbbbbb", "ccc"])
+    packer = ElementPacker(CharacterTokenizer(), max_tokens=8, scorer=LengthScorer(), query="q")
+
+    elements, _ = packer.pack(doc)
+    assert [e.text_representation for e in elements] == ["ccc"]
+    assert "_packing_score" not in doc.properties
+    assert all(e.properties.keys() == {"_element_index"} for e in doc.elements)
+
+
+def test_pack_missing_values():
+    doc = make_document(["aaaa", None, "bbbb", "cccc"], scores=[0.1, 0.9, None, 0.5])
+    packer = ElementPacker(CharacterTokenizer(), max_tokens=7, score_property="score", element_overhead_tokens=1)
+
+    elements, tokens = packer.pack(doc)
+    # The element without text costs only the overhead, and the one without a score is ranked last.
+    assert [e.text_representation for e in elements] == [None, "cccc"]
+    assert tokens == 6
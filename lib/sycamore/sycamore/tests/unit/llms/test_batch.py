@@ -0,0 +1,77 @@
+import pickle
+from typing import Optional
+
+import pytest
+
+from sycamore.data import Document
+from sycamore.llms import LLM, LocalBatchJobClient, OpenAI, OpenAIModels
+from sycamore.llms.batch import BatchJobError
+from sycamore.llms.llms import FakeLLM
+from sycamore.transforms import ExtractEntity
+from sycamore.transforms.extract_entity import OpenAIEntityExtractor
+
+
+class EchoLLM(LLM):
+    def __init__(self):
+        super().__init__("echo")
+
+    def generate(self, *, prompt_kwargs: dict, llm_kwargs: Optional[dict] = None) -> str:
+        content = prompt_kwargs["messages"][-1]["content"]
+        if "fail" in content:
+            raise ValueError("asked to fail")
+        return content.upper()
+
+    def is_chat_mode(self) -> bool:
+        return True
+
+
+def batch_openai(tmp_path, **kwargs) -> LLM:
+    client = LocalBatchJobClient(str(tmp_path / "jobs"), EchoLLM(), **kwargs)
+    return OpenAI(OpenAIModels.GPT_4O_MINI, api_key="unused").use_batch_jobs(client, poll_interval_seconds=0)
+
+
+def extract(llm, paths, max_concurrency):
+    docs = [Document(doc_id=str(i), properties={"path": p}) for i, p in enumerate(paths)]
+    extractor = OpenAIEntityExtractor("title", llm=llm, use_elements=False, prompt="title of ", field="properties.path")
+    return ExtractEntity(None, entity_extractor=extractor, max_concurrency=max_concurrency)._local_process(docs)
+
+
+def job_sizes(tmp_path) -> list[int]:
+    return sorted(len((j / "input.jsonl").read_text().splitlines()) for j in (tmp_path / "jobs").iterdir())
+
+
+def test_batch_jobs(tmp_path):
+    llm = batch_openai(tmp_path, polls_until_done=2)
+    out = extract(llm, [f"doc{i}" for i in range(12)], max_concurrency=5)
+
+    assert [d.properties["title"] for d in out] == [f"TITLE OF DOC{i}" for i in range(12)]
+    # Documents waiting for a job do not count against max_concurrency, so the whole batch is one job.
+    assert job_sizes(tmp_path) == [12]
+
+
+def test_batch_jobs_max_batch_size(tmp_path):
+    client = LocalBatchJobClient(str(tmp_path / "jobs"), EchoLLM(), polls_until_done=2)
+    llm = OpenAI(OpenAIModels.GPT_4O_MINI, api_key="unused")
+    llm.use_batch_jobs(client, poll_interval_seconds=0, max_batch_size=5)
+    out = extract(llm, [f"doc{i}" for i in range(12)], max_concurrency=2)
+
+    assert [d.properties["title"] for d in out] == [f"TITLE OF DOC{i}" for i in range(12)]
+    assert job_sizes(tmp_path) == [2, 5, 5]
+
+
+def test_batch_jobs_failed_request(tmp_path):
+    llm = batch_openai(tmp_path)
+    with pytest.raises(BatchJobError):
+        extract(llm, ["doc0", "fail", "doc2"], max_concurrency=3)
+
+
+def test_batch_mode_is_pickled(tmp_path):
+    llm = pickle.loads(pickle.dumps(batch_openai(tmp_path)))
+    assert llm._batch_mode is not None
+    out = extract(llm, ["a", "b"], max_concurrency=2)
+    assert [d.properties["title"] for d in out] == ["TITLE OF A", "TITLE OF B"]
+
+
+def test_batch_jobs_not_supported(tmp_path):
+    with pytest.raises(ValueError):
+        FakeLLM().use_batch_jobs(LocalBatchJobClient(str(tmp_path), EchoLLM()))
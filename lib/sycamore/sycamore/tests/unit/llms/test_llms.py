@@ -1,5 +1,8 @@
+from pydantic import BaseModel
+
 from sycamore.llms import OpenAI, OpenAIModels
 from sycamore.llms.prompts import EntityExtractorFewShotGuidancePrompt, EntityExtractorZeroShotGuidancePrompt
+from sycamore.utils.cache import DiskCache
 
 
 class TestLLMs:
@@ -17,3 +20,36 @@ class TestLLMs:
         from sycamore.llms.prompts import ENTITY_EXTRACTOR_FEW_SHOT_GUIDANCE_PROMPT
 
         assert isinstance(ENTITY_EXTRACTOR_FEW_SHOT_GUIDANCE_PROMPT, EntityExtractorFewShotGuidancePrompt)
+
+    def test_cache_keys_are_canonical(self, tmp_path):
+        llm = OpenAI(OpenAIModels.GPT_4O_MINI, api_key="unused", cache=DiskCache(str(tmp_path)))
+
+        class Answer(BaseModel):
+            value: int
+
+        class SameAnswer(BaseModel):
+            value: int
+
+        SameAnswer.__name__ = "Answer"
+        messages = [{"role": "user", "content": "hi"}]
+        key = llm._get_cache_key({"messages": messages}, {"temperature": 0, "response_format": Answer})
+        reordered = [{"content": "hi", "role": "user"}]
+        assert key == llm._get_cache_key({"messages": reordered}, {"response_format": SameAnswer, "temperature": 0})
+        assert key != llm._get_cache_key({"messages": messages}, {"temperature": 0})
+
+    def test_legacy_cache_keys(self, tmp_path):
+        cache = DiskCache(str(tmp_path))
+        llm = OpenAI(OpenAIModels.GPT_4O_MINI, api_key="unused", cache=cache)
+        prompt_kwargs = {"prompt": "hi"}
+        legacy_key = llm._get_legacy_cache_key(prompt_kwargs, {})
+        value = {"result": "hello", "prompt_kwargs": prompt_kwargs, "llm_kwargs": {}, "model_name": "gpt-4o-mini"}
+        cache.set(legacy_key, value)
+
+        assert llm.generate(prompt_kwargs=prompt_kwargs, llm_kwargs={}) == "hello"
+        assert cache.get(llm._get_cache_key(prompt_kwargs, {})) == value
+
+        bye = {"prompt": "bye"}
+        cache.set(llm._get_legacy_cache_key(bye, {}), {**value, "prompt_kwargs": bye})
+        no_legacy = OpenAI(OpenAIModels.GPT_4O_MINI, api_key="unused", cache=cache, legacy_cache_keys=False)
+        assert no_legacy._cache_get(bye, {})[1] is None
+        assert llm._cache_get(bye, {})[1] == "hello"
@@ -0,0 +1,17 @@
+import sycamore
+from sycamore.data import Document
+from sycamore.data.serialization import OUT_OF_BAND_THRESHOLD
+from sycamore.query.query_inspect import QueryDataInspector
+
+
+def test_large_binaries(tmp_path):
+    binary = bytes(range(256)) * (OUT_OF_BAND_THRESHOLD // 256 + 1)
+    docs = [Document(doc_id=f"doc{i}", binary_representation=binary) for i in range(3)]
+    context = sycamore.init(exec_mode=sycamore.EXEC_LOCAL)
+    context.read.document(docs).materialize(path=tmp_path / "node1").execute()
+
+    inspector = QueryDataInspector(f"{tmp_path}/")
+    assert inspector.get_counts() == {"node1": 3}
+    out = inspector.get_documents_for_node("node1")
+    assert sorted(d.doc_id for d in out) == ["doc0", "doc1", "doc2"]
+    assert all(d.binary_representation == binary for d in out)
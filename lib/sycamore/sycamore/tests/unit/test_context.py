@@ -6,13 +6,17 @@ from sycamore.context import context_params, Context, get_val_from_context, Exec
 
 def test_init():
     from sycamore.rules.optimize_resource_args import EnforceResourceUsage, OptimizeResourceArgs
+    from sycamore.rules.fuse_map_transforms import FuseMapTransforms
+    from sycamore.rules.limit_pushdown import PushDownLimit
 
     context = sycamore.init()
 
     assert context is not None
-    assert len(context.rewrite_rules) == 2
-    assert isinstance(context.rewrite_rules[0], EnforceResourceUsage)
-    assert isinstance(context.rewrite_rules[1], OptimizeResourceArgs)
+    assert len(context.rewrite_rules) == 4
+    assert isinstance(context.rewrite_rules[0], PushDownLimit)
+    assert isinstance(context.rewrite_rules[1], EnforceResourceUsage)
+    assert isinstance(context.rewrite_rules[2], OptimizeResourceArgs)
+    assert isinstance(context.rewrite_rules[3], FuseMapTransforms)
 
     another_context = sycamore.init()
     assert another_context is not context
@@ -432,6 +432,26 @@ class TestDocSet:
         assert taken[1].doc_id == "doc_2"
         assert taken[2].doc_id == "doc_3"
 
+    def test_llm_filter_concurrent(self):
+        doc_list = [
+            Document(doc_id=f"doc_{i}", elements=[Element(text_representation=f"test{1 + i % 2}")]) for i in range(6)
+        ]
+        mock_llm = MockLLM()
+        mock_llm.generate = MagicMock(wraps=mock_llm.generate)
+        context = sycamore.init(params={OperationTypes.BINARY_CLASSIFIER: {"llm": mock_llm}}, exec_mode=ExecMode.LOCAL)
+
+        filtered_docset = context.read.document(doc_list).llm_filter(
+            new_field="_autogen_LLMFilterOutput",
+            prompt=[],
+            field="text_representation",
+            threshold=4,
+            use_elements=True,
+            max_concurrency=3,
+        )
+
+        assert [d.doc_id for d in filtered_docset.take()] == ["doc_0", "doc_2", "doc_4"]
+        assert mock_llm.generate.call_count == 6
+
     def test_llm_filter_with_doc_structure_with_similarity_sorting(self):
         doc_list = [
             Document(
@@ -104,3 +104,135 @@ class TestPrepare(unittest.TestCase):
 
         assert a.count == 7
         assert b.count == 3
+
+
+class CountingSource(Node):
+    def __init__(self, num_docs):
+        super().__init__([])
+        self.num_docs = num_docs
+        self.produced = 0
+
+    def execute(self, **kwargs):
+        assert False
+
+    def local_source(self):
+        for i in range(self.num_docs):
+            self.produced += 1
+            yield Document({"doc_id": str(i), "properties": {"i": i}})
+
+
+def test_local_streaming_stops_early():
+    from sycamore.transforms.map import Map
+
+    source = CountingSource(1000)
+    mapped = []
+
+    def record(d):
+        mapped.append(d.doc_id)
+        return d
+
+    context = sycamore.init(exec_mode=ExecMode.LOCAL)
+    docs = DocSet(context, Map(source, f=record, batch_size=2)).take(3)
+
+    assert [d.doc_id for d in docs] == ["0", "1", "2"]
+    assert source.produced <= 4
+    assert len(mapped) <= 4
+
+
+def test_local_streaming_limit():
+    source = CountingSource(1000)
+    context = sycamore.init(exec_mode=ExecMode.LOCAL)
+    docs = DocSet(context, source).limit(5).map(lambda d: d, batch_size=1).take_all()
+
+    assert len(docs) == 5
+    assert source.produced == 5
+
+
+def test_local_streaming_single_instance():
+    from sycamore.transforms.map import Map
+
+    class Counter:
+        def __init__(self):
+            self.seen = 0
+
+        def __call__(self, d):
+            self.seen += 1
+            d.properties["seen"] = self.seen
+            return d
+
+    context = sycamore.init(exec_mode=ExecMode.LOCAL)
+    docs = DocSet(context, Map(CountingSource(10), f=Counter, batch_size=3)).take_all()
+
+    assert [d.properties["seen"] for d in docs] == list(range(1, 11))
+
+
+def add_pid(d: Document) -> Document:
+    import os
+
+    d.properties["pid"] = os.getpid()
+    return d
+
+
+class TestLocalParallel:
+    @staticmethod
+    def docs(n):
+        return [Document({"doc_id": str(i), "properties": {"i": i}}) for i in range(n)]
+
+    def test_process_pool_preserves_order(self):
+        context = sycamore.init(exec_mode=ExecMode.LOCAL_PARALLEL, local_max_workers=4)
+        docs = context.read.document(self.docs(50)).map(add_pid, batch_size=2).take_all()
+
+        assert [d.doc_id for d in docs] == [str(i) for i in range(50)]
+        pids = {d.properties["pid"] for d in docs}
+        assert len(pids) > 1
+
+    def test_filter_and_flat_map(self):
+        context = sycamore.init(exec_mode=ExecMode.LOCAL_PARALLEL, local_max_workers=3)
+        docs = (
+            context.read.document(self.docs(20))
+            .filter(lambda d: d.properties["i"] % 2 == 0)
+            .flat_map(lambda d: [d, Document({"doc_id": d.doc_id + "-copy"})])
+            .take_all()
+        )
+
+        expected = []
+        for i in range(0, 20, 2):
+            expected.extend([str(i), f"{i}-copy"])
+        assert [d.doc_id for d in docs] == expected
+
+    def test_parallelism_one_runs_in_process(self):
+        import os
+
+        class Tag:
+            def __call__(self, d):
+                d.properties["pid"] = os.getpid()
+                return d
+
+        context = sycamore.init(exec_mode=ExecMode.LOCAL_PARALLEL, local_max_workers=4)
+        docs = context.read.document(self.docs(10)).map(Tag, batch_size=1).take_all()
+
+        assert {d.properties["pid"] for d in docs} == {os.getpid()}
+
+    def test_non_cpu_user_uses_threads(self):
+        import os
+        import threading
+
+        from sycamore.plan_nodes import NonCPUUser
+        from sycamore.transforms.map import Map
+
+        class ThreadTagger(NonCPUUser, Map):
+            def __init__(self, child, **kwargs):
+                super().__init__(child, f=ThreadTagger.tag, **kwargs)
+
+            @staticmethod
+            def tag(d):
+                d.properties["pid"] = os.getpid()
+                d.properties["thread"] = threading.get_ident()
+                return d
+
+        context = sycamore.init(exec_mode=ExecMode.LOCAL_PARALLEL, local_max_workers=4)
+        ds = context.read.document(self.docs(40))
+        docs = DocSet(context, ThreadTagger(ds.plan, batch_size=1)).take_all()
+
+        assert [d.doc_id for d in docs] == [str(i) for i in range(40)]
+        assert {d.properties["pid"] for d in docs} == {os.getpid()}
@@ -1,4 +1,5 @@
 import glob
+import json
 import logging
 from pathlib import Path
 import pytest
@@ -367,6 +368,148 @@ class TestMaterializeRead(unittest.TestCase):
                 ds.take_all()
 
 
+class TestIncremental(unittest.TestCase):
+    class NumCalls:
+        x = 0
+
+    # Note: This only makes sense in local mode, as the count is not thread safe
+    @staticmethod
+    def inc_counter(doc):
+        TestIncremental.NumCalls.x += 1
+        doc.properties["computed"] = True
+        return doc
+
+    def setUp(self):
+        TestIncremental.NumCalls.x = 0
+
+    @staticmethod
+    def inputs(sources):
+        # New documents for every execution, like a reader would produce.
+        return [Document({"doc_id": f"doc_{n}", "text_representation": t, "properties": {"n": n}}) for n, t in sources]
+
+    @staticmethod
+    def data_docs(docs):
+        return sorted([d for d in docs if not isinstance(d, MetadataDocument)], key=lambda d: d.properties["n"])
+
+    def test_incremental(self):
+        ctx = sycamore.init(exec_mode=ExecMode.LOCAL)
+        sources = [(0, "a"), (1, "b"), (2, "c")]
+        with tempfile.TemporaryDirectory() as tmpdir:
+
+            def run():
+                ds = ctx.read.document(self.inputs(sources)).map(self.inc_counter)
+                return self.data_docs(
+                    ds.materialize(path=tmpdir, source_mode=sycamore.MATERIALIZE_INCREMENTAL).take_all()
+                )
+
+            out = run()
+            assert TestIncremental.NumCalls.x == 3
+            assert [d.properties["n"] for d in out] == [0, 1, 2]
+            assert all("_materialize_keys" not in d.properties for d in out)
+            assert len(glob.glob(tmpdir + "/doc-*.pickle")) == 3
+
+            # Nothing changed, everything is served from disk.
+            out = run()
+            assert TestIncremental.NumCalls.x == 3
+            assert [d.properties["n"] for d in out] == [0, 1, 2]
+            assert all(d.properties["computed"] for d in out)
+
+            # One changed, one deleted and one added document.
+            sources = [(0, "a"), (1, "changed"), (3, "d")]
+            out = run()
+            assert TestIncremental.NumCalls.x == 5
+            assert [d.properties["n"] for d in out] == [0, 1, 3]
+            assert out[1].text_representation == "changed"
+            assert len(glob.glob(tmpdir + "/doc-*.pickle")) == 3
+            assert len(glob.glob(tmpdir + "/seen-*")) == 0
+
+            tombstones = [json.loads(Path(f).read_text()) for f in glob.glob(tmpdir + "/tombstone-*.json")]
+            assert sorted(t["doc_ids"][0] for t in tombstones) == ["doc_1", "doc_2"]
+
+            # The plan changed, so everything is recomputed.
+            ds = ctx.read.document(self.inputs(sources)).map(self.inc_counter).map(noop_fn)
+            ds.materialize(path=tmpdir, source_mode=sycamore.MATERIALIZE_INCREMENTAL).execute()
+            assert TestIncremental.NumCalls.x == 8
+            assert len(glob.glob(tmpdir + "/doc-*.pickle")) == 3
+
+    def test_take_does_not_tombstone(self):
+        ctx = sycamore.init(exec_mode=ExecMode.LOCAL)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            ds = ctx.read.document(self.inputs([(0, "a"), (1, "b"), (2, "c")])).map(noop_fn)
+            ds = ds.materialize(path=tmpdir, source_mode=sycamore.MATERIALIZE_INCREMENTAL)
+            ds.execute()
+            ds.take(1)
+            assert len(glob.glob(tmpdir + "/doc-*.pickle")) == 3
+            assert len(glob.glob(tmpdir + "/tombstone-*")) == 0
+
+    def test_limit_does_not_tombstone_ray(self):
+        ctx = sycamore.init(exec_mode=ExecMode.RAY)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            sources = [(n, str(n)) for n in range(200)]
+            ds = ctx.read.document(self.inputs(sources)).map(noop_fn)
+            ds = ds.materialize(path=tmpdir, source_mode=sycamore.MATERIALIZE_INCREMENTAL)
+            ds.execute()
+            assert len(glob.glob(tmpdir + "/doc-*.pickle")) == 200
+            assert (Path(tmpdir) / "materialize.success").exists()
+            (Path(tmpdir) / "materialize.success").unlink()
+
+            assert len(ds.limit(3).take_all()) == 3
+            assert len(glob.glob(tmpdir + "/doc-*.pickle")) == 200
+            assert len(glob.glob(tmpdir + "/tombstone-*")) == 0
+            assert not (Path(tmpdir) / "materialize.success").exists()
+
+    def test_nested(self):
+        ctx = sycamore.init(exec_mode=ExecMode.LOCAL)
+        with tempfile.TemporaryDirectory() as tmpdir:
+
+            def run(outer_fn):
+                ds = ctx.read.document(self.inputs([(0, "a"), (1, "b"), (2, "c")])).map(self.inc_counter)
+                ds = ds.materialize(path=f"{tmpdir}/inner", source_mode=sycamore.MATERIALIZE_INCREMENTAL)
+                ds = ds.map(outer_fn)
+                ds = ds.materialize(path=f"{tmpdir}/outer", source_mode=sycamore.MATERIALIZE_INCREMENTAL)
+                return self.data_docs(ds.take_all())
+
+            assert [d.properties["n"] for d in run(noop_fn)] == [0, 1, 2]
+            assert TestIncremental.NumCalls.x == 3
+
+            def outer_fn(d):
+                d.properties["outer"] = True
+                return d
+
+            # Only the plan above the inner materialize changed, so its outputs are reused.
+            out = run(outer_fn)
+            assert TestIncremental.NumCalls.x == 3
+            assert [d.properties["n"] for d in out] == [0, 1, 2]
+            assert all(d.properties["outer"] for d in out)
+            assert all("_materialize_keys" not in d.properties for d in out)
+            assert len(glob.glob(tmpdir + "/inner/doc-*.pickle")) == 3
+            assert len(glob.glob(tmpdir + "/outer/doc-*.pickle")) == 3
+            assert len(glob.glob(tmpdir + "/outer/tombstone-*")) == 3
+
+    def test_automaterialize(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+
+            def run(sources):
+                a = AutoMaterialize(tmpdir, source_mode=sycamore.MATERIALIZE_INCREMENTAL)
+                ctx = sycamore.init(exec_mode=ExecMode.LOCAL, rewrite_rules=[a])
+                return self.data_docs(
+                    ctx.read.document(self.inputs(sources)).map(self.inc_counter).map(noop_fn).take_all()
+                )
+
+            assert [d.properties["n"] for d in run([(0, "a"), (1, "b"), (2, "c")])] == [0, 1, 2]
+            assert TestIncremental.NumCalls.x == 3
+            out = run([(0, "changed"), (1, "b"), (2, "c")])
+            assert TestIncremental.NumCalls.x == 4
+            assert [d.properties["n"] for d in out] == [0, 1, 2]
+            assert all("_materialize_keys" not in d.properties for d in out)
+
+    def test_requires_map_transforms(self):
+        ctx = sycamore.init(exec_mode=ExecMode.LOCAL)
+        ds = ctx.read.document(make_docs(3)).limit(2)
+        with pytest.raises(ValueError):
+            ds.materialize(path="/tmp/unused", source_mode=sycamore.MATERIALIZE_INCREMENTAL)
+
+
 class TestAllViaPyarrowFS(unittest.TestCase):
     def test_simple(self):
         fs = InMemPyArrowFileSystem()
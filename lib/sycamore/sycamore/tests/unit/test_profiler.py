@@ -0,0 +1,107 @@
+import asyncio
+import io
+import time
+
+import pytest
+
+import sycamore
+from sycamore.context import ExecMode
+from sycamore.data import Document
+from sycamore.utils.profiler import NodeProfile, count_event
+
+
+def make_docs(num):
+    return [Document(doc_id=f"doc_{i}", text_representation=f"text {i}", properties={"x": i}) for i in range(num)]
+
+
+def call_llm(doc: Document) -> Document:
+    count_event("llm_calls")
+    if doc.properties["x"] % 2 == 0:
+        count_event("llm_cache_hits")
+    return doc
+
+
+async def call_llm_in_thread(doc: Document) -> Document:
+    return await asyncio.to_thread(call_llm, doc)
+
+
+def is_even(doc: Document) -> bool:
+    return doc.properties["x"] % 2 == 0
+
+
+def slow(doc: Document) -> Document:
+    time.sleep(0.01)
+    return doc
+
+
+@pytest.mark.parametrize("exec_mode", [ExecMode.LOCAL, ExecMode.LOCAL_PARALLEL, ExecMode.RAY])
+def test_analyze(exec_mode):
+    # More than one worker, so that LOCAL_PARALLEL runs the batches on a pool even on a single cpu.
+    context = sycamore.init(exec_mode=exec_mode, local_max_workers=4)
+    ds = context.read.document(make_docs(10)).filter(is_even).map(call_llm)
+    stream = io.StringIO()
+    profile = ds.explain(stream=stream, analyze=True)
+
+    assert profile is not None
+    nodes = {p.name.split("(")[0]: p for p in profile.nodes()}
+    scan = nodes["DocScan"]
+    assert scan.rows_out == 10 and scan.bytes_out > 0
+
+    filtered = [p for p in profile.nodes() if p.rows_in == 10][0]
+    assert filtered.rows_out == 5
+    assert filtered.bytes_in == scan.bytes_out
+
+    root = profile.root
+    assert root.rows_out == 5
+    assert root.counters["llm_calls"] == 5
+    assert root.cache_hit_rate() == 1.0
+    assert "llm_calls" in stream.getvalue()
+
+
+@pytest.mark.parametrize("exec_mode", [ExecMode.LOCAL, ExecMode.LOCAL_PARALLEL, ExecMode.RAY])
+def test_analyze_counts_from_threads(exec_mode):
+    context = sycamore.init(exec_mode=exec_mode, local_max_workers=4)
+    profile = context.read.document(make_docs(10)).map(call_llm_in_thread).explain(analyze=True)
+
+    assert profile is not None
+    assert profile.root.counters == {"llm_calls": 10, "llm_cache_hits": 5}
+
+
+def test_analyze_local_parallel_workers():
+    context = sycamore.init(exec_mode=ExecMode.LOCAL_PARALLEL, local_max_workers=4)
+    docs = context.read.document(make_docs(40)).map(call_llm, batch_size=5).map(slow, num_cpus=0, batch_size=5)
+    profile = docs.explain(analyze=True)
+
+    assert profile is not None
+    [slept, called, _] = profile.nodes()
+    assert called.counters == {"llm_calls": 40, "llm_cache_hits": 20}
+    assert called.peak_rss > 0
+    # Threads sleeping in parallel do not use the cpu.
+    assert slept.cpu_s() < 0.4
+
+
+def test_times_are_exclusive():
+    context = sycamore.init(exec_mode=ExecMode.LOCAL)
+    profile = context.read.document(make_docs(10)).map(slow).filter(is_even).explain(analyze=True)
+
+    assert profile is not None
+    [filtered, mapped, scan] = profile.nodes()
+    assert mapped.wall_s() >= 0.1
+    assert filtered.wall_s() < 0.1
+    assert profile.wall_ns >= mapped.wall_ns
+
+
+def test_count_event_outside_profile():
+    # No node is being profiled, so this is ignored.
+    count_event("llm_calls")
+
+    outer = NodeProfile("outer")
+    inner = NodeProfile("inner")
+    with outer:
+        with inner:
+            count_event("embed_calls", 3)
+        count_event("llm_calls")
+
+    assert inner.counters == {"embed_calls": 3}
+    assert outer.counters == {"llm_calls": 1}
+    assert outer.wall_ns >= 0
@@ -0,0 +1,196 @@
+import os
+import time
+from typing import Optional
+
+import pytest
+
+import sycamore
+from sycamore.connectors.base_reader import BaseDBReader
+from sycamore.context import ExecMode
+from sycamore.data import Document
+from sycamore.docset import DocSet
+from sycamore.result_cache import ResultStore, clear_result_caches, get_result_store, plan_fingerprint
+from sycamore.transforms.dataset_scan import DatasetScan
+
+calls: list[Optional[str]] = []
+
+
+def count_calls(doc: Document, tag: str = "") -> Document:
+    calls.append(doc.doc_id)
+    doc.properties["tag"] = tag
+    return doc
+
+
+def make_docs(num):
+    return [Document(doc_id=f"doc_{i}", text_representation=f"text {i}") for i in range(num)]
+
+
+@pytest.fixture(autouse=True)
+def reset():
+    calls.clear()
+    clear_result_caches()
+    yield
+    clear_result_caches()
+
+
+@pytest.mark.parametrize("storage", ["memory", "disk"])
+def test_repeated_actions_reuse_results(storage):
+    context = sycamore.init(exec_mode=ExecMode.LOCAL)
+    ds = context.read.document(make_docs(5)).map(count_calls).cache(storage=storage)
+
+    assert ds.count() == 5
+    assert len(calls) == 5
+
+    docs = ds.take_all()
+    assert len(calls) == 5
+    assert sorted(d.doc_id for d in docs) == [f"doc_{i}" for i in range(5)]
+
+    # Changes made by the consumer do not leak into the cache.
+    docs[0].properties["tag"] = "changed"
+    assert all(d.properties["tag"] == "" for d in ds.take_all())
+    assert len(calls) == 5
+
+
+def test_plan_changes_miss():
+    context = sycamore.init(exec_mode=ExecMode.LOCAL)
+    docs = make_docs(3)
+
+    context.read.document(docs).map(count_calls, kwargs={"tag": "a"}).cache().execute()
+    context.read.document(docs).map(count_calls, kwargs={"tag": "a"}).cache().execute()
+    assert len(calls) == 3
+
+    context.read.document(docs).map(count_calls, kwargs={"tag": "b"}).cache().execute()
+    assert len(calls) == 6
+
+
+def test_partial_read_not_cached():
+    context = sycamore.init(exec_mode=ExecMode.LOCAL)
+    ds = context.read.document(make_docs(5)).map(count_calls, batch_size=1).cache()
+
+    assert len(ds.take(1)) == 1
+    assert len(get_result_store("memory")) == 0
+    ds.execute()
+    assert len(get_result_store("memory")) == 1
+    computed = len(calls)
+    ds.execute()
+    assert len(calls) == computed
+
+
+def test_source_mtime(tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_text("one")
+    context = sycamore.init(exec_mode=ExecMode.LOCAL)
+    ds = context.read.binary(str(tmp_path), binary_format="txt").map(count_calls).cache()
+
+    fingerprint = plan_fingerprint(ds.plan.children[0])
+    assert fingerprint is not None
+    ds.execute()
+    ds.execute()
+    assert len(calls) == 1
+
+    path.write_text("two!")
+    os.utime(path, (time.time() + 10, time.time() + 10))
+    assert plan_fingerprint(ds.plan.children[0]) != fingerprint
+    ds.execute()
+    assert len(calls) == 2
+
+
+def test_ray_memory():
+    context = sycamore.init(exec_mode=ExecMode.RAY)
+    ds = context.read.document(make_docs(5)).map(count_calls).cache()
+
+    assert ds.count() == 5
+    first = ds.plan.children[0]
+    assert plan_fingerprint(first) is not None
+    assert len(get_result_store("memory")) == 1
+    assert sorted(d.doc_id for d in ds.take_all()) == [f"doc_{i}" for i in range(5)]
+    assert len(get_result_store("memory")) == 1
+
+
+def test_store_lru():
+    evicted = []
+    store = ResultStore(max_bytes=10)
+
+    assert store.put(("local", "a"), "A", 4, lambda: evicted.append("a"))
+    assert store.put(("local", "b"), "B", 4, lambda: evicted.append("b"))
+    assert store.get(("local", "a")) == "A"
+    assert store.put(("local", "c"), "C", 4, lambda: evicted.append("c"))
+
+    assert evicted == ["b"]
+    assert store.get(("local", "b")) is None
+    assert store.nbytes == 8
+
+    assert not store.put(("local", "d"), "D", 11)
+    assert len(store) == 2
+
+    store.set_max_bytes(4)
+    assert evicted == ["b", "a"]
+    assert store.get(("local", "c")) == "C"
+
+
+class ListReader(BaseDBReader):
+    class Client(BaseDBReader.Client):
+        @classmethod
+        def from_client_params(cls, params):
+            return cls()
+
+        def read_records(self, query_params):
+            return ListReader.QueryResponse()
+
+        def check_target_presence(self, query_params):
+            return True
+
+    class QueryResponse(BaseDBReader.QueryResponse):
+        def to_docs(self, query_params):
+            reads.append(1)
+            return [Document(d) for d in rows]
+
+
+rows: list[dict] = []
+reads: list[int] = []
+
+
+def test_reader_params():
+    rows[:] = [{"doc_id": "a", "text_representation": "one"}]
+    reads.clear()
+    context = sycamore.init(exec_mode=ExecMode.LOCAL)
+    ds = DocSet(context, ListReader(BaseDBReader.ClientParams(), BaseDBReader.QueryParams())).map(count_calls).cache()
+
+    ds.execute()
+    ds.execute()
+    # Fingerprinting does not query the database, and a hit does not read it.
+    assert len(calls) == 1
+    assert len(reads) == 1
+
+
+def test_reader_content():
+    rows[:] = [{"doc_id": "a", "text_representation": "one"}]
+    reads.clear()
+    context = sycamore.init(exec_mode=ExecMode.LOCAL)
+    reader = ListReader(BaseDBReader.ClientParams(), BaseDBReader.QueryParams())
+    ds = DocSet(context, reader).map(count_calls).cache(fingerprint_reads=True)
+
+    ds.execute()
+    ds.execute()
+    assert len(calls) == 1
+    # Each execution reads the records to fingerprint them; only the first reads them for the plan.
+    assert len(reads) == 3
+
+    rows[0]["text_representation"] = "changed"
+    assert [d.text_representation for d in ds.take_all()] == ["changed"]
+    assert len(calls) == 2
+
+
+def test_dataset_scan():
+    import ray
+
+    sycamore.init(exec_mode=ExecMode.RAY)
+    items = [{"doc": d.serialize()} for d in make_docs(3)]
+
+    lazy = DatasetScan(ray.data.from_items(items).map(lambda row: row))
+    assert plan_fingerprint(lazy) is None
+
+    first = plan_fingerprint(DatasetScan(ray.data.from_items(items).materialize()))
+    assert first is not None
+    assert plan_fingerprint(DatasetScan(ray.data.from_items(items).materialize())) == first
+    assert plan_fingerprint(DatasetScan(ray.data.from_items(items[:2]).materialize())) != first
@@ -19,3 +19,210 @@ class TestRewriter:
         assert scan.resource_args["num_cpus"] == 1 and "num_gpus" not in scan.resource_args
         assert explode.resource_args["num_cpus"] == 1 and "num_gpus" not in explode.resource_args
         assert writer.resource_args["num_cpus"] == 1 and "num_gpus" not in writer.resource_args
+
+
+def double(d):
+    d.properties["x"] = d.properties["x"] * 2
+    return d
+
+
+def is_even(d):
+    return d.properties["x"] % 4 == 0
+
+
+class TestFuseMapTransforms:
+    @staticmethod
+    def docset(exec_mode=None):
+        import sycamore
+        from sycamore.data import Document
+
+        context = sycamore.init() if exec_mode is None else sycamore.init(exec_mode=exec_mode)
+        docs = [Document({"doc_id": str(i), "properties": {"x": i}}) for i in range(10)]
+        return context, context.read.document(docs)
+
+    @staticmethod
+    def rewrite(context, plan):
+        from sycamore.executor import Execution
+
+        return Execution(context)._apply_rules(plan)
+
+    def test_fuses_adjacent_maps(self):
+        from sycamore.transforms.base import FusedMapTransform
+
+        context, ds = self.docset()
+        ds = ds.map(double).filter(is_even).with_property("y", lambda d: 1)
+        original = ds.plan
+        plan = self.rewrite(context, ds.plan)
+
+        assert isinstance(plan, FusedMapTransform)
+        assert len(plan.nodes) == 3
+        assert plan.child().__class__.__name__ == "DocScan"
+        # The docset's own plan is not modified
+        assert ds.plan is original
+        assert not isinstance(original.children[0], FusedMapTransform)
+
+    def test_does_not_fuse_incompatible(self):
+        from sycamore.transforms.base import FusedMapTransform
+
+        class Stateful:
+            def __call__(self, d):
+                return d
+
+        context, ds = self.docset()
+        ds = ds.map(double).map(Stateful).map(double).map(double, num_cpus=2).map(double, parallelism=2)
+        plan = self.rewrite(context, ds.plan)
+
+        found = []
+        plan.traverse(visit=lambda n: found.append(n))
+        assert not any(isinstance(n, FusedMapTransform) for n in found)
+
+    def test_local_mode_not_fused(self):
+        from sycamore.context import ExecMode
+        from sycamore.transforms.base import FusedMapTransform
+
+        context, ds = self.docset(ExecMode.LOCAL)
+        plan = self.rewrite(context, ds.map(double).map(double).plan)
+        assert not isinstance(plan, FusedMapTransform)
+
+    def test_fused_function_matches_unfused(self):
+        from sycamore.data import Document, MetadataDocument
+        from sycamore.transforms.base import FusedMapTransform
+
+        context, ds = self.docset()
+        plan = self.rewrite(context, ds.map(double).filter(is_even).plan)
+        assert isinstance(plan, FusedMapTransform)
+
+        docs = [Document({"doc_id": str(i), "properties": {"x": i}}) for i in range(10)]
+        out = plan._map_function()({"doc": [d.serialize() for d in docs]})
+        out_docs = [Document.deserialize(s) for s in out["doc"]]
+        kept = [d for d in out_docs if not isinstance(d, MetadataDocument)]
+        metadata = [d for d in out_docs if isinstance(d, MetadataDocument)]
+
+        assert [d.doc_id for d in kept] == ["0", "2", "4", "6", "8"]
+        assert [d.properties["x"] for d in kept] == [0, 4, 8, 12, 16]
+        # one lineage record per fused transform
+        assert len(metadata) == 2
+
+    def test_fused_writes_intermediate_data(self, tmp_path):
+        import os
+        import pickle
+
+        from sycamore.connectors.file.file_writer_ray import _FileDataSink
+        from sycamore.transforms.base import FusedMapTransform
+
+        context, ds = self.docset()
+        plan = self.rewrite(context, ds.map(double, name="first").filter(is_even, name="second").plan)
+        assert isinstance(plan, FusedMapTransform)
+
+        sink_kwargs = {"path": str(tmp_path), "makedirs": True, "doc_to_bytes_fn": pickle.dumps}
+        plan.execute(
+            write_intermediate_data=True, intermediate_datasink=_FileDataSink, intermediate_datasink_kwargs=sink_kwargs
+        ).materialize()
+        # Each fused transform writes its own directory, as it would unfused.
+        assert {"first", "second"} == set(next(os.walk(tmp_path))[1])
+
+    def test_explain_shows_fused_plan(self):
+        import io
+
+        context, ds = self.docset()
+        stream = io.StringIO()
+        ds.map(double).filter(is_even).explain(stream=stream)
+        lines = stream.getvalue().splitlines()
+
+        assert lines[0].startswith("FusedMapTransform")
+        assert "double" in lines[0]
+        assert lines[1].strip().startswith("DocScan")
+
+
+class TestPushDownLimit:
+    @staticmethod
+    def push(plan):
+        from sycamore.rules import PushDownLimit
+
+        return PushDownLimit().once(None, plan)  # type: ignore[arg-type]
+
+    @staticmethod
+    def chain(plan):
+        nodes = []
+        while plan is not None:
+            nodes.append(plan)
+            plan = plan.children[0] if plan.children else None
+        return nodes
+
+    def test_pushes_through_map_into_scan(self):
+        import sycamore
+        from sycamore.transforms.basics import Limit
+
+        context = sycamore.init()
+        ds = context.read.binary("path", binary_format="pdf").map(double).limit(3)
+        original = ds.plan
+        plan = self.push(ds.plan)
+
+        nodes = self.chain(plan)
+        assert [type(n).__name__ for n in nodes] == ["Limit", "Map", "BinaryScan"]
+        assert isinstance(nodes[0], Limit) and nodes[0]._limit == 3
+        assert nodes[2]._limit == 3
+        # The docset's own plan is not modified
+        assert ds.plan is original
+        assert self.chain(original)[2]._limit is None
+
+    def test_inserts_limit_above_unlimitable_node(self):
+        import sycamore
+        from sycamore.data import Document
+
+        context = sycamore.init()
+        docs = [Document({"doc_id": str(i)}) for i in range(10)]
+        plan = self.push(context.read.document(docs).map(double).limit(2).plan)
+
+        assert [type(n).__name__ for n in self.chain(plan)] == ["Limit", "Map", "Limit", "DocScan"]
+
+    def test_not_pushed_through_filter(self):
+        import sycamore
+
+        context = sycamore.init()
+        ds = context.read.binary("path", binary_format="pdf").filter(is_even).limit(2)
+        plan = self.push(ds.plan)
+
+        assert plan is ds.plan
+        assert self.chain(plan)[-1]._limit is None
+
+    def test_nested_limits(self):
+        import sycamore
+
+        context = sycamore.init()
+        ds = context.read.binary("path", binary_format="pdf").limit(5).map(double).limit(2)
+        nodes = self.chain(self.push(ds.plan))
+
+        assert [type(n).__name__ for n in nodes] == ["Limit", "Map", "Limit", "BinaryScan"]
+        assert nodes[2]._limit == 2
+        assert nodes[3]._limit == 2
+
+    def test_binary_scan_reads_only_limit_files(self, tmp_path):
+        import sycamore
+        from sycamore.context import ExecMode
+
+        for i in range(5):
+            (tmp_path / f"{i}.txt").write_text(str(i))
+        context = sycamore.init(exec_mode=ExecMode.LOCAL)
+        ds = context.read.binary(str(tmp_path), binary_format="txt").map(lambda d: d).limit(2)
+
+        plan = self.push(ds.plan)
+        assert len(list(self.chain(plan)[-1].local_source())) == 2
+        assert len(ds.take_all()) == 2
+
+    def test_db_reader_pushdown(self):
+        from sycamore.connectors.duckdb.duckdb_reader import (
+            DuckDBReader,
+            DuckDBReaderClientParams,
+            DuckDBReaderQueryParams,
+        )
+
+        reader = DuckDBReader(
+            client_params=DuckDBReaderClientParams(db_url="db"),
+            query_params=DuckDBReaderQueryParams(table_name="t", query=None, create_hnsw_table=None),
+        )
+        limited = reader.pushdown_limit(4)
+        assert limited is not None and limited is not reader
+        assert limited._query_params.limit == 4
+        assert reader._query_params.limit is None
+        assert limited.pushdown_limit(10)._query_params.limit == 4
@@ -115,6 +115,110 @@ class TestBaseMapTransform(Common):
             assert from_ids[0] != to_ids[0]
             assert id_to_num[from_ids[0]] == id_to_num[to_ids[0]]
 
+    @staticmethod
+    def record_batch_size(docs: list[Document]) -> list[Document]:
+        for d in docs:
+            d.properties["batch_size"] = len(docs)
+        return docs
+
+    def test_adaptive_batching(self, mocker) -> None:
+        from sycamore.utils.adaptive_batch import AdaptiveBatchSize
+
+        (docs, mds) = self.outputs(
+            BaseMapTransform(
+                self.input_node(mocker),
+                f=self.record_batch_size,
+                adaptive_batching=AdaptiveBatchSize(max_batch_bytes=1),
+            )
+        )
+
+        assert sorted(d.doc_id for d in docs) == ["pb1", "pb2", "pb3"]
+        # Every document is larger than max_batch_bytes, so each one is processed on its own.
+        assert all(d.properties["batch_size"] == 1 for d in docs)
+        assert len(mds) == self.ndocs
+
+    @staticmethod
+    def fail_pb2(docs: list[Document]) -> list[Document]:
+        for d in docs:
+            d.properties["seen"] = True
+            if d.doc_id == "pb2":
+                raise ValueError("malformed")
+        return docs
+
+    def test_error_policy(self, mocker, tmp_path: Path) -> None:
+        from sycamore.utils.error_policy import ErrorPolicy
+
+        policy = ErrorPolicy(max_retries=1, backoff_seconds=0, dead_letter=str(tmp_path))
+        (docs, mds) = self.outputs(BaseMapTransform(self.input_node(mocker), f=self.fail_pb2, error_policy=policy))
+
+        assert sorted(d.doc_id for d in docs) == ["pb1", "pb3"]
+        dead = [Document.deserialize(p.read_bytes()) for p in tmp_path.glob("doc-*.pickle")]
+        assert [d.doc_id for d in dead] == ["pb2"]
+        # The dead letter is the input document, not the partially processed one.
+        assert "seen" not in dead[0].properties
+        error = dead[0].properties["_error"]
+        assert error["transform"] == "fail_pb2"
+        assert error["type"] == "ValueError"
+        assert error["message"] == "malformed"
+
+    def test_error_policy_copies_on_failure(self, mocker, tmp_path: Path) -> None:
+        from sycamore.utils.error_policy import ErrorPolicy
+
+        policy = ErrorPolicy(max_retries=0, dead_letter=str(tmp_path))
+        run = policy.wrap(self.fail_pb2, "fail_pb2")
+        originals = mocker.Mock(return_value=[Document(d) for d in self.dicts])
+        assert len(run([Document(self.dicts[0])], originals=originals)) == 1
+        originals.assert_not_called()
+
+        assert [d.doc_id for d in run([Document(d) for d in self.dicts], originals=originals)] == ["pb1", "pb3"]
+        originals.assert_called_once()
+
+        # Retries start from the unmodified input on every local path.
+        node = BaseMapTransform(self.input_node(mocker), f=self.fail_pb2, error_policy=policy)
+        node.resource_args["num_cpus"] = 0
+        for execute in [node.local_execute_iter, lambda docs: node.local_parallel_execute_iter(docs, max_workers=2)]:
+            out = list(execute([Document(d) for d in self.dicts]))
+            assert sorted(str(d.doc_id) for d in out if not isinstance(d, MetadataDocument)) == ["pb1", "pb3"]
+        dead = [Document.deserialize(p.read_bytes()) for p in tmp_path.glob("doc-*.pickle")]
+        assert len(dead) == 3
+        assert all("seen" not in d.properties for d in dead)
+
+    def test_error_policy_retry(self, mocker) -> None:
+        from sycamore.utils.error_policy import ErrorPolicy
+        from sycamore.utils.profiler import NodeProfile
+
+        calls: dict[str, int] = {}
+
+        def flaky(docs: list[Document]) -> list[Document]:
+            for d in docs:
+                assert d.doc_id is not None
+                calls[d.doc_id] = calls.get(d.doc_id, 0) + 1
+                if d.doc_id == "pb1" and calls["pb1"] < 3:
+                    raise ConnectionError("try again")
+            return docs
+
+        node = BaseMapTransform(
+            self.input_node(mocker), f=flaky, error_policy=ErrorPolicy(max_retries=2, backoff_seconds=0)
+        )
+        profile = NodeProfile("flaky")
+        with profile:
+            out = node.local_execute([Document(d) for d in self.dicts])
+
+        assert sorted(str(d.doc_id) for d in out if not isinstance(d, MetadataDocument)) == ["pb1", "pb2", "pb3"]
+        # The batch stops at pb1, then every document runs on its own and pb1 is retried once.
+        assert calls == {"pb1": 3, "pb2": 1, "pb3": 1}
+        assert profile.counters == {"batch_errors": 1, "doc_retries": 1}
+
+        calls.clear()
+        node = BaseMapTransform(
+            self.input_node(mocker), f=flaky, error_policy=ErrorPolicy(max_retries=2, retry_on=(ValueError,))
+        )
+        profile = NodeProfile("flaky")
+        with profile:
+            out = node.local_execute([Document(d) for d in self.dicts])
+        assert sorted(str(d.doc_id) for d in out if not isinstance(d, MetadataDocument)) == ["pb2", "pb3"]
+        assert profile.counters == {"batch_errors": 1, "doc_errors": 1}
+
     def test_passthrough(self, mocker) -> None:
         a = BaseMapTransform(self.input_node(mocker), f=self.fn_a, args=["simple"], enable_auto_metadata=True)
         b = BaseMapTransform(a, f=lambda x: x, enable_auto_metadata=True)
@@ -1,9 +1,11 @@
+import asyncio
 from typing import Optional
 import logging
 
 
 from sycamore import Context
 from sycamore.data import Document
+from sycamore.functions import CharacterTokenizer, ElementPacker
 from sycamore.transforms import ExtractEntity
 from sycamore.transforms.extract_entity import OpenAIEntityExtractor
 from sycamore.llms import LLM
@@ -95,6 +97,17 @@ class TestEntityExtraction:
         out_doc = extract_entity.run(self.doc)
         assert out_doc.properties.get("title") == "Jack Black"
 
+    def test_extract_entity_element_packer(self):
+        packer = ElementPacker(CharacterTokenizer(), max_tokens=10)
+        extractor = OpenAIEntityExtractor(
+            "title", llm=MockLLM(), field="properties.entity.author", element_packer=packer
+        )
+        doc = Document(self.doc.data.copy())
+        kwargs = extractor._handle_element_prompting(doc)
+        # The author does not fit, and the element without one costs only the overhead.
+        assert kwargs["prompt_kwargs"]["query"] == "ELEMENT 1: None\n"
+        assert doc.properties["_prompt_element_tokens"] == 5
+
     def test_extract_entity_with_context_llm(self, mocker):
         llm = MockLLM()
         context = Context(
@@ -136,3 +149,36 @@ class TestEntityExtraction:
         )
         out_doc = extract_entity.run(self.doc)
         assert out_doc.properties.get("title") == "alt_title"
+
+    def test_extract_entity_with_context_llm_concurrent(self, mocker):
+        llm = MockLLM()
+        context = Context(params={"default": {"llm": llm}})
+        extract_entity = ExtractEntity(
+            None, context=context, entity_extractor=OpenAIEntityExtractor("title"), max_concurrency=2
+        )
+        out_doc = extract_entity.run(self.doc)
+        assert out_doc.properties.get("title") == "title1"
+
+    def test_extract_entity_concurrent(self):
+        class SlowLLM(MockLLM):
+            in_flight = 0
+            max_in_flight = 0
+
+            async def generate_async(self, *, prompt_kwargs: dict, llm_kwargs: Optional[dict] = None):
+                SlowLLM.in_flight += 1
+                SlowLLM.max_in_flight = max(SlowLLM.max_in_flight, SlowLLM.in_flight)
+                await asyncio.sleep(0.01 * (len(prompt_kwargs["prompt"]) % 3))
+                SlowLLM.in_flight -= 1
+                return prompt_kwargs["prompt"].upper()
+
+        docs = [Document(doc_id=str(i), properties={"path": f"path{i}"}) for i in range(10)]
+        extract_entity = ExtractEntity(
+            None,
+            entity_extractor=OpenAIEntityExtractor(
+                "title", llm=SlowLLM(), use_elements=False, prompt="", field="properties.path"
+            ),
+            max_concurrency=3,
+        )
+        out = extract_entity._local_process(docs)
+        assert [d.properties["title"] for d in out] == [f"PATH{i}" for i in range(10)]
+        assert SlowLLM.max_in_flight == 3
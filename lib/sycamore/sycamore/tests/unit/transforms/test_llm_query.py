@@ -3,7 +3,7 @@ import string
 
 from sycamore.data import Document, Element
 from sycamore.llms import OpenAI
-from sycamore.transforms.llm_query import LLMTextQueryAgent
+from sycamore.transforms.llm_query import LLMQuery, LLMTextQueryAgent
 
 
 class TestLLMQuery:
@@ -54,3 +54,15 @@ class TestLLMQuery:
         doc = query_agent.execute_query(doc)
 
         assert doc.properties[output_property] == {"summary": "summary"}
+
+    def test_llm_query_concurrent(self, mocker):
+        llm = mocker.Mock(spec=OpenAI)
+        generate_async = mocker.patch.object(llm, "generate_async", new_callable=mocker.AsyncMock)
+        generate_async.side_effect = lambda prompt_kwargs, llm_kwargs: prompt_kwargs["prompt"].split("\n")[1]
+        docs = [Document(doc_id=str(i), text_representation=f"text {i}") for i in range(5)]
+        query_agent = LLMTextQueryAgent(prompt="Summarize", llm=llm, per_element=False, output_property="out")
+
+        out = LLMQuery(None, query_agent=query_agent, max_concurrency=2)._local_process(docs)
+
+        assert [d.properties["out"] for d in out] == [f"text {i}" for i in range(5)]
+        llm.generate.assert_not_called()
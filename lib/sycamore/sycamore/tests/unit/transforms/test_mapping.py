@@ -1,3 +1,4 @@
+import asyncio
 from typing import List
 
 import pytest
@@ -14,6 +15,12 @@ def map_func(doc: Document) -> Document:
     return doc
 
 
+async def async_map_func(doc: Document) -> Document:
+    await asyncio.sleep(0.001 * (doc["index"] % 2))
+    doc["index"] += 1
+    return doc
+
+
 def flat_map_func(doc: Document) -> List[Document]:
     return [doc, doc]
 
@@ -34,7 +41,11 @@ class TestMapping:
             doc["index"] += 1
             return doc
 
-    @pytest.mark.parametrize("function", [map_func, MapClass])
+    class AsyncMapClass:
+        async def __call__(self, doc: Document) -> Document:
+            return await async_map_func(doc)
+
+    @pytest.mark.parametrize("function", [map_func, MapClass, async_map_func, AsyncMapClass])
     def test_map_function(self, mocker, function) -> None:
         node = mocker.Mock(spec=Node)
         mapping = Map(node, f=function)
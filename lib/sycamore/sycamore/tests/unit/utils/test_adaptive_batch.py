@@ -0,0 +1,87 @@
+import sycamore
+from sycamore.context import ExecMode
+from sycamore.data import Document
+from sycamore.utils import adaptive_batch
+from sycamore.utils.adaptive_batch import AdaptiveBatchSize
+
+
+def test_grows_toward_target_duration():
+    sizer = AdaptiveBatchSize(target_batch_seconds=1.0, initial_batch_size=4, smoothing=1.0)
+    assert sizer.batch_size() == 4
+
+    # 0.01s per document means 100 documents per second; growth is limited to doubling.
+    sizer.record(4, 400, 0.04)
+    assert sizer.batch_size() == 8
+    for _ in range(10):
+        sizer.record(sizer.batch_size(), 100 * sizer.batch_size(), 0.01 * sizer.batch_size())
+    assert sizer.batch_size() == 100
+
+
+def test_shrinks_for_slow_batches():
+    sizer = AdaptiveBatchSize(target_batch_seconds=1.0, initial_batch_size=64, smoothing=1.0)
+    sizer.record(64, 640, 16.0)
+    assert sizer.batch_size() == 4
+
+
+def test_memory_ceiling():
+    sizer = AdaptiveBatchSize(target_batch_seconds=10.0, max_batch_bytes=1000, initial_batch_size=4, smoothing=1.0)
+    for _ in range(10):
+        sizer.record(4, 400, 0.001)
+    assert sizer.batch_size() == 10
+    assert sizer.full(3, 1000)
+    assert not sizer.full(3, 999)
+
+
+def test_limits():
+    sizer = AdaptiveBatchSize(initial_batch_size=1000, min_batch_size=2, max_batch_size=50, smoothing=1.0)
+    assert sizer.batch_size() == 50
+    sizer.record(10, 10, 100.0)
+    assert sizer.batch_size() == 2
+
+
+def test_split():
+    sizer = AdaptiveBatchSize(max_batch_bytes=10, initial_batch_size=3)
+    batches = list(sizer.split(list("abcdefg"), [1, 1, 1, 8, 20, 1, 1]))
+    assert batches == [(["a", "b", "c"], 3), (["d", "e"], 28), (["f", "g"], 2)]
+
+
+def test_for_process_shares_state():
+    sizer = AdaptiveBatchSize(initial_batch_size=4, smoothing=1.0)
+    shared = sizer.for_process()
+    assert shared is not sizer
+    assert sizer.for_process() is shared
+
+    shared.record(4, 4, 0.001)
+    assert shared.batch_size() == 8
+    assert sizer.batch_size() == 4
+
+
+def test_process_sizers_are_bounded(monkeypatch):
+    monkeypatch.setattr(adaptive_batch, "MAX_PROCESS_SIZERS", 2)
+    first = AdaptiveBatchSize()
+    shared = first.for_process()
+    AdaptiveBatchSize().for_process()
+    assert first.for_process() is shared
+    AdaptiveBatchSize().for_process()
+    assert len(adaptive_batch._process_sizers) == 2
+    assert first.key in adaptive_batch._process_sizers
+
+
+def test_local_map_batch():
+    sizes = []
+
+    def f(docs: list[Document]) -> list[Document]:
+        sizes.append(len(docs))
+        return docs
+
+    context = sycamore.init(exec_mode=ExecMode.LOCAL)
+    docs = [Document(doc_id=str(i), text_representation="x" * 100) for i in range(20)]
+    sizer = AdaptiveBatchSize(initial_batch_size=2, smoothing=1.0)
+    out = context.read.document(docs).map_batch(f, adaptive_batching=sizer).take_all()
+
+    assert sorted(d.doc_id for d in out) == sorted(str(i) for i in range(20))
+    assert sizes[0] == 2
+    assert sizes[1] == 4
+    assert sum(sizes) == 20
+    # Local execution learns on the node rather than in the process-wide registry.
+    assert sizer.key not in adaptive_batch._process_sizers
@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+
+from sycamore.utils.async_utils import map_bounded, release_concurrency_slot, run_coroutine
+
+
+async def _delayed(i: int, delays: list[float], counts: dict[str, int]) -> int:
+    counts["in_flight"] += 1
+    counts["max"] = max(counts["max"], counts["in_flight"])
+    await asyncio.sleep(delays[i])
+    counts["in_flight"] -= 1
+    return i * 10
+
+
+@pytest.mark.parametrize("max_concurrency", [1, 3, 20])
+def test_map_bounded_keeps_order(max_concurrency):
+    delays = [0.001 * ((7 * i) % 5) for i in range(12)]
+    counts = {"in_flight": 0, "max": 0}
+    assert map_bounded(_delayed, range(12), max_concurrency, delays, counts) == [i * 10 for i in range(12)]
+    assert counts["max"] == min(max_concurrency, 12)
+
+
+def test_map_bounded_raises():
+    async def fail_on_three(i: int) -> int:
+        if i == 3:
+            raise ValueError("three")
+        return i
+
+    with pytest.raises(ValueError, match="three"):
+        map_bounded(fail_on_three, range(5), 2)
+
+
+def test_release_concurrency_slot():
+    started: list[int] = []
+
+    async def wait_for_all(i: int) -> int:
+        started.append(i)
+        release_concurrency_slot()
+        release_concurrency_slot()
+        while len(started) < 4:
+            await asyncio.sleep(0)
+        return i
+
+    # Would never finish if the calls kept their slots while waiting.
+    assert map_bounded(wait_for_all, range(4), 1) == [0, 1, 2, 3]
+    release_concurrency_slot()
+
+
+def test_run_coroutine_in_running_loop():
+    async def outer() -> int:
+        # As in a notebook, where the calling thread already runs a loop.
+        return run_coroutine(asyncio.sleep(0, result=42))
+
+    assert asyncio.run(outer()) == 42
@@ -0,0 +1,32 @@
+import numpy as np
+
+from sycamore.data import Element
+from sycamore.transforms.bbox_merge import getRows
+from sycamore.utils.bbox_array import BboxArray
+
+
+def mkElem(bbox, page=1) -> Element:
+    return Element({"bbox": bbox, "properties": {"page_number": page}})
+
+
+def test_bbox_array() -> None:
+    elems = [mkElem((0.1, 0.2, 0.4, 0.3)), Element({"properties": {}}), mkElem((0.5, 0.1, 1.5, 0.2), 2)]
+    boxes = BboxArray(elems)
+    assert boxes.bboxes.shape == (3, 4)
+    assert boxes.has_bbox.tolist() == [True, False, True]
+    assert boxes.pages.tolist() == [1, 0, 2]
+    assert np.allclose(boxes.width, [0.3, 0.0, 1.0])
+    assert boxes.within_unit_square().tolist() == [True, False, False]
+    assert boxes.order_by_left_top().tolist() == [1, 0, 2]
+    assert boxes.take(np.array([2, 0])).pages.tolist() == [2, 1]
+
+
+def test_get_rows() -> None:
+    elems = [
+        mkElem((0.1, 0.1, 0.9, 0.15)),  # 0: full width
+        mkElem((0.6, 0.2, 0.9, 0.3)),  # 1: right of 2
+        mkElem((0.1, 0.21, 0.4, 0.3)),  # 2: left of 1
+        mkElem((0.1, 0.5, 0.9, 0.6)),  # 3: full width
+    ]
+    assert getRows(BboxArray(elems)) == [[0], [2, 1], [2, 1], [3]]
+    assert getRows(BboxArray([])) == []
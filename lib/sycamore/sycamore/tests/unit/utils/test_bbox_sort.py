@@ -1,3 +1,4 @@
+import random
 from typing import Any, Optional
 
 from sycamore.data import Document, Element
@@ -122,3 +123,25 @@ def assert_element_index_sorted(elements: list[Element]):
     assert all(
         elements[i].element_index < elements[i + 1].element_index for i in range(len(elements) - 1)  # type: ignore
     )
+
+
+def test_page_matches_per_element_helpers() -> None:
+    from sycamore.utils.bbox_sort import bbox_sort_based_on_tags, elem_top_left, tag_two_columns
+
+    rng = random.Random(7)
+    for _ in range(200):
+        elems = []
+        for _ in range(rng.randint(2, 25)):
+            left = rng.choice([0.05, 0.1, 0.52, 0.6, round(rng.random(), 2)])
+            top = round(rng.random(), 1)
+            elems.append(mkElem(left, top, left + rng.choice([0.05, 0.3, 0.4, 0.8]), top + rng.random() * 0.3))
+        expected = sorted(elems, key=elem_top_left)
+        for elem in expected:
+            elem.data["_coltag"] = col_tag(elem)
+        tag_two_columns(expected)
+        bbox_sort_based_on_tags(expected)
+        for elem in expected:
+            del elem.data["_coltag"]
+
+        bbox_sort_page(elems)
+        assert elems == expected
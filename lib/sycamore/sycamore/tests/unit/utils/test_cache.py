@@ -1,12 +1,28 @@
+import asyncio
 import io
 import json
+import pickle
+import threading
+import time
 from pathlib import Path
 from unittest.mock import patch
 
 import boto3
 from botocore.response import StreamingBody
+from botocore.exceptions import ClientError
 from botocore.stub import Stubber
-from sycamore.utils.cache import DiskCache, S3Cache
+import pytest
+from sycamore.cli import main, parse_age, parse_size
+from sycamore.utils.cache import (
+    LAYOUT_NAMESPACE,
+    LLM_NAMESPACE,
+    DiskCache,
+    MemoryCache,
+    S3Cache,
+    TieredCache,
+    cache_from_path,
+    get_async,
+)
 import hashlib
 
 
@@ -35,6 +51,79 @@ class TestDiskCache:
         cm.set(get_hash(data1), data2)
         assert cm.get(get_hash(data1)) == data2
 
+    def test_ttl_by_namespace(self, tmp_path: Path):
+        cache = DiskCache(str(tmp_path), ttl_seconds={LLM_NAMESPACE: 0.05})
+        cache.set("llm", "answer", namespace=LLM_NAMESPACE)
+        cache.set_many([("layout", "boxes")], namespace=LAYOUT_NAMESPACE)
+        cache.set("other", "value")
+        assert cache.namespace_stats().keys() == {LLM_NAMESPACE, LAYOUT_NAMESPACE, None}
+        time.sleep(0.1)
+        assert cache.get("llm") is None
+        assert cache.get("layout") == "boxes"
+        assert cache.prune() == 1
+        assert cache.namespace_stats()[LAYOUT_NAMESPACE][0] == 1
+
+    def test_prune(self, tmp_path: Path):
+        cache = DiskCache(str(tmp_path), eviction_policy="lru")
+        cache.set_many([(f"llm{i}", "x" * 1000) for i in range(10)], namespace=LLM_NAMESPACE)
+        cache.set_many([(f"layout{i}", "y" * 1000) for i in range(10)], namespace=LAYOUT_NAMESPACE)
+        assert cache.namespace_stats()[LLM_NAMESPACE][1] > 10_000
+
+        assert cache.prune(namespace=LLM_NAMESPACE, older_than_seconds=3600) == 0
+        with pytest.raises(ValueError):
+            cache.prune(namespace=LLM_NAMESPACE)
+        assert cache.clear_namespace(LLM_NAMESPACE) == 10
+        assert LLM_NAMESPACE not in cache.namespace_stats()
+
+        cache.set("new", "z", namespace=LLM_NAMESPACE)
+        assert cache.prune(size_limit_bytes=0) == 11
+        assert cache.namespace_stats() == {}
+
+    def test_prune_older_than(self, tmp_path: Path):
+        cache = DiskCache(str(tmp_path))
+        cache.set("old", 1, namespace=LLM_NAMESPACE)
+        cache.set("untagged", 2)
+        time.sleep(0.05)
+        cache.set("new", 3, namespace=LLM_NAMESPACE)
+        assert cache.prune(older_than_seconds=0.04, namespace=LLM_NAMESPACE) == 1
+        assert (cache.get("old"), cache.get("untagged"), cache.get("new")) == (None, 2, 3)
+
+    def test_invalid_eviction_policy(self, tmp_path: Path):
+        with pytest.raises(ValueError):
+            DiskCache(str(tmp_path), eviction_policy="random")
+
+    def test_cli(self, tmp_path: Path, capsys):
+        cache = DiskCache(str(tmp_path))
+        cache.set("a", "value", namespace=LLM_NAMESPACE)
+        cache.set("b", "value", namespace=LAYOUT_NAMESPACE)
+
+        main(["cache", "stats", str(tmp_path)])
+        out = capsys.readouterr().out
+        assert f"{LLM_NAMESPACE} " in out and f"{LAYOUT_NAMESPACE} " in out
+
+        # A namespace alone selects nothing to remove.
+        with pytest.raises(SystemExit):
+            main(["cache", "prune", str(tmp_path), "--namespace", LLM_NAMESPACE])
+        main(["cache", "prune", str(tmp_path), "--namespace", LLM_NAMESPACE, "--older-than", "1d"])
+        assert "removed 0 entries" in capsys.readouterr().out
+        main(["cache", "prune", str(tmp_path), "--namespace", LLM_NAMESPACE, "--all"])
+        assert "removed 1 entries" in capsys.readouterr().out
+        assert cache.get("a") is None and cache.get("b") == "value"
+
+    def test_cli_refuses_other_dirs(self, tmp_path: Path, capsys):
+        main(["cache", "stats", str(tmp_path)])
+        assert "not a cache" in capsys.readouterr().err
+        with pytest.raises(SystemExit):
+            main(["cache", "prune", str(tmp_path), "--older-than", "1d"])
+        assert list(tmp_path.iterdir()) == []
+
+    def test_cli_parsing(self):
+        assert parse_size("10G") == 10 * 2**30
+        assert parse_size("1.5MiB") == 3 * 2**19
+        assert parse_size("512") == 512
+        assert parse_age("30d") == 30 * 86400
+        assert parse_age("90") == 90
+
 
 class TestS3Cache:
     @patch("time.time", return_value=1000)
@@ -123,4 +212,237 @@ class TestS3Cache:
         with stubber:
             result = cache.set(key, value)
             assert result is None
+            cache.flush()
             stubber.assert_no_pending_responses()
+
+
+class TestMemoryCache:
+    def test_lru_eviction(self):
+        cache = MemoryCache(max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == 1
+        cache.set("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.stats.hits == 3 and cache.stats.misses == 1
+
+    def test_max_bytes(self):
+        big = "x" * 1000
+        cache = MemoryCache(max_bytes=2500)
+        cache.set("a", big)
+        cache.set("b", big)
+        cache.set("c", big)
+        assert len(cache) == 2
+        assert cache.get("a") is None
+        cache.set("huge", "x" * 5000)
+        assert cache.get("huge") is None
+        assert len(cache) == 2
+
+    def test_returns_copies(self):
+        cache = MemoryCache()
+        value = {"result": ["one"]}
+        cache.set("a", value)
+        value["result"].append("two")
+        cache.get("a")["result"].append("three")
+        assert cache.get("a") == {"result": ["one"]}
+
+    def test_ttl_by_namespace(self):
+        cache = MemoryCache(ttl_seconds={LLM_NAMESPACE: 0.05})
+        cache.set("llm", 1, namespace=LLM_NAMESPACE)
+        cache.set("other", 2)
+        time.sleep(0.1)
+        assert (cache.get("llm"), cache.get("other")) == (None, 2)
+        assert len(cache) == 1
+
+    def test_pickle_is_empty(self):
+        cache = MemoryCache(max_entries=5)
+        cache.set("a", 1)
+        copy = pickle.loads(pickle.dumps(cache))
+        assert len(copy) == 0 and copy._max_entries == 5
+
+
+class TestTieredCache:
+    def test_write_through_and_promote(self, tmp_path: Path):
+        memory = MemoryCache()
+        disk = DiskCache(str(tmp_path))
+        cache = TieredCache([memory, disk])
+
+        cache.set("a", {"value": 1})
+        assert memory.get("a") == disk.get("a") == {"value": 1}
+
+        disk.set("b", "only on disk")
+        assert cache.get("b") == "only on disk"
+        assert memory.get("b") == "only on disk"
+        assert cache.get("missing") is None
+
+        stats = cache.tier_stats()
+        assert list(stats) == ["0:MemoryCache", "1:DiskCache"]
+        assert (stats["0:MemoryCache"].hits, stats["0:MemoryCache"].misses) == (2, 2)
+        assert cache.stats.hit_rate == 0.5
+
+    def test_cache_from_path(self, tmp_path: Path):
+        assert isinstance(cache_from_path(str(tmp_path)), DiskCache)
+        assert isinstance(cache_from_path("s3://bucket/prefix"), S3Cache)
+        cache = cache_from_path(str(tmp_path), memory_entries=100)
+        assert isinstance(cache, TieredCache)
+        assert [type(t) for t in cache.tiers] == [MemoryCache, DiskCache]
+
+        cache = cache_from_path("s3://bucket/prefix", local_dir=str(tmp_path), memory_entries=100)
+        assert isinstance(cache, TieredCache)
+        assert [type(t) for t in cache.tiers] == [MemoryCache, DiskCache, S3Cache]
+        cache = pickle.loads(pickle.dumps(cache))
+        assert [type(t) for t in cache.tiers] == [MemoryCache, DiskCache, S3Cache]
+
+    def test_stats_from_threads(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        cache = MemoryCache()
+        with ThreadPoolExecutor(8) as pool:
+            list(pool.map(lambda i: cache.get_many([f"k{i}", f"k{i + 1}"]), range(2000)))
+        assert cache.stats.misses == 4000
+        assert pickle.loads(pickle.dumps(cache.stats)).misses == 4000
+
+
+class LocalS3:
+    """A local stand-in for the S3 calls that S3Cache makes."""
+
+    def __init__(self):
+        self.objects: dict[tuple[str, str], bytes] = {}
+        self.gets = 0
+        self.puts_allowed = threading.Event()
+        self.puts_allowed.set()
+
+    def get_object(self, Bucket, Key):
+        self.gets += 1
+        if (Bucket, Key) not in self.objects:
+            raise ClientError({"Error": {"Code": "NoSuchKey"}}, "GetObject")
+        return {"Body": io.BytesIO(self.objects[(Bucket, Key)])}
+
+    def put_object(self, Body, Bucket, Key):
+        self.puts_allowed.wait(timeout=10)
+        if Key.endswith("bad"):
+            raise ClientError({"Error": {"Code": "AccessDenied"}}, "PutObject")
+        self.objects[(Bucket, Key)] = Body.encode()
+
+
+def local_s3_cache(**kwargs) -> tuple[S3Cache, LocalS3]:
+    s3 = LocalS3()
+    cache = S3Cache("s3://bucket/prefix", **kwargs)
+    cache._s3_client = s3  # type: ignore[assignment]
+    return cache, s3
+
+
+class TestS3CacheBatches:
+    def test_get_many_set_many(self):
+        cache, s3 = local_s3_cache(write_behind=False)
+        cache.set_many([(f"k{i}", {"i": i}) for i in range(20)])
+        assert len(s3.objects) == 20
+
+        keys = [f"k{i}" for i in range(25)]
+        assert cache.get_many(keys) == [{"i": i} for i in range(20)] + [None] * 5
+        assert (cache.stats.hits, cache.stats.misses, cache.stats.sets) == (20, 5, 20)
+
+    def test_write_behind(self):
+        cache, s3 = local_s3_cache(write_behind=True)
+        s3.puts_allowed.clear()
+        cache.set("a", "value")
+        # Visible in this process before it is written.
+        assert cache.get("a") == "value"
+        assert s3.objects == {}
+        s3.puts_allowed.set()
+        cache.flush()
+        assert json.loads(s3.objects[("bucket", "prefix/a")])["value"] == "value"
+
+        cache.set("bad", "value")
+        with pytest.raises(ClientError):
+            cache.flush()
+        cache.flush()
+
+        # A failed write is also raised by the next set, once it is done.
+        cache.set("bad", "value")
+        with pytest.raises(ClientError):
+            for _ in range(1000):
+                time.sleep(0.01)
+                cache.set("a", "value")
+
+    def test_write_behind_is_bounded(self):
+        cache, s3 = local_s3_cache(write_behind=True, max_pending_writes=2)
+        s3.puts_allowed.clear()
+        cache.set("a", 1)
+        cache.set("b", 2)
+        done = threading.Event()
+
+        def set_c():
+            cache.set("c", 3)
+            done.set()
+
+        threading.Thread(target=set_c).start()
+        assert not done.wait(0.1)
+        s3.puts_allowed.set()
+        assert done.wait(10)
+        cache.flush()
+        assert len(s3.objects) == 3
+
+    def test_ttl_by_namespace(self):
+        cache, s3 = local_s3_cache(write_behind=False, ttl_seconds={LLM_NAMESPACE: 60})
+        cache.set("llm", 1, namespace=LLM_NAMESPACE)
+        cache.set("other", 2)
+        assert json.loads(s3.objects[("bucket", "prefix/llm")])["namespace"] == LLM_NAMESPACE
+        assert "namespace" not in json.loads(s3.objects[("bucket", "prefix/other")])
+        assert cache.get("llm") == 1
+        with patch("time.time", return_value=time.time() + 120):
+            assert (cache.get("llm"), cache.get("other")) == (None, 2)
+
+    def test_pickle(self):
+        cache = S3Cache("s3://bucket/prefix", freshness_in_seconds=5, write_behind=False, endpoint_url="http://s3")
+        copy = pickle.loads(pickle.dumps(cache))
+        assert (copy._freshness_in_seconds, copy._write_behind, copy._endpoint_url) == (5, False, "http://s3")
+
+    def test_tiered_get_many(self):
+        s3_cache, s3 = local_s3_cache(write_behind=False)
+        memory = MemoryCache()
+        cache = TieredCache([memory, s3_cache])
+        s3_cache.set_many([("a", 1), ("b", 2)])
+        memory.set("c", 3)
+
+        assert cache.get_many(["a", "b", "c", "d"]) == [1, 2, 3, None]
+        assert s3.gets == 3
+        assert memory.get_many(["a", "b"]) == [1, 2]
+
+    def test_tiered_promotion_keeps_namespace(self, tmp_path: Path):
+        s3_cache, _ = local_s3_cache(ttl_seconds={LLM_NAMESPACE: 60})
+        disk = DiskCache(str(tmp_path), ttl_seconds={LLM_NAMESPACE: 60})
+        memory = MemoryCache(ttl_seconds={LLM_NAMESPACE: 60})
+        cache = TieredCache([memory, disk, s3_cache])
+        s3_cache.set_many([("a", 1), ("b", 2)], namespace=LLM_NAMESPACE)
+        s3_cache.set("c", 3)
+
+        assert cache.get_entry("a") == (1, LLM_NAMESPACE)
+        assert cache.get_many(["b", "c"]) == [2, 3]
+        assert disk.namespace_stats()[LLM_NAMESPACE][0] == 2
+        assert disk.namespace_stats()[None][0] == 1
+        assert memory.get_many_entries(["a", "b", "c"]) == [(1, LLM_NAMESPACE), (2, LLM_NAMESPACE), (3, None)]
+        with patch("time.time", return_value=time.time() + 120):
+            assert memory.get("a") is None
+            assert disk.get("b") is None
+            assert disk.get("c") == 3
+
+    def test_get_async_combines_lookups(self):
+        cache = MemoryCache()
+        cache.set_many([("a", 1), ("b", 2)])
+        calls = []
+        get_many = cache.get_many
+
+        def counting_get_many(keys):
+            calls.append(keys)
+            return get_many(keys)
+
+        cache.get_many = counting_get_many  # type: ignore[method-assign]
+
+        async def lookups():
+            return await asyncio.gather(*(get_async(cache, k) for k in ["a", "b", "c"]))
+
+        assert asyncio.run(lookups()) == [1, 2, None]
+        assert calls == [["a", "b", "c"]]
@@ -1,4 +1,5 @@
-from sycamore.utils.nested import nested_lookup, dotted_lookup
+from sycamore.data import Document
+from sycamore.utils.nested import FieldPath, nested_lookup, dotted_lookup
 
 
 def test_nested_lookup():
@@ -23,3 +24,13 @@ def test_dotted_lookup():
     assert dotted_lookup(v, "d") == {}
     assert dotted_lookup(v, "d.1") is None
     assert dotted_lookup(v, "3") is None
+
+
+def test_field_path():
+    v = {"a": {"b": 1, "c": 2, "": 5}, "d": {}}
+    for path in ["a.b", "a.b.c", "a.c", "a.", "a.d", "d", "d.1", "3"]:
+        assert FieldPath(path).lookup(v) == dotted_lookup(v, path), path
+    assert FieldPath.of("a.b") is FieldPath.of("a.b") and FieldPath.of("a.b") == FieldPath("a.b")
+
+    doc = Document(properties={"entity": {"state": "WA"}})
+    assert FieldPath("properties.entity.state")(doc) == "WA" == doc.field_to_value("properties.entity.state")
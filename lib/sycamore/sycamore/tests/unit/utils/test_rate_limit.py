@@ -0,0 +1,171 @@
+import json
+import pickle
+
+import httpx
+import pytest
+
+from sycamore.llms import OpenAI, OpenAIModels
+from sycamore.utils.rate_limit import RateLimiter, TokenBuckets, parse_duration, parse_rate_limit_headers
+
+
+def test_parse_duration():
+    assert parse_duration("1.5") == 1.5
+    assert parse_duration("6m0s") == 360
+    assert parse_duration("20ms") == pytest.approx(0.02)
+    assert parse_duration("1h2m3.5s") == 3723.5
+    assert parse_duration("soon") is None
+
+
+def test_parse_rate_limit_headers():
+    headers = {
+        "X-RateLimit-Limit-Requests": "500",
+        "x-ratelimit-remaining-requests": "499",
+        "x-ratelimit-limit-tokens": "30000",
+        "x-ratelimit-remaining-tokens": "29000",
+        "x-ratelimit-reset-tokens": "2s",
+        "retry-after": "3",
+        "content-type": "application/json",
+    }
+    assert parse_rate_limit_headers(headers) == {
+        "limit_requests": 500,
+        "remaining_requests": 499,
+        "limit_tokens": 30000,
+        "remaining_tokens": 29000,
+        "retry_after": 3,
+    }
+    assert parse_rate_limit_headers({"retry-after-ms": "250", "retry-after": "1"}) == {"retry_after": 0.25}
+
+
+def test_token_buckets():
+    buckets = TokenBuckets(requests_per_minute=60, tokens_per_minute=600)
+    buckets.updated = 0
+
+    assert buckets.take(1, 500, now=0) == 0
+    assert buckets.take(1, 200, now=0) == pytest.approx(10)
+    # Ten seconds refill 100 tokens.
+    assert buckets.take(1, 200, now=10) == 0
+    assert buckets.utilization(now=10) == {"requests": pytest.approx(1 / 60), "tokens": 1.0, "paused_seconds": 0}
+
+    buckets.add_tokens(150)
+    assert buckets.utilization(now=10)["tokens"] == pytest.approx(0.75)
+
+    # A request larger than the limit waits for a full bucket.
+    assert buckets.take(1, 1000, now=10) == pytest.approx(45)
+    assert buckets.take(1, 1000, now=55) == 0
+
+
+def test_token_buckets_observe():
+    buckets = TokenBuckets()
+    buckets.updated = 0
+    assert buckets.take(1, 10**6, now=0) == 0
+    assert buckets.utilization(now=0) == {"requests": None, "tokens": None, "paused_seconds": 0}
+
+    buckets.observe({"limit_requests": 100, "remaining_requests": 50, "limit_tokens": 1000}, now=0)
+    assert buckets.utilization(now=0)["requests"] == pytest.approx(0.5)
+    assert buckets.utilization(now=0)["tokens"] == 0
+
+    # The service knows about requests from elsewhere; configured limits are kept.
+    buckets.observe({"limit_tokens": 5000, "remaining_tokens": 100}, now=0)
+    assert buckets.tokens_per_minute == 1000
+    assert buckets.utilization(now=0)["tokens"] == pytest.approx(0.9)
+
+    buckets.observe({"retry_after": 4}, now=0, throttled=True)
+    assert buckets.take(1, 0, now=1) == pytest.approx(3)
+    buckets.observe({}, now=5, throttled=True)
+    assert buckets.utilization(now=5)["paused_seconds"] == pytest.approx(1)
+
+
+def test_file_backend_is_shared(tmp_path):
+    one = RateLimiter("shared", requests_per_minute=10, backend="file", lock_dir=str(tmp_path))
+    two = pickle.loads(pickle.dumps(one))
+    assert two._buckets is None
+
+    one.acquire()
+    two.acquire()
+    assert one.utilization()["requests"] == pytest.approx(0.2, abs=0.01)
+
+    other = RateLimiter("other", requests_per_minute=10, backend="file", lock_dir=str(tmp_path))
+    assert other.utilization()["requests"] == 0
+
+
+def test_file_backend_expires(tmp_path):
+    limiter = RateLimiter("stale", requests_per_minute=10, backend="file", lock_dir=str(tmp_path))
+    limiter.acquire()
+    limiter.observe({"retry-after": "1h"}, throttled=True)
+    assert limiter.utilization()["paused_seconds"] > 3000
+
+    path = tmp_path / "sycamore-rate-limiter-stale.json"
+    state = json.loads(path.read_text())
+    path.write_text(json.dumps(state | {"updated": state["updated"] - 120}))
+    # A later run starts over rather than waiting out the pause.
+    later = RateLimiter("stale", requests_per_minute=10, backend="file", lock_dir=str(tmp_path))
+    assert later.utilization() == {"requests": 0, "tokens": None, "paused_seconds": 0}
+
+
+def test_bedrock_client_retries(mocker):
+    from sycamore.transforms.embed import BedrockEmbedder
+
+    client = mocker.patch("boto3.client")
+    BedrockEmbedder()._client()
+    assert "config" not in client.call_args.kwargs
+    BedrockEmbedder(rate_limiter=RateLimiter("bedrock"))._client()
+    assert client.call_args.kwargs["config"].retries == {"total_max_attempts": 1}
+
+
+def test_call_retries_throttled(tmp_path):
+    limiter = RateLimiter("retry", backend="file", lock_dir=str(tmp_path), max_retries=2)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ConnectionError("throttled")
+        return "ok"
+
+    def throttled(e):
+        return {"retry-after-ms": "10"} if isinstance(e, ConnectionError) else None
+
+    assert limiter.call(flaky, 0, throttled) == "ok"
+    assert len(attempts) == 3
+
+    attempts.clear()
+    limiter.max_retries = 1
+    with pytest.raises(ConnectionError):
+        limiter.call(flaky, 0, throttled)
+
+    with pytest.raises(ValueError):
+        limiter.call(lambda: int("x"), 0, throttled)
+
+
+def test_openai_rate_limited(tmp_path):
+    limit_headers = {"x-ratelimit-limit-requests": "100", "x-ratelimit-remaining-requests": "90"}
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if len(requests) == 1:
+            return httpx.Response(429, headers={"retry-after-ms": "10", **limit_headers}, json={"error": {}})
+        body = {
+            "id": "1",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "gpt-4o-mini",
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "hello"}}],
+            "usage": {"prompt_tokens": 5, "completion_tokens": 1, "total_tokens": 6},
+        }
+        return httpx.Response(200, headers=limit_headers, json=body)
+
+    limiter = RateLimiter("openai", tokens_per_minute=1000, backend="file", lock_dir=str(tmp_path))
+    llm = OpenAI(
+        OpenAIModels.GPT_4O_MINI,
+        api_key="unused",
+        disable_helicone=True,
+        rate_limiter=limiter,
+        http_client=httpx.Client(transport=httpx.MockTransport(handler)),
+    )
+
+    assert llm.generate(prompt_kwargs={"prompt": "hi"}, llm_kwargs={}) == "hello"
+    assert len(requests) == 2
+    utilization = limiter.utilization()
+    assert utilization["requests"] == pytest.approx(0.1, abs=0.01)
+    assert utilization["tokens"] == pytest.approx(0.006, abs=0.001)
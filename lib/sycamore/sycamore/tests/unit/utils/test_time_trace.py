@@ -1,4 +1,5 @@
-from sycamore.utils.time_trace import LogTime, TimeTrace
+from sycamore.utils.time_trace import LogTime, TimeTrace, timetrace
+import asyncio
 import time
 import os
 import tempfile
@@ -23,6 +24,20 @@ class TestTimeTrace:
         time.sleep(0.01)
         tt.end()
 
+    def test_decorator(self):
+        @timetrace("test_sync")
+        def sync(x):
+            return x + 1
+
+        @timetrace("test_async")
+        async def coroutine(x):
+            await asyncio.sleep(0.01)
+            return x + 1
+
+        assert sync(1) == 2
+        assert asyncio.iscoroutinefunction(coroutine)
+        assert asyncio.run(coroutine(1)) == 2
+
 
 class TestLogTime:
     def test_simple(self):
@@ -1,5 +1,7 @@
+import copy
 import logging
-from typing import Any, Callable, Iterable, Optional, Union, TYPE_CHECKING
+import time
+from typing import Any, Callable, Iterable, Iterator, Optional, Union, TYPE_CHECKING
 
 import numpy as np
 
@@ -7,10 +9,21 @@ from sycamore.data import Document, MetadataDocument
 from sycamore.utils.lineage_utils import update_lineage
 from sycamore.data.document import split_data_metadata
 from sycamore.plan_nodes import Node, UnaryNode
+from sycamore.utils.adaptive_batch import AdaptiveBatchSize
+from sycamore.utils.error_policy import ErrorPolicy
+from sycamore.utils.local_parallel import BatchCallable, MapSpec, make_batch_callable
+from sycamore.utils.profiler import PROFILE_METADATA_KEY, is_profiling, profile_batch
 from sycamore.utils.ray_utils import check_serializable
 
 if TYPE_CHECKING:
     from ray.data import Dataset, Datasink
+    from sycamore.utils.local_parallel import LocalPool
+
+# Number of documents handed to a map function at a time when streaming in local mode if the
+# node does not specify a batch_size. Kept small so that take() and limit() can stop early.
+DEFAULT_LOCAL_BATCH_SIZE = 100
+# Smaller batches in local parallel mode so that small docsets are still spread over the workers.
+DEFAULT_LOCAL_PARALLEL_BATCH_SIZE = 10
 
 
 def take_separate(dataset: "Dataset", limit: Optional[int] = None) -> tuple[list[Document], list[MetadataDocument]]:
@@ -64,6 +77,173 @@ def get_name_from_callable(f):
     raise ValueError(f"Unable to extract name from {f}, dir(f): {dir(f)}")
 
 
+def _local_batches(
+    all_docs: Iterable[Document], batch_size: Union[int, AdaptiveBatchSize]
+) -> Iterator[tuple[Optional[list[Document]], list[Document], Optional[list[bytes]]]]:
+    """Groups documents into (docs, metadata, serialized) batches of at most batch_size documents as they
+    arrive.
+
+    If batch_size is an AdaptiveBatchSize, it decides when a batch is full from the number of documents
+    and their serialized size. The serialized documents are returned so that they can also be used to
+    copy the batch. Otherwise serialized is None.
+
+    At least one batch of docs is always produced so that functions with side effects (e.g. writers)
+    behave the same on an empty input as they do when the input is fully materialized. Trailing
+    metadata is returned with docs set to None and should just be passed through."""
+    adaptive = isinstance(batch_size, AdaptiveBatchSize)
+    processed = False
+    docs: list[Document] = []
+    metadata: list[Document] = []
+    serialized: Optional[list[bytes]] = [] if adaptive else None
+    nbytes = 0
+    for d in all_docs:
+        if isinstance(d, MetadataDocument):
+            metadata.append(d)
+            continue
+        docs.append(d)
+        if isinstance(batch_size, AdaptiveBatchSize):
+            assert serialized is not None
+            serialized.append(d.serialize())
+            nbytes += len(serialized[-1])
+            full = batch_size.full(len(docs), nbytes)
+        else:
+            full = len(docs) >= batch_size
+        if full:
+            yield docs, metadata, serialized
+            processed = True
+            docs = []
+            metadata = []
+            serialized = [] if adaptive else None
+            nbytes = 0
+
+    if len(docs) > 0 or not processed:
+        yield docs, metadata, serialized
+    elif len(metadata) > 0:
+        yield None, metadata, None
+
+
+def _finish_local_batch(
+    docs: list[Document], outputs: list[Document], metadata: list[Document], enable_auto_metadata: bool
+) -> list[Document]:
+    to_docs = [d for d in outputs if not isinstance(d, MetadataDocument)]
+    if enable_auto_metadata and (len(docs) > 0 or len(to_docs) > 0):
+        outputs.extend(update_lineage(docs, to_docs))
+    outputs.extend(metadata)
+    return outputs
+
+
+def _copies(docs: list[Document], serialized: Optional[list[bytes]]) -> Callable[[], list[Document]]:
+    """Returns a function that makes new copies of docs, from their serialized form if there is one."""
+    if serialized is None:
+        return lambda: copy.deepcopy(docs)
+    return lambda: [Document.deserialize(s) for s in serialized]
+
+
+def _local_stream(
+    all_docs: Iterable[Document],
+    f: BatchCallable,
+    batch_size: Union[int, AdaptiveBatchSize],
+    enable_auto_metadata: bool,
+) -> Iterator[Document]:
+    """Applies f to batches of at most batch_size documents as they arrive, passing metadata through.
+
+    If batch_size is an AdaptiveBatchSize, the time taken by each batch is recorded with it."""
+    import copy
+
+    for docs, metadata, serialized in _local_batches(all_docs, batch_size):
+        if docs is None:
+            yield from metadata
+            continue
+        # transforms assume they can mutate docs in place; this works in ray because documents are serialized and
+        # deserialized between every stage. When the documents were serialized to size the batch, that copy is used.
+        if serialized is None:
+            in_docs = copy.deepcopy(docs)
+        else:
+            in_docs = [Document.deserialize(s) for s in serialized]
+        start = time.perf_counter()
+        # docs are left unmodified, so an error policy can retry with copies of them.
+        outputs = f(in_docs, originals=_copies(docs, serialized))
+        if isinstance(batch_size, AdaptiveBatchSize):
+            assert serialized is not None
+            batch_size.record(len(docs), sum(len(s) for s in serialized), time.perf_counter() - start)
+        yield from _finish_local_batch(docs, outputs, metadata, enable_auto_metadata)
+
+
+def _local_parallel_stream(
+    all_docs: Iterable[Document],
+    pool: "LocalPool",
+    batch_size: int,
+    enable_auto_metadata: bool,
+) -> Iterator[Document]:
+    """Like _local_stream, but runs the batches on pool. Output order matches _local_stream."""
+    trailing_metadata: list[Document] = []
+
+    def items() -> Iterator[tuple[Any, list[Document]]]:
+        for docs, metadata, _ in _local_batches(all_docs, batch_size):
+            if docs is None:
+                trailing_metadata.extend(metadata)
+            else:
+                yield (docs, metadata), docs
+
+    for (docs, metadata), outputs in pool.imap(items()):
+        yield from _finish_local_batch(docs, outputs, metadata, enable_auto_metadata)
+    yield from trailing_metadata
+
+
+def _make_local_pool(
+    name: str,
+    specs: list[MapSpec],
+    parallelism: Optional[int],
+    resource_args: dict[str, Any],
+    max_workers: Optional[int],
+    error_policy: Optional[ErrorPolicy] = None,
+) -> Optional["LocalPool"]:
+    """Chooses a pool for local parallel execution from the ray resource hints of a node.
+
+    Returns None if the node should run in the calling thread."""
+    import os
+
+    from sycamore.utils.local_parallel import LocalPool
+
+    cpus = os.cpu_count() or 1
+    num_workers = max_workers or cpus
+    if parallelism is not None:
+        num_workers = min(num_workers, parallelism)
+
+    if resource_args.get("num_gpus", 0) > 0:
+        # Loading a model onto the GPU once per worker would exhaust GPU memory.
+        num_workers = 1
+
+    num_cpus = resource_args.get("num_cpus")
+    # EnforceResourceUsage sets num_cpus to 0 for NonCPUUser nodes; those are typically waiting on
+    # a remote service so threads are sufficient.
+    use_threads = num_cpus == 0
+    if not use_threads and isinstance(num_cpus, (int, float)) and num_cpus > 1:
+        num_workers = min(num_workers, max(1, int(cpus // num_cpus)))
+
+    if num_workers <= 1:
+        return None
+    # Called while the node is running, so the workers are only measured when the node is being profiled.
+    return LocalPool(
+        specs, num_workers, use_threads=use_threads, name=name, error_policy=error_policy, profile=is_profiling()
+    )
+
+
+def _write_intermediate_data(
+    dataset: "Dataset",
+    name: str,
+    datasink: Optional[Union[type["Datasink"], "Datasink"]],
+    datasink_kwargs: Optional[dict[str, Any]],
+) -> None:
+    assert datasink is not None
+    if isinstance(datasink, type):
+        assert datasink_kwargs is not None
+        # ensure each nodes data is written in a separate directory
+        path = datasink_kwargs["path"] + "/" + name
+        datasink = datasink(**{**datasink_kwargs, "path": path})
+    dataset.write_datasink(datasink)
+
+
 class BaseMapTransform(UnaryNode):
     """
     BaseMapTransform abstracts away MetadataDocuments from all other transforms.
@@ -76,6 +256,16 @@ class BaseMapTransform(UnaryNode):
     Otherwise f will be run as a function.
 
     Use args, kwargs to pass additional args to the function call.
+
+    If adaptive_batching is True or an AdaptiveBatchSize, the number of documents passed to f at a
+    time is tuned from how long each call takes and the serialized size of the documents instead of
+    being fixed by batch_size. In ray mode, ray still hands each worker batches of batch_size
+    documents (AdaptiveBatchSize.max_batch_size if unset), which are split into smaller batches for
+    f. Local parallel mode uses fixed batches.
+
+    If error_policy is set, a document that makes f raise is retried on its own and, if it keeps
+    failing, dropped and optionally saved to a dead letter location instead of failing the whole
+    batch. See ErrorPolicy.
     """
 
     def __init__(
@@ -92,6 +282,8 @@ class BaseMapTransform(UnaryNode):
         # since everything needs to be updated to skip metadata. If we temporarily disable the
         # lineage metadata, then we can do the conversion to BaseMap in separate PRs.
         enable_auto_metadata: bool = True,
+        adaptive_batching: Union[bool, AdaptiveBatchSize, None] = None,
+        error_policy: Optional[ErrorPolicy] = None,
         **resource_args,
     ):
         if isinstance(f, type) and "parallelism" not in resource_args:
@@ -108,6 +300,22 @@ class BaseMapTransform(UnaryNode):
         self._constructor_args = constructor_args
         self._constructor_kwargs = constructor_kwargs
         self._enable_auto_metadata = enable_auto_metadata
+        if adaptive_batching is True:
+            adaptive_batching = AdaptiveBatchSize()
+        # Each node learns its own batch sizes in local mode, even if the sizer is passed to several.
+        self._adaptive_batching: Optional[AdaptiveBatchSize] = copy.copy(adaptive_batching) or None
+        self._error_policy = error_policy
+
+    def fingerprint_state(self) -> dict[str, Any]:
+        state = super().fingerprint_state()
+        # Batching does not change the output.
+        state.pop("_adaptive_batching", None)
+        return state
+
+    def _ray_args(self) -> dict[str, Any]:
+        if self._adaptive_batching is not None and self.resource_args.get("batch_size") in (None, "default"):
+            return self.resource_args | {"batch_size": self._adaptive_batching.max_batch_size}
+        return self.resource_args
 
     def execute(
         self,
@@ -134,37 +342,72 @@ class BaseMapTransform(UnaryNode):
         )
         if isinstance(self._f, type):  # is f a class?
             # Maybe add a class as function variant if the caller specified parallelism=None
-            result = input_dataset.map_batches(self._map_class(), **self.resource_args)
+            result = input_dataset.map_batches(self._map_class(), **self._ray_args())
         elif "compute" in self.resource_args:
             assert isinstance(
                 self.resource_args["compute"], ActorPoolStrategy
             ), "only supported compute type is ActorPoolStrategy"
             # Ray requires a class for ActorPoolStrategy
-            result = input_dataset.map_batches(self._map_callable_as_class(), **self.resource_args)
+            result = input_dataset.map_batches(self._map_callable_as_class(), **self._ray_args())
         else:
-            result = input_dataset.map_batches(self._map_function(), **self.resource_args)
+            result = input_dataset.map_batches(self._map_function(), **self._ray_args())
 
         if write_intermediate_data:
-            assert intermediate_datasink is not None
-            if isinstance(intermediate_datasink, type):
-                assert intermediate_datasink_kwargs is not None
-                # ensure each nodes data is written in a separate directory
-                path = intermediate_datasink_kwargs["path"] + "/" + self._name
-                intermediate_datasink = intermediate_datasink(**{**intermediate_datasink_kwargs, "path": path})
-            else:
-                intermediate_datasink = intermediate_datasink
-            result.write_datasink(intermediate_datasink)
+            _write_intermediate_data(result, self._name, intermediate_datasink, intermediate_datasink_kwargs)
         return result
 
     def local_execute(self, all_docs: list[Document]) -> list[Document]:
-        docs = [d for d in all_docs if not isinstance(d, MetadataDocument)]
-        metadata = [d for d in all_docs if isinstance(d, MetadataDocument)]
-        outputs = self._local_process(docs)
-        to_docs = [d for d in outputs if not isinstance(d, MetadataDocument)]
-        if self._enable_auto_metadata and (len(docs) > 0 or len(to_docs) > 0):
-            outputs.extend(update_lineage(docs, to_docs))
-        outputs.extend(metadata)
-        return outputs
+        return list(self.local_execute_iter(all_docs))
+
+    def local_execute_iter(self, all_docs: Iterable[Document]) -> Iterator[Document]:
+        """Lazily process documents in batches of batch_size (or DEFAULT_LOCAL_BATCH_SIZE).
+
+        If f is a class, a single instance is used for the whole execution, matching the
+        behavior of a ray actor."""
+        batch_size: Union[int, AdaptiveBatchSize] = self._local_batch_size()
+        if self._adaptive_batching is not None:
+            # The node's own sizer, so that what it learns lasts as long as the node.
+            batch_size = self._adaptive_batching
+        return _local_stream(all_docs, self._local_callable(), batch_size, self._enable_auto_metadata)
+
+    def local_parallel_execute_iter(
+        self, all_docs: Iterable[Document], max_workers: Optional[int] = None
+    ) -> Iterator[Document]:
+        """Like local_execute_iter, but spreads batches over a pool of up to max_workers workers.
+
+        The number of workers is limited by parallelism and the num_cpus/num_gpus resource args."""
+        pool = _make_local_pool(
+            self._name, self._local_specs(), self.parallelism, self.resource_args, max_workers, self._error_policy
+        )
+        if pool is None:
+            yield from self.local_execute_iter(all_docs)
+            return
+
+        yield from _local_parallel_stream(
+            all_docs, pool, self._local_batch_size(parallel=True), self._enable_auto_metadata
+        )
+
+    def _local_batch_size(self, parallel: bool = False) -> int:
+        batch_size = self.resource_args.get("batch_size")
+        if isinstance(batch_size, int) and batch_size > 0:
+            return batch_size
+        if parallel:
+            return DEFAULT_LOCAL_PARALLEL_BATCH_SIZE
+        return DEFAULT_LOCAL_BATCH_SIZE
+
+    def _local_specs(self) -> list[MapSpec]:
+        return [
+            (
+                self._f,
+                tuple(_noneOr(self._args, tuple())),
+                _noneOr(self._kwargs, {}),
+                tuple(_noneOr(self._constructor_args, tuple())),
+                _noneOr(self._constructor_kwargs, {}),
+            )
+        ]
+
+    def _local_callable(self) -> BatchCallable:
+        return make_batch_callable(self._local_specs(), self._error_policy, self._name)
 
     def _local_process(self, in_docs: list[Document]) -> list[Document]:
         """Internal function for faster testing during the conversion to running on BaseMap.
@@ -174,18 +417,7 @@ class BaseMapTransform(UnaryNode):
         # transforms assume they can mutate docs in place; this works in ray because documents are serialized and
         # deserialized between every stage.
         docs = copy.deepcopy(in_docs)
-        if isinstance(self._f, type):  # is f a class?
-            c_args = _noneOr(self._constructor_args, tuple())
-            c_kwargs = _noneOr(self._constructor_kwargs, {})
-            inst = self._f(*c_args, **c_kwargs)
-
-            args = _noneOr(self._args, tuple())
-            kwargs = _noneOr(self._kwargs, {})
-            return inst(docs, *args, **kwargs)
-        else:
-            args = _noneOr(self._args, tuple())
-            kwargs = _noneOr(self._kwargs, {})
-            return self._f(docs, *args, **kwargs)
+        return self._local_callable()(docs, originals=lambda: copy.deepcopy(in_docs))
 
     def _map_function(self):
         f = self._f
@@ -193,10 +425,21 @@ class BaseMapTransform(UnaryNode):
         args = _noneOr(self._args, tuple())
         kwargs = _noneOr(self._kwargs, {})
         enable_auto_metadata = self._enable_auto_metadata
+        profile = self._profile_batches()
+        adaptive = self._adaptive_batching
+        error_policy = self._error_policy
 
         @rename(name)
         def ray_callable(ray_input: dict[str, np.ndarray]) -> dict[str, list]:
-            return BaseMapTransform._process_ray(ray_input, name, lambda d: f(d, *args, **kwargs), enable_auto_metadata)
+            return BaseMapTransform._process_ray(
+                ray_input,
+                name,
+                lambda d: f(d, *args, **kwargs),
+                enable_auto_metadata,
+                profile,
+                adaptive,
+                error_policy,
+            )
 
         return ray_callable
 
@@ -206,12 +449,23 @@ class BaseMapTransform(UnaryNode):
         args = _noneOr(self._args, tuple())
         kwargs = _noneOr(self._kwargs, {})
         enable_auto_metadata = self._enable_auto_metadata
+        profile = self._profile_batches()
+        adaptive = self._adaptive_batching
+        error_policy = self._error_policy
 
         def ray_init(self):
             pass
 
         def ray_callable(self, ray_input: dict[str, np.ndarray]) -> dict[str, list]:
-            return BaseMapTransform._process_ray(ray_input, name, lambda d: f(d, *args, **kwargs), enable_auto_metadata)
+            return BaseMapTransform._process_ray(
+                ray_input,
+                name,
+                lambda d: f(d, *args, **kwargs),
+                enable_auto_metadata,
+                profile,
+                adaptive,
+                error_policy,
+            )
 
         return type("BaseMapTransformCallable__" + name, (), {"__init__": ray_init, "__call__": ray_callable})
 
@@ -223,29 +477,90 @@ class BaseMapTransform(UnaryNode):
         c_args = _noneOr(self._constructor_args, tuple())
         c_kwargs = _noneOr(self._constructor_kwargs, {})
         enable_auto_metadata = self._enable_auto_metadata
+        profile = self._profile_batches()
+        adaptive = self._adaptive_batching
+        error_policy = self._error_policy
 
         def ray_init(self):
             self.base = c(*c_args, **c_kwargs)
 
         def ray_callable(self, ray_input: dict[str, np.ndarray]) -> dict[str, list]:
             return BaseMapTransform._process_ray(
-                ray_input, name, lambda d: self.base(d, *args, **kwargs), enable_auto_metadata
+                ray_input,
+                name,
+                lambda d: self.base(d, *args, **kwargs),
+                enable_auto_metadata,
+                profile,
+                adaptive,
+                error_policy,
             )
 
         return type("BaseMapTransformCustom__" + name, (), {"__init__": ray_init, "__call__": ray_callable})
 
+    def _profile_batches(self) -> bool:
+        # Set by Execution.profile on the nodes it runs in ray mode.
+        return self.properties.get(PROFILE_METADATA_KEY, False)
+
     @staticmethod
     def _process_ray(
         ray_input: dict[str, np.ndarray],
         name: str,
         f: Callable[[list[Document]], list[Document]],
         enable_auto_metadata: bool,
+        profile: bool = False,
+        adaptive: Optional[AdaptiveBatchSize] = None,
+        error_policy: Optional[ErrorPolicy] = None,
     ) -> dict[str, list]:
         # Have to do fully inline documents and metadata which means that we're forced to deserialize
         # metadata documents even though we just pass them through. If we instead had multiple columns,
         # we would have to make fake empty documents so that the doc and meta columns have the same number
         # of rows. Otherwise ray will raise an error.
-        all_docs = [Document.deserialize(s) for s in ray_input.get("doc", [])]
+        serialized: Any = ray_input.get("doc", [])
+        all_docs = [Document.deserialize(s) for s in serialized]
+        if error_policy is not None:
+            f = error_policy.wrap_serialized(f, name, all_docs, serialized)
+
+        def process() -> list[Document]:
+            if adaptive is None:
+                return BaseMapTransform._process_docs(all_docs, name, f, enable_auto_metadata)
+            sizes = [len(s) for s in serialized]
+            return BaseMapTransform._process_adaptive(
+                all_docs, sizes, name, f, enable_auto_metadata, adaptive.for_process()
+            )
+
+        outputs = profile_batch(process) if profile else process()
+        return {"doc": [d.serialize() for d in outputs]}
+
+    @staticmethod
+    def _process_adaptive(
+        all_docs: list[Document],
+        sizes: list[int],
+        name: str,
+        f: Callable[[list[Document]], list[Document]],
+        enable_auto_metadata: bool,
+        sizer: AdaptiveBatchSize,
+    ) -> list[Document]:
+        """Like _process_docs, but calls f on batches chosen by sizer. sizes are the serialized sizes of all_docs."""
+        data = [(d, n) for d, n in zip(all_docs, sizes) if not isinstance(d, MetadataDocument)]
+        if len(data) == 0:
+            return BaseMapTransform._process_docs(all_docs, name, f, enable_auto_metadata)
+
+        docs = [d for d, _ in data]
+        outputs: list[Document] = []
+        for batch, nbytes in sizer.split(docs, [n for _, n in data]):
+            start = time.perf_counter()
+            outputs.extend(BaseMapTransform._process_docs(batch, name, f, enable_auto_metadata))
+            sizer.record(len(batch), nbytes, time.perf_counter() - start)
+        outputs.extend(d for d in all_docs if isinstance(d, MetadataDocument))
+        return outputs
+
+    @staticmethod
+    def _process_docs(
+        all_docs: list[Document],
+        name: str,
+        f: Callable[[list[Document]], list[Document]],
+        enable_auto_metadata: bool,
+    ) -> list[Document]:
         docs = [d for d in all_docs if not isinstance(d, MetadataDocument)]
         metadata = [d for d in all_docs if isinstance(d, MetadataDocument)]
         outputs = f(docs)
@@ -264,14 +579,24 @@ class BaseMapTransform(UnaryNode):
         if enable_auto_metadata and (len(docs) > 0 or len(to_docs) > 0):
             outputs.extend(update_lineage(docs, to_docs))
         outputs.extend(metadata)
-        return {"doc": [d.serialize() for d in outputs]}
+        return outputs
 
 
 class CompositeTransform(UnaryNode):
-    def __init__(self, child: Node, base_args: list[dict], enable_auto_metadata=True, **resource_args):
+    def __init__(
+        self,
+        child: Node,
+        base_args: list[dict],
+        enable_auto_metadata=True,
+        error_policy: Optional[ErrorPolicy] = None,
+        **resource_args,
+    ):
         super().__init__(child, **resource_args)
+        if error_policy is not None:
+            base_args = [{"error_policy": error_policy, **a} for a in base_args]
         self.nodes = CompositeTransform.combine(child, base_args, **resource_args)
         self._enable_auto_metadata = enable_auto_metadata
+        self._error_policy = error_policy
 
     @staticmethod
     def combine(last: Node, base_args: list[dict], **resource_args) -> list[BaseMapTransform]:
@@ -291,19 +616,162 @@ class CompositeTransform(UnaryNode):
         return docs
 
     def local_execute(self, all_docs: list[Document]) -> list[Document]:
-        docs = [d for d in all_docs if not isinstance(d, MetadataDocument)]
-        metadata = [d for d in all_docs if isinstance(d, MetadataDocument)]
-        outputs = self._local_process(docs)
-        to_docs = [d for d in outputs if not isinstance(d, MetadataDocument)]
-        if self._enable_auto_metadata and (len(docs) > 0 or len(to_docs) > 0):
-            outputs.extend(update_lineage(docs, to_docs))
-        outputs.extend(metadata)
-        return outputs
+        return list(self.local_execute_iter(all_docs))
+
+    def local_execute_iter(self, all_docs: Iterable[Document]) -> Iterator[Document]:
+        return _local_stream(
+            all_docs,
+            make_batch_callable(self._local_specs(), self._error_policy, self.__class__.__name__),
+            self.nodes[0]._local_batch_size(),
+            self._enable_auto_metadata,
+        )
+
+    def local_parallel_execute_iter(
+        self, all_docs: Iterable[Document], max_workers: Optional[int] = None
+    ) -> Iterator[Document]:
+        parallelism = [n.parallelism for n in [self, *self.nodes] if n.parallelism is not None]
+        pool = _make_local_pool(
+            self.__class__.__name__,
+            self._local_specs(),
+            min(parallelism) if len(parallelism) > 0 else None,
+            self.resource_args,
+            max_workers,
+            self._error_policy,
+        )
+        if pool is None:
+            yield from self.local_execute_iter(all_docs)
+            return
+
+        yield from _local_parallel_stream(
+            all_docs, pool, self.nodes[0]._local_batch_size(parallel=True), self._enable_auto_metadata
+        )
+
+    def _local_specs(self) -> list[MapSpec]:
+        return [spec for n in self.nodes for spec in n._local_specs()]
 
     def execute(self, **kwargs) -> "Dataset":
         from sycamore.executor import visit_parallelism
 
+        if self.nodes[0].children[0] is not self.child() or PROFILE_METADATA_KEY in self.properties:
+            # A rewrite rule replaced the child of a copy of this node, or this copy is being profiled;
+            # chain copies of the nodes onto the new child so the original plan is left alone.
+            self.nodes = self._chain(self.child())
+
         for n in self.nodes:
             visit_parallelism(n)
 
         return self.nodes[-1].execute()
+
+    def _chain(self, child: Node) -> list[BaseMapTransform]:
+        import copy
+
+        nodes = []
+        last = child
+        for n in self.nodes:
+            n = copy.copy(n)
+            n.children = [last]
+            if PROFILE_METADATA_KEY in self.properties:
+                n.properties = n.properties | {PROFILE_METADATA_KEY: self.properties[PROFILE_METADATA_KEY]}
+            nodes.append(n)
+            last = n
+        return nodes
+
+
+class FusedMapTransform(UnaryNode):
+    """
+    FusedMapTransform runs a chain of stateless BaseMapTransforms as a single ray stage.
+
+    Each document is deserialized and serialized once for the whole chain rather than once per
+    transform. Lineage metadata is generated for each of the fused transforms exactly as if they
+    had run separately. Created by the FuseMapTransforms rewrite rule; nodes[0] is the transform
+    closest to the source and its child is the child of the fused node. When intermediate data is
+    written, the transforms run as separate stages so that each one's output is written as usual.
+    """
+
+    def __init__(self, nodes: list[BaseMapTransform], **resource_args):
+        assert len(nodes) > 0
+        super().__init__(nodes[0].children[0], **resource_args)
+        self.nodes = nodes
+        self._name = "+".join(n._name for n in nodes)
+        self.properties["fused"] = [n._name for n in nodes]
+
+    def __str__(self):
+        return f"fused({self._name})"
+
+    def execute(
+        self,
+        write_intermediate_data: bool = False,
+        intermediate_datasink: Optional[Union[type["Datasink"], "Datasink"]] = None,
+        intermediate_datasink_kwargs: Optional[dict[str, Any]] = None,
+        **kwargs,
+    ) -> "Dataset":
+        for n in self.nodes:
+            check_serializable(n._f, n._name, n._args, n._kwargs)
+
+        input_dataset = self.child().execute(
+            write_intermediate_data=write_intermediate_data,
+            intermediate_datasink=intermediate_datasink,
+            intermediate_datasink_kwargs=intermediate_datasink_kwargs,
+        )
+        if not write_intermediate_data:
+            return input_dataset.map_batches(self._map_function(), **self.resource_args)
+
+        # Each transform's output is written separately, so the transforms are run unfused.
+        result = input_dataset
+        for n in self.nodes:
+            result = result.map_batches(n._map_function(), **n._ray_args())
+            _write_intermediate_data(result, n._name, intermediate_datasink, intermediate_datasink_kwargs)
+        return result
+
+    def local_execute(self, all_docs: list[Document]) -> list[Document]:
+        return list(self.local_execute_iter(all_docs))
+
+    def local_execute_iter(self, all_docs: Iterable[Document]) -> Iterator[Document]:
+        docs: Iterable[Document] = all_docs
+        for n in self.nodes:
+            docs = n.local_execute_iter(docs)
+        return iter(docs)
+
+    def _map_function(self):
+        stages = []
+        for n in self.nodes:
+            assert not isinstance(n._f, type), "only function transforms can be fused"
+            stages.append(
+                (
+                    n._name,
+                    n._f,
+                    _noneOr(n._args, tuple()),
+                    _noneOr(n._kwargs, {}),
+                    n._enable_auto_metadata,
+                    n._error_policy,
+                )
+            )
+        profile = self.properties.get(PROFILE_METADATA_KEY, False)
+
+        def process(docs: list[Document], serialized: list[bytes]) -> list[Document]:
+            for i, (name, f, args, kwargs, enable_auto_metadata, error_policy) in enumerate(stages):
+
+                def call(d: list[Document]) -> list[Document]:
+                    return f(d, *args, **kwargs)
+
+                if error_policy is None:
+                    wrapped = call
+                elif i == 0:
+                    # Only the input of the first stage is still available serialized.
+                    wrapped = error_policy.wrap_serialized(call, name, docs, serialized)
+                else:
+                    wrapped = error_policy.wrap(call, name)
+                docs = BaseMapTransform._process_docs(docs, name, wrapped, enable_auto_metadata)
+            return docs
+
+        @rename(self._name)
+        def ray_callable(ray_input: dict[str, np.ndarray]) -> dict[str, list]:
+            serialized: Any = ray_input.get("doc", [])
+            docs = [Document.deserialize(s) for s in serialized]
+            if profile:
+                docs = profile_batch(lambda: process(docs, serialized))
+            else:
+                docs = process(docs, serialized)
+            return {"doc": [d.serialize() for d in docs]}
+
+        return ray_callable
@@ -1,8 +1,10 @@
-from typing import Callable, TYPE_CHECKING
+import inspect
+from typing import Awaitable, Callable, Iterable, Iterator, Optional, Union, TYPE_CHECKING
 
 from sycamore.data import Document
 from sycamore.plan_nodes import Node, NonGPUUser, NonCPUUser, Transform
 from sycamore.transforms.map import MapBatch
+from sycamore.utils.async_utils import DEFAULT_MAX_CONCURRENCY, map_bounded
 
 if TYPE_CHECKING:
     from ray.data import Dataset
@@ -35,6 +37,11 @@ class Limit(NonCPUUser, NonGPUUser, Transform):
     def local_execute(self, all_docs: list[Document]) -> list[Document]:
         return all_docs[: self._limit]
 
+    def local_execute_iter(self, all_docs: Iterable[Document]) -> Iterator[Document]:
+        from itertools import islice
+
+        return islice(all_docs, self._limit)
+
 
 class Filter(MapBatch):
     """
@@ -44,6 +51,8 @@ class Filter(MapBatch):
         child: The source node or component that provides the dataset to be filtered.
         f: A callable function that takes a Document object and returns a boolean indicating whether the document
             should be included in the filtered dataset.
+        max_concurrency: If f is a coroutine function, the number of documents it is awaited on at a time in
+            each worker.
         resource_args: Additional resource-related arguments that can be passed to the filtering operation.
 
     Example:
@@ -59,5 +68,21 @@ class Filter(MapBatch):
 
     """
 
-    def __init__(self, child: Node, *, f: Callable[[Document], bool], **resource_args):
-        super().__init__(child, f=lambda docs: [d for d in docs if f(d)], **resource_args)
+    def __init__(
+        self,
+        child: Node,
+        *,
+        f: Callable[[Document], Union[bool, Awaitable[bool]]],
+        max_concurrency: Optional[int] = None,
+        **resource_args,
+    ):
+        if inspect.iscoroutinefunction(f):
+            limit = max_concurrency or DEFAULT_MAX_CONCURRENCY
+
+            def keep(docs: list[Document]) -> list[Document]:
+                return [d for d, k in zip(docs, map_bounded(f, docs, limit)) if k]
+
+            super().__init__(child, f=keep, **resource_args)
+        else:
+            assert max_concurrency is None, "max_concurrency requires f to be a coroutine function"
+            super().__init__(child, f=lambda docs: [d for d in docs if f(d)], **resource_args)
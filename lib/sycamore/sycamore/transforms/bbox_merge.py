@@ -1,29 +1,15 @@
 from typing import Optional
 
+import numpy as np
 
 from sycamore.data import Document, Element
 from sycamore.data.document import DocumentPropertyTypes
 from sycamore.plan_nodes import Node, SingleThreadUser, NonGPUUser
 from sycamore.transforms.map import Map
+from sycamore.utils.bbox_array import BboxArray
 from sycamore.utils.time_trace import TimeTrace, timetrace
 
 
-def validBbox(bbox):
-    for idx in range(4):
-        val = bbox[idx]
-        if (val < 0.0) or (val > 1.0):
-            return False
-    return True
-
-
-def getBboxLeftTop(elem: Element):
-    bbox = elem.data.get("bbox")
-    if bbox is None:
-        return (0.0, 0.0)
-    else:
-        return (bbox[0], bbox[1])
-
-
 def getPageTopLeft(elem: Element):
     bbox = elem.data.get("bbox")
     if bbox is None:
@@ -32,72 +18,111 @@ def getPageTopLeft(elem: Element):
         return (elem.properties[DocumentPropertyTypes.PAGE_NUMBER], bbox[1], bbox[0])
 
 
-def getRow(elem: Element, elements: list[Element]) -> list[Element]:
-    rv = [elem]
-
-    bbox = elem.data.get("bbox")
-    if bbox is None:
-        return rv
-    left = bbox[0]
-    top = bbox[1]
-    right = bbox[2]
-    bottom = bbox[3]
-    page = elem.properties[DocumentPropertyTypes.PAGE_NUMBER]
-
+def _rowStarts(boxes: BboxArray) -> np.ndarray:
+    """
+    Binary searches for each box's position by (page, top), all boxes at once, returning for each
+    the last position the search stepped past, where the scan for its row starts.
+    """
+    n = len(boxes)
+    (pages, tops) = (boxes.pages, boxes.top)
+    beg = np.zeros(n, dtype=np.int64)
+    end = np.full(n, n, dtype=np.int64)
+    idx = np.zeros(n, dtype=np.int64)
+    active = beg < end
+    while np.any(active):
+        mid = beg + ((end - beg) // 2)
+        mid[~active] = 0
+        (mpage, mtop) = (pages[mid], tops[mid])
+        before = active & ((mpage < pages) | ((mpage == pages) & (mtop < tops)))
+        after = active & ((mpage > pages) | ((mpage == pages) & (mtop > tops)))
+        beg[before] = mid[before] + 1
+        idx[before] = mid[before]
+        end[after] = mid[after]
+        active &= (before | after) & (beg < end)
+    return idx
+
+
+def _firstAbove(values: np.ndarray, starts: np.ndarray, limits: np.ndarray) -> np.ndarray:
+    """For each i, returns the first k >= starts[i] with values[k] > limits[i], or len(values)."""
+    n = len(values)
+    # maxes[j][k] is the largest of values[k : k + 2**j].
+    maxes = [values]
+    while (1 << len(maxes)) <= n:
+        half = 1 << (len(maxes) - 1)
+        prev = maxes[-1]
+        maxes.append(np.maximum(prev[:-half], prev[half:]))
+    pos = starts.copy()
+    for j in range(len(maxes) - 1, -1, -1):
+        level = maxes[j]
+        step = pos < len(level)
+        step[step] = level[pos[step]] <= limits[step]
+        pos[step] += 1 << j
+    return pos
+
+
+# The most (box, candidate) pairs getRows materializes at once.
+_MAX_PAIRS = 1 << 20
+
+
+def _candidates(
+    boxes: BboxArray, owners: np.ndarray, starts: np.ndarray, lengths: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """Returns the (box, candidate) pairs of the given boxes whose candidates are beside them in the same
+    row, where the candidates of owners[i] are the lengths[i] boxes from starts[i]."""
+    owner = np.repeat(owners, lengths)
+    offsets = np.repeat(np.cumsum(lengths) - lengths - starts, lengths)
+    cand = np.arange(len(owner)) - offsets
+    (left, top, right) = (boxes.left[owner], boxes.top[owner], boxes.right[owner])
+    beside = boxes.has_bbox[cand] & (boxes.bottom[cand] >= top)
+    beside &= (boxes.left[cand] > right) | (boxes.right[cand] < left)
+    return (owner[beside], cand[beside])
+
+
+def getRows(boxes: BboxArray) -> list[list[int]]:
+    """
+    Returns the row of each box: the indices of the boxes beside it and overlapping it vertically,
+    with the box itself, ordered left to right.  Boxes must be sorted by page, then top.
+    """
+    n = len(boxes)
+    if n == 0:
+        return []
     # !!! assuming elements are sorted by y-values
-    n = len(elements)
+    starts = _rowStarts(boxes)
+    lengths = np.where(boxes.has_bbox, _firstAbove(boxes.top, starts, boxes.bottom) - starts, 0)
+
+    # Every (box, candidate) pair as flat arrays, a bounded number of pairs at a time since a box near
+    # the bottom of a page can have candidates on the following pages.
+    owners = []
+    cands = []
+    ends = np.cumsum(lengths)
     beg = 0
-    end = n
-    idx = 0
-    while beg < end:
-        mid = beg + ((end - beg) // 2)
-        melem = elements[mid]
-        mpage = melem.properties[DocumentPropertyTypes.PAGE_NUMBER]
-        if mpage < page:
-            beg = mid + 1
-            idx = mid
-        elif mpage > page:
-            end = mid
-        else:
-            mbb = melem.data["bbox"]
-            mtop = mbb[1]
-            if mtop < top:
-                beg = mid + 1
-                idx = mid
-            elif mtop > top:
-                end = mid
-            else:
-                break
-
-    for idx in range(idx, n):
-        ee = elements[idx]
-        bb = ee.data["bbox"]
-        if bb[1] > bottom:
-            break
-        if bb[3] < top:
-            continue
-        if (bb[0] > right) or (bb[2] < left):
-            rv.append(ee)
-
-    rv.sort(key=getBboxLeftTop)
-    return rv
-
-
-def partOfTwoCol(elem: Element, xmin, xmax) -> bool:
-    cc = elem.data.get("_colCnt")
-    if (cc is None) or (cc != 2):
-        return False
-    bb = elem.data.get("bbox")
-    if bb is None:
-        return False
-    left = bb[0]
-    width = bb[2] - left
+    while beg < n:
+        end = max(beg + 1, int(np.searchsorted(ends, ends[beg] - lengths[beg] + _MAX_PAIRS, side="right")))
+        (owner, cand) = _candidates(boxes, np.arange(beg, end), starts[beg:end], lengths[beg:end])
+        owners.append(owner)
+        cands.append(cand)
+        beg = end
+    owner = np.concatenate(owners)
+    cand = np.concatenate(cands)
+
+    # Each row is the box itself followed by its candidates, stably sorted by left, then top.
+    owner = np.concatenate((np.arange(n), owner))
+    member = np.concatenate((np.arange(n), cand))
+    rank = np.concatenate((np.zeros(n, dtype=np.int64), np.arange(1, len(cand) + 1)))
+    order = np.lexsort((rank, boxes.top[member], boxes.left[member], owner))
+    members = member[order].tolist()
+    bounds = np.searchsorted(owner[order], np.arange(n + 1)).tolist()
+    return [members[bounds[i] : bounds[i + 1]] for i in range(n)]
+
+
+def partOfTwoCol(boxes: BboxArray, colCnt: np.ndarray, xmin: float, xmax: float) -> np.ndarray:
+    """Returns a mask of the boxes that are a column of two-column text."""
     pageWidth = xmax - xmin
     halfWidth = pageWidth / 2
-    if width > halfWidth:
-        return False
-    frac = (left - xmin) / pageWidth
-    return (frac <= 0.1) or ((frac >= 0.45) and (frac <= 0.6))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        frac = (boxes.left - xmin) / pageWidth
+    inColumn = (frac <= 0.1) | ((frac >= 0.45) & (frac <= 0.6))
+    return (colCnt == 2) & boxes.has_bbox & (boxes.width <= halfWidth) & inColumn
 
 
 ###############################################################################
@@ -196,68 +221,68 @@ class MarkBreakByColumn(SingleThreadUser, NonGPUUser, Map):
     @timetrace("makeBreakCol")
     def mark_break_by_column(parent: Document) -> Document:
         elements = parent.elements
+        boxes = BboxArray(elements)
 
         # measure width in-use
         xmin = 1.0  # FIXME are these global?
         xmax = 0.0
-        for elem in elements:
-            bbox = elem.data.get("bbox")
-            if (bbox is not None) and validBbox(bbox):
-                xmin = min(xmin, bbox[0])
-                xmax = max(xmax, bbox[2])
+        valid = boxes.within_unit_square()
+        if np.any(valid):
+            xmin = min(xmin, boxes.left[valid].min())
+            xmax = max(xmax, boxes.right[valid].max())
         if xmin < xmax:
             fullWidth = (xmax - xmin) * 0.8  # fudge
         else:
             fullWidth = 0.8
 
         # tag elements by column
-        for elem in elements:
-            if elem.data.get("_colIdx") is None:
-                row = getRow(elem, elements)
+        colIdx = [elem.data.get("_colIdx") for elem in elements]
+        colCnt = [elem.data.get("_colCnt") for elem in elements]
+        rows = getRows(boxes)
+        widths = boxes.width.tolist()
+        lefts = boxes.left.tolist()
+        rights = boxes.right.tolist()
+        for i, row in enumerate(rows):
+            if colIdx[i] is None:
                 if len(row) == 1:
-                    bbox = elem.data.get("bbox")
-                    if bbox is None:
-                        width = 0.0
-                    else:
-                        width = bbox[2] - bbox[0]
-                    if width > fullWidth:
+                    if widths[i] > fullWidth:
                         cnt = 0  # signal full-width
                     else:
                         cnt = 1
-                    elem.data["_colIdx"] = 0
-                    elem.data["_colCnt"] = cnt
+                    colIdx[i] = 0
+                    colCnt[i] = cnt
                 else:
                     idx = -1
                     last = 0.0
-                    for ee in row:
-                        bbox = ee.data["bbox"]
-                        if bbox[0] >= last:  # may be stacked vertically
+                    for j in row:
+                        if lefts[j] >= last:  # may be stacked vertically
                             idx += 1
-                        last = bbox[2]
-                        if ee.data.get("_colIdx") is None:
-                            ee.data["_colIdx"] = idx
-                    for ee in row:
-                        if ee.data.get("_colCnt") is None:
-                            ee.data["_colCnt"] = idx + 1
+                        last = rights[j]
+                        if colIdx[j] is None:
+                            colIdx[j] = idx
+                    for j in row:
+                        if colCnt[j] is None:
+                            colCnt[j] = idx + 1
+        for elem, ci, cc in zip(elements, colIdx, colCnt):
+            if ci is not None:
+                elem.data["_colIdx"] = ci
+            if cc is not None:
+                elem.data["_colCnt"] = cc
+        cnts = np.array(colCnt)
 
         # re-sort ranges of two-column text
-        last = 0
-        ranges = []
-        for idx, elem in enumerate(elements):
-            if not partOfTwoCol(elem, xmin, xmax):
-                if (idx - last) > 4:
-                    ranges.append((last + 1, idx))
-                last = idx
-        for xx, yy in ranges:
-            elements[xx:yy] = sorted(elements[xx:yy], key=getBboxLeftTop)
+        order = np.arange(len(elements))
+        breaks = np.flatnonzero(~partOfTwoCol(boxes, cnts, xmin, xmax))
+        lasts = np.concatenate(([0], breaks[:-1]))
+        for last, idx in zip(lasts.tolist(), breaks.tolist()):
+            if (idx - last) > 4:
+                order[last + 1 : idx] = order[last + 1 : idx][boxes.take(order[last + 1 : idx]).order_by_left_top()]
+        elements[:] = [elements[i] for i in order]
+        cnts = cnts[order]
 
         # mark breaks due to column transitions
-        lastCols = 0
-        for elem in elements:
-            ecols = elem.data["_colCnt"]
-            if ecols != lastCols:
-                if ecols == 0:
-                    elem.data["_break"] = True
-                lastCols = ecols
+        lastCols = np.concatenate(([0], cnts[:-1]))
+        for idx in np.flatnonzero((cnts == 0) & (lastCols != 0)):
+            elements[idx].data["_break"] = True
 
         return parent
@@ -1,4 +1,4 @@
-from typing import TYPE_CHECKING
+from typing import Any, TYPE_CHECKING
 from sycamore.plan_nodes import Scan
 
 if TYPE_CHECKING:
@@ -17,5 +17,24 @@ class DatasetScan(Scan):
     def execute(self, **kwargs) -> "Dataset":
         return self._dataset
 
+    def fingerprint_state(self) -> dict[str, Any]:
+        import hashlib
+        import pyarrow as pa
+        from ray.data.dataset import MaterializedDataset
+
+        # Object ids are reused and differ between runs, and the plan of a lazy dataset does not capture
+        # the functions it applies or the data it reads, so only materialized datasets are fingerprinted,
+        # by their content.
+        if not isinstance(self._dataset, MaterializedDataset):
+            raise ValueError("Only materialized datasets can be fingerprinted")
+
+        h = hashlib.sha256()
+        for table in self._dataset.iter_batches(batch_format="pyarrow", batch_size=None):
+            sink = pa.BufferOutputStream()
+            with pa.ipc.new_stream(sink, table.schema) as writer:
+                writer.write_table(table)
+            h.update(sink.getvalue())
+        return {"content": h.hexdigest()}
+
     def format(self):
         return "dataset"
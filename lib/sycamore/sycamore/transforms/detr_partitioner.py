@@ -24,7 +24,7 @@ from sycamore.data.element import create_element
 from sycamore.transforms.table_structure.extract import DEFAULT_TABLE_STRUCTURE_EXTRACTOR
 from sycamore.utils import choose_device
 from sycamore.utils.bbox_sort import bbox_sort_page
-from sycamore.utils.cache import Cache
+from sycamore.utils.cache import LAYOUT_NAMESPACE, Cache
 from sycamore.utils.image_utils import crop_to_bbox, image_to_bytes
 from sycamore.utils.import_utils import requires_modules
 from sycamore.utils.markdown import elements_to_markdown
@@ -692,6 +692,11 @@ class DeformableDetr(SycamoreObjectDetection):
             results = self._get_cached_inference(images, threshold)
         else:
             results = self._get_uncached_inference(images, threshold)
+            if self.cache:
+                self.cache.set_many(
+                    ((self._get_hash_key(image, threshold), result) for image, result in zip(images, results)),
+                    namespace=LAYOUT_NAMESPACE,
+                )
 
         batched_results = []
         for result, image in zip(results, images):
@@ -708,36 +713,26 @@ class DeformableDetr(SycamoreObjectDetection):
                 )
                 elements.append(element)
             batched_results.append(elements)
-            if self.cache:
-                hash_key = self._get_hash_key(image, threshold)
-                self.cache.set(hash_key, result)
 
         return batched_results
 
     def _get_cached_inference(self, images: list[Image.Image], threshold: float) -> list:
-        results = []
-        uncached_images = []
-        uncached_indices = []
-
-        # First, check the cache for each image
-        for index, image in enumerate(images):
-            key = self._get_hash_key(image, threshold)
-            assert self.cache is not None
-            cached_layout = self.cache.get(key)
-            if cached_layout:
-                logger.info(f"Cache Hit for ImageToJson. Cache hit-rate is {self.cache.get_hit_rate()}")
-                results.append(cached_layout)
-            else:
-                uncached_images.append(image)
-                uncached_indices.append(index)
-                results.append(None)  # Placeholder for uncached image
+        assert self.cache is not None
+        keys = [self._get_hash_key(image, threshold) for image in images]
+
+        # First, check the cache for all the images at once
+        results = self.cache.get_many(keys)
+        uncached_indices = [index for index, cached_layout in enumerate(results) if not cached_layout]
+        if len(uncached_indices) < len(images):
+            logger.info(f"Cache Hit for ImageToJson. Cache hit-rate is {self.cache.get_hit_rate()}")
 
         # Process the uncached images in a batch
-        if uncached_images:
-            processed_images = self._get_uncached_inference(uncached_images, threshold)
+        if uncached_indices:
+            processed_images = self._get_uncached_inference([images[i] for i in uncached_indices], threshold)
             # Store processed images in the cache and update the result list
             for index, processed_img in zip(uncached_indices, processed_images):
                 results[index] = processed_img
+            self.cache.set_many(((keys[i], results[i]) for i in uncached_indices), namespace=LAYOUT_NAMESPACE)
         return results
 
     def _get_uncached_inference(self, images: list[Image.Image], threshold: float) -> list:
@@ -12,11 +12,13 @@ from sycamore.llms import OpenAIClientParameters
 from sycamore.utils import choose_device
 
 # from sycamore.llms.llms import AzureOpenAI, OpenAIClientParameters
-from sycamore.llms.openai import OpenAIClientWrapper
+from sycamore.llms.openai import OpenAIClientWrapper, openai_throttle_headers
 from sycamore.plan_nodes import Node
 from sycamore.transforms.map import MapBatch
 from sycamore.utils import batched
 from sycamore.utils.import_utils import requires_modules
+from sycamore.utils.profiler import count_event
+from sycamore.utils.rate_limit import RateLimiter, estimate_tokens
 from sycamore.utils.time_trace import timetrace
 
 logger = logging.getLogger(__name__)
@@ -106,6 +108,7 @@ class SentenceTransformerEmbedder(Embedder):
         text_batch = [self.pre_process_document(doc) for doc in doc_batch if doc.text_representation is not None]
         if len(text_batch) == 0:
             return doc_batch
+        count_event("embed_calls")
         embeddings = self._transformer.encode(text_batch, batch_size=self.model_batch_size, device=self.device)
         i = 0
         for doc in doc_batch:
@@ -123,6 +126,7 @@ class SentenceTransformerEmbedder(Embedder):
 
         assert self._transformer is not None
 
+        count_event("embed_calls")
         return self._transformer.encode(text).tolist()
 
 
@@ -137,6 +141,8 @@ class OpenAIEmbedder(Embedder):
         model_name: The name of the OpenAI embedding model to use.
         batch_size: The Ray batch size.
         model_batch_size: The number of documents to send in a single OpenAI request.
+        rate_limiter: Shares the request and token limits of the account between all workers. See
+            :class:`~sycamore.utils.rate_limit.RateLimiter`.
     """
 
     def __init__(
@@ -148,6 +154,7 @@ class OpenAIEmbedder(Embedder):
         api_key: Optional[str] = None,
         client_wrapper: Optional[OpenAIClientWrapper] = None,
         params: Optional[OpenAIClientParameters] = None,
+        rate_limiter: Optional[RateLimiter] = None,
         **kwargs
     ):
         if isinstance(model_name, OpenAIEmbeddingModels):
@@ -172,6 +179,7 @@ class OpenAIEmbedder(Embedder):
         self.client_wrapper = client_wrapper
         self._client: Optional[OpenAIClient] = None
         self.model_name = model_name
+        self.rate_limiter = rate_limiter
 
     def generate_embeddings(self, doc_batch: list[Document]) -> list[Document]:
         # TODO: Add some input validation here.
@@ -191,7 +199,8 @@ class OpenAIEmbedder(Embedder):
                 if doc.text_representation is not None
             ]
 
-            embeddings = self._client.embeddings.create(model=self.model_name, input=text_to_embed).data
+            count_event("embed_calls")
+            embeddings = self._create_embeddings(text_to_embed).data
 
             i = 0
             for doc in batch:
@@ -209,15 +218,38 @@ class OpenAIEmbedder(Embedder):
             logger.warn("The maximum batch size for emeddings on Azure Open AI is 16.")
             self.model_batch_size = 16
 
-        embedding = self._client.embeddings.create(model=self.model_name, input=text).data[0].embedding
+        count_event("embed_calls")
+        embedding = self._create_embeddings(text).data[0].embedding
 
         return embedding
 
+    def _create_embeddings(self, text: Union[str, list[str]]) -> Any:
+        assert self._client is not None
+        if self.rate_limiter is None:
+            return self._client.embeddings.create(model=self.model_name, input=text)
+
+        limiter = self.rate_limiter
+        create = self._client.with_options(max_retries=0).embeddings.with_raw_response.create
+        tokens = sum(estimate_tokens(t) for t in ([text] if isinstance(text, str) else text))
+        raw = limiter.call(lambda: create(model=self.model_name, input=text), tokens, openai_throttle_headers)
+        limiter.observe(raw.headers)
+        response = raw.parse()
+        limiter.add_tokens(tokens - response.usage.total_tokens)
+        return response
+
 
 class BedrockEmbeddingModels(Enum):
     TITAN_EMBED_TEXT_V1 = "amazon.titan-embed-text-v1"
 
 
+def _bedrock_throttle_headers(e: Exception) -> Optional[dict[str, str]]:
+    from botocore.exceptions import ClientError
+
+    if isinstance(e, ClientError) and e.response.get("Error", {}).get("Code") == "ThrottlingException":
+        return e.response.get("ResponseMetadata", {}).get("HTTPHeaders", {})
+    return None
+
+
 class BedrockEmbedder(Embedder):
     """Embedder implementation using Amazon Bedrock.
 
@@ -228,6 +260,8 @@ class BedrockEmbedder(Embedder):
         boto_session_args: Arg parameters to pass to the boto3.session.Session constructor.
             These will be used to create a boto3 session on each executor.
         boto_session_kwargs: Keyword arg parameters pass to the boto3.session.Session constructor.
+        rate_limiter: Shares the request and token limits of the account between all workers. See
+            :class:`~sycamore.utils.rate_limit.RateLimiter`.
 
     Example:
          .. code-block:: python
@@ -243,6 +277,7 @@ class BedrockEmbedder(Embedder):
         pre_process_document: Optional[Callable[[Document], str]] = None,
         boto_session_args: list[Any] = [],
         boto_session_kwargs: dict[str, Any] = {},
+        rate_limiter: Optional[RateLimiter] = None,
     ):
         # Bedrock embedding curently doesn't support batching
         super().__init__(
@@ -254,22 +289,42 @@ class BedrockEmbedder(Embedder):
         )
         self.boto_session_args = boto_session_args
         self.boto_session_kwargs = boto_session_kwargs
+        self.rate_limiter = rate_limiter
 
     def _generate_embedding(self, client, text: str) -> list[float]:
-        response = client.invoke_model(
-            body=json.dumps({"inputText": text.replace("\n", " ")}),
-            modelId=self.model_name,
-            accept="application/json",
-            contentType="application/json",
-        )
+        count_event("embed_calls")
+        text = text.replace("\n", " ")
+
+        def invoke():
+            return client.invoke_model(
+                body=json.dumps({"inputText": text}),
+                modelId=self.model_name,
+                accept="application/json",
+                contentType="application/json",
+            )
+
+        if self.rate_limiter is None:
+            response = invoke()
+        else:
+            tokens = estimate_tokens(text)
+            response = self.rate_limiter.call(invoke, tokens, _bedrock_throttle_headers)
         body_dict = json.loads(response.get("body").read())
+        if self.rate_limiter is not None and "inputTextTokenCount" in body_dict:
+            self.rate_limiter.add_tokens(tokens - body_dict["inputTextTokenCount"])
         return body_dict["embedding"]
 
-    def generate_embeddings(self, doc_batch: list[Document]) -> list[Document]:
+    def _client(self):
         import boto3
+        from botocore.config import Config
 
         boto3.session.Session(*self.boto_session_args, **self.boto_session_kwargs)
-        client = boto3.client("bedrock-runtime")
+        if self.rate_limiter is None:
+            return boto3.client("bedrock-runtime")
+        # The limiter retries throttled requests itself, after pausing every worker.
+        return boto3.client("bedrock-runtime", config=Config(retries={"total_max_attempts": 1}))
+
+    def generate_embeddings(self, doc_batch: list[Document]) -> list[Document]:
+        client = self._client()
 
         for doc in doc_batch:
             if doc.text_representation is not None:
@@ -277,12 +332,7 @@ class BedrockEmbedder(Embedder):
         return doc_batch
 
     def generate_text_embedding(self, text: str) -> list[float]:
-        import boto3
-
-        boto3.session.Session(*self.boto_session_args, **self.boto_session_kwargs)
-        client = boto3.client("bedrock-runtime")
-
-        return self._generate_embedding(client, text)
+        return self._generate_embedding(self._client(), text)
 
 
 class Embed(MapBatch):
@@ -1,8 +1,10 @@
 from abc import ABC, abstractmethod
+import asyncio
 from typing import Callable, Any, Optional, Union
 
 from sycamore.context import Context, context_params, OperationTypes
 from sycamore.data import Element, Document
+from sycamore.functions.element_packer import ElementPacker, PROMPT_TOKENS_PROPERTY
 from sycamore.llms import LLM
 from sycamore.llms.prompts import (
     EntityExtractorZeroShotGuidancePrompt,
@@ -10,13 +12,15 @@ from sycamore.llms.prompts import (
 )
 from sycamore.plan_nodes import Node
 from sycamore.transforms.map import Map
+from sycamore.utils.nested import FieldPath
 from sycamore.utils.time_trace import timetrace
 
 
 def element_list_formatter(elements: list[Element], field: str = "text_representation") -> str:
+    path = FieldPath.of(field)
     query = ""
     for i in range(len(elements)):
-        value = str(elements[i].field_to_value(field))
+        value = str(path.lookup(elements[i]))
         query += f"ELEMENT {i + 1}: {value}\n"
     return query
 
@@ -31,6 +35,13 @@ class EntityExtractor(ABC):
     ) -> Document:
         pass
 
+    async def extract_entity_async(
+        self, document: Document, context: Optional[Context] = None, llm: Optional[LLM] = None
+    ) -> Document:
+        """Like extract_entity, but lets other documents be processed while waiting for the LLM. By default
+        extract_entity is run in a separate thread."""
+        return await asyncio.to_thread(self.extract_entity, document, context, llm)
+
 
 class OpenAIEntityExtractor(EntityExtractor):
     """
@@ -46,6 +57,9 @@ class OpenAIEntityExtractor(EntityExtractor):
         prompt_template: A template for constructing prompts for few-shot prompting. Default is None.
         num_of_elements: The number of elements to consider for entity extraction. Default is 10.
         prompt_formatter: A callable function to format prompts based on document elements.
+        element_packer: If set, the elements are chosen to fill the token budget of this packer instead of
+            taking the first num_of_elements. The tokens they use are recorded in the
+            "_prompt_element_tokens" property of the document.
 
     Example:
         .. code-block:: python
@@ -73,6 +87,7 @@ class OpenAIEntityExtractor(EntityExtractor):
         use_elements: Optional[bool] = True,
         prompt: Optional[Union[list[dict], str]] = None,
         field: str = "text_representation",
+        element_packer: Optional[ElementPacker] = None,
     ):
         super().__init__(entity_name)
         self._llm = llm
@@ -82,6 +97,7 @@ class OpenAIEntityExtractor(EntityExtractor):
         self._use_elements = use_elements
         self._prompt = prompt
         self._field = field
+        self._element_packer = element_packer
 
     @context_params(OperationTypes.INFORMATION_EXTRACTOR)
     @timetrace("OaExtract")
@@ -89,20 +105,38 @@ class OpenAIEntityExtractor(EntityExtractor):
         self, document: Document, context: Optional[Context] = None, llm: Optional[LLM] = None
     ) -> Document:
         self._llm = llm or self._llm
-        if self._use_elements:
-            entities = self._handle_element_prompting(document)
-        else:
-            if self._prompt is None:
-                raise Exception("prompt must be specified if use_elements is False")
-            entities = self._handle_document_field_prompting(document)
-
+        assert self._llm is not None
+        entities = self._llm.generate(**self._generate_kwargs(document))
         document.properties.update({f"{self._entity_name}": entities})
 
         return document
 
-    def _handle_element_prompting(self, document: Document) -> Any:
+    @context_params(OperationTypes.INFORMATION_EXTRACTOR)
+    @timetrace("OaExtract")
+    async def extract_entity_async(
+        self, document: Document, context: Optional[Context] = None, llm: Optional[LLM] = None
+    ) -> Document:
+        self._llm = llm or self._llm
         assert self._llm is not None
-        sub_elements = [document.elements[i] for i in range((min(self._num_of_elements, len(document.elements))))]
+        entities = await self._llm.generate_async(**self._generate_kwargs(document))
+        document.properties.update({f"{self._entity_name}": entities})
+
+        return document
+
+    def _generate_kwargs(self, document: Document) -> dict[str, Any]:
+        if self._use_elements:
+            return self._handle_element_prompting(document)
+        else:
+            if self._prompt is None:
+                raise Exception("prompt must be specified if use_elements is False")
+            return self._handle_document_field_prompting(document)
+
+    def _handle_element_prompting(self, document: Document) -> dict[str, Any]:
+        if self._element_packer is not None:
+            sub_elements, tokens = self._element_packer.pack(document, self._field)
+            document.properties[PROMPT_TOKENS_PROPERTY] = tokens
+        else:
+            sub_elements = document.elements[: self._num_of_elements]
         content = self._prompt_formatter(sub_elements, self._field)
         if self._prompt is None:
             prompt: Any = None
@@ -110,20 +144,18 @@ class OpenAIEntityExtractor(EntityExtractor):
                 prompt = EntityExtractorFewShotGuidancePrompt()
             else:
                 prompt = EntityExtractorZeroShotGuidancePrompt()
-            entities = self._llm.generate(
-                prompt_kwargs={
+            return {
+                "prompt_kwargs": {
                     "prompt": prompt,
                     "entity": self._entity_name,
                     "query": content,
                     "examples": self._prompt_template,
                 }
-            )
-            return entities
+            }
         else:
             return self._get_entities(content)
 
-    def _handle_document_field_prompting(self, document: Document) -> Any:
-        assert self._llm is not None
+    def _handle_document_field_prompting(self, document: Document) -> dict[str, Any]:
         if self._field is None:
             self._field = "text_representation"
 
@@ -131,17 +163,15 @@ class OpenAIEntityExtractor(EntityExtractor):
 
         return self._get_entities(value)
 
-    def _get_entities(self, content: str, prompt: Optional[Union[list[dict], str]] = None):
-        assert self._llm is not None
+    def _get_entities(self, content: str, prompt: Optional[Union[list[dict], str]] = None) -> dict[str, Any]:
         prompt = prompt or self._prompt
         assert prompt is not None, "No prompt found for entity extraction"
         if isinstance(self._prompt, str):
             prompt = self._prompt + content
-            response = self._llm.generate(prompt_kwargs={"prompt": prompt}, llm_kwargs={})
+            return {"prompt_kwargs": {"prompt": prompt}, "llm_kwargs": {}}
         else:
             messages = (self._prompt or []) + [{"role": "user", "content": content}]
-            response = self._llm.generate(prompt_kwargs={"messages": messages}, llm_kwargs={})
-        return response
+            return {"prompt_kwargs": {"messages": messages}, "llm_kwargs": {}}
 
 
 class ExtractEntity(Map):
@@ -155,6 +185,8 @@ class ExtractEntity(Map):
         child: The source node or component that provides the dataset containing text data.
         entity_extractor: An instance of an EntityExtractor class that defines the entity extraction method to be
         applied.
+        max_concurrency: If set, the documents are extracted with extract_entity_async, with up to this many
+            LLM calls in flight at a time in each worker, instead of one after another.
         resource_args: Additional resource-related arguments that can be passed to the extraction operation.
 
     Example:
@@ -172,6 +204,8 @@ class ExtractEntity(Map):
         child: Node,
         entity_extractor: EntityExtractor,
         context: Optional[Context] = None,
+        max_concurrency: Optional[int] = None,
         **resource_args,
     ):
-        super().__init__(child, f=entity_extractor.extract_entity, kwargs={"context": context}, **resource_args)
+        f = entity_extractor.extract_entity if max_concurrency is None else entity_extractor.extract_entity_async
+        super().__init__(child, f=f, kwargs={"context": context}, max_concurrency=max_concurrency, **resource_args)
@@ -1,8 +1,10 @@
 from abc import ABC, abstractmethod
+import asyncio
 from typing import Callable, Any, Optional
 import json
 
 from sycamore.data import Element, Document
+from sycamore.functions.element_packer import ElementPacker, PROMPT_TOKENS_PROPERTY
 from sycamore.llms import LLM
 from sycamore.llms.prompts import (
     SchemaZeroShotGuidancePrompt,
@@ -21,6 +23,14 @@ def element_list_formatter(elements: list[Element]) -> str:
     return query
 
 
+def _prompt_elements(document: Document, num_of_elements: int, packer: Optional[ElementPacker]) -> list[Element]:
+    if packer is not None:
+        elements, tokens = packer.pack(document)
+        document.properties[PROMPT_TOKENS_PROPERTY] = tokens
+        return elements
+    return document.elements[:num_of_elements]
+
+
 class SchemaExtractor(ABC):
     def __init__(self, entity_name: str):
         self._entity_name = entity_name
@@ -29,6 +39,11 @@ class SchemaExtractor(ABC):
     def extract_schema(self, document: Document) -> Document:
         pass
 
+    async def extract_schema_async(self, document: Document) -> Document:
+        """Like extract_schema, but lets other documents be processed while waiting for the LLM. By default
+        extract_schema is run in a separate thread."""
+        return await asyncio.to_thread(self.extract_schema, document)
+
 
 class PropertyExtractor(ABC):
     def __init__(
@@ -41,6 +56,11 @@ class PropertyExtractor(ABC):
     def extract_properties(self, document: Document) -> Document:
         pass
 
+    async def extract_properties_async(self, document: Document) -> Document:
+        """Like extract_properties, but lets other documents be processed while waiting for the LLM. By
+        default extract_properties is run in a separate thread."""
+        return await asyncio.to_thread(self.extract_properties, document)
+
 
 class OpenAISchemaExtractor(SchemaExtractor):
     """
@@ -52,6 +72,9 @@ class OpenAISchemaExtractor(SchemaExtractor):
         llm: An instance of an OpenAI language model for text processing.
         num_of_elements: The number of elements to consider for schema extraction. Default is 10.
         prompt_formatter: A callable function to format prompts based on document elements.
+        element_packer: If set, the elements are chosen to fill the token budget of this packer instead of
+            taking the first num_of_elements. The tokens they use are recorded in the
+            "_prompt_element_tokens" property of the document.
 
     Example:
         .. code-block:: python
@@ -72,17 +95,25 @@ class OpenAISchemaExtractor(SchemaExtractor):
         num_of_elements: int = 35,
         max_num_properties: int = 7,
         prompt_formatter: Callable[[list[Element]], str] = element_list_formatter,
+        element_packer: Optional[ElementPacker] = None,
     ):
         super().__init__(entity_name)
         self._llm = llm
         self._num_of_elements = num_of_elements
         self._prompt_formatter = prompt_formatter
+        self._element_packer = element_packer
         self._max_num_properties = max_num_properties
 
     @timetrace("ExtrSchema")
     def extract_schema(self, document: Document) -> Document:
-        entities = self._handle_zero_shot_prompting(document)
+        entities = self._llm.generate(prompt_kwargs=self._zero_shot_prompt_kwargs(document))
+        return self._set_schema(document, entities)
+
+    async def extract_schema_async(self, document: Document) -> Document:
+        entities = await self._llm.generate_async(prompt_kwargs=self._zero_shot_prompt_kwargs(document))
+        return self._set_schema(document, entities)
 
+    def _set_schema(self, document: Document, entities: Any) -> Document:
         try:
             payload = entities
             answer = extract_json(payload)
@@ -93,21 +124,17 @@ class OpenAISchemaExtractor(SchemaExtractor):
 
         return document
 
-    def _handle_zero_shot_prompting(self, document: Document) -> Any:
-        sub_elements = [document.elements[i] for i in range((min(self._num_of_elements, len(document.elements))))]
+    def _zero_shot_prompt_kwargs(self, document: Document) -> dict[str, Any]:
+        sub_elements = _prompt_elements(document, self._num_of_elements, self._element_packer)
 
         prompt = SchemaZeroShotGuidancePrompt()
 
-        entities = self._llm.generate(
-            prompt_kwargs={
-                "prompt": prompt,
-                "entity": self._entity_name,
-                "max_num_properties": self._max_num_properties,
-                "query": self._prompt_formatter(sub_elements),
-            }
-        )
-
-        return entities
+        return {
+            "prompt": prompt,
+            "entity": self._entity_name,
+            "max_num_properties": self._max_num_properties,
+            "query": self._prompt_formatter(sub_elements),
+        }
 
 
 class OpenAIPropertyExtractor(PropertyExtractor):
@@ -119,6 +146,9 @@ class OpenAIPropertyExtractor(PropertyExtractor):
         llm: An instance of an OpenAI language model for text processing.
         num_of_elements: The number of elements to consider for property extraction. Default is 10.
         prompt_formatter: A callable function to format prompts based on document elements.
+        element_packer: If set, the elements are chosen to fill the token budget of this packer instead of
+            taking the first num_of_elements. The tokens they use are recorded in the
+            "_prompt_element_tokens" property of the document.
 
     Example:
         .. code-block:: python
@@ -138,6 +168,7 @@ class OpenAIPropertyExtractor(PropertyExtractor):
         schema: Optional[dict[str, str]] = None,
         num_of_elements: int = 10,
         prompt_formatter: Callable[[list[Element]], str] = element_list_formatter,
+        element_packer: Optional[ElementPacker] = None,
     ):
         super().__init__()
         self._llm = llm
@@ -145,11 +176,18 @@ class OpenAIPropertyExtractor(PropertyExtractor):
         self._schema = schema
         self._num_of_elements = num_of_elements
         self._prompt_formatter = prompt_formatter
+        self._element_packer = element_packer
 
     @timetrace("ExtrProps")
     def extract_properties(self, document: Document) -> Document:
-        entities = self._handle_zero_shot_prompting(document)
+        entities = self._llm.generate(prompt_kwargs=self._zero_shot_prompt_kwargs(document))
+        return self._set_properties(document, entities)
 
+    async def extract_properties_async(self, document: Document) -> Document:
+        entities = await self._llm.generate_async(prompt_kwargs=self._zero_shot_prompt_kwargs(document))
+        return self._set_properties(document, entities)
+
+    def _set_properties(self, document: Document, entities: Any) -> Document:
         try:
             payload = entities
             answer = extract_json(payload)
@@ -163,13 +201,11 @@ class OpenAIPropertyExtractor(PropertyExtractor):
 
         return document
 
-    def _handle_zero_shot_prompting(self, document: Document) -> Any:
+    def _zero_shot_prompt_kwargs(self, document: Document) -> dict[str, Any]:
         if document.text_representation:
             text = document.text_representation
         else:
-            text = self._prompt_formatter(
-                [document.elements[i] for i in range((min(self._num_of_elements, len(document.elements))))]
-            )
+            text = self._prompt_formatter(_prompt_elements(document, self._num_of_elements, self._element_packer))
 
         prompt = PropertiesZeroShotGuidancePrompt()
 
@@ -183,10 +219,7 @@ class OpenAIPropertyExtractor(PropertyExtractor):
         else:
             schema = document.properties["_schema"]
 
-        entities = self._llm.generate(
-            prompt_kwargs={"prompt": prompt, "entity": schema_name, "properties": schema, "query": text}
-        )
-        return entities
+        return {"prompt": prompt, "entity": schema_name, "properties": schema, "query": text}
 
 
 class ExtractSchema(Map):
@@ -203,6 +236,8 @@ class ExtractSchema(Map):
     Args:
         child: The source node or component that provides the dataset text for schema suggestion
         schema_extractor: An instance of an SchemaExtractor class that provides the schema extraction method
+        max_concurrency: If set, the schemas are extracted with extract_schema_async, with up to this many
+            LLM calls in flight at a time in each worker, instead of one after another.
         resource_args: Additional resource-related arguments that can be passed to the extraction operation
 
     Example:
@@ -215,8 +250,15 @@ class ExtractSchema(Map):
             documents_with_schema = documents_with_schema.execute()
     """
 
-    def __init__(self, child: Node, schema_extractor: SchemaExtractor, **resource_args):
-        super().__init__(child, f=schema_extractor.extract_schema, **resource_args)
+    def __init__(
+        self,
+        child: Node,
+        schema_extractor: SchemaExtractor,
+        max_concurrency: Optional[int] = None,
+        **resource_args,
+    ):
+        f = schema_extractor.extract_schema if max_concurrency is None else schema_extractor.extract_schema_async
+        super().__init__(child, f=f, max_concurrency=max_concurrency, **resource_args)
 
 
 class ExtractBatchSchema(Map):
@@ -276,6 +318,8 @@ class ExtractProperties(Map):
     Args:
         child: The source node or component that provides the dataset text for schema suggestion
         property_extractor: An instance of an PropertyExtractor class that provides the property detection method
+        max_concurrency: If set, the properties are extracted with extract_properties_async, with up to this
+            many LLM calls in flight at a time in each worker, instead of one after another.
         resource_args: Additional resource-related arguments that can be passed to the extraction operation
 
     Example:
@@ -292,5 +336,16 @@ class ExtractProperties(Map):
             documents_with_properties = documents_with_properties.execute()
     """
 
-    def __init__(self, child: Node, property_extractor: PropertyExtractor, **resource_args):
-        super().__init__(child, f=property_extractor.extract_properties, **resource_args)
+    def __init__(
+        self,
+        child: Node,
+        property_extractor: PropertyExtractor,
+        max_concurrency: Optional[int] = None,
+        **resource_args,
+    ):
+        f = (
+            property_extractor.extract_properties
+            if max_concurrency is None
+            else property_extractor.extract_properties_async
+        )
+        super().__init__(child, f=f, max_concurrency=max_concurrency, **resource_args)
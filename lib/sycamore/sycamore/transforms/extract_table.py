@@ -219,7 +219,7 @@ class CachedTextractTableExtractor(TextractTableExtractor):
                 raise RuntimeError("Missing textract upload path")
 
             # Clip the pages which have tables into a new tmp pdf and upload for textract
-            binary = io.BytesIO(document.data["binary_representation"])
+            binary = io.BytesIO(document.binary_representation or b"")
             pdf_reader = pypdf.PdfReader(binary)
             pdf_writer = pypdf.PdfWriter()
             for page_number in document_page_mapping:
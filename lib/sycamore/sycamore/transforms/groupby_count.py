@@ -3,6 +3,7 @@ from sycamore.data.document import Document
 from sycamore.plan_nodes import Node, Transform
 
 if TYPE_CHECKING:
+    import pyarrow as pa
     from ray.data import Dataset
 
 
@@ -20,10 +21,10 @@ class GroupByCount(Transform):
         # creates dataset
         ds = self.child().execute(**kwargs)
 
-        # adds a "key" column containing desired field
+        # replaces each block with "key" (and "unique") columns containing the desired fields. The
+        # documents themselves are not needed for the aggregation, so they are left out of the shuffle.
         map_fn = self.make_map_fn_count(self._field, self._unique_field)
-        ds = ds.map(map_fn)
-        ds = ds.filter(lambda row: self.filterOutNone(row))
+        ds = ds.map_batches(map_fn, batch_format="pyarrow")
         # lazy grouping + count aggregation
 
         if self._unique_field is not None:
@@ -36,43 +37,32 @@ class GroupByCount(Transform):
 
         return ds
 
-    def make_map_fn_count(
-        self, field: str, unique_field: Optional[str] = None
-    ) -> Callable[[dict[str, Any]], dict[str, Any]]:
+    def make_map_fn_count(self, field: str, unique_field: Optional[str] = None) -> Callable[["pa.Table"], "pa.Table"]:
         """
-        Creates a map function that can be called on a Ray Dataset
-        based on a DocSet. Adds a column to the Dataset based on
-        field and unique_field in DocSet documents.
+        Creates a map_batches function that can be called on a Ray Dataset
+        based on a DocSet. Replaces each block with a "key" column based on
+        field and, if given, a "unique" column based on unique_field.
+        Documents missing either field are dropped.
 
         Args:
             field: Document field to add as a column.
             unique_field: Unique document field to as a column.
 
         Returns:
-            Function that can be called inside of DocSet.filter
+            Function that can be called with a pyarrow batch of documents.
         """
 
-        def ray_callable(input_dict: dict[str, Any]) -> dict[str, Any]:
-            doc = Document.from_row(input_dict)
-            key_val = doc.field_to_value(field)
+        def ray_callable(batch: "pa.Table") -> "pa.Table":
+            import pyarrow as pa
+            from sycamore.data.columnar import field_values
 
-            if key_val is None:
-                return (
-                    {"doc": None, "key": None, "unique": None}
-                    if unique_field is not None
-                    else {"doc": None, "key": None}
-                )
+            keys = field_values(batch, field)
+            if unique_field is None:
+                return pa.table({"key": [k for k in keys if k is not None]})
 
-            new_doc = doc.to_row()
-            new_doc["key"] = key_val
-
-            if unique_field is not None:
-                unique_val = doc.field_to_value(unique_field)
-                if unique_val is None:
-                    return {"doc": None, "key": None, "unique": None}
-                new_doc["unique"] = unique_val
-
-            return new_doc
+            uniques = field_values(batch, unique_field)
+            pairs = [(k, u) for k, u in zip(keys, uniques) if k is not None and u is not None]
+            return pa.table({"key": [k for k, _ in pairs], "unique": [u for _, u in pairs]})
 
         return ray_callable
 
@@ -95,6 +85,9 @@ class GroupByCount(Transform):
         """
         Filters out Dataset rows where all values are None.
 
+        No longer used by execute, whose map function drops documents missing either field; kept for
+        callers of the earlier row based map function.
+
         Args:
             row: Input Dataset row.
 
@@ -1,4 +1,4 @@
-from typing import Optional, Any, Union
+from typing import Optional, Any, TypeVar, Union
 
 from sycamore.data import Element, Document
 from sycamore.plan_nodes import NonCPUUser, NonGPUUser, Node
@@ -7,6 +7,8 @@ from sycamore.transforms.map import Map
 from sycamore.utils.time_trace import timetrace
 from jinja2.sandbox import SandboxedEnvironment
 
+_Queried = TypeVar("_Queried", Document, Element)
+
 
 class LLMTextQueryAgent:
     """
@@ -59,50 +61,90 @@ class LLMTextQueryAgent:
         self._element_type = element_type
 
     def execute_query(self, document: Document) -> Document:
-        final_prompt = self._prompt
-        element_count = 0
-        if self._per_element or self._number_of_elements:
-            for idx, element in enumerate(document.elements):
-                if self._element_type and element.type != self._element_type:
-                    continue
-                if self._per_element:
-                    document.elements[idx] = self._query_text_object(element)
-                else:
-                    final_prompt += "\n" + element["text_representation"]
-                if self._number_of_elements:
-                    element_count += 1
-                    if element_count >= self._number_of_elements:
-                        break
-            if not self._per_element:
-                prompt_kwargs = {"prompt": final_prompt}
-                llm_resp = self._llm.generate(prompt_kwargs=prompt_kwargs, llm_kwargs=self._llm_kwargs)
-                document["properties"][self._output_property] = llm_resp
-        else:
+        if not (self._per_element or self._number_of_elements):
             if document.text_representation:
                 document = self._query_text_object(document)
+            return document
+
+        (indices, final_prompt) = self._selected_elements(document)
+        if self._per_element:
+            for idx in indices:
+                document.elements[idx] = self._query_text_object(document.elements[idx])
+        else:
+            prompt_kwargs = {"prompt": final_prompt}
+            llm_resp = self._llm.generate(prompt_kwargs=prompt_kwargs, llm_kwargs=self._llm_kwargs)
+            document["properties"][self._output_property] = llm_resp
         return document
 
+    async def execute_query_async(self, document: Document) -> Document:
+        """Like execute_query, but lets other documents be processed while waiting for the LLM."""
+        if not (self._per_element or self._number_of_elements):
+            if document.text_representation:
+                document = await self._query_text_object_async(document)
+            return document
+
+        (indices, final_prompt) = self._selected_elements(document)
+        if self._per_element:
+            for idx in indices:
+                document.elements[idx] = await self._query_text_object_async(document.elements[idx])
+        else:
+            prompt_kwargs = {"prompt": final_prompt}
+            llm_resp = await self._llm.generate_async(prompt_kwargs=prompt_kwargs, llm_kwargs=self._llm_kwargs)
+            document["properties"][self._output_property] = llm_resp
+        return document
+
+    def _selected_elements(self, document: Document) -> tuple[list[int], str]:
+        """Returns the indices of the elements to query one at a time, and the prompt with the text of the
+        elements to query the whole document with."""
+        indices = []
+        final_prompt = self._prompt
+        element_count = 0
+        for idx, element in enumerate(document.elements):
+            if self._element_type and element.type != self._element_type:
+                continue
+            if self._per_element:
+                indices.append(idx)
+            else:
+                final_prompt += "\n" + element["text_representation"]
+            if self._number_of_elements:
+                element_count += 1
+                if element_count >= self._number_of_elements:
+                    break
+        return (indices, final_prompt)
+
     @timetrace("LLMQueryText")
-    def _query_text_object(self, object: Union[Document, Element]) -> Union[Document, Element]:
+    def _query_text_object(self, object: _Queried) -> _Queried:
         if object.text_representation:
-            if self._format_kwargs:
-                prompt = (
-                    SandboxedEnvironment()
-                    .from_string(source=self._prompt, globals=self._format_kwargs)
-                    .render(doc=object)
-                )
-            else:
-                prompt = self._prompt + "\n" + object.text_representation
-            prompt_kwargs = {"prompt": prompt}
+            prompt_kwargs = {"prompt": self._object_prompt(object)}
             llm_resp = self._llm.generate(prompt_kwargs=prompt_kwargs, llm_kwargs=self._llm_kwargs)
             object["properties"][self._output_property] = llm_resp
         return object
 
+    @timetrace("LLMQueryText")
+    async def _query_text_object_async(self, object: _Queried) -> _Queried:
+        if object.text_representation:
+            prompt_kwargs = {"prompt": self._object_prompt(object)}
+            llm_resp = await self._llm.generate_async(prompt_kwargs=prompt_kwargs, llm_kwargs=self._llm_kwargs)
+            object["properties"][self._output_property] = llm_resp
+        return object
+
+    def _object_prompt(self, object: Union[Document, Element]) -> str:
+        if self._format_kwargs:
+            return (
+                SandboxedEnvironment().from_string(source=self._prompt, globals=self._format_kwargs).render(doc=object)
+            )
+        else:
+            return self._prompt + "\n" + (object.text_representation or "")
+
 
 class LLMQuery(NonCPUUser, NonGPUUser, Map):
     """
     The LLM Query Transform executes user defined queries on a document or the elements within it.
+
+    If max_concurrency is set, documents are queried with LLMTextQueryAgent.execute_query_async, with up to
+    max_concurrency of them in flight at a time in each worker.
     """
 
-    def __init__(self, child: Node, query_agent: LLMTextQueryAgent, **kwargs):
-        super().__init__(child, f=query_agent.execute_query, **kwargs)
+    def __init__(self, child: Node, query_agent: LLMTextQueryAgent, max_concurrency: Optional[int] = None, **kwargs):
+        f = query_agent.execute_query if max_concurrency is None else query_agent.execute_query_async
+        super().__init__(child, f=f, max_concurrency=max_concurrency, **kwargs)
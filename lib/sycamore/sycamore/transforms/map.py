@@ -1,8 +1,10 @@
+import inspect
 from typing import Any, Callable, Iterable, Optional
 
 from sycamore.data import Document
 from sycamore.plan_nodes import Node
 from sycamore.transforms.base import BaseMapTransform, get_name_from_callable
+from sycamore.utils.async_utils import DEFAULT_MAX_CONCURRENCY, map_bounded
 
 
 class Map(BaseMapTransform):
@@ -27,6 +29,10 @@ class Map(BaseMapTransform):
 
            ctx.map(ExampleClass, parallelism=num_instances)
 
+    f can also be a coroutine function (or a class whose __call__ is one), e.g. one that awaits
+    LLM.generate_async. The documents of each batch are then processed concurrently, with at most
+    max_concurrency of them in flight at a time in each worker, and are returned in their original order.
+
     Example:
          .. code-block:: python
 
@@ -38,11 +44,16 @@ class Map(BaseMapTransform):
             transformed_dataset = map_transformer.execute()
     """
 
-    def __init__(self, child: Optional[Node], *, f: Any, **kwargs):
-        super().__init__(child, f=Map.wrap(f), **{"name": get_name_from_callable(f), **kwargs})
+    def __init__(self, child: Optional[Node], *, f: Any, max_concurrency: Optional[int] = None, **kwargs):
+        super().__init__(child, f=Map.wrap(f, max_concurrency), **{"name": get_name_from_callable(f), **kwargs})
 
     @staticmethod
-    def wrap(f: Any) -> Callable[[list[Document]], list[Document]]:
+    def wrap(f: Any, max_concurrency: Optional[int] = None) -> Callable[[list[Document]], list[Document]]:
+        is_async = inspect.iscoroutinefunction(f.__call__ if isinstance(f, type) else f)
+        assert is_async or max_concurrency is None, "max_concurrency requires f to be a coroutine function"
+        if is_async:
+            return Map._wrap_async(f, max_concurrency or DEFAULT_MAX_CONCURRENCY)
+
         if isinstance(f, type):
             # mypy doesn't understand the dynamic class inheritence.
             class _Wrap(f):  # type: ignore[valid-type,misc]
@@ -67,6 +78,31 @@ class Map(BaseMapTransform):
 
             return _wrap
 
+    @staticmethod
+    def _wrap_async(f: Any, max_concurrency: int) -> Callable[[list[Document]], list[Document]]:
+        if isinstance(f, type):
+
+            class _Wrap(f):  # type: ignore[valid-type,misc]
+                def __init__(self, *args, **kwargs):
+                    super().__init__(*args, **kwargs)
+
+                def __call__(self, docs, *args, **kwargs):
+                    assert isinstance(docs, list)
+                    for d in docs:
+                        assert isinstance(d, Document)
+                    return map_bounded(super().__call__, docs, max_concurrency, *args, **kwargs)
+
+            return _Wrap
+        else:
+
+            def _wrap(docs, *args, **kwargs):
+                assert isinstance(docs, list)
+                for d in docs:
+                    assert isinstance(d, Document)
+                return map_bounded(f, docs, max_concurrency, *args, **kwargs)
+
+            return _wrap
+
     def run(self, d: Document) -> Document:
         ret = self._local_process([d])
         assert len(ret) == 1
@@ -102,7 +102,7 @@ class UnstructuredPPTXPartitioner(Partitioner):
     def partition(self, document: Document) -> Document:
         from unstructured.partition.pptx import partition_pptx
 
-        binary_file = io.BytesIO(document.data["binary_representation"])
+        binary_file = io.BytesIO(document.binary_representation or b"")
 
         elements = partition_pptx(
             file=binary_file,
@@ -209,7 +209,7 @@ class UnstructuredPdfPartitioner(Partitioner):
     def partition(self, document: Document) -> Document:
         from unstructured.partition.pdf import partition_pdf
 
-        binary = io.BytesIO(document.data["binary_representation"])
+        binary = io.BytesIO(document.binary_representation or b"")
         try:
             elements = partition_pdf(
                 file=binary,
@@ -488,7 +488,7 @@ class ArynPartitioner(Partitioner):
 
     @timetrace("SycamorePdf")
     def partition(self, document: Document) -> Document:
-        binary = io.BytesIO(document.data["binary_representation"])
+        binary = io.BytesIO(document.binary_representation or b"")
         from sycamore.transforms.detr_partitioner import ArynPDFPartitioner
 
         partitioner = ArynPDFPartitioner(self._model_name_or_path, device=self._device, cache=self._cache)
@@ -584,6 +584,7 @@ class Partition(CompositeTransform):
         self, child: Node, partitioner: Partitioner, table_extractor: Optional[TableExtractor] = None, **resource_args
     ):
         ops = []
+        error_policy = resource_args.pop("error_policy", None)
 
         if isinstance(partitioner, ArynPartitioner) and partitioner._use_partitioning_service:
             resource_args["parallelism"] = 1
@@ -604,4 +605,4 @@ class Partition(CompositeTransform):
 
         # Note: we are not applying resource args to the entire composite operation just the first step because that
         # matches with the original code. It is unclear if this is the correct behavior.
-        super().__init__(child, ops)
+        super().__init__(child, ops, error_policy=error_policy)
@@ -1,9 +1,10 @@
-from typing import Any, Optional, TYPE_CHECKING
+from typing import Any, Callable, Optional, TYPE_CHECKING
 
 from sycamore.plan_nodes import Node, Transform
 from sycamore.data import Document
 
 if TYPE_CHECKING:
+    import pyarrow as pa
     from ray.data import Dataset
 
 
@@ -22,9 +23,10 @@ class Sort(Transform):
         # creates dataset
         ds = self.child().execute(**kwargs)
 
-        # adds a "key" column containing desired field
+        # adds a "key" column containing desired field. The documents are unpickled to read the keys, but
+        # the rows are passed through rather than serialized again.
         map_fn = self.make_map_fn_sort()
-        ds = ds.map(map_fn)
+        ds = ds.map_batches(map_fn, batch_format="pyarrow")
 
         # sorts the dataset
         ds = ds.sort("key", descending=self._descending)
@@ -32,36 +34,34 @@ class Sort(Transform):
         return ds
 
     def local_execute(self, all_docs: list[Document]) -> list[Document]:
-        def get_sort_key(doc, field, default_val):
-            field_value = doc.field_to_value(field)
-            if field_value is not None:
-                return field_value
-            if default_val is None:
-                raise ValueError("default_value cannot be None")
-            return default_val
-
-        sorted_docs = sorted(
-            all_docs, key=lambda doc: get_sort_key(doc, self._field, self._default_val), reverse=self._descending
-        )
-        return sorted_docs
-
-    def make_map_fn_sort(self):
-        def ray_callable(input_dict: dict[str, Any]) -> dict[str, Any]:
-            doc = Document.from_row(input_dict)
-
-            val = doc.field_to_value(self._field)
-
-            if val is None:
+        from sycamore.data.columnar import extract_column
+
+        keys = extract_column(all_docs, self._field)
+        for i, key in enumerate(keys):
+            if key is None:
                 if self._default_val is None:
-                    exception_string = f'Field "{self._field}" not present in Document and default value not provided.'
-                    raise Exception(exception_string)
-                else:
-                    val = self._default_val
+                    raise ValueError("default_value cannot be None")
+                keys[i] = self._default_val
+
+        order = sorted(range(len(all_docs)), key=keys.__getitem__, reverse=self._descending)
+        return [all_docs[i] for i in order]
+
+    def make_map_fn_sort(self) -> Callable[["pa.Table"], "pa.Table"]:
+        field = self._field
+        default_val = self._default_val
+
+        def ray_callable(batch: "pa.Table") -> "pa.Table":
+            import pyarrow as pa
+            from sycamore.data.columnar import field_values
 
-            # updates row to include new col
-            new_doc = doc.to_row()
-            new_doc["key"] = val
+            keys = field_values(batch, field)
+            for i, val in enumerate(keys):
+                if val is None:
+                    if default_val is None:
+                        exception_string = f'Field "{field}" not present in Document and default value not provided.'
+                        raise Exception(exception_string)
+                    keys[i] = default_val
 
-            return new_doc
+            return batch.select(["doc"]).append_column("key", pa.array(keys))
 
         return ray_callable
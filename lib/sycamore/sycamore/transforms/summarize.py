@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+import asyncio
 from typing import Callable, Optional
 
 
@@ -15,6 +16,11 @@ class Summarizer(ABC):
     def summarize(self, document: Document) -> Document:
         pass
 
+    async def summarize_async(self, document: Document) -> Document:
+        """Like summarize, but lets other documents be processed while waiting for the LLM. By default
+        summarize is run in a separate thread."""
+        return await asyncio.to_thread(self.summarize, document)
+
 
 class LLMElementTextSummarizer(Summarizer):
     """
@@ -56,20 +62,41 @@ class LLMElementTextSummarizer(Summarizer):
         document.elements = elements
         return document
 
+    async def summarize_async(self, document: Document) -> Document:
+        # The elements of a document are summarized one at a time, as in summarize, so that the concurrency
+        # limit of the transform bounds the number of calls in flight.
+        elements = document.elements
+        for element in elements:
+            if self._element_operator is None or self._element_operator(element):
+                await self._summarize_text_element_async(element)
+        document.elements = elements
+        return document
+
     @timetrace("SummText")
     def _summarize_text_element(self, element: Element) -> Element:
-        prompt = TextSummarizerGuidancePrompt()
+        if element.text_representation:
+            response = self._llm.generate(prompt_kwargs=self._prompt_kwargs(element))
+            element.properties["summary"] = response
+        return element
 
+    async def _summarize_text_element_async(self, element: Element) -> Element:
         if element.text_representation:
-            response = self._llm.generate(prompt_kwargs={"prompt": prompt, "query": element.text_representation})
+            response = await self._llm.generate_async(prompt_kwargs=self._prompt_kwargs(element))
             element.properties["summary"] = response
         return element
 
+    def _prompt_kwargs(self, element: Element) -> dict:
+        return {"prompt": TextSummarizerGuidancePrompt(), "query": element.text_representation}
+
 
 class Summarize(NonCPUUser, NonGPUUser, Map):
     """
     The summarize transform generates summaries of documents or elements.
+
+    If max_concurrency is set, documents are summarized with Summarizer.summarize_async, with up to
+    max_concurrency of them in flight at a time in each worker.
     """
 
-    def __init__(self, child: Node, summarizer: Summarizer, **kwargs):
-        super().__init__(child, f=summarizer.summarize, **kwargs)
+    def __init__(self, child: Node, summarizer: Summarizer, max_concurrency: Optional[int] = None, **kwargs):
+        f = summarizer.summarize if max_concurrency is None else summarizer.summarize_async
+        super().__init__(child, f=f, max_concurrency=max_concurrency, **kwargs)
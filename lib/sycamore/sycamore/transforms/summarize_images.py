@@ -1,4 +1,4 @@
-from typing import Any, Optional
+from typing import Any, Iterator, Optional
 
 from PIL import Image
 
@@ -86,6 +86,20 @@ class OpenAIImageSummarizer:
     def summarize_image(
         self, image: Image.Image, preceding_context: Optional[str] = None, following_context: Optional[str] = None
     ):
+        prompt_kwargs = self._prompt_kwargs(image, preceding_context, following_context)
+        raw_answer = self.openai.generate(prompt_kwargs=prompt_kwargs, llm_kwargs={})
+        return extract_json(raw_answer)
+
+    async def summarize_image_async(
+        self, image: Image.Image, preceding_context: Optional[str] = None, following_context: Optional[str] = None
+    ):
+        prompt_kwargs = self._prompt_kwargs(image, preceding_context, following_context)
+        raw_answer = await self.openai.generate_async(prompt_kwargs=prompt_kwargs, llm_kwargs={})
+        return extract_json(raw_answer)
+
+    def _prompt_kwargs(
+        self, image: Image.Image, preceding_context: Optional[str], following_context: Optional[str]
+    ) -> dict[str, Any]:
         messages: list[dict[str, Any]] = [
             {"role": "user", "content": self.prompt},
         ]
@@ -100,12 +114,27 @@ class OpenAIImageSummarizer:
         if self.include_context and following_context is not None:
             messages.append({"role": "user", "content": "The text preceding the image is {}".format(following_context)})
 
-        prompt_kwargs = {"messages": messages}
-
-        raw_answer = self.openai.generate(prompt_kwargs=prompt_kwargs, llm_kwargs={})
-        return extract_json(raw_answer)
+        return {"messages": messages}
 
     def summarize_all_images(self, doc: Document) -> Document:
+        for element, image, preceding_context, following_context in self._images(doc):
+            json_summary = self.summarize_image(image, preceding_context, following_context)
+
+            element.properties["summary"] = json_summary
+            element.text_representation = json_summary["summary"]
+        return doc
+
+    async def summarize_all_images_async(self, doc: Document) -> Document:
+        for element, image, preceding_context, following_context in self._images(doc):
+            json_summary = await self.summarize_image_async(image, preceding_context, following_context)
+
+            element.properties["summary"] = json_summary
+            element.text_representation = json_summary["summary"]
+        return doc
+
+    @staticmethod
+    def _images(doc: Document) -> Iterator[tuple[ImageElement, Image.Image, Optional[str], Optional[str]]]:
+        """Yields the image elements of doc that have an image, with the image and the text around it."""
         for i, element in enumerate(doc.elements):
             if not isinstance(element, ImageElement):
                 continue
@@ -127,11 +156,7 @@ class OpenAIImageSummarizer:
             if image is None:
                 continue
 
-            json_summary = self.summarize_image(image, preceding_context, following_context)
-
-            element.properties["summary"] = json_summary
-            element.text_representation = json_summary["summary"]
-        return doc
+            yield element, image, preceding_context, following_context
 
 
 class SummarizeImages(Map):
@@ -140,6 +165,8 @@ class SummarizeImages(Map):
     Args:
        child: The source node for the transform.
        summarizer: The class to use for summarization. The default uses OpenAI gpt-4-turbo.
+       max_concurrency: If set, the images of up to this many documents are summarized at a time in each
+           worker, using summarize_all_images_async, instead of one document after another.
        resource_args: Additional resource-related arguments that can be passed to the underlying runtime.
 
     Example:
@@ -152,6 +179,9 @@ class SummarizeImages(Map):
                               .show()
     """
 
-    def __init__(self, child: Node, summarizer=OpenAIImageSummarizer(), **resource_args):
-        super().__init__(child, f=summarizer.summarize_all_images, **resource_args)
+    def __init__(
+        self, child: Node, summarizer=OpenAIImageSummarizer(), max_concurrency: Optional[int] = None, **resource_args
+    ):
+        f = summarizer.summarize_all_images if max_concurrency is None else summarizer.summarize_all_images_async
+        super().__init__(child, f=f, max_concurrency=max_concurrency, **resource_args)
         self.summarizer = summarizer
@@ -2,7 +2,7 @@ from abc import abstractmethod
 from PIL import Image
 from typing import Any, Union, TYPE_CHECKING, Optional
 from sycamore.data import BoundingBox, Element
-from sycamore.utils.cache import DiskCache
+from sycamore.utils.cache import OCR_NAMESPACE, DiskCache
 from pathlib import Path
 from io import IOBase, BytesIO
 from sycamore.utils.pdf import pdf_to_image_files
@@ -61,7 +61,7 @@ class OcrModel(TextExtractor):
                 pages.append(texts)
             if use_cache:
                 logger.info("Cache Miss for OCR. Storing the result to the cache.")
-                ocr_cache.set(hash_key, pages)
+                ocr_cache.set(hash_key, pages, namespace=OCR_NAMESPACE)
             return pages
 
 
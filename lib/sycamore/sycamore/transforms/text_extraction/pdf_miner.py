@@ -1,5 +1,5 @@
 from sycamore.data import Element, BoundingBox
-from sycamore.utils.cache import DiskCache
+from sycamore.utils.cache import PDFMINER_NAMESPACE, DiskCache
 from typing import Any, BinaryIO, Tuple, Iterable, Literal, Optional, cast, Generator, TYPE_CHECKING, Union
 from pathlib import Path
 from sycamore.utils.import_utils import requires_modules
@@ -85,7 +85,7 @@ class PdfMinerExtractor(TextExtractor):
                 pages.append(texts)
             if use_cache:
                 logger.info("Cache Miss for PDFMiner. Storing the result to the cache.")
-                pdf_miner_cache.set(hash_key, pages)
+                pdf_miner_cache.set(hash_key, pages, namespace=PDFMINER_NAMESPACE)
             return pages
 
     @timetrace("PdfMinerPageEx")
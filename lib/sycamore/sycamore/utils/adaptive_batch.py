@@ -0,0 +1,127 @@
+import copy
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Iterator, Sequence, TypeVar
+
+T = TypeVar("T")
+
+# Batch sizers for the map transforms running in this ray worker, keyed by AdaptiveBatchSize.key. Ray
+# may deserialize a map function for every task, so the state that has been learned is kept here
+# rather than in the copy of the sizer that comes with the function. Workers outlive the plans that
+# use them, so only the most recently used sizers are kept.
+MAX_PROCESS_SIZERS = 64
+_process_sizers: OrderedDict[str, "AdaptiveBatchSize"] = OrderedDict()
+_process_sizers_lock = threading.Lock()
+
+
+class AdaptiveBatchSize:
+    """
+    Chooses how many documents to pass to a map function at a time from how long previous batches
+    took and how large the documents are.
+
+    After each batch the sizer updates a moving average of the time per document and the serialized
+    size per document. The next batch holds as many documents as are expected to take
+    target_batch_seconds, limited so that the serialized documents in a batch stay under
+    max_batch_bytes. To avoid oscillating, the batch size at most doubles from one batch to the next.
+
+    Args:
+        target_batch_seconds: How long each call to the map function should take.
+        max_batch_bytes: The largest total serialized size of the documents in a batch. A single
+            document larger than this is still processed, on its own.
+        initial_batch_size: The batch size used before any batches have been timed.
+        min_batch_size: The smallest batch size to use.
+        max_batch_size: The largest batch size to use. In ray mode this is also the ray batch_size
+            unless one is given explicitly.
+        smoothing: The weight of the most recent batch in the moving averages.
+
+    Example:
+         .. code-block:: python
+
+            docset.embed(embedder, adaptive_batching=AdaptiveBatchSize(target_batch_seconds=2.0))
+    """
+
+    def __init__(
+        self,
+        *,
+        target_batch_seconds: float = 1.0,
+        max_batch_bytes: int = 64 * 1024 * 1024,
+        initial_batch_size: int = 16,
+        min_batch_size: int = 1,
+        max_batch_size: int = 1024,
+        smoothing: float = 0.3,
+    ):
+        assert target_batch_seconds > 0, "target_batch_seconds must be positive"
+        assert max_batch_bytes > 0, "max_batch_bytes must be positive"
+        assert 1 <= min_batch_size <= max_batch_size, "need 1 <= min_batch_size <= max_batch_size"
+        assert 0 < smoothing <= 1, "smoothing must be in (0, 1]"
+
+        self.target_batch_seconds = target_batch_seconds
+        self.max_batch_bytes = max_batch_bytes
+        self.min_batch_size = min_batch_size
+        self.max_batch_size = max_batch_size
+        self.smoothing = smoothing
+        self.key = str(uuid.uuid4())
+
+        self._batch_size = self._clamp(initial_batch_size)
+        self._seconds_per_doc: float = 0.0
+        self._bytes_per_doc: float = 0.0
+
+    def batch_size(self) -> int:
+        """The number of documents to put in the next batch."""
+        return self._batch_size
+
+    def full(self, num_docs: int, num_bytes: int) -> bool:
+        """Returns True if a batch with num_docs documents totalling num_bytes should not grow."""
+        return num_docs >= self._batch_size or num_bytes >= self.max_batch_bytes
+
+    def record(self, num_docs: int, num_bytes: int, seconds: float) -> None:
+        """Updates the batch size after a batch of num_docs documents took seconds to process."""
+        if num_docs == 0:
+            return
+
+        a = self.smoothing
+        if self._seconds_per_doc == 0.0:
+            self._seconds_per_doc = seconds / num_docs
+            self._bytes_per_doc = num_bytes / num_docs
+        else:
+            self._seconds_per_doc = a * seconds / num_docs + (1 - a) * self._seconds_per_doc
+            self._bytes_per_doc = a * num_bytes / num_docs + (1 - a) * self._bytes_per_doc
+
+        size = float(self.max_batch_size)
+        if self._seconds_per_doc > 0:
+            size = min(size, self.target_batch_seconds / self._seconds_per_doc)
+        if self._bytes_per_doc > 0:
+            size = min(size, self.max_batch_bytes / self._bytes_per_doc)
+        self._batch_size = self._clamp(min(int(size), 2 * self._batch_size))
+
+    def split(self, items: Sequence[T], sizes: Sequence[int]) -> Iterator[tuple[list[T], int]]:
+        """Splits items into batches using the current batch size. sizes are the serialized sizes of
+        the items. Yields each batch with its total size; record() should be called for each batch
+        before the next one is requested so that the split follows the latest timings."""
+        start = 0
+        while start < len(items):
+            end = start
+            num_bytes = 0
+            while end < len(items) and not self.full(end - start, num_bytes):
+                num_bytes += sizes[end]
+                end += 1
+            yield list(items[start:end]), num_bytes
+            start = end
+
+    def for_process(self) -> "AdaptiveBatchSize":
+        """Returns the sizer shared by the tasks in this ray worker that use this configuration. Local
+        execution uses the sizer of the node itself, which lives as long as the node."""
+        with _process_sizers_lock:
+            sizer = _process_sizers.get(self.key)
+            if sizer is None:
+                sizer = copy.deepcopy(self)
+                _process_sizers[self.key] = sizer
+                while len(_process_sizers) > MAX_PROCESS_SIZERS:
+                    _process_sizers.popitem(last=False)
+            else:
+                _process_sizers.move_to_end(self.key)
+        return sizer
+
+    def _clamp(self, size: int) -> int:
+        return max(self.min_batch_size, min(self.max_batch_size, size))
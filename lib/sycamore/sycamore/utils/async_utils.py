@@ -0,0 +1,113 @@
+"""
+Helpers for running coroutines, e.g. calls to LLM.generate_async, from the synchronous functions that
+transforms are made of.
+
+A worker that calls a remote model one document at a time spends almost all of its time waiting for
+responses. Running the calls for a batch of documents as coroutines lets a single worker keep several
+requests in flight, while max_concurrency keeps it from flooding the service.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+import threading
+from typing import Any, Awaitable, Callable, Iterable, Optional, TypeVar
+
+T = TypeVar("T")
+U = TypeVar("U")
+
+# Number of coroutines a worker runs at a time if the caller does not choose.
+DEFAULT_MAX_CONCURRENCY = 8
+
+_thread_state = threading.local()
+# Gives up the slot that gather_bounded holds for the current call; see release_concurrency_slot.
+_release_slot: contextvars.ContextVar[Optional[Callable[[], None]]] = contextvars.ContextVar(
+    "sycamore_release_slot", default=None
+)
+_helper: Optional[ThreadPoolExecutor] = None
+_helper_lock = threading.Lock()
+
+
+def run_coroutine(coro: Awaitable[T]) -> T:
+    """Runs coro to completion and returns its result.
+
+    Every thread reuses a single event loop, so that clients that keep connections open between calls,
+    like the async OpenAI client, keep working from one batch of documents to the next. If the calling
+    thread is already running an event loop, as it is in a notebook, coro is run in a helper thread
+    since loops can not be nested."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return _thread_loop().run_until_complete(_as_coroutine(coro))
+
+    global _helper
+    with _helper_lock:
+        if _helper is None:
+            _helper = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sycamore-async")
+    # The helper runs coro in a copy of the caller's context, as asyncio.to_thread would.
+    context = contextvars.copy_context()
+    return _helper.submit(context.run, lambda: _thread_loop().run_until_complete(_as_coroutine(coro))).result()
+
+
+def _thread_loop() -> asyncio.AbstractEventLoop:
+    loop = getattr(_thread_state, "loop", None)
+    if loop is None or loop.is_closed():
+        loop = asyncio.new_event_loop()
+        _thread_state.loop = loop
+    return loop
+
+
+async def gather_bounded(
+    f: Callable[..., Awaitable[T]], items: Iterable[U], max_concurrency: int, *args: Any, **kwargs: Any
+) -> list[T]:
+    """Awaits f(item, *args, **kwargs) for every item with at most max_concurrency calls in flight at a
+    time, and returns the results in the order of items. Raises the first exception raised by a call,
+    after cancelling the calls that are still running."""
+    assert max_concurrency > 0, "max_concurrency must be positive"
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def bounded(item: U) -> T:
+        await semaphore.acquire()
+        released = False
+
+        def release() -> None:
+            nonlocal released
+            if not released:
+                released = True
+                semaphore.release()
+
+        # Each call runs in its own task, and so with its own copy of the context.
+        _release_slot.set(release)
+        try:
+            return await f(item, *args, **kwargs)
+        finally:
+            release()
+
+    tasks = [asyncio.ensure_future(bounded(item)) for item in items]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        # The loop outlives this call, so do not leave the other calls running in it.
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+def release_concurrency_slot() -> None:
+    """Called by a coroutine run by gather_bounded to let another call start while it waits for something
+    that puts no load on the service, e.g. an offline batch job. Does nothing outside gather_bounded."""
+    release = _release_slot.get()
+    if release is not None:
+        release()
+
+
+def map_bounded(
+    f: Callable[..., Awaitable[T]], items: Iterable[U], max_concurrency: int, *args: Any, **kwargs: Any
+) -> list[T]:
+    """Synchronous version of gather_bounded."""
+    return run_coroutine(gather_bounded(f, items, max_concurrency, *args, **kwargs))
+
+
+async def _as_coroutine(awaitable: Awaitable[T]) -> T:
+    return await awaitable
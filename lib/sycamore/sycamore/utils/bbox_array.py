@@ -0,0 +1,87 @@
+"""
+Bounding boxes of many elements as arrays, for layout computations over whole pages.
+
+Layout code like reading-order sorting and column detection compares every element's bounding box
+with many others. Doing that one element at a time means a dict lookup and a tuple unpack per
+comparison; BboxArray reads the boxes once into an N x 4 array so the comparisons become array
+operations.
+"""
+
+from itertools import chain
+from typing import Any, Sequence
+
+import numpy as np
+
+from sycamore.data import Element
+from sycamore.data.document import DocumentPropertyTypes
+
+_NO_BBOX = (0.0, 0.0, 0.0, 0.0)
+
+
+class BboxArray:
+    """
+    The bounding boxes of a sequence of elements as an N x 4 array of (left, top, right, bottom), with
+    their page numbers. Row i describes elements[i]. Elements without a bbox have a row of zeros and
+    are False in has_bbox; elements without a page number are on default_page.
+
+    Example:
+         .. code-block:: python
+
+            boxes = BboxArray(doc.elements)
+            order = boxes.order_by_left_top()
+            doc.elements = [doc.elements[i] for i in order]
+    """
+
+    __slots__ = ("bboxes", "has_bbox", "pages")
+
+    def __init__(self, elements: Sequence[Element], default_page: Any = 0):
+        datas = [elem.data for elem in elements]
+        bboxes = [data.get("bbox") or _NO_BBOX for data in datas]
+        self.bboxes = np.fromiter(chain.from_iterable(bboxes), dtype=np.float64, count=4 * len(bboxes))
+        self.bboxes.shape = (len(bboxes), 4)
+        self.has_bbox = np.array([bbox is not _NO_BBOX for bbox in bboxes], dtype=bool)
+        page_number = DocumentPropertyTypes.PAGE_NUMBER
+        self.pages = np.array([data.get("properties", {}).get(page_number, default_page) for data in datas])
+
+    @classmethod
+    def _of(cls, bboxes: np.ndarray, has_bbox: np.ndarray, pages: np.ndarray) -> "BboxArray":
+        boxes = object.__new__(cls)
+        boxes.bboxes = bboxes
+        boxes.has_bbox = has_bbox
+        boxes.pages = pages
+        return boxes
+
+    def __len__(self) -> int:
+        return len(self.bboxes)
+
+    def take(self, indices: np.ndarray) -> "BboxArray":
+        """Returns the boxes at the given indices, in that order."""
+        return BboxArray._of(self.bboxes[indices], self.has_bbox[indices], self.pages[indices])
+
+    @property
+    def left(self) -> np.ndarray:
+        return self.bboxes[:, 0]
+
+    @property
+    def top(self) -> np.ndarray:
+        return self.bboxes[:, 1]
+
+    @property
+    def right(self) -> np.ndarray:
+        return self.bboxes[:, 2]
+
+    @property
+    def bottom(self) -> np.ndarray:
+        return self.bboxes[:, 3]
+
+    @property
+    def width(self) -> np.ndarray:
+        return self.right - self.left
+
+    def order_by_left_top(self) -> np.ndarray:
+        """Returns the indices that sort the boxes left to right, then top to bottom. The sort is stable."""
+        return np.lexsort((self.top, self.left))
+
+    def within_unit_square(self) -> np.ndarray:
+        """Returns a mask of the boxes whose coordinates are all between 0 and 1."""
+        return self.has_bbox & np.all((self.bboxes >= 0.0) & (self.bboxes <= 1.0), axis=1)
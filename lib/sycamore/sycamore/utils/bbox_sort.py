@@ -1,6 +1,9 @@
 """
 Utilities to sort elements based on bounding box (bbox) coordinates.
 
+The per-element helpers describe the algorithm; bbox_sort_page and bbox_sorted_elements run it over
+the BboxArray of each page.
+
 TODO:
 - handle page_number not (always) present
 - handle bbox not (always) present
@@ -8,8 +11,11 @@ TODO:
 
 from typing import Optional
 
+import numpy as np
+
 from sycamore.data import Document, Element
 from sycamore.data.document import DocumentPropertyTypes
+from sycamore.utils.bbox_array import BboxArray
 
 
 def elem_top_left(elem: Element) -> tuple:
@@ -131,23 +137,99 @@ def bbox_sort_based_on_tags(elems: list[Element]) -> None:
         bbox_sort_two_columns(elems, lidx, len(elems))
 
 
+# Column tags as computed by col_tag, as integers for array operations.
+_NO_TAG = 0
+_LEFT = 1
+_RIGHT = 2
+_FULL = 3
+_TWO_COL = 4
+
+
+def _col_tags(boxes: BboxArray) -> np.ndarray:
+    """col_tag for every box at once."""
+    left = boxes.left
+    right = boxes.right
+    width = boxes.width
+    tags = np.full(len(boxes), _NO_TAG, dtype=np.int8)
+    column = boxes.has_bbox & (width >= 0.1) & (width < 0.45)
+    tags[column & (right < 0.5)] = _LEFT
+    tags[column & (right >= 0.5) & (left > 0.5)] = _RIGHT
+    tags[boxes.has_bbox & (width > 0.6)] = _FULL
+    return tags
+
+
+def _tag_two_columns(boxes: BboxArray, tags: np.ndarray, beg: int, end: int) -> None:
+    """tag_two_columns on the boxes of a page from beg to end, sorted top to bottom."""
+    top = boxes.top[beg:end]
+    bottom = boxes.bottom[beg:end]
+    lefts = np.flatnonzero(tags[beg:end] == _LEFT)
+    # The boxes overlapping each left box, for all of them at once.
+    overlaps = boxes.has_bbox[beg:end] & (top < bottom[lefts, None]) & (bottom > top[lefts, None])
+    rows: list[list[int]] = [[] for _ in lefts]
+    for k, j in zip(*(a.tolist() for a in np.nonzero(overlaps))):
+        rows[k].append(j)
+
+    # Rows are retagged in order since an earlier row can retag the boxes of a later one.
+    current = tags[beg:end].tolist()
+    for i, row in zip(lefts.tolist(), rows):
+        if current[i] != _LEFT:
+            continue
+        row_tags = [current[j] for j in row]
+        if _LEFT in row_tags and _RIGHT in row_tags:
+            for j in row:
+                current[j] = _TWO_COL
+    tags[beg:end] = current
+
+
+def _reading_order(boxes: BboxArray, pages: np.ndarray) -> np.ndarray:
+    """Returns the order in which bbox_sorted_elements puts the boxes, given the page of each."""
+    n = len(boxes)
+    order = np.lexsort((boxes.left, boxes.top, pages))  # sort by page, top-to-bottom, left-to-right
+    boxes = boxes.take(order)
+    pages = pages[order]
+    tags = _col_tags(boxes)  # tag left/right/full based on width/position
+
+    starts = np.r_[0, np.flatnonzero(pages[1:] != pages[:-1]) + 1]
+    ends = np.r_[starts[1:], n]
+    # Only pages with both left and right boxes can have two-column rows.
+    lefts = np.add.reduceat(tags == _LEFT, starts)
+    rights = np.add.reduceat(tags == _RIGHT, starts)
+    two_column_pages = np.flatnonzero((lefts > 0) & (rights > 0))
+    if len(two_column_pages) == 0:
+        return order
+
+    # Give each two-column section one key, so that a single sort orders the boxes within each
+    # section by column, then top to bottom, and leaves all other boxes where they are.
+    section = np.arange(n)
+    for p in two_column_pages.tolist():
+        (beg, end) = (int(starts[p]), int(ends[p]))
+        _tag_two_columns(boxes, tags, beg, end)
+        lidx = beg
+        ltag = tags[beg]
+        for idx, tag in enumerate(tags[beg:end].tolist(), beg):
+            if (tag in (_FULL, _TWO_COL)) and (tag != ltag):
+                if ltag == _TWO_COL:
+                    section[lidx:idx] = lidx
+                lidx = idx
+                ltag = tag
+        if ltag == _TWO_COL:
+            section[lidx:end] = lidx
+    column = np.trunc(5 * boxes.left)  # !!! quantize
+    return order[np.lexsort((boxes.top, column, section))]
+
+
 def bbox_sort_page(elems: list[Element]) -> None:
     if len(elems) < 2:
         return
-    elems.sort(key=elem_top_left)  # sort top-to-bottom, left-to-right
-    for elem in elems:  # tag left/right/full based on width/position
-        elem.data["_coltag"] = col_tag(elem)
-    tag_two_columns(elems)
-    bbox_sort_based_on_tags(elems)
-    for elem in elems:
-        elem.data.pop("_coltag", None)  # clean up tags
+    order = _reading_order(BboxArray(elems), np.zeros(len(elems), dtype=np.int64))
+    elems[:] = [elems[i] for i in order]
 
 
 def bbox_sorted_elements(elements: list[Element], update_element_indexs: bool = True) -> list[Element]:
-    pages = collect_pages(elements)
-    for elems in pages:
-        bbox_sort_page(elems)
-    ordered_elements = [elem for elems in pages for elem in elems]  # flatten
+    if len(elements) == 0:
+        return []
+    boxes = BboxArray(elements)
+    ordered_elements = [elements[i] for i in _reading_order(boxes, boxes.pages)]
     if update_element_indexs:
         for idx, element in enumerate(ordered_elements):
             element.element_index = idx
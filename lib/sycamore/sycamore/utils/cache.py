@@ -1,18 +1,43 @@
 from __future__ import annotations
+import asyncio
+import atexit
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
 import hashlib
 import json
+import logging
 from pathlib import Path
+import pickle
+import threading
 import time
 from tempfile import SpooledTemporaryFile
-from typing import Any, Optional, Union, BinaryIO
+from typing import Any, Iterable, Optional, Union, BinaryIO
+import weakref
 
 import boto3
 import diskcache
 from botocore.exceptions import ClientError
 from mypy_boto3_s3.client import S3Client
 
+logger = logging.getLogger(__name__)
+
 BLOCK_SIZE = 1048576  # 1 MiB
 
+# The classes of cache entries. Each can get its own time to live, and the cache CLI reports sizes by class.
+LLM_NAMESPACE = "llm"
+LAYOUT_NAMESPACE = "layout"
+OCR_NAMESPACE = "ocr"
+PDFMINER_NAMESPACE = "pdfminer"
+
+# The diskcache eviction policies by the names DiskCache accepts.
+EVICTION_POLICIES = {
+    "lru": "least-recently-used",
+    "lfu": "least-frequently-used",
+    "fifo": "least-recently-stored",
+    "none": "none",
+}
+
 
 class HashContext:
     """
@@ -35,22 +60,129 @@ class HashContext:
         return self.hash_obj.hexdigest()
 
 
+@dataclass
+class CacheStats:
+    """Counts the lookups and writes of a cache and the time they took. Caches are used from several threads,
+    e.g. the S3 request pool, so the counts are updated with record_get and record_set."""
+
+    hits: int = 0
+    misses: int = 0
+    get_seconds: float = 0.0
+    sets: int = 0
+    set_seconds: float = 0.0
+
+    def __post_init__(self):
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        return {k: v for k, v in self.__dict__.items() if k != "_lock"}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def record_get(self, seconds: float, hits: int, misses: int) -> None:
+        with self._lock:
+            self.get_seconds += seconds
+            self.hits += hits
+            self.misses += misses
+
+    def record_set(self, seconds: float, sets: int) -> None:
+        with self._lock:
+            self.set_seconds += seconds
+            self.sets += sets
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.0
+
+    @property
+    def mean_get_seconds(self) -> float:
+        total = self.hits + self.misses
+        return self.get_seconds / total if total > 0 else 0.0
+
+    @property
+    def mean_set_seconds(self) -> float:
+        return self.set_seconds / self.sets if self.sets > 0 else 0.0
+
+
 class Cache:
+    """
+    Base class for caches. Subclasses implement _get and _set; get and set keep the statistics.
+
+    Entries can be set with a namespace, e.g. LLM_NAMESPACE, and ttl_seconds maps namespaces to how long their
+    entries are kept. Entries of other namespaces, or without one, are kept until they are evicted.
+    """
+
+    def __init__(self, ttl_seconds: Optional[dict[str, float]] = None):
+        self.stats = CacheStats()
+        self.ttl_seconds = ttl_seconds or {}
 
-    def __init__(self):
-        self.cache_hits = 0
-        self.total_accesses = 0
+    def _ttl(self, namespace: Optional[str]) -> Optional[float]:
+        return self.ttl_seconds.get(namespace) if namespace is not None else None
 
     def get(self, hash_key: str):
+        return self.get_entry(hash_key)[0]
+
+    def get_entry(self, hash_key: str) -> tuple[Any, Optional[str]]:
+        """Like get, but returns the value together with the namespace it was set with."""
+        start = time.perf_counter()
+        entry = self._get_entry(hash_key)
+        hit = entry[0] is not None
+        self.stats.record_get(time.perf_counter() - start, int(hit), int(not hit))
+        return entry
+
+    def set(self, hash_key: str, hash_value, namespace: Optional[str] = None):
+        start = time.perf_counter()
+        self._set(hash_key, hash_value, namespace)
+        self.stats.record_set(time.perf_counter() - start, 1)
+
+    def get_many(self, hash_keys: list[str]) -> list[Any]:
+        """Returns the values of hash_keys, None for the ones that are not cached."""
+        return [v for v, _ in self.get_many_entries(hash_keys)]
+
+    def get_many_entries(self, hash_keys: list[str]) -> list[tuple[Any, Optional[str]]]:
+        """Like get_many, but returns each value together with the namespace it was set with."""
+        start = time.perf_counter()
+        entries = self._get_many_entries(hash_keys)
+        hits = sum(1 for v, _ in entries if v is not None)
+        self.stats.record_get(time.perf_counter() - start, hits, len(entries) - hits)
+        return entries
+
+    def set_many(self, items: Iterable[tuple[str, Any]], namespace: Optional[str] = None) -> None:
+        items = list(items)
+        start = time.perf_counter()
+        self._set_many(items, namespace)
+        self.stats.record_set(time.perf_counter() - start, len(items))
+
+    def flush(self) -> None:
+        """Waits until the values set so far are stored. Only caches that write in the background need this."""
         pass
 
-    def set(self, hash_key: str, hash_value):
+    def _get(self, hash_key: str):
         pass
 
+    def _get_entry(self, hash_key: str) -> tuple[Any, Optional[str]]:
+        """Caches that keep the namespace of their entries override this."""
+        return (self._get(hash_key), None)
+
+    def _set(self, hash_key: str, hash_value, namespace: Optional[str] = None):
+        pass
+
+    def _get_many_entries(self, hash_keys: list[str]) -> list[tuple[Any, Optional[str]]]:
+        return [self._get_entry(k) for k in hash_keys]
+
+    def _set_many(self, items: list[tuple[str, Any]], namespace: Optional[str] = None) -> None:
+        for k, v in items:
+            self._set(k, v, namespace)
+
     def get_hit_rate(self):
-        if self.total_accesses == 0:
-            return 0.0
-        return self.cache_hits / self.total_accesses
+        return self.stats.hit_rate
+
+    def tier_stats(self) -> dict[str, CacheStats]:
+        """Returns the statistics of each tier of the cache by name; a cache that is not tiered has one."""
+        return {type(self).__name__: self.stats}
 
     @staticmethod
     def get_hash_context(data: bytes, hash_ctx: Optional[HashContext] = None) -> HashContext:
@@ -83,19 +215,165 @@ class Cache:
 
 
 class DiskCache(Cache):
-    def __init__(self, cache_loc: str):
-        super().__init__()
-        self._cache = diskcache.Cache(directory=cache_loc)
+    """
+    A cache in a local directory, backed by diskcache.
+
+    Args:
+        cache_loc: The directory of the cache.
+        size_limit_bytes: The size the cache is kept under by evicting entries. diskcache defaults to 1 GiB.
+            The limit is stored with the cache, so it also applies to later processes that do not set one.
+        eviction_policy: Which entries are evicted first once the cache is over its size limit: "lru" for the
+            least recently used, "lfu" for the least frequently used, "fifo" for the oldest, or "none" to never
+            evict. Defaults to the stored policy of the cache, "fifo" for a new one.
+        ttl_seconds: How long the entries of each namespace are kept, e.g. {LLM_NAMESPACE: 30 * 86400}.
+
+    Example:
+         .. code-block:: python
+
+            cache = DiskCache("/tmp/layout_cache", size_limit_bytes=10 * 2**30, eviction_policy="lru")
+    """
+
+    def __init__(
+        self,
+        cache_loc: str,
+        size_limit_bytes: Optional[int] = None,
+        eviction_policy: Optional[str] = None,
+        ttl_seconds: Optional[dict[str, float]] = None,
+    ):
+        super().__init__(ttl_seconds)
+        settings: dict[str, Any] = {}
+        if size_limit_bytes is not None:
+            settings["size_limit"] = size_limit_bytes
+        if eviction_policy is not None:
+            if eviction_policy not in EVICTION_POLICIES:
+                raise ValueError(
+                    f"Unknown eviction policy {eviction_policy}. Expected one of {list(EVICTION_POLICIES)}"
+                )
+            settings["eviction_policy"] = EVICTION_POLICIES[eviction_policy]
+        self._cache_loc = cache_loc
+        self._cache = diskcache.Cache(directory=cache_loc, **settings)
+
+    def _get(self, hash_key: str):
+        return self._cache.get(hash_key)
+
+    def _get_entry(self, hash_key: str) -> tuple[Any, Optional[str]]:
+        return self._cache.get(hash_key, tag=True)
+
+    def _set(self, hash_key: str, hash_value, namespace: Optional[str] = None):
+        self._cache.set(hash_key, hash_value, expire=self._ttl(namespace), tag=namespace)
+
+    def _set_many(self, items: list[tuple[str, Any]], namespace: Optional[str] = None) -> None:
+        # One sqlite transaction instead of one per key.
+        expire = self._ttl(namespace)
+        with self._cache.transact():
+            for k, v in items:
+                self._cache.set(k, v, expire=expire, tag=namespace)
+
+    def namespace_stats(self) -> dict[Optional[str], tuple[int, int]]:
+        """Returns the number of entries and their approximate size in bytes by namespace."""
+        import sqlite3
+
+        con = sqlite3.connect(f"file:{Path(self._cache_loc) / diskcache.core.DBNAME}?mode=ro", uri=True)
+        try:
+            rows = con.execute(
+                "SELECT tag, COUNT(*), SUM(size + COALESCE(LENGTH(value), 0) + LENGTH(key)) FROM Cache GROUP BY tag"
+            ).fetchall()
+        finally:
+            con.close()
+        return {tag: (count, size or 0) for tag, count, size in rows}
+
+    def volume(self) -> int:
+        """Returns the size of the cache on disk in bytes."""
+        return self._cache.volume()
+
+    def prune(
+        self,
+        size_limit_bytes: Optional[int] = None,
+        namespace: Optional[str] = None,
+        older_than_seconds: Optional[float] = None,
+    ) -> int:
+        """
+        Removes the expired entries and returns how many entries were removed in all.
+
+        Args:
+            size_limit_bytes: Also evicts entries of any namespace by the eviction policy until the cache is
+                under this size, and keeps this as its size limit.
+            namespace: Only removes the entries of this namespace that are older than older_than_seconds.
+                See clear_namespace to remove all of them.
+            older_than_seconds: Removes the entries stored longer ago than this, of namespace if given.
+        """
+        if namespace is not None and older_than_seconds is None:
+            raise ValueError("namespace only narrows older_than_seconds; use clear_namespace to remove a namespace")
+        removed = self._cache.expire()
+        if older_than_seconds is not None:
+            removed += self._remove_older(namespace, older_than_seconds)
+        if size_limit_bytes is not None:
+            self._cache.reset("size_limit", size_limit_bytes)
+            removed += self._cache.cull()
+        return removed
+
+    def clear_namespace(self, namespace: Optional[str]) -> int:
+        """Removes every entry of the namespace and returns how many were removed."""
+        return self._cache.evict(namespace)
+
+    def _remove_older(self, namespace: Optional[str], older_than_seconds: float) -> int:
+        import sqlite3
+
+        query = "SELECT key FROM Cache WHERE store_time < ?"
+        params: list[Any] = [time.time() - older_than_seconds]
+        if namespace is not None:
+            query += " AND tag = ?"
+            params.append(namespace)
+        con = sqlite3.connect(f"file:{Path(self._cache_loc) / diskcache.core.DBNAME}?mode=ro", uri=True)
+        try:
+            keys = [k for (k,) in con.execute(query, params).fetchall()]
+        finally:
+            con.close()
+        return sum(1 for k in keys if self._cache.delete(k))
 
-    def get(self, hash_key: str):
-        v = self._cache.get(hash_key)
-        if v is not None:
-            self.cache_hits += 1
-        self.total_accesses += 1
-        return v
 
-    def set(self, hash_key: str, hash_value):
-        self._cache.set(hash_key, hash_value)
+# The connections of each S3 client, and the threads S3 requests are made from. boto3 keeps only 10 connections
+# by default, which serializes concurrent lookups.
+S3_MAX_POOL_CONNECTIONS = 64
+
+_s3_lock = threading.Lock()
+_s3_clients: dict[Optional[str], S3Client] = {}
+_s3_executor: Optional[ThreadPoolExecutor] = None
+_write_behind_caches: weakref.WeakSet[S3Cache] = weakref.WeakSet()
+
+
+def _shared_s3_client(endpoint_url: Optional[str]) -> S3Client:
+    # Clients are thread safe and expensive to create, so all S3Caches of a process share one per endpoint.
+    with _s3_lock:
+        client = _s3_clients.get(endpoint_url)
+        if client is None:
+            from botocore.config import Config
+
+            config = Config(
+                max_pool_connections=S3_MAX_POOL_CONNECTIONS,
+                retries={"mode": "adaptive", "max_attempts": 5},
+                tcp_keepalive=True,
+            )
+            client = boto3.client("s3", endpoint_url=endpoint_url, config=config)
+            _s3_clients[endpoint_url] = client
+        return client
+
+
+def _shared_s3_executor() -> ThreadPoolExecutor:
+    global _s3_executor
+    with _s3_lock:
+        if _s3_executor is None:
+            _s3_executor = ThreadPoolExecutor(max_workers=S3_MAX_POOL_CONNECTIONS, thread_name_prefix="sycamore-s3")
+        return _s3_executor
+
+
+@atexit.register
+def _flush_write_behind_caches() -> None:
+    for cache in list(_write_behind_caches):
+        try:
+            cache.flush()
+        except Exception as e:
+            logger.warning(f"Unable to write cache entries to {cache._s3_path}: {e}")
 
 
 def s3_cache_deserializer(kwargs):
@@ -103,23 +381,70 @@ def s3_cache_deserializer(kwargs):
 
 
 class S3Cache(Cache):
-    def __init__(self, s3_path: str, freshness_in_seconds: int = -1):
-        super().__init__()
+    """
+    A cache that keeps each entry as a JSON object in S3.
+
+    All S3Caches of a process share an S3 client with a pool of S3_MAX_POOL_CONNECTIONS connections, and
+    get_many looks up its keys concurrently.
+
+    Args:
+        s3_path: The s3:// prefix to keep the entries under.
+        freshness_in_seconds: If not negative, entries older than this are treated as missing.
+        write_behind: If True, set returns right away and the entry is written in the background. Lookups in
+            the same process see it immediately; call flush to wait until it is stored. A write that fails is
+            logged and raised by the next call to set or flush. Writes still pending
+            when the process exits are flushed by an atexit hook, which ray workers may not run, so only use
+            this where flush is called, e.g. in the driver.
+        max_pending_writes: With write_behind, how many writes may be in the background at once. set waits
+            for the oldest one when there are more.
+        endpoint_url: The URL of an S3 compatible service to use instead of AWS S3, e.g. a local stand-in.
+        ttl_seconds: How long the entries of each namespace are fresh. S3 does not remove stale entries by
+            itself; use a lifecycle rule on the prefix to bound its size.
+    """
+
+    def __init__(
+        self,
+        s3_path: str,
+        freshness_in_seconds: int = -1,
+        write_behind: bool = False,
+        endpoint_url: Optional[str] = None,
+        ttl_seconds: Optional[dict[str, float]] = None,
+        max_pending_writes: int = 1000,
+    ):
+        assert max_pending_writes > 0, "max_pending_writes must be positive"
+        super().__init__(ttl_seconds)
         self._s3_path = s3_path
         self._freshness_in_seconds = freshness_in_seconds
+        self._write_behind = write_behind
+        self._max_pending_writes = max_pending_writes
+        self._endpoint_url = endpoint_url
         self._s3_client: Optional[S3Client] = None
+        self._pending_lock = threading.Lock()
+        # Values that are still being written, with the futures of the writes and their namespaces, oldest first.
+        self._pending: dict[str, tuple[Any, Future, Optional[str]]] = {}
+        # The first background write that failed since the last call to flush or set.
+        self._write_error: Optional[Exception] = None
+
+    def _client(self) -> S3Client:
+        if self._s3_client is None:
+            self._s3_client = _shared_s3_client(self._endpoint_url)
+        return self._s3_client
 
     def _get_s3_bucket_and_key(self, key):
         parts = self._s3_path.replace("s3://", "").strip("/").split("/", 1)
         return parts[0], "/".join([parts[1], key]) if len(parts) == 2 else key
 
-    def get(self, key: str):
-        if not self._s3_client:
-            self._s3_client = boto3.client("s3")
+    def _get(self, key: str):
+        return self._get_entry(key)[0]
+
+    def _get_entry(self, key: str) -> tuple[Any, Optional[str]]:
+        with self._pending_lock:
+            pending = self._pending.get(key)
+        if pending is not None:
+            return (pending[0], pending[2])
         try:
-            assert self._s3_client is not None
             bucket, key = self._get_s3_bucket_and_key(key)
-            response = self._s3_client.get_object(Bucket=bucket, Key=key)
+            response = self._client().get_object(Bucket=bucket, Key=key)
 
             content = json.loads(response["Body"].read())
 
@@ -128,48 +453,322 @@ class S3Cache(Cache):
                 self._freshness_in_seconds >= 0
                 and self._freshness_in_seconds + content.get("cached_at", 0) < time.time()
             ):
-                return None
-            data = content["value"]
-            self.cache_hits += 1
-            return data
+                return (None, None)
+            namespace = content.get("namespace")
+            ttl = self._ttl(namespace)
+            if ttl is not None and ttl + content.get("cached_at", 0) < time.time():
+                return (None, None)
+            return (content["value"], namespace)
         except ClientError as e:
             if e.response["Error"]["Code"] == "NoSuchKey":
-                return None
+                return (None, None)
             else:
                 raise
-        finally:
-            self.total_accesses += 1
 
-    def set(self, key: str, value: Any):
-        if not self._s3_client:
-            self._s3_client = boto3.client("s3")
-        assert self._s3_client is not None
-        bucket, key = self._get_s3_bucket_and_key(key)
+    def _get_many_entries(self, keys: list[str]) -> list[tuple[Any, Optional[str]]]:
+        if len(keys) <= 1:
+            return [self._get_entry(k) for k in keys]
+        return list(_shared_s3_executor().map(self._get_entry, keys))
 
+    def _set(self, key: str, value: Any, namespace: Optional[str] = None):
         content = {"value": value, "cached_at": time.time()}
-
+        if namespace is not None:
+            content["namespace"] = namespace
+        # Serialized right away, so that later changes to value are not written and errors surface here.
         json_str = json.dumps(content, sort_keys=True, indent=2)
-        self._s3_client.put_object(Body=json_str, Bucket=bucket, Key=key)
+        if not self._write_behind:
+            self._put(key, json_str)
+            return
+
+        self._raise_write_error()
+        _write_behind_caches.add(self)
+        self._wait_for_room()
+        with self._pending_lock:
+            future = _shared_s3_executor().submit(self._put_behind, key, json_str)
+            self._pending.pop(key, None)
+            self._pending[key] = (value, future, namespace)
+        future.add_done_callback(lambda f: self._write_done(key, f))
+
+    def _set_many(self, items: list[tuple[str, Any]], namespace: Optional[str] = None) -> None:
+        if self._write_behind or len(items) <= 1:
+            for k, v in items:
+                self._set(k, v, namespace)
+        else:
+            list(_shared_s3_executor().map(lambda item: self._set(item[0], item[1], namespace), items))
+
+    def _put(self, key: str, json_str: str) -> None:
+        bucket, key = self._get_s3_bucket_and_key(key)
+        self._client().put_object(Body=json_str, Bucket=bucket, Key=key)
+
+    def _put_behind(self, key: str, json_str: str) -> None:
+        try:
+            self._put(key, json_str)
+        except Exception as e:
+            # Recorded before the future completes, so that flush sees it once the write is done.
+            logger.warning(f"Unable to write cache entry {key} to {self._s3_path}: {e}")
+            with self._pending_lock:
+                if self._write_error is None:
+                    self._write_error = e
+            raise
+
+    def _write_done(self, key: str, future: Future) -> None:
+        with self._pending_lock:
+            pending = self._pending.get(key)
+            if pending is not None and pending[1] is future:
+                del self._pending[key]
+
+    def _wait_for_room(self) -> None:
+        while True:
+            with self._pending_lock:
+                if len(self._pending) < self._max_pending_writes:
+                    return
+                oldest = next(iter(self._pending.values()))[1]
+            wait([oldest])
+            if oldest.done():
+                # The done callback that removes it may not have run yet.
+                time.sleep(0)
+
+    def _raise_write_error(self) -> None:
+        with self._pending_lock:
+            error = self._write_error
+            self._write_error = None
+        if error is not None:
+            raise error
+
+    def flush(self) -> None:
+        """Waits for the writes in the background and raises the first error among the writes that failed
+        since the last call to flush or set."""
+        with self._pending_lock:
+            futures = [f for _, f, _ in self._pending.values()]
+        wait(futures)
+        self._raise_write_error()
 
     # The actual s3 client is not pickleable, This just says to pickle the wrapper, which can be used to
     # recreate the client on the other end.
     def __reduce__(self):
 
-        kwargs = {"s3_path": self._s3_path, "freshness_in_seconds": self._freshness_in_seconds}
+        kwargs = {
+            "s3_path": self._s3_path,
+            "freshness_in_seconds": self._freshness_in_seconds,
+            "write_behind": self._write_behind,
+            "endpoint_url": self._endpoint_url,
+            "ttl_seconds": self.ttl_seconds,
+            "max_pending_writes": self._max_pending_writes,
+        }
 
         return s3_cache_deserializer, (kwargs,)
 
 
-def cache_from_path(path: Optional[str]) -> Optional[Cache]:
+class MemoryCache(Cache):
+    """
+    A least recently used cache in the memory of the process, bounded by the number of entries and by the total
+    size of their pickled values. Values are stored pickled, so that callers can not change the cached copy.
+
+    Args:
+        max_entries: The number of entries to keep.
+        max_bytes: The total size of the pickled values to keep. A value larger than this is not cached.
+        ttl_seconds: How long the entries of each namespace are kept.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10_000,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl_seconds: Optional[dict[str, float]] = None,
+    ):
+        super().__init__(ttl_seconds)
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        # The pickled values, the times they expire at and their namespaces.
+        self._entries: OrderedDict[str, tuple[bytes, Optional[float], Optional[str]]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # Every process starts with an empty memory tier.
+        return {"max_entries": self._max_entries, "max_bytes": self._max_bytes, "ttl_seconds": self.ttl_seconds}
+
+    def __setstate__(self, state):
+        self.__init__(state["max_entries"], state["max_bytes"], state.get("ttl_seconds"))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _get(self, hash_key: str):
+        return self._get_entry(hash_key)[0]
+
+    def _get_entry(self, hash_key: str) -> tuple[Any, Optional[str]]:
+        with self._lock:
+            entry = self._entries.get(hash_key)
+            if entry is None:
+                return (None, None)
+            data, expires, namespace = entry
+            if expires is not None and expires < time.time():
+                self._remove(hash_key)
+                return (None, None)
+            self._entries.move_to_end(hash_key)
+        return (pickle.loads(data), namespace)
+
+    def _set(self, hash_key: str, hash_value, namespace: Optional[str] = None):
+        data = pickle.dumps(hash_value, protocol=pickle.HIGHEST_PROTOCOL)
+        ttl = self._ttl(namespace)
+        expires = time.time() + ttl if ttl is not None else None
+        with self._lock:
+            self._remove(hash_key)
+            if len(data) > self._max_bytes:
+                return
+            self._entries[hash_key] = (data, expires, namespace)
+            self._bytes += len(data)
+            while len(self._entries) > self._max_entries or self._bytes > self._max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, hash_key: str) -> None:
+        entry = self._entries.pop(hash_key, None)
+        if entry is not None:
+            self._bytes -= len(entry[0])
+
+
+class TieredCache(Cache):
+    """
+    A stack of caches ordered from the fastest to the slowest, e.g. a MemoryCache over a DiskCache over an
+    S3Cache. Writes go through to every tier. A lookup asks the tiers in order and copies a hit into the faster
+    tiers that missed it, with the namespace it was set with, so that the next lookup of the same key is
+    answered from memory.
+
+    Example:
+         .. code-block:: python
+
+            cache = TieredCache([MemoryCache(), DiskCache("/tmp/llm_cache"), S3Cache("s3://bucket/llm_cache")])
+            llm = OpenAI(OpenAIModels.GPT_4O, cache=cache)
+            ...
+            for name, stats in cache.tier_stats().items():
+                print(name, stats.hit_rate, stats.mean_get_seconds)
+    """
+
+    def __init__(self, tiers: list[Cache]):
+        super().__init__()
+        assert len(tiers) > 0, "TieredCache needs at least one tier"
+        self.tiers = tiers
+
+    def _get(self, hash_key: str):
+        return self._get_entry(hash_key)[0]
+
+    def _get_entry(self, hash_key: str) -> tuple[Any, Optional[str]]:
+        for i, tier in enumerate(self.tiers):
+            (v, namespace) = tier.get_entry(hash_key)
+            if v is not None:
+                for faster in self.tiers[:i]:
+                    faster.set(hash_key, v, namespace)
+                return (v, namespace)
+        return (None, None)
+
+    def _set(self, hash_key: str, hash_value, namespace: Optional[str] = None):
+        for tier in self.tiers:
+            tier.set(hash_key, hash_value, namespace)
+
+    def _get_many_entries(self, hash_keys: list[str]) -> list[tuple[Any, Optional[str]]]:
+        entries: list[tuple[Any, Optional[str]]] = [(None, None)] * len(hash_keys)
+        missing = list(range(len(hash_keys)))
+        for i, tier in enumerate(self.tiers):
+            if len(missing) == 0:
+                break
+            found = tier.get_many_entries([hash_keys[j] for j in missing])
+            # set_many takes one namespace for all its items.
+            hits: dict[Optional[str], list[tuple[str, Any]]] = {}
+            for j, (v, namespace) in zip(missing, found):
+                if v is not None:
+                    hits.setdefault(namespace, []).append((hash_keys[j], v))
+            for namespace, items in hits.items():
+                for faster in self.tiers[:i]:
+                    faster.set_many(items, namespace)
+            for j, entry in zip(missing, found):
+                entries[j] = entry
+            missing = [j for j, (v, _) in zip(missing, found) if v is None]
+        return entries
+
+    def _set_many(self, items: list[tuple[str, Any]], namespace: Optional[str] = None) -> None:
+        for tier in self.tiers:
+            tier.set_many(items, namespace)
+
+    def flush(self) -> None:
+        for tier in self.tiers:
+            tier.flush()
+
+    def tier_stats(self) -> dict[str, CacheStats]:
+        stats = {}
+        for i, tier in enumerate(self.tiers):
+            for name, tier_stats in tier.tier_stats().items():
+                stats[f"{i}:{name}"] = tier_stats
+        return stats
+
+
+_pending_lookups: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[int, tuple[Cache, list]]] = (
+    weakref.WeakKeyDictionary()
+)
+# The event loop only keeps weak references to tasks.
+_lookup_tasks: set[asyncio.Task] = set()
+
+
+async def get_async(cache: Cache, hash_key: str) -> Any:
+    """Looks up hash_key in cache without blocking the event loop. The lookups that the coroutines of a loop
+    make at the same time, e.g. the LLM calls for the documents of a batch, are combined into one get_many call
+    made from another thread."""
+    loop = asyncio.get_running_loop()
+    pending = _pending_lookups.setdefault(loop, {})
+    batch = pending.get(id(cache))
+    if batch is None:
+        batch = (cache, [])
+        pending[id(cache)] = batch
+        # Runs after the coroutines that are ready now have made their lookups.
+        loop.call_soon(_start_lookups, loop, id(cache))
+    future = loop.create_future()
+    batch[1].append((hash_key, future))
+    return await future
+
+
+def _start_lookups(loop: asyncio.AbstractEventLoop, cache_id: int) -> None:
+    cache, lookups = _pending_lookups[loop].pop(cache_id)
+    task = loop.create_task(_lookup(cache, lookups))
+    _lookup_tasks.add(task)
+    task.add_done_callback(_lookup_tasks.discard)
+
+
+async def _lookup(cache: Cache, lookups: list[tuple[str, asyncio.Future]]) -> None:
+    try:
+        values = await asyncio.to_thread(cache.get_many, [k for k, _ in lookups])
+    except Exception as e:
+        for _, future in lookups:
+            if not future.done():
+                future.set_exception(e)
+        return
+    for (_, future), value in zip(lookups, values):
+        if not future.done():
+            future.set_result(value)
+
+
+def cache_from_path(path: Optional[str], local_dir: Optional[str] = None, memory_entries: int = 0) -> Optional[Cache]:
+    """
+    Returns the cache at path: an S3Cache for s3:// paths, a DiskCache for local directories.
+
+    Args:
+        path: The location of the cache.
+        local_dir: For s3:// paths, a local directory to keep a DiskCache of the S3 entries in.
+        memory_entries: If positive, the cache gets a MemoryCache with this many entries in front of it and is
+            returned as a TieredCache.
+    """
     if path is None:
         return None
+    tiers: list[Cache] = []
+    if memory_entries > 0:
+        tiers.append(MemoryCache(max_entries=memory_entries))
     if path.startswith("s3://"):
-        return S3Cache(path)
-    if path.startswith("/"):
-        return DiskCache(path)
-    if Path(path).is_dir():
-        return DiskCache(path)
-
-    raise ValueError(
-        f"Unable to interpret {path} as path for cache. Expected s3://, /... or a directory path that exists"
-    )
+        if local_dir is not None:
+            tiers.append(DiskCache(local_dir))
+        tiers.append(S3Cache(path))
+    elif path.startswith("/") or Path(path).is_dir():
+        tiers.append(DiskCache(path))
+    else:
+        raise ValueError(
+            f"Unable to interpret {path} as path for cache. Expected s3://, /... or a directory path that exists"
+        )
+    return tiers[0] if len(tiers) == 1 else TieredCache(tiers)
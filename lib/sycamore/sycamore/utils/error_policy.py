@@ -0,0 +1,170 @@
+import copy
+import logging
+from pathlib import Path
+import time
+import traceback
+from typing import Any, Callable, Optional, Sequence, Union
+
+from sycamore.data import Document
+from sycamore.utils.profiler import count_event
+
+logger = logging.getLogger(__name__)
+
+BatchCallable = Callable[[list[Document]], Any]
+
+# Returns unmodified copies of the documents of a batch.
+Originals = Callable[[], list[Document]]
+
+# Property of a dead letter document that describes why it failed.
+ERROR_PROPERTY = "_error"
+
+
+class ErrorPolicy:
+    """
+    Isolates failures of a map function to the documents that cause them.
+
+    Without an error policy, an exception raised while processing one document fails the whole batch,
+    and ray re-runs every document in it. With a policy, a batch that raises is retried one document
+    at a time so that only the documents that fail are retried, waiting backoff_seconds before the
+    first retry and backoff_multiplier times longer before each following one. A document that still
+    fails after max_retries retries is dropped from the output and, if dead_letter is set, saved
+    there with the error in properties["_error"].
+
+    The dead letter location is a materialize directory; read it back with
+    ctx.read.materialize(path=dead_letter). The profiler reports the number of failed batches,
+    retries and failed documents as the batch_errors, doc_retries and doc_errors counters.
+
+    Args:
+        max_retries: How many times to retry a failing document on its own.
+        backoff_seconds: How long to wait before the first retry.
+        backoff_multiplier: How much longer to wait before each following retry.
+        max_backoff_seconds: The longest wait between retries.
+        dead_letter: A path, or a dict with root and optionally fs as for materialize, where documents
+            that fail are saved. If None, failed documents are only logged.
+        retry_on: The exceptions that are worth retrying; documents raising other exceptions are
+            treated as failed without retrying.
+
+    Example:
+         .. code-block:: python
+
+            policy = ErrorPolicy(max_retries=2, dead_letter="s3://bucket/dead-letter")
+            docset.partition(ArynPartitioner(), error_policy=policy)
+    """
+
+    def __init__(
+        self,
+        *,
+        max_retries: int = 2,
+        backoff_seconds: float = 1.0,
+        backoff_multiplier: float = 2.0,
+        max_backoff_seconds: float = 60.0,
+        dead_letter: Optional[Union[str, Path, dict]] = None,
+        retry_on: tuple[type[BaseException], ...] = (Exception,),
+    ):
+        assert max_retries >= 0, "max_retries must not be negative"
+        assert backoff_seconds >= 0 and backoff_multiplier >= 1, "backoff must not shrink"
+        assert dead_letter is None or not isinstance(dead_letter, dict) or "root" in dead_letter
+
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.backoff_multiplier = backoff_multiplier
+        self.max_backoff_seconds = max_backoff_seconds
+        self.dead_letter = dead_letter
+        self.retry_on = retry_on
+
+    def wrap(self, f: BatchCallable, name: str) -> Callable[..., Any]:
+        """Returns a function that applies f to a batch of documents following this policy.
+
+        f may modify the documents before it fails, so retries need unmodified copies of them. The
+        returned function takes them from its optional originals argument, which callers that already
+        hold copies (e.g. the serialized documents) pass so that nothing is copied unless f fails.
+        Without it, the batch is copied before calling f."""
+
+        def run(docs: list[Document], originals: Optional[Originals] = None) -> Any:
+            if originals is None:
+                snapshot = copy.deepcopy(docs)
+                originals = lambda: snapshot  # noqa: E731
+            try:
+                return f(docs)
+            except Exception as e:
+                count_event("batch_errors")
+                error = e
+
+            retry_docs = originals()
+            if len(retry_docs) == 1:
+                return self._retry(f, retry_docs[0], name, error)
+            logger.warning(f"{name} failed on a batch of {len(retry_docs)} documents, retrying one at a time: {error}")
+            outputs: list[Document] = []
+            for doc in retry_docs:
+                outputs.extend(self._retry(f, doc, name, None))
+            return outputs
+
+        return run
+
+    def wrap_serialized(
+        self, f: BatchCallable, name: str, docs: Sequence[Document], serialized: Sequence[bytes]
+    ) -> BatchCallable:
+        """Like wrap, for batches made of docs, which were deserialized from serialized. Failed batches are
+        retried with documents deserialized again rather than with copies made before every call."""
+        run = self.wrap(f, name)
+        by_id = {id(d): s for d, s in zip(docs, serialized)}
+
+        def run_serialized(batch: list[Document]) -> Any:
+            raws = [by_id[id(d)] for d in batch]
+            return run(batch, originals=lambda: [Document.deserialize(r) for r in raws])
+
+        return run_serialized
+
+    def _retry(self, f: BatchCallable, doc: Document, name: str, error: Optional[Exception]) -> list[Document]:
+        """Runs f on doc alone; error is set if f already failed on it."""
+        delay = self.backoff_seconds
+        attempts = 0 if error is None else 1
+        while True:
+            if error is not None:
+                if attempts > self.max_retries or not isinstance(error, self.retry_on):
+                    break
+                count_event("doc_retries")
+                time.sleep(delay)
+                delay = min(delay * self.backoff_multiplier, self.max_backoff_seconds)
+            attempts += 1
+            try:
+                return _as_list(f([copy.deepcopy(doc)]))
+            except Exception as e:
+                error = e
+
+        assert error is not None
+        count_event("doc_errors")
+        self._dead_letter(doc, name, error)
+        return []
+
+    def _dead_letter(self, doc: Document, name: str, error: BaseException) -> None:
+        logger.error(f"{name} failed on document {doc.doc_id}, dropping it: {error}")
+        if self.dead_letter is None:
+            return
+
+        from sycamore.materialize import Materialize
+
+        doc.properties[ERROR_PROPERTY] = {
+            "transform": name,
+            "type": type(error).__name__,
+            "message": str(error),
+            "traceback": "".join(traceback.format_exception(type(error), error, error.__traceback__)),
+        }
+        if isinstance(self.dead_letter, dict) and "fs" in self.dead_letter:
+            (fs, root) = (self.dead_letter["fs"], Path(self.dead_letter["root"]))
+        elif isinstance(self.dead_letter, dict):
+            (fs, root) = Materialize.infer_fs(str(self.dead_letter["root"]))
+        else:
+            (fs, root) = Materialize.infer_fs(str(self.dead_letter))
+        fs.create_dir(str(root))
+        bin = doc.serialize()
+        with fs.open_output_stream(str(root / Materialize.doc_to_name(doc, bin))) as out:
+            out.write(bin)
+
+
+def _as_list(outputs: Any) -> list[Document]:
+    if outputs is None:
+        return []
+    if isinstance(outputs, Document):
+        return [outputs]
+    return outputs
@@ -0,0 +1,175 @@
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Iterator, Optional, TYPE_CHECKING
+
+from sycamore.data import Document
+
+if TYPE_CHECKING:
+    from sycamore.utils.error_policy import ErrorPolicy
+
+logger = logging.getLogger(__name__)
+
+# (f, args, kwargs, constructor_args, constructor_kwargs) for one map function. If f is a class
+# it is instantiated with the constructor arguments once per worker, like a ray actor.
+MapSpec = tuple[Any, tuple, dict, tuple, dict]
+
+# Called with a batch of documents and, optionally, a function returning unmodified copies of them
+# for the error policy to retry with (see ErrorPolicy.wrap).
+BatchCallable = Callable[..., list[Document]]
+
+
+def make_batch_callable(
+    specs: list[MapSpec], error_policy: Optional["ErrorPolicy"] = None, name: str = "map"
+) -> BatchCallable:
+    """Builds a function that applies each of the map functions in specs to a batch in order. If
+    error_policy is given, it is applied to the whole chain of functions."""
+    fns = []
+    for f, args, kwargs, c_args, c_kwargs in specs:
+        if isinstance(f, type):
+            f = f(*c_args, **c_kwargs)
+        fns.append((f, args, kwargs))
+
+    def chain(docs: list[Document]) -> list[Document]:
+        for f, args, kwargs in fns:
+            docs = f(docs, *args, **kwargs)
+        return docs
+
+    if error_policy is not None:
+        return error_policy.wrap(chain, name)
+
+    def run(docs: list[Document], originals: Optional[Callable[[], list[Document]]] = None) -> list[Document]:
+        return chain(docs)
+
+    return run
+
+
+# (outputs, statistics of the batch or None if the pool is not profiling)
+WorkerResult = tuple[list[Document], Optional[dict[str, Any]]]
+
+
+def _run_batch(
+    fn: BatchCallable, docs: list[Document], originals: Callable[[], list[Document]], profile: bool
+) -> WorkerResult:
+    if not profile:
+        return fn(docs, originals=originals), None
+    from sycamore.utils.profiler import run_profiled
+
+    return run_profiled(lambda: fn(docs, originals=originals))
+
+
+# Per process state for ProcessPoolExecutor workers, set by _init_process_worker.
+_process_worker_fn: Optional[BatchCallable] = None
+_process_worker_profile = False
+
+
+def _init_process_worker(pickled_specs: bytes) -> None:
+    from ray import cloudpickle
+
+    global _process_worker_fn, _process_worker_profile
+    (specs, error_policy, name, profile) = cloudpickle.loads(pickled_specs)
+    _process_worker_fn = make_batch_callable(specs, error_policy, name)
+    _process_worker_profile = profile
+
+
+def _run_process_worker(serialized: list[bytes]) -> WorkerResult:
+    assert _process_worker_fn is not None, "process worker was not initialized"
+    docs = [Document.deserialize(s) for s in serialized]
+    return _run_batch(
+        _process_worker_fn, docs, lambda: [Document.deserialize(s) for s in serialized], _process_worker_profile
+    )
+
+
+class LocalPool:
+    """Runs map functions over batches of documents on a concurrent.futures pool.
+
+    Each worker builds its own copy of the map functions, so class-based functions get one
+    instance per worker. Threads are used for functions that do not use the CPU (e.g. calls to
+    a remote service); otherwise a process pool is used. If the functions cannot be pickled for
+    a process pool, a thread pool is used instead.
+
+    Results are returned in the order the batches were submitted. If profile is set, the workers
+    measure each batch and the statistics are added to the node being profiled by the thread that
+    consumes the results, as profile_batch does for ray workers.
+    """
+
+    def __init__(
+        self,
+        specs: list[MapSpec],
+        num_workers: int,
+        use_threads: bool = False,
+        name: str = "map",
+        error_policy: Optional["ErrorPolicy"] = None,
+        profile: bool = False,
+    ):
+        assert num_workers > 0
+        self._num_workers = num_workers
+        self._use_threads = use_threads
+        self._profile = profile
+        self._executor: Executor
+        if not use_threads:
+            from ray import cloudpickle
+
+            try:
+                pickled = cloudpickle.dumps((specs, error_policy, name, profile))
+            except Exception as e:
+                logger.warning(f"Unable to pickle {name} for a process pool, falling back to threads: {e}")
+                self._use_threads = True
+            else:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=num_workers, initializer=_init_process_worker, initargs=(pickled,)
+                )
+
+        if self._use_threads:
+            local = threading.local()
+
+            def run_thread(docs: list[Document], originals: Callable[[], list[Document]]) -> WorkerResult:
+                if not hasattr(local, "fn"):
+                    local.fn = make_batch_callable(specs, error_policy, name)
+                return _run_batch(local.fn, docs, originals, profile)
+
+            self._run_thread = run_thread
+            self._executor = ThreadPoolExecutor(max_workers=num_workers, thread_name_prefix=name)
+
+    def imap(self, items: Iterable[tuple[Any, list[Document]]]) -> Iterator[tuple[Any, list[Document]]]:
+        """Applies the map functions to each (key, docs) item, yielding (key, outputs) in input order.
+
+        Keys stay in the calling process. At most twice the number of workers batches are in flight
+        so that memory stays bounded when the consumer is slower than the pool."""
+        import copy
+        import functools
+
+        pending: deque[tuple[Any, Future]] = deque()
+        max_pending = 2 * self._num_workers
+        try:
+            for key, docs in items:
+                if self._use_threads:
+                    # Threads share the documents, so they get a copy and docs stay unmodified for retries.
+                    future = self._executor.submit(
+                        self._run_thread, copy.deepcopy(docs), functools.partial(copy.deepcopy, docs)
+                    )
+                else:
+                    # Processes get the documents serialized and deserialize them again to retry.
+                    future = self._executor.submit(_run_process_worker, [d.serialize() for d in docs])
+                pending.append((key, future))
+                if len(pending) >= max_pending:
+                    k, fut = pending.popleft()
+                    yield k, self._result(fut)
+
+            while len(pending) > 0:
+                k, fut = pending.popleft()
+                yield k, self._result(fut)
+        finally:
+            self.shutdown()
+
+    def _result(self, future: Future) -> list[Document]:
+        outputs, stats = future.result()
+        if stats is not None:
+            from sycamore.utils.profiler import merge_batch_profile
+
+            merge_batch_profile(stats)
+        return outputs
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -1,20 +1,68 @@
-from typing import Any
+from functools import lru_cache
+from typing import Any, Sequence
 
 
-def nested_lookup(d: Any, keys: list[str]) -> Any:
+def nested_lookup(d: Any, keys: Sequence[str]) -> Any:
     # Eventually we can support integer indexes into tuples and lists also
-    while len(keys) > 0:
+    for key in keys:
         if d is None:
             return None
         try:
-            d = d.get(keys[0])
+            d = d.get(key)
         except AttributeError:
             return None
 
-        keys = keys[1:]
-
     return d
 
 
 def dotted_lookup(d: Any, keys: str) -> Any:
-    return nested_lookup(d, keys.split("."))
+    return FieldPath.of(keys).lookup(d)
+
+
+class FieldPath:
+    """
+    A field in dotted notation, e.g. properties.entity.state, split into its keys once so that it can be
+    looked up in many documents. Looking up a path that is missing part way returns None, as for
+    Document.field_to_value.
+
+    Example:
+         .. code-block:: python
+
+            state = FieldPath("properties.entity.state")
+            states = [state.lookup(doc) for doc in docs]
+    """
+
+    __slots__ = ("path", "keys")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.keys = tuple(path.split("."))
+
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def of(path: str) -> "FieldPath":
+        """Returns the compiled form of path, reusing it for paths that have been seen before."""
+        return FieldPath(path)
+
+    def lookup(self, d: Any) -> Any:
+        """Returns the value of this field in d, or None if it is missing."""
+        for key in self.keys:
+            if d is None:
+                return None
+            try:
+                d = d.get(key)
+            except AttributeError:
+                return None
+        return d
+
+    def __call__(self, d: Any) -> Any:
+        return self.lookup(d)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, FieldPath) and other.path == self.path
+
+    def __hash__(self) -> int:
+        return hash(self.path)
+
+    def __repr__(self) -> str:
+        return f"FieldPath({self.path!r})"
@@ -0,0 +1,241 @@
+"""
+Per-node execution statistics for DocSet.explain(analyze=True).
+
+The executor wraps every node of the plan so that each node records the rows and serialized bytes
+it produces and the wall/cpu time and peak rss spent in it (measured with InMemoryTimeTrace, the
+same measurement that TimeTrace and LogTime use). Code that calls a model, e.g. an LLM or an
+embedder, reports its calls with count_event() and the counts are attributed to the node that is
+running at the time. The node is tracked in a context variable, so calls made from threads started with
+asyncio.to_thread, or from coroutines, are attributed to it as well.
+"""
+
+import contextvars
+import sys
+import threading
+from typing import Any, Callable, Iterable, Iterator, Optional, TextIO
+
+from sycamore.data import Document, MetadataDocument
+from sycamore.plan_nodes import Node
+from sycamore.utils.time_trace import InMemoryTimeTrace, TimeTraceData
+
+# Key of the MetadataDocument used to return statistics from ray workers.
+PROFILE_METADATA_KEY = "profile"
+
+# The nodes being profiled in the current context, innermost last. A tuple, since copies of the context,
+# e.g. in asyncio.to_thread, share the value.
+_stack: contextvars.ContextVar[tuple["NodeProfile", ...]] = contextvars.ContextVar("sycamore_profile", default=())
+
+
+def count_event(name: str, n: int = 1) -> None:
+    """Adds n to the counter name of the node that is currently being profiled, if any.
+
+    Used for llm_calls, llm_cache_hits, embed_calls and the ErrorPolicy counters. Does nothing if the
+    plan is not being profiled, so it is cheap enough to call on every model invocation."""
+    stack = _stack.get()
+    if len(stack) > 0:
+        stack[-1].count(name, n)
+
+
+def is_profiling() -> bool:
+    """Returns True if a node is being profiled in the calling context."""
+    return len(_stack.get()) > 0
+
+
+def merge_batch_profile(d: dict[str, Any]) -> None:
+    """Adds the statistics of a batch that ran in another thread or process, from run_profiled, to the
+    node that is currently being profiled, if any."""
+    stack = _stack.get()
+    if len(stack) > 0:
+        stack[-1].merge_dict(d)
+
+
+def node_name(n: Node) -> str:
+    if hasattr(n, "_name"):
+        return f"{n.__class__.__name__}({n._name})"
+    return n.__class__.__name__
+
+
+class NodeProfile:
+    """Statistics for one node of the plan.
+
+    rows and bytes only count data documents; bytes are the size of the serialized documents. Times
+    are exclusive, i.e. they do not include the time spent in the children of the node. In ray and
+    LOCAL_PARALLEL mode the cpu time, rss and counters of map style transforms are measured on the
+    workers and added to the node.
+    """
+
+    def __init__(self, name: str, depth: int = 0):
+        self.name = name
+        self.depth = depth
+        self.children: list[NodeProfile] = []
+        self.rows_out = 0
+        self.bytes_out = 0
+        self.wall_ns = 0
+        self.user_ns = 0
+        self.sys_ns = 0
+        self.peak_rss = 0
+        self.counters: dict[str, int] = {}
+        # count() may be called from several threads that share the context.
+        self._lock = threading.Lock()
+
+    @property
+    def rows_in(self) -> int:
+        return sum(c.rows_out for c in self.children)
+
+    @property
+    def bytes_in(self) -> int:
+        return sum(c.bytes_out for c in self.children)
+
+    def wall_s(self) -> float:
+        return self.wall_ns / 1.0e9
+
+    def cpu_s(self) -> float:
+        return (self.user_ns + self.sys_ns) / 1.0e9
+
+    def cache_hit_rate(self) -> Optional[float]:
+        calls = self.counters.get("llm_calls", 0)
+        if calls == 0:
+            return None
+        return self.counters.get("llm_cache_hits", 0) / calls
+
+    def count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def add_time(self, data: TimeTraceData, sign: int = 1) -> None:
+        self.wall_ns += sign * (data.t1 - data.t0)
+        self.user_ns += sign * data.user
+        self.sys_ns += sign * data.sys
+        self.peak_rss = max(self.peak_rss, data.rss)
+
+    def add_output(self, doc: Document) -> None:
+        if isinstance(doc, MetadataDocument):
+            return
+        self.rows_out += 1
+        self.bytes_out += len(doc.serialize())
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "wall_ns": self.wall_ns,
+            "user_ns": self.user_ns,
+            "sys_ns": self.sys_ns,
+            "peak_rss": self.peak_rss,
+            "counters": dict(self.counters),
+        }
+
+    def merge_dict(self, d: dict[str, Any]) -> None:
+        self.user_ns += d["user_ns"]
+        self.sys_ns += d["sys_ns"]
+        self.peak_rss = max(self.peak_rss, d["peak_rss"])
+        for k, v in d["counters"].items():
+            self.count(k, v)
+
+    def __enter__(self):
+        _stack.set(_stack.get() + (self,))
+        self._imtt = InMemoryTimeTrace()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        data = self._imtt.measure()
+        stack = _stack.get()[:-1]
+        _stack.set(stack)
+        self.add_time(data)
+        # The enclosing node was also measuring while this node ran; keep its times exclusive.
+        if len(stack) > 0:
+            stack[-1].add_time(data, sign=-1)
+
+
+class PlanProfile:
+    """The profiles of all of the nodes in a plan, in the same shape as the plan."""
+
+    def __init__(self, plan: Node):
+        self.root = self._build(plan, 0)
+        self._by_node: dict[int, NodeProfile] = {}
+        self._index(plan, self.root)
+        self.wall_ns = 0
+
+    @classmethod
+    def _build(cls, n: Node, depth: int) -> NodeProfile:
+        profile = NodeProfile(node_name(n), depth)
+        profile.children = [cls._build(c, depth + 1) for c in n.children if c is not None]
+        return profile
+
+    def _index(self, n: Node, profile: NodeProfile) -> None:
+        self._by_node[id(n)] = profile
+        for c, p in zip([c for c in n.children if c is not None], profile.children):
+            self._index(c, p)
+
+    def get(self, n: Node) -> NodeProfile:
+        return self._by_node[id(n)]
+
+    def nodes(self) -> list[NodeProfile]:
+        """The node profiles in plan order, root first."""
+        out: list[NodeProfile] = []
+
+        def visit(p: NodeProfile):
+            out.append(p)
+            for c in p.children:
+                visit(c)
+
+        visit(self.root)
+        return out
+
+    def stream(self, n: Node, docs: Callable[[], Iterable[Document]]) -> Iterator[Document]:
+        """Profiles the local execution of n. docs is only called once the output is consumed so
+        that blocking nodes are measured when they run."""
+        profile = self.get(n)
+        with profile:
+            it = iter(docs())
+        while True:
+            with profile:
+                try:
+                    d = next(it)
+                except StopIteration:
+                    return
+            profile.add_output(d)
+            yield d
+
+    def print(self, stream: TextIO = sys.stdout) -> None:
+        header = (
+            f"{'node':<40} {'rows_in':>8} {'rows_out':>8} {'bytes_in':>11} {'bytes_out':>11}"
+            f" {'wall_s':>8} {'cpu_s':>8} {'rss_mib':>8} {'llm_calls':>9} {'hit_rate':>8} {'embeds':>7}"
+            f" {'retries':>7} {'errors':>6}"
+        )
+        stream.write(header + "\n")
+        for p in self.nodes():
+            name = (" " * (2 * p.depth) + p.name)[:40]
+            hit_rate = p.cache_hit_rate()
+            stream.write(
+                f"{name:<40} {p.rows_in:>8} {p.rows_out:>8} {p.bytes_in:>11} {p.bytes_out:>11}"
+                f" {p.wall_s():>8.3f} {p.cpu_s():>8.3f} {p.peak_rss / (1024 * 1024):>8.1f}"
+                f" {p.counters.get('llm_calls', 0):>9}"
+                f" {'-' if hit_rate is None else f'{hit_rate:.0%}':>8}"
+                f" {p.counters.get('embed_calls', 0):>7}"
+                f" {p.counters.get('doc_retries', 0):>7} {p.counters.get('doc_errors', 0):>6}\n"
+            )
+        stream.write(f"Total wall time: {self.wall_ns / 1.0e9:.3f}s\n")
+
+
+def run_profiled(f: Callable[[], list[Document]]) -> tuple[list[Document], dict[str, Any]]:
+    """Runs f and returns its outputs along with the statistics for the batch, for workers whose
+    counters and times are not seen by the node being profiled."""
+    profile = NodeProfile("batch")
+    # The batch is measured on its own, even if the worker shares the context of the node, so that its
+    # times are not also taken off the node.
+    outer = _stack.set(())
+    try:
+        with profile:
+            outputs = f()
+    finally:
+        _stack.reset(outer)
+    return outputs, profile.to_dict()
+
+
+def profile_batch(f: Callable[[], list[Document]]) -> list[Document]:
+    """Runs f on a ray worker and appends a MetadataDocument with the statistics for the batch."""
+    outputs, stats = run_profiled(f)
+    outputs.append(MetadataDocument(**{PROFILE_METADATA_KEY: stats}))
+    return outputs
+
+
+def is_profile_metadata(d: Document) -> bool:
+    return isinstance(d, MetadataDocument) and PROFILE_METADATA_KEY in d.metadata
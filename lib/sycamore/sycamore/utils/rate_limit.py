@@ -0,0 +1,404 @@
+"""
+Rate limits shared by all the workers that call the same model service.
+
+Providers limit both the requests and the tokens per minute of an account. When every ray actor retries its own
+429 responses with blind backoff, the workers keep colliding and throughput collapses. A RateLimiter instead
+keeps one pair of token buckets, one for requests and one for tokens, per limiter name for the whole job. In ray
+mode the buckets live in a named ray actor; otherwise they live in a file on the local machine, guarded by a
+file lock, so that the processes of local parallel execution share them too. A file that has not been used for
+a minute holds nothing a new run needs, since its buckets have refilled, and is started over; delete it to
+reset the limiter sooner.
+
+The buckets also follow the x-ratelimit-* headers that OpenAI returns: the remaining capacity the service
+reports is taken as the truth, the limits are learned from it if none were given, and a retry-after header
+pauses every worker.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import Any, Awaitable, Callable, Mapping, Optional, TypeVar
+
+from sycamore.utils.profiler import count_event
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Never sleep longer than this at once, so that limits learned in the meantime are picked up.
+_MAX_WAIT_SECONDS = 5.0
+# How long to pause after a throttled response that did not say how long to wait.
+_DEFAULT_THROTTLE_SECONDS = 1.0
+# The file backend starts over from buckets that have not been used for this long.
+_FILE_STATE_TTL_SECONDS = 60.0
+
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_duration(value: str) -> Optional[float]:
+    """Parses durations like 1s, 6m0s or 20ms as used in x-ratelimit-reset-* headers, or plain seconds."""
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION.findall(value)
+    if len(parts) == 0:
+        return None
+    return sum(float(n) * _DURATION_UNITS[unit] for n, unit in parts)
+
+
+def parse_rate_limit_headers(headers: Mapping[str, str]) -> dict[str, float]:
+    """Returns the rate limit information in the headers of a response, with keys limit_requests,
+    remaining_requests, limit_tokens, remaining_tokens and retry_after. Keys without a header are left out."""
+    lower = {k.lower(): v for k, v in headers.items()}
+    info: dict[str, float] = {}
+    for key in ("limit_requests", "remaining_requests", "limit_tokens", "remaining_tokens"):
+        value = lower.get("x-ratelimit-" + key.replace("_", "-"))
+        if value is not None:
+            try:
+                info[key] = float(value)
+            except ValueError:
+                pass
+    retry_after = lower.get("retry-after-ms")
+    if retry_after is not None:
+        info["retry_after"] = float(retry_after) / 1000.0
+    elif lower.get("retry-after") is not None:
+        seconds = parse_duration(lower["retry-after"])
+        if seconds is not None:
+            info["retry_after"] = seconds
+    return info
+
+
+class TokenBuckets:
+    """
+    The requests per minute and tokens per minute buckets of a RateLimiter. This is the shared state; it does no
+    locking of its own.
+
+    Each bucket holds up to a minute's worth of its limit and refills continuously. A limit of None is not
+    enforced until one is learned from the response headers.
+    """
+
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.requests = requests_per_minute or 0.0
+        self.tokens = tokens_per_minute or 0.0
+        self.paused_until = 0.0
+        self.updated = time.time()
+
+    def configure(self, requests_per_minute: Optional[float], tokens_per_minute: Optional[float]) -> None:
+        """Sets the limits that are given, e.g. when a worker connects to buckets that already exist."""
+        if requests_per_minute is not None:
+            self.requests_per_minute = requests_per_minute
+            self.requests = min(self.requests, requests_per_minute)
+        if tokens_per_minute is not None:
+            self.tokens_per_minute = tokens_per_minute
+            self.tokens = min(self.tokens, tokens_per_minute)
+
+    def take(self, requests: float, tokens: float, now: float) -> float:
+        """Takes requests and tokens from the buckets if they hold enough and returns 0. Otherwise takes nothing
+        and returns how many seconds to wait before there will be enough."""
+        self._refill(now)
+        if now < self.paused_until:
+            return self.paused_until - now
+        wait = max(
+            _wait(self.requests, requests, self.requests_per_minute), _wait(self.tokens, tokens, self.tokens_per_minute)
+        )
+        if wait > 0:
+            return wait
+        if self.requests_per_minute is not None:
+            self.requests -= requests
+        if self.tokens_per_minute is not None:
+            # A request larger than the bucket can be granted once the bucket is full and leaves it in debt.
+            self.tokens -= tokens
+        return 0.0
+
+    def add_tokens(self, tokens: float) -> None:
+        """Gives back tokens, or takes more if negative, once the actual usage of a request is known."""
+        if self.tokens_per_minute is not None:
+            self.tokens = min(self.tokens + tokens, self.tokens_per_minute)
+
+    def observe(self, info: dict[str, float], now: float, throttled: bool = False) -> None:
+        """Updates the buckets from the rate limit information of a response; see parse_rate_limit_headers."""
+        self._refill(now)
+        if self.requests_per_minute is None and "limit_requests" in info:
+            self.requests_per_minute = info["limit_requests"]
+            self.requests = info.get("remaining_requests", info["limit_requests"])
+        if self.tokens_per_minute is None and "limit_tokens" in info:
+            self.tokens_per_minute = info["limit_tokens"]
+            self.tokens = info.get("remaining_tokens", info["limit_tokens"])
+        # The service also counts requests we do not know about, e.g. from other jobs on the same account.
+        if self.requests_per_minute is not None and "remaining_requests" in info:
+            self.requests = min(self.requests, info["remaining_requests"])
+        if self.tokens_per_minute is not None and "remaining_tokens" in info:
+            self.tokens = min(self.tokens, info["remaining_tokens"])
+        if throttled or "retry_after" in info:
+            pause = info.get("retry_after", _DEFAULT_THROTTLE_SECONDS)
+            self.paused_until = max(self.paused_until, now + pause)
+
+    def utilization(self, now: float) -> dict[str, Any]:
+        """Returns the fraction of each bucket that is used up, or None for limits that are not known, and the
+        number of seconds until a pause ends."""
+        self._refill(now)
+        return {
+            "requests": _used(self.requests, self.requests_per_minute),
+            "tokens": _used(self.tokens, self.tokens_per_minute),
+            "paused_seconds": max(0.0, self.paused_until - now),
+        }
+
+    def _refill(self, now: float) -> None:
+        elapsed = max(0.0, now - self.updated)
+        self.updated = now
+        if self.requests_per_minute is not None:
+            self.requests = min(self.requests_per_minute, self.requests + elapsed * self.requests_per_minute / 60.0)
+        if self.tokens_per_minute is not None:
+            self.tokens = min(self.tokens_per_minute, self.tokens + elapsed * self.tokens_per_minute / 60.0)
+
+
+def _wait(available: float, needed: float, per_minute: Optional[float]) -> float:
+    if per_minute is None or per_minute <= 0:
+        return 0.0
+    needed = min(needed, per_minute)
+    if available >= needed:
+        return 0.0
+    return (needed - available) * 60.0 / per_minute
+
+
+def _used(available: float, per_minute: Optional[float]) -> Optional[float]:
+    if per_minute is None or per_minute <= 0:
+        return None
+    return max(0.0, 1.0 - available / per_minute)
+
+
+class RateLimiterActor:
+    """Holds the TokenBuckets of a RateLimiter in ray mode."""
+
+    def __init__(self, requests_per_minute: Optional[float], tokens_per_minute: Optional[float]):
+        self._buckets = TokenBuckets(requests_per_minute, tokens_per_minute)
+
+    def configure(self, requests_per_minute: Optional[float], tokens_per_minute: Optional[float]) -> None:
+        self._buckets.configure(requests_per_minute, tokens_per_minute)
+
+    def take(self, requests: float, tokens: float) -> float:
+        return self._buckets.take(requests, tokens, time.time())
+
+    def add_tokens(self, tokens: float) -> None:
+        self._buckets.add_tokens(tokens)
+
+    def observe(self, info: dict[str, float], throttled: bool) -> None:
+        self._buckets.observe(info, time.time(), throttled)
+
+    def utilization(self) -> dict[str, Any]:
+        return self._buckets.utilization(time.time())
+
+
+class _RayBuckets:
+    def __init__(self, name: str, requests_per_minute: Optional[float], tokens_per_minute: Optional[float]):
+        import ray
+
+        # Detached so that the buckets outlive the worker that happened to create them.
+        actor_class: Any = ray.remote(RateLimiterActor)
+        self._actor = actor_class.options(
+            name=f"sycamore-rate-limiter-{name}", get_if_exists=True, lifetime="detached", num_cpus=0
+        ).remote(requests_per_minute, tokens_per_minute)
+        ray.get(self._actor.configure.remote(requests_per_minute, tokens_per_minute))
+
+    def take(self, requests: float, tokens: float) -> float:
+        import ray
+
+        return ray.get(self._actor.take.remote(requests, tokens))
+
+    def add_tokens(self, tokens: float) -> None:
+        self._actor.add_tokens.remote(tokens)
+
+    def observe(self, info: dict[str, float], throttled: bool) -> None:
+        self._actor.observe.remote(info, throttled)
+
+    def utilization(self) -> dict[str, Any]:
+        import ray
+
+        return ray.get(self._actor.utilization.remote())
+
+
+class _FileBuckets:
+    def __init__(self, path: str, requests_per_minute: Optional[float], tokens_per_minute: Optional[float]):
+        self._path = path
+        self._requests_per_minute = requests_per_minute
+        self._tokens_per_minute = tokens_per_minute
+        # flock does not exclude threads of the same process that share the open file.
+        self._lock = threading.Lock()
+        self._update(lambda b: b.configure(requests_per_minute, tokens_per_minute))
+
+    def take(self, requests: float, tokens: float) -> float:
+        return self._update(lambda b: b.take(requests, tokens, time.time()))
+
+    def add_tokens(self, tokens: float) -> None:
+        self._update(lambda b: b.add_tokens(tokens))
+
+    def observe(self, info: dict[str, float], throttled: bool) -> None:
+        self._update(lambda b: b.observe(info, time.time(), throttled))
+
+    def utilization(self) -> dict[str, Any]:
+        return self._update(lambda b: b.utilization(time.time()))
+
+    def _update(self, f):
+        import fcntl
+
+        with self._lock, open(self._path, "a+") as file:
+            fcntl.flock(file, fcntl.LOCK_EX)
+            try:
+                file.seek(0)
+                data = file.read()
+                buckets = TokenBuckets(self._requests_per_minute, self._tokens_per_minute)
+                state = json.loads(data) if data else {}
+                # Left behind by an earlier run, e.g. with limits learned from another account or a pause.
+                if time.time() - state.get("updated", 0.0) < _FILE_STATE_TTL_SECONDS:
+                    buckets.__dict__.update(state)
+                ret = f(buckets)
+                file.seek(0)
+                file.truncate()
+                file.write(json.dumps(buckets.__dict__))
+                file.flush()
+                return ret
+            finally:
+                fcntl.flock(file, fcntl.LOCK_UN)
+
+
+class RateLimiter:
+    """
+    A requests per minute and tokens per minute limit shared by every client that uses a limiter with the same
+    name, across all the workers of a job.
+
+    Clients send each request through call with an estimate of the tokens it will use, then call add_tokens
+    with the difference once the actual usage is known, and observe with the headers of every response.
+
+    Args:
+        name: Limiters with the same name share their buckets. Use one name per account and model.
+        requests_per_minute: The request limit. If None, it is learned from the x-ratelimit-limit-requests
+            header of the first response.
+        tokens_per_minute: The token limit. If None, it is learned from the x-ratelimit-limit-tokens header.
+        backend: "ray" to keep the buckets in a named ray actor, "file" to keep them in a file on this machine.
+            Defaults to "ray" if ray is initialized when the limiter is first used, "file" otherwise.
+        lock_dir: The directory of the file backend. Defaults to the temp directory. The buckets are kept in
+            sycamore-rate-limiter-<name>.json there, and are started over once unused for a minute.
+        max_retries: How many times call and call_async retry a throttled request. Clients that use a limiter
+            turn off the blind retries of their SDK.
+
+    Example:
+         .. code-block:: python
+
+            limiter = RateLimiter("openai-gpt-4o", requests_per_minute=5000, tokens_per_minute=800_000)
+            llm = OpenAI(OpenAIModels.GPT_4O, rate_limiter=limiter)
+            embedder = OpenAIEmbedder(rate_limiter=RateLimiter("openai-embeddings"))
+    """
+
+    def __init__(
+        self,
+        name: str = "default",
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        backend: Optional[str] = None,
+        lock_dir: Optional[str] = None,
+        max_retries: int = 10,
+    ):
+        assert backend in (None, "ray", "file"), f"Unknown rate limiter backend {backend}"
+        self.name = name
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.backend = backend
+        self.lock_dir = lock_dir
+        self.max_retries = max_retries
+        self._buckets: Any = None
+
+    def __getstate__(self):
+        # Every process connects to the shared buckets itself.
+        state = self.__dict__.copy()
+        state["_buckets"] = None
+        return state
+
+    def acquire(self, tokens: int = 0) -> None:
+        """Blocks until a request that uses tokens tokens can be sent."""
+        while (wait := self._get_buckets().take(1, tokens)) > 0:
+            count_event("rate_limit_waits")
+            time.sleep(min(wait, _MAX_WAIT_SECONDS))
+
+    async def acquire_async(self, tokens: int = 0) -> None:
+        """Like acquire, but lets other coroutines run while waiting."""
+        while (wait := await asyncio.to_thread(self._get_buckets().take, 1, tokens)) > 0:
+            count_event("rate_limit_waits")
+            await asyncio.sleep(min(wait, _MAX_WAIT_SECONDS))
+
+    def add_tokens(self, tokens: int) -> None:
+        """Gives back tokens acquired for a request that used fewer, or takes more if negative."""
+        if tokens != 0:
+            self._get_buckets().add_tokens(tokens)
+
+    def observe(self, headers: Optional[Mapping[str, str]], throttled: bool = False) -> None:
+        """Updates the shared buckets from the headers of a response. If throttled, the response was a rate limit
+        error, and all workers pause for its retry-after time, or a second if it has none."""
+        info = parse_rate_limit_headers(headers or {})
+        if len(info) > 0 or throttled:
+            if throttled:
+                count_event("rate_limit_throttled")
+            self._get_buckets().observe(info, throttled)
+
+    def call(self, f: Callable[[], T], tokens: int, throttled: Callable[[Exception], Optional[Mapping[str, str]]]) -> T:
+        """Returns f() once a request that uses tokens tokens can be sent. throttled returns the headers of an
+        exception raised by f if it is a rate limit error, and None otherwise. Rate limit errors pause all
+        workers and are retried up to max_retries times; other exceptions are raised."""
+        for attempt in range(self.max_retries + 1):
+            self.acquire(tokens)
+            try:
+                return f()
+            except Exception as e:
+                headers = throttled(e)
+                if headers is None or attempt == self.max_retries:
+                    raise
+                self.observe(headers, throttled=True)
+        raise AssertionError("unreachable")
+
+    async def call_async(
+        self, f: Callable[[], Awaitable[T]], tokens: int, throttled: Callable[[Exception], Optional[Mapping[str, str]]]
+    ) -> T:
+        """Like call, for a coroutine function f."""
+        for attempt in range(self.max_retries + 1):
+            await self.acquire_async(tokens)
+            try:
+                return await f()
+            except Exception as e:
+                headers = throttled(e)
+                if headers is None or attempt == self.max_retries:
+                    raise
+                await asyncio.to_thread(self.observe, headers, True)
+        raise AssertionError("unreachable")
+
+    def utilization(self) -> dict[str, Any]:
+        """Returns the fractions of the request and token buckets that are used up, None for limits that are not
+        known yet, and how many seconds are left of a pause caused by a throttled response."""
+        return self._get_buckets().utilization()
+
+    def _get_buckets(self):
+        if self._buckets is None:
+            backend = self.backend
+            if backend is None:
+                import ray
+
+                backend = "ray" if ray.is_initialized() else "file"
+            if backend == "ray":
+                self._buckets = _RayBuckets(self.name, self.requests_per_minute, self.tokens_per_minute)
+            else:
+                lock_dir = self.lock_dir or tempfile.gettempdir()
+                path = os.path.join(lock_dir, f"sycamore-rate-limiter-{self.name}.json")
+                self._buckets = _FileBuckets(path, self.requests_per_minute, self.tokens_per_minute)
+        return self._buckets
+
+
+def estimate_tokens(text: str) -> int:
+    """A rough count of the tokens in text, for rate limiting before the actual usage is known."""
+    return len(text) // 4 + 1
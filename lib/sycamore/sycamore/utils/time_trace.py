@@ -4,6 +4,7 @@ import struct
 import resource
 import threading
 import functools
+import inspect
 import logging
 from sys import platform
 
@@ -127,9 +128,20 @@ def timetrace(name: str):
     @timetrace("label")
     def foo():
         time.sleep(1.0)
+
+    Coroutine functions are traced until they return, including the time spent waiting.
     """
 
     def decorator(f):
+        if inspect.iscoroutinefunction(f):
+
+            @functools.wraps(f)
+            async def async_wrapper(*args, **kwargs):
+                with TimeTrace(name):
+                    return await f(*args, **kwargs)
+
+            return async_wrapper
+
         @functools.wraps(f)
         def wrapper(*args, **kwargs):
             with TimeTrace(name):
@@ -5,7 +5,13 @@ from pyarrow.fs import FileSystem
 
 from sycamore.context import Context, ExecMode, context_params
 from sycamore.connectors.common import HostAndPort
-from sycamore.connectors.file.file_writer import default_doc_to_bytes, default_filename, FileWriter, JsonWriter
+from sycamore.connectors.file.file_writer import (
+    default_doc_to_bytes,
+    default_filename,
+    FileWriter,
+    JsonWriter,
+    ParquetWriter,
+)
 from sycamore.data import Document
 from sycamore.executor import Execution
 from sycamore.plan_nodes import Node
@@ -596,6 +602,7 @@ class DocSetWriter:
             Neo4jWriterTargetParams,
             Neo4jValidateParams,
         )
+        from sycamore.materialize import mark_read_to_end
         from sycamore.plan_nodes import Node
         from sycamore.connectors.neo4j import Neo4jPrepareCSV, Neo4jWriteCSV, Neo4jLoadCSV
         from sycamore.connectors.neo4j.neo4j_writer import (
@@ -630,6 +637,7 @@ class DocSetWriter:
         pnjds = Execution(self.context)._execute_ray(pre_n4j_plan)
         pnjds = pnjds.materialize()
         self.plan = Wrapper(pnjds)
+        mark_read_to_end(pre_n4j_plan)
         pre_n4j_plan.traverse(visit=lambda n: n.finalize())
 
         start = time.time()
@@ -799,6 +807,49 @@ class DocSetWriter:
 
         self._maybe_execute(node, True)
 
+    def parquet(
+        self,
+        path: str,
+        filesystem: Optional[FileSystem] = None,
+        elements_path: Optional[str] = None,
+        include_binary: bool = False,
+        **resource_args,
+    ) -> None:
+        """
+        Writes Documents to Parquet files, one file per block, with a
+        column for each document property in dotted notation, e.g.
+        properties.entity.state. The column types are inferred from all of
+        the documents, and properties whose values have no common type are
+        written as JSON text, so that the files can be read together.
+        Embeddings are written as fixed size lists of doubles when every
+        document has one of the same length. In ray mode the DocSet is
+        materialized to infer the types before writing.
+
+        Args:
+            path: The path prefix to write documents to. Should include the scheme if not local.
+            filesystem: The pyarrow.fs FileSystem to use.
+            elements_path: (Optional) The path prefix to write the elements of the documents to, one row
+                per element with the doc_id of its document. Elements are not written if unset.
+            include_binary: Whether to write binary_representation columns. Defaults to False.
+            resource_args: Arguments to pass to the underlying execution environment.
+
+        Example:
+            .. code-block:: python
+
+               docset.write.parquet("s3://bucket/docs", elements_path="s3://bucket/elements")
+        """
+
+        node: Node = ParquetWriter(
+            self.plan,
+            path,
+            filesystem=filesystem,
+            elements_path=elements_path,
+            include_binary=include_binary,
+            **resource_args,
+        )
+
+        self._maybe_execute(node, True)
+
     def _maybe_execute(self, node: Node, execute: bool) -> Optional[DocSet]:
         ds = DocSet(self.context, node)
         if not execute: